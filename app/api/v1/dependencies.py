@@ -1,9 +1,30 @@
 """
 API v1 依賴注入
+更新時間：2026-10-18 18:40
+作者：AI Assistant
+修改摘要：QA GraphStore（常駐實例與聯邦 qa shard）不再包裝 CachedGraphStore / HotTierGraphStore，
+          腳本於程序外寫入 graph_qa.db 後 /qa/* 立即讀到新資料（與原本每個請求開新連線相同）
+更新時間：2026-10-18 17:40
+作者：AI Assistant
+修改摘要：聯邦 GraphStore 加入 GRAPH_FEDERATION_QA_ENTITY_TYPES 類型路由（QA 類型實體寫入 qa shard）
+更新時間：2026-10-18 07:00
+作者：AI Assistant
+修改摘要：GRAPH_FEDERATION_ENABLED 時 get_graph_store 回傳 FederatedGraphStore（main + qa 兩個 shard）；
+          新增 get_shared_qa_graph_store / close_shared_qa_graph_store，/qa/* 共用單一常駐 QA GraphStore
+更新時間：2026-10-18 04:40
+作者：AI Assistant
+修改摘要：GRAPH_HOT_TIER_ENABLED 時 get_graph_store 以 HotTierGraphStore 包裝 SQLiteGraphStore（取代實體 LRU 快取）
+更新時間：2026-10-17 23:50
+作者：AI Assistant
+修改摘要：get_graph_store 傳入 GRAPH_SNAPSHOT_PATH，啟動時載入二進位圖快照
+更新時間：2026-10-17 18:40
+作者：AI Assistant
+修改摘要：GRAPH_ENTITY_CACHE_ENABLED 時 get_graph_store 以 CachedGraphStore 包裝 SQLiteGraphStore
 更新時間：2026-03-11
 作者：AI Assistant
 修改摘要：單例建立加 threading.Lock 消除 TOCTOU 競態，避免多請求同時首次呼叫時重複建立實例
 """
+import asyncio
 import threading
 from fastapi import Depends
 from app.services.llm_service import LLMService
@@ -11,6 +32,9 @@ from app.services.cache_service import CacheService
 from app.services.vector_service import VectorService
 from app.services.rag_service import RAGService
 from app.core.graph_store import GraphStore, SQLiteGraphStore
+from app.core.graph_cache import CachedGraphStore
+from app.core.graph_hot_tier import HotTierGraphStore
+from app.core.graph_federated import FederatedGraphStore
 from app.core.entity_extractor import EntityExtractor
 from app.core.orchestrator import GraphOrchestrator
 from app.services.graph_builder import GraphBuilder
@@ -25,6 +49,9 @@ _cache_service: CacheService = None
 _vector_service: VectorService = None
 _rag_service: RAGService = None
 _graph_store: GraphStore = None
+_qa_graph_store: GraphStore = None
+_qa_graph_store_ready = False
+_qa_init_lock = asyncio.Lock()
 _entity_extractor: EntityExtractor = None
 _graph_builder: GraphBuilder = None
 _orchestrator: GraphOrchestrator = None
@@ -50,17 +77,73 @@ def get_cache_service() -> CacheService:
     return _cache_service
 
 
+def _build_graph_store(db_path: str, snapshot_path: str = None) -> GraphStore:
+    """建立單一資料庫的 GraphStore（依設定包裝記憶體讀取層或實體 LRU 快取）"""
+    store: GraphStore = SQLiteGraphStore(db_path, snapshot_path=snapshot_path)
+    if settings.GRAPH_HOT_TIER_ENABLED:
+        store = HotTierGraphStore(store)
+    elif settings.GRAPH_ENTITY_CACHE_ENABLED:
+        store = CachedGraphStore(store)
+    return store
+
+
+def _build_qa_graph_store() -> GraphStore:
+    """
+    建立 QA 資料庫（GRAPH_QA_DB_PATH）的 GraphStore：不包裝實體 LRU 快取或記憶體讀取層。
+    QA 資料由 scripts/import_qa_markdown_batch.py 等腳本在服務程序外直接寫入 graph_qa.db，
+    包裝層只在經由自身的寫入時失效，常駐實例會持續回傳舊資料；每次讀取都查 SQLite 才能立即看到重新匯入的結果
+    """
+    return SQLiteGraphStore(settings.GRAPH_QA_DB_PATH)
+
+
 def get_graph_store() -> GraphStore:
     """取得 GraphStore 實例"""
     global _graph_store
     if _graph_store is None:
         with _init_lock:
             if _graph_store is None:
-                _graph_store = SQLiteGraphStore(settings.GRAPH_DB_PATH)
+                store = _build_graph_store(settings.GRAPH_DB_PATH, settings.GRAPH_SNAPSHOT_PATH or None)
+                if settings.GRAPH_FEDERATION_ENABLED:
+                    qa_prefixes = [p.strip() for p in settings.GRAPH_FEDERATION_QA_ID_PREFIXES.split(",") if p.strip()]
+                    qa_types = [t.strip() for t in settings.GRAPH_FEDERATION_QA_ENTITY_TYPES.split(",") if t.strip()]
+                    store = FederatedGraphStore(
+                        {"main": store, "qa": _build_qa_graph_store()},
+                        default_shard="main",
+                        prefix_routes={prefix: "qa" for prefix in qa_prefixes},
+                        type_routes={entity_type: "qa" for entity_type in qa_types}
+                    )
+                _graph_store = store
         # 注意：initialize() 需要在應用啟動時呼叫
     return _graph_store
 
 
+async def get_shared_qa_graph_store() -> GraphStore:
+    """
+    取得 QA GraphStore（GRAPH_QA_DB_PATH）常駐實例。
+    聯邦模式下即 get_graph_store 的 qa shard（由應用啟動時初始化）；否則首次呼叫時建立並初始化，關閉由 close_shared_qa_graph_store 負責
+    """
+    global _qa_graph_store, _qa_graph_store_ready
+    if settings.GRAPH_FEDERATION_ENABLED:
+        return get_graph_store().shards["qa"]
+    if not _qa_graph_store_ready:
+        async with _qa_init_lock:
+            if not _qa_graph_store_ready:
+                store = _build_qa_graph_store()
+                if not await store.initialize():
+                    raise RuntimeError(f"QA GraphStore initialization failed: {settings.GRAPH_QA_DB_PATH}")
+                _qa_graph_store, _qa_graph_store_ready = store, True
+    return _qa_graph_store
+
+
+async def close_shared_qa_graph_store() -> None:
+    """關閉 get_shared_qa_graph_store 建立的 QA GraphStore（聯邦模式下隨主 GraphStore 關閉，不需動作）"""
+    global _qa_graph_store, _qa_graph_store_ready
+    store, _qa_graph_store, _qa_graph_store_ready = _qa_graph_store, None, False
+    if store is not None:
+        await store.flush()
+        await store.close()
+
+
 def get_vector_service(
     graph_store: GraphStore = Depends(get_graph_store)
 ) -> VectorService:
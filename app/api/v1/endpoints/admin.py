@@ -1,5 +1,14 @@
 """
 管理 API 端點
+更新時間：2026-10-18 18:00
+作者：AI Assistant
+修改摘要：/cache/clear 改呼叫 GraphStore.clear_cache()，聯邦 / 熱層包裝內的實體快取也會清除
+更新時間：2026-10-17 23:20
+作者：AI Assistant
+修改摘要：/graph/stats 改讀增量維護的統計表；新增 POST /graph/stats/recompute 於統計偏差時全表重算
+更新時間：2026-10-17 18:40
+作者：AI Assistant
+修改摘要：/cache/clear 一併清除 GraphStore 實體 LRU 快取
 更新時間：2025-12-26 18:03
 作者：AI Assistant
 修改摘要：修正 datetime JSON 序列化問題，使用 model_dump(mode='json') 確保 datetime 正確序列化
@@ -84,6 +93,8 @@ async def clear_cache(
     try:
         # 清除快取
         keys_cleared = await cache_service.clear()
+        # 一併清除 GraphStore 實體快取（經 FederatedGraphStore / HotTierGraphStore 等包裝層逐層委派）
+        keys_cleared += get_graph_store().clear_cache()
         
         response = CacheClearResponse(
             status="success",
@@ -139,3 +150,37 @@ async def get_graph_stats(
             content={"error": "Internal server error", "detail": str(e)}
         )
 
+@router.post("/graph/stats/recompute", response_model=GraphStatsResponse)
+async def recompute_graph_stats(
+    request: Request,
+    graph_store: GraphStore = Depends(get_graph_store),
+    api_key_verified: bool = Depends(verify_api_key)
+):
+    """重新計算圖結構統計（graph_stats 與實際資料不一致時使用，會全表掃描）"""
+    try:
+        stats = await graph_store.recompute_statistics()
+        
+        response = GraphStatsResponse(
+            total_entities=stats.get("total_entities", 0),
+            total_relations=stats.get("total_relations", 0),
+            entity_types=stats.get("entity_types", {}),
+            relation_types=stats.get("relation_types", {}),
+            timestamp=datetime.now()
+        )
+        
+        logger.info(
+            f"Graph stats recomputed: {response.total_entities} entities, "
+            f"{response.total_relations} relations"
+        )
+        
+        return JSONResponse(content=response.model_dump(mode='json'))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Recompute graph stats error: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Internal server error", "detail": str(e)}
+        )
+
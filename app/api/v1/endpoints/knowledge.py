@@ -1,5 +1,11 @@
 """
 知識庫 API 端點
+更新時間：2026-10-18 16:40
+作者：AI Assistant
+修改摘要：/sources 依寫入順序串流（iter_entities order="insertion"），來源順序與原本相同
+更新時間：2026-10-17 22:10
+作者：AI Assistant
+修改摘要：/sources 改以 iter_entities("Document") 串流，不再於 1000 筆截斷
 更新時間：2025-12-26 18:12
 作者：AI Assistant
 修改摘要：實作 get_knowledge_sources 端點，從 GraphStore 獲取所有 Document 實體作為知識來源
@@ -74,14 +80,11 @@ async def get_knowledge_sources(
 ):
     """取得知識來源列表"""
     try:
-        # 從 GraphStore 獲取所有 Document 類型的實體
-        document_entities = await graph_store.get_entities_by_type("Document", limit=1000)
-        
-        # 從 Document 實體中提取來源資訊
+        # 串流 GraphStore 中所有 Document 類型的實體，提取來源資訊
         sources = []
         seen_sources = set()  # 用於去重
         
-        for entity in document_entities:
+        async for entity in graph_store.iter_entities("Document", order="insertion"):
             # 從 properties 中獲取 source
             source = entity.properties.get("source", "")
             
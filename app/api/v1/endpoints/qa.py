@@ -1,6 +1,24 @@
 """
 QA 查詢 API 端點
 
+更新時間：2026-10-18 16:40
+作者：AI Assistant
+修改摘要：QA 搜尋與 /documents 以 iter_entities(order="insertion") 依寫入順序串流，結果與順序與原本 get_entities_by_type 相同
+          （依 id 排序會讓回傳哪些 QA 取決於 id 字串排序而非匯入順序）
+
+更新時間：2026-10-18 07:00
+作者：AI Assistant
+修改摘要：改用 get_shared_qa_graph_store 的常駐 QA GraphStore（聯邦模式下為主 GraphStore 的 qa shard），
+          不再每個請求建立 SQLiteGraphStore 並 initialize / close；資料庫路徑改由 GRAPH_QA_DB_PATH 設定
+
+更新時間：2026-10-17 22:10
+作者：AI Assistant
+修改摘要：QA 搜尋與 /documents 改以 iter_entities / 文件分頁串流，湊滿 limit 即停止，不再一次載入 1 萬筆（亦不再於 1 萬筆截斷）
+
+更新時間：2026-10-17 21:00
+作者：AI Assistant
+修改摘要：/by-document 與指定 doc_id 的搜尋改用 get_entities_by_document（document_id 索引），取代載入 1 萬筆 QA 再以 id 前綴篩選
+
 更新時間：2026-03-06
 作者：AI Assistant
 修改摘要：依 QUERY_TYPE（sql | rag）分流；rag 時以檢索結果為 context 呼叫 LLM 產出單一回答
@@ -13,15 +31,16 @@ QA 查詢 API 端點
 """
 import os
 import logging
+from typing import AsyncIterator
 from fastapi import APIRouter, Request, Depends, HTTPException, Query
 from fastapi.responses import JSONResponse
 from app.api.v1.schemas.qa import (
     QASearchRequest, QASearchResponse, QAResult,
     QADocumentsResponse, QADocumentInfo, QAByDocumentRequest
 )
-from app.core.graph_store import SQLiteGraphStore
-from app.config import get_query_type
-from app.api.v1.dependencies import get_llm_service
+from app.core.graph_store import Entity, GraphStore
+from app.config import get_query_type, settings
+from app.api.v1.dependencies import get_llm_service, get_shared_qa_graph_store
 from app.services.llm_service import LLMService
 from app.utils.metrics import REQUEST_COUNTER, REQUEST_LATENCY
 
@@ -32,25 +51,25 @@ RAG_CONTEXT_MAX_CHARS = 4000
 router = APIRouter()
 logger = logging.getLogger("QAEndpoint")
 
-# QA 資料庫路徑
-QA_DB_PATH = "./data/graph_qa.db"
+# 串流讀取 QA 時每批筆數
+QA_DOCUMENT_PAGE_SIZE = 500
 
 
-def get_qa_graph_store() -> SQLiteGraphStore:
-    """取得 QA GraphStore 實例"""
-    db_path = os.path.abspath(QA_DB_PATH)
+async def get_qa_graph_store() -> GraphStore:
+    """取得 QA GraphStore 常駐實例（資料庫尚未匯入時回傳 404）"""
+    db_path = os.path.abspath(settings.GRAPH_QA_DB_PATH)
     if not os.path.exists(db_path):
         raise HTTPException(
             status_code=404,
             detail=f"QA database not found: {db_path}. Please import QA data first."
         )
-    return SQLiteGraphStore(db_path)
+    return await get_shared_qa_graph_store()
 
 
 @router.get("/documents", response_model=QADocumentsResponse)
 async def get_qa_documents(
     request: Request,
-    graph_store: SQLiteGraphStore = Depends(get_qa_graph_store)
+    graph_store: GraphStore = Depends(get_qa_graph_store)
 ):
     """取得所有 QA 文件列表"""
     endpoint_path = "/api/v1/qa/documents"
@@ -58,14 +77,9 @@ async def get_qa_documents(
     
     with REQUEST_LATENCY.labels(method=method, endpoint=endpoint_path).time():
         try:
-            await graph_store.initialize()
-            
-            # 查詢所有 Document 類型的實體
-            documents = await graph_store.get_entities_by_type("Document", limit=1000)
-            
-            # 篩選出 qa_markdown 類型的文件
+            # 依寫入順序串流所有 Document 類型的實體，篩選出 qa_markdown 類型的文件
             qa_documents = []
-            for doc in documents:
+            async for doc in graph_store.iter_entities("Document", order="insertion"):
                 props = doc.properties
                 if props.get("type") == "qa_markdown":
                     qa_documents.append(QADocumentInfo(
@@ -87,8 +101,6 @@ async def get_qa_documents(
             logger.error(f"Get QA documents error: {str(e)}")
             REQUEST_COUNTER.labels(method=method, endpoint=endpoint_path, status="500").inc()
             raise HTTPException(status_code=500, detail=str(e))
-        finally:
-            await graph_store.close()
 
 
 def _build_rag_context(results: list, max_items: int = RAG_CONTEXT_MAX_ITEMS, max_chars: int = RAG_CONTEXT_MAX_CHARS) -> str:
@@ -104,17 +116,29 @@ def _build_rag_context(results: list, max_items: int = RAG_CONTEXT_MAX_ITEMS, ma
     return "\n".join(parts) if parts else ""
 
 
+async def _iter_document_qa(graph_store: GraphStore, doc_id: str) -> AsyncIterator[Entity]:
+    """以 document_id 索引逐頁串流文件的 QA 實體（依匯入順序）"""
+    cursor = None
+    while True:
+        page, cursor = await graph_store.get_entities_by_document(
+            doc_id, "QA", limit=QA_DOCUMENT_PAGE_SIZE, cursor=cursor
+        )
+        for qa in page:
+            yield qa
+        if cursor is None:
+            return
+
+
 async def _perform_qa_search(
     search_request: QASearchRequest,
-    graph_store: SQLiteGraphStore,
+    graph_store: GraphStore,
 ) -> list[QAResult]:
     """執行關鍵字 QA 搜尋，回傳 QAResult 列表。"""
-    # 查詢所有 QA 實體
-    all_qa = await graph_store.get_entities_by_type("QA", limit=10000)
-
-    # 如果指定了 doc_id，先篩選
+    # 指定 doc_id 時僅串流該文件的 QA（document_id 索引），否則依寫入順序串流所有 QA 實體；湊滿 limit 筆即停止
     if search_request.doc_id:
-        all_qa = [qa for qa in all_qa if qa.id.startswith(f"{search_request.doc_id}_qa_")]
+        qa_stream = _iter_document_qa(graph_store, search_request.doc_id)
+    else:
+        qa_stream = graph_store.iter_entities("QA", batch=QA_DOCUMENT_PAGE_SIZE, order="insertion")
 
     # 準備查詢 token（支援多關鍵字 AND）
     raw_query = search_request.query or ""
@@ -124,7 +148,7 @@ async def _perform_qa_search(
     # 搜尋匹配的 QA
     results: list[QAResult] = []
 
-    for qa in all_qa:
+    async for qa in qa_stream:
         props = qa.properties
 
         title = props.get("qa_title") or qa.name or ""
@@ -168,9 +192,10 @@ async def _perform_qa_search(
                 notes=notes,
                 metadata=props.get("metadata", {})
             ))
+            if len(results) >= search_request.limit:
+                break
 
-    # 限制結果數量
-    return results[:search_request.limit]
+    return results
 
 
 async def _handle_search_response(
@@ -221,7 +246,7 @@ async def _handle_search_response(
 async def search_qa(
     request: Request,
     search_request: QASearchRequest,
-    graph_store: SQLiteGraphStore = Depends(get_qa_graph_store),
+    graph_store: GraphStore = Depends(get_qa_graph_store),
     llm_service: LLMService = Depends(get_llm_service),
 ):
     """搜尋 QA（依 QUERY_TYPE：sql 回傳列表，rag 回傳 LLM 單一回答 + sources）"""
@@ -230,7 +255,6 @@ async def search_qa(
 
     with REQUEST_LATENCY.labels(method=method, endpoint=endpoint_path).time():
         try:
-            await graph_store.initialize()
             results = await _perform_qa_search(search_request, graph_store)
             response = await _handle_search_response(search_request, results, llm_service)
             REQUEST_COUNTER.labels(method=method, endpoint=endpoint_path, status="200").inc()
@@ -239,15 +263,13 @@ async def search_qa(
             logger.error(f"Search QA error: {str(e)}")
             REQUEST_COUNTER.labels(method=method, endpoint=endpoint_path, status="500").inc()
             raise HTTPException(status_code=500, detail=str(e))
-        finally:
-            await graph_store.close()
 
 
 @router.post("/by-document", response_model=QASearchResponse)
 async def get_qa_by_document(
     request: Request,
     doc_request: QAByDocumentRequest,
-    graph_store: SQLiteGraphStore = Depends(get_qa_graph_store)
+    graph_store: GraphStore = Depends(get_qa_graph_store)
 ):
     """根據文件 ID 取得所有 QA"""
     endpoint_path = "/api/v1/qa/by-document"
@@ -255,8 +277,6 @@ async def get_qa_by_document(
     
     with REQUEST_LATENCY.labels(method=method, endpoint=endpoint_path).time():
         try:
-            await graph_store.initialize()
-            
             # 驗證文件是否存在
             doc_entity = await graph_store.get_entity(doc_request.doc_id)
             if not doc_entity:
@@ -265,13 +285,14 @@ async def get_qa_by_document(
                     detail=f"Document not found: {doc_request.doc_id}"
                 )
             
-            # 查詢該文件的所有 QA
-            all_qa = await graph_store.get_entities_by_type("QA", limit=10000)
-            doc_qa_list = [qa for qa in all_qa if qa.id.startswith(f"{doc_request.doc_id}_qa_")]
+            # 查詢該文件的 QA（document_id 索引，只取需要的筆數）
+            doc_qa_list, _ = await graph_store.get_entities_by_document(
+                doc_request.doc_id, "QA", limit=doc_request.limit
+            )
             
             # 轉換為 QAResult
             results = []
-            for qa in doc_qa_list[:doc_request.limit]:
+            for qa in doc_qa_list:
                 props = qa.properties
                 results.append(QAResult(
                     id=qa.id,
@@ -299,8 +320,6 @@ async def get_qa_by_document(
             logger.error(f"Get QA by document error: {str(e)}")
             REQUEST_COUNTER.labels(method=method, endpoint=endpoint_path, status="500").inc()
             raise HTTPException(status_code=500, detail=str(e))
-        finally:
-            await graph_store.close()
 
 
 @router.get("/search", response_model=QASearchResponse)
@@ -309,7 +328,7 @@ async def search_qa_get(
     query: str = Query(..., description="搜尋關鍵詞", min_length=1, max_length=200),
     limit: int = Query(10, description="返回結果數量", ge=1, le=50),
     doc_id: str = Query(None, description="限制搜尋特定文件 ID"),
-    graph_store: SQLiteGraphStore = Depends(get_qa_graph_store),
+    graph_store: GraphStore = Depends(get_qa_graph_store),
     llm_service: LLMService = Depends(get_llm_service),
 ):
     """搜尋 QA (GET 方法)"""
@@ -319,7 +338,6 @@ async def search_qa_get(
     method = request.method
     with REQUEST_LATENCY.labels(method=method, endpoint=endpoint_path).time():
         try:
-            await graph_store.initialize()
             results = await _perform_qa_search(search_request, graph_store)
             response = await _handle_search_response(search_request, results, llm_service)
             REQUEST_COUNTER.labels(method=method, endpoint=endpoint_path, status="200").inc()
@@ -328,5 +346,3 @@ async def search_qa_get(
             logger.error(f"Search QA (GET) error: {str(e)}")
             REQUEST_COUNTER.labels(method=method, endpoint=endpoint_path, status="500").inc()
             raise HTTPException(status_code=500, detail=str(e))
-        finally:
-            await graph_store.close()
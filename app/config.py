@@ -1,5 +1,59 @@
 """
 應用程式配置檔案
+更新時間：2026-10-18 19:40
+作者：AI Assistant
+修改摘要：GRAPH_ENTITY_CACHE_ENABLED 預設改為 False（快取不感知程序外寫入，改為明確開啟）
+更新時間：2026-10-18 18:20
+作者：AI Assistant
+修改摘要：GRAPH_FEDERATION_QA_ENTITY_TYPES 說明改為 Document 與其 QA 寫入同一 shard
+更新時間：2026-10-18 17:40
+作者：AI Assistant
+修改摘要：新增 GRAPH_FEDERATION_QA_ENTITY_TYPES，聯邦模式下依實體類型路由 QA 實體（匯入腳本以檔名產生的 id 不帶 qa_doc_ 前綴）
+更新時間：2026-10-18 14:00
+作者：AI Assistant
+修改摘要：新增 QA_ANN_ENABLED / QA_ANN_INDEX_PATH / QA_ANN_NLIST / QA_ANN_NPROBE / QA_ANN_MIN_VECTORS，QA 向量近似搜尋（IVF-flat）
+更新時間：2026-10-18 12:50
+作者：AI Assistant
+修改摘要：新增 QA_VECTORS_MMAP_PATH，QAEmbeddingIndex 由匯出的 .npy 以 mmap 唯讀開啟向量（多個 worker 共用頁面快取）
+更新時間：2026-10-18 09:20
+作者：AI Assistant
+修改摘要：新增 GRAPH_SQL_METRICS_ENABLED / GRAPH_SLOW_QUERY_MS，SQLiteGraphStore 語句耗時指標與慢查詢日誌
+更新時間：2026-10-18 08:10
+作者：AI Assistant
+修改摘要：新增 GRAPH_DB_READONLY / GRAPH_DB_MMAP_SIZE / GRAPH_DB_CACHE_SIZE_KB，建置時產生的圖與向量資料庫以唯讀不可變模式開啟
+更新時間：2026-10-18 07:00
+作者：AI Assistant
+修改摘要：新增 GRAPH_QA_DB_PATH、GRAPH_FEDERATION_ENABLED / GRAPH_FEDERATION_QA_ID_PREFIXES，主 GraphStore 可聯邦 graph.db 與 graph_qa.db
+更新時間：2026-10-18 05:50
+作者：AI Assistant
+修改摘要：新增 GRAPH_WRITE_QUEUE_ENABLED / MAX_DELAY_MS / MAX_ROWS，SQLiteGraphStore 寫入合併提交（group commit）
+更新時間：2026-10-18 04:40
+作者：AI Assistant
+修改摘要：新增 GRAPH_HOT_TIER_ENABLED，啟動時把整張圖載入記憶體讀取層（HotTierGraphStore），請求讀取不經 SQLite
+更新時間：2026-10-18 01:10
+作者：AI Assistant
+修改摘要：新增 GRAPH_DB_SCHEMA_VERSION，新建圖資料庫可選用精簡結構 v2
+更新時間：2026-10-17 23:50
+作者：AI Assistant
+修改摘要：新增 GRAPH_SNAPSHOT_PATH，主 GraphStore 啟動時載入建置時匯出的二進位圖快照
+更新時間：2026-10-17 18:40
+作者：AI Assistant
+修改摘要：新增 GRAPH_ENTITY_CACHE_ENABLED / MAX_ENTRIES / MAX_BYTES，設定 GraphStore 實體 LRU 快取
+更新時間：2026-10-17 17:30
+作者：AI Assistant
+修改摘要：新增 GRAPH_ADJACENCY_SNAPSHOT，啟用 SQLiteGraphStore 記憶體內 CSR 鄰接快照
+更新時間：2026-10-17 16:10
+作者：AI Assistant
+修改摘要：新增 GRAPH_TRAVERSAL_MAX_NODES / GRAPH_TRAVERSAL_MAX_EDGES，限制 get_path / get_subgraph 走訪規模
+更新時間：2026-10-17 15:00
+作者：AI Assistant
+修改摘要：新增 GRAPH_DB_READ_POOL_SIZE，設定 SQLiteGraphStore 唯讀連線池大小
+更新時間：2026-10-17 13:20
+作者：AI Assistant
+修改摘要：新增 GRAPH_FTS_ENABLED，控制 search_entities 是否使用 FTS5 trigram 索引
+更新時間：2026-10-17 09:40
+作者：AI Assistant
+修改摘要：新增 GRAPH_BULK_BATCH_SIZE，控制 GraphStore 批次寫入每個交易的筆數
 更新時間：2026-03-31 11:53
 作者：AI Assistant
 修改摘要：新增 LINE Reply API 所需設定（LINE_CHANNEL_ACCESS_TOKEN 等），供 LINE webhook proxy 在取得答案後回覆到 LINE 聊天室
@@ -102,6 +156,67 @@ class Settings(BaseSettings):
     GRAPH_QUERY_MAX_ENTITIES: int = 5  # 圖查詢時最多處理的實體數量
     GRAPH_QUERY_MAX_NEIGHBORS: int = 3  # 每個實體最多查詢的鄰居數量
     GRAPH_CACHE_TTL: int = 3600  # 圖查詢快取 TTL（秒）
+    GRAPH_BULK_BATCH_SIZE: int = 500  # add_entities_bulk / add_relations_bulk 每批筆數（每批一個交易）
+    # search_entities 使用 FTS5 trigram 索引（SQLite 不支援時自動退回 LIKE）
+    GRAPH_FTS_ENABLED: bool = True
+    # WAL 模式下的唯讀連線數（並行讀取分散到各連線；0 表示讀取共用寫入連線）
+    GRAPH_DB_READ_POOL_SIZE: int = 4
+    # get_path / get_subgraph 走訪上限（避免熱點實體展開過大子圖，超過時截斷並記錄警告）
+    GRAPH_TRAVERSAL_MAX_NODES: int = 2000
+    GRAPH_TRAVERSAL_MAX_EDGES: int = 5000
+    # 啟動時建立記憶體內 CSR 鄰接快照，鄰居 / 路徑 / 子圖走訪不經 SQL（讀取為主的部署建議開啟）
+    GRAPH_ADJACENCY_SNAPSHOT: bool = False
+    # 建置時由 scripts/export_graph_snapshot.py 匯出的二進位快照（與 GRAPH_DB_PATH 一致時直接採用其鄰接陣列；空字串停用）
+    GRAPH_SNAPSHOT_PATH: str = ""
+    # 新建圖資料庫的結構版本（1 = TEXT 結構；2 = 整數鍵 / epoch 時間戳 / 關係類型代碼的精簡結構）；
+    # 既有資料庫依其 user_version，v1 轉 v2 請執行 scripts/migrate_graph_schema_v2.py
+    GRAPH_DB_SCHEMA_VERSION: int = 1
+    # get_entity LRU 快取（CachedGraphStore）：項目數與估計位元組數兩個上限。
+    # 快取只在經由本程序的寫入時失效（無 TTL / 版本檢查），腳本於程序外寫入圖資料庫後會讀到舊資料，
+    # 故預設關閉；僅在服務期間不由外部程序寫入的部署開啟
+    GRAPH_ENTITY_CACHE_ENABLED: bool = False
+    GRAPH_ENTITY_CACHE_MAX_ENTRIES: int = 10000
+    GRAPH_ENTITY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # 常駐記憶體讀取層（HotTierGraphStore）：啟動時載入整張圖並建索引，讀取全由記憶體回答、寫入同步寫回 SQLite；
+    # 啟用時不再套用 get_entity LRU 快取（實體已全部常駐），記憶體需求約為圖資料庫大小的數倍
+    GRAPH_HOT_TIER_ENABLED: bool = False
+    # 寫入佇列（group commit）：並行寫入合併為一個交易，第一筆排入後 MAX_DELAY_MS 毫秒或累積 MAX_ROWS 筆即提交，
+    # 寫入於提交後才回傳；單一協程逐筆寫入（如建圖腳本）每筆都要等待 MAX_DELAY_MS，故預設關閉，由服務部署開啟
+    GRAPH_WRITE_QUEUE_ENABLED: bool = False
+    GRAPH_WRITE_QUEUE_MAX_DELAY_MS: float = 5.0
+    GRAPH_WRITE_QUEUE_MAX_ROWS: int = 1000
+    # QA 圖資料庫（/qa/* 端點；服務期間共用單一常駐 GraphStore，不再每個請求開關連線）
+    GRAPH_QA_DB_PATH: str = "./data/graph_qa.db"
+    # 聯邦 GraphStore（FederatedGraphStore）：get_graph_store 涵蓋 main（GRAPH_DB_PATH）與 qa（GRAPH_QA_DB_PATH）兩個 shard，
+    # 讀取並行查詢後合併；寫入路由依序為：實體類型屬於 GRAPH_FEDERATION_QA_ENTITY_TYPES（逗號分隔）→ qa，
+    # 實體 id 以 GRAPH_FEDERATION_QA_ID_PREFIXES（逗號分隔）任一前綴開頭 → qa，其餘 → main。
+    # scripts/import_qa_markdown_batch.py 以檔名產生 id（如 faq_qa_1），只能由類型路由；依類型路由的實體與其 document_id
+    # 指向的 Document 寫入同一 shard（Document 隨其 QA 寫入 qa），文件 → 問答關係不會跨 shard
+    GRAPH_FEDERATION_ENABLED: bool = False
+    GRAPH_FEDERATION_QA_ID_PREFIXES: str = "qa_doc_,ic_error_spec_"
+    GRAPH_FEDERATION_QA_ENTITY_TYPES: str = "QA"
+    # 唯讀模式：建置時產生、服務期間不寫入的資料庫（SQLiteGraphStore 與 QAEmbeddingIndex）以 mode=ro&immutable=1 開啟，
+    # 不建表 / 不切換 WAL / 不做遷移，寫入直接拋出 ReadOnlyStoreError；immutable 下 SQLite 不檢查檔案變更也不讀取 -wal，
+    # 資料庫須於建置時 checkpoint 完成（正常關閉即可），服務期間不得被其他程序修改
+    GRAPH_DB_READONLY: bool = False
+    # 唯讀模式下每條連線的 mmap_size（位元組）與頁面快取（KiB，PRAGMA cache_size = -N）
+    GRAPH_DB_MMAP_SIZE: int = 256 * 1024 * 1024
+    GRAPH_DB_CACHE_SIZE_KB: int = 16 * 1024
+    # SQLiteGraphStore 語句量測：每個語句的耗時記錄於 Prometheus（依發出語句的方法名稱標記）；
+    # 超過 GRAPH_SLOW_QUERY_MS 毫秒者記錄 WARNING（參數只記錄型別與長度），0 停用慢查詢日誌
+    GRAPH_SQL_METRICS_ENABLED: bool = True
+    GRAPH_SLOW_QUERY_MS: float = 200.0
+    # QA 向量匯出檔（scripts/export_qa_vectors_mmap.py 產生的 .npy，旁附 .meta.json）；設定後 QAEmbeddingIndex 以 mmap
+    # 唯讀開啟向量矩陣，多個 uvicorn worker 共用同一份頁面快取而非各自載入；與資料庫筆數不符（匯出後有寫入）時改由資料庫載入
+    QA_VECTORS_MMAP_PATH: Optional[str] = None
+    # QA 向量近似搜尋（IVF-flat，見 qa_ann_index）：向量數達 QA_ANN_MIN_VECTORS 時 search 只掃描最接近的
+    # QA_ANN_NPROBE 個分群（越大召回越高、越慢）；分群數 QA_ANN_NLIST（0 = 約 √n）。
+    # 分群保存於 QA_ANN_INDEX_PATH（預設為向量資料庫同名 .ivf.npz），upsert 的向量於下次載入時指派到最近的分群
+    QA_ANN_ENABLED: bool = False
+    QA_ANN_INDEX_PATH: Optional[str] = None
+    QA_ANN_NLIST: int = 0
+    QA_ANN_NPROBE: int = 16
+    QA_ANN_MIN_VECTORS: int = 20000
     # QA embedding 搜尋相似度門檻；低於此值視為無相關 QA，避免不相關查詢（如「火星探測車」）誤觸 QA 回答
     QA_MIN_SCORE: float = 0.60
 
@@ -1,5 +1,8 @@
 """
 自訂例外類別
+更新時間：2026-10-18 08:10
+作者：AI Assistant
+修改摘要：新增 ReadOnlyStoreError（GRAPH_DB_READONLY 唯讀模式下的寫入）
 """
 from fastapi import HTTPException, status
 
@@ -7,6 +10,10 @@ class CareRAGException(Exception):
     """基礎例外類別"""
     pass
 
+class ReadOnlyStoreError(CareRAGException):
+    """唯讀模式（GRAPH_DB_READONLY）下的寫入"""
+    pass
+
 class InvalidAPIKeyException(HTTPException):
     """無效的 API Key"""
     def __init__(self):
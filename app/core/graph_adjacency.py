@@ -0,0 +1,301 @@
+"""
+圖結構記憶體內鄰接快照（CSR）
+供讀取為主的服務在程序內直接回答鄰居 / 路徑 / 子圖走訪，不需逐次查詢 SQLite
+
+更新時間：2026-10-17 23:50
+作者：AI Assistant
+修改摘要：CSR 陣列可為 array 或指向二進位快照映射區段的 memoryview（graph_snapshot 載入時不複製）
+
+更新時間：2026-10-17 17:30
+作者：AI Assistant
+修改摘要：建立 AdjacencySnapshot：實體 id 整數化（interning）、關係類型編碼，
+          outgoing / incoming 各一組 CSR offsets + 鄰居陣列（array 模組，連續記憶體），
+          邊以 relations.rowid 參照，實際資料於需要時再以主鍵批次取得
+"""
+import sys
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+@dataclass
+class TraversalResult:
+    """子圖走訪結果（實體 id 與關係 rowid），truncated 表示觸及節點 / 關係上限"""
+    nodes: List[str]
+    edge_rowids: List[int]
+    truncated: bool = False
+
+
+class AdjacencySnapshot:
+    """
+    唯讀 CSR 鄰接快照
+
+    節點 i 的 outgoing 邊位於 out_targets[out_offsets[i]:out_offsets[i + 1]]，
+    同位置的 out_edges / out_types 為該邊的 relations.rowid 與類型代碼；incoming 同理。
+    每個節點的邊依 rowid 遞增排列，與 SQL 依索引掃描的順序一致。
+    陣列只需支援索引與 len，可為 array 或 memoryview（見 graph_snapshot.GraphSnapshot.adjacency）。
+    """
+
+    def __init__(
+        self,
+        node_ids: List[str],
+        type_names: List[str],
+        out_offsets: array,
+        out_targets: array,
+        out_edges: array,
+        out_types: array,
+        in_offsets: array,
+        in_sources: array,
+        in_edges: array,
+        in_types: array,
+        version: int = 0,
+    ):
+        self.node_ids = node_ids
+        self.node_index: Dict[str, int] = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.type_names = type_names
+        self.type_index: Dict[str, int] = {name: i for i, name in enumerate(type_names)}
+        self.out_offsets = out_offsets
+        self.out_targets = out_targets
+        self.out_edges = out_edges
+        self.out_types = out_types
+        self.in_offsets = in_offsets
+        self.in_sources = in_sources
+        self.in_edges = in_edges
+        self.in_types = in_types
+        # 建立時的圖版本；與 store 目前版本不同即視為過期
+        self.version = version
+
+    @classmethod
+    def build(
+        cls,
+        edges: Iterable[Tuple[int, str, str, str]],
+        version: int = 0,
+    ) -> "AdjacencySnapshot":
+        """
+        由 (rowid, source_id, target_id, type) 依 rowid 遞增的序列建立快照（節點計數 + 穩定排序分桶）
+        """
+        node_index: Dict[str, int] = {}
+        node_ids: List[str] = []
+        type_index: Dict[str, int] = {}
+        type_names: List[str] = []
+        sources = array("i")
+        targets = array("i")
+        rowids = array("q")
+        types = array("H")
+
+        def intern(node_id: str) -> int:
+            idx = node_index.get(node_id)
+            if idx is None:
+                idx = node_index[node_id] = len(node_ids)
+                node_ids.append(node_id)
+            return idx
+
+        for rowid, source_id, target_id, relation_type in edges:
+            code = type_index.get(relation_type)
+            if code is None:
+                code = type_index[relation_type] = len(type_names)
+                type_names.append(relation_type)
+            sources.append(intern(source_id))
+            targets.append(intern(target_id))
+            rowids.append(rowid)
+            types.append(code)
+
+        num_nodes = len(node_ids)
+        out_offsets, out_targets, out_edges, out_types = cls._csr(num_nodes, sources, targets, rowids, types)
+        in_offsets, in_sources, in_edges, in_types = cls._csr(num_nodes, targets, sources, rowids, types)
+        return cls(
+            node_ids, type_names,
+            out_offsets, out_targets, out_edges, out_types,
+            in_offsets, in_sources, in_edges, in_types,
+            version=version,
+        )
+
+    @staticmethod
+    def _csr(
+        num_nodes: int,
+        keys: array,
+        values: array,
+        rowids: array,
+        types: array,
+    ) -> Tuple[array, array, array, array]:
+        """依 keys 穩定排序分桶，回傳 offsets 與對應的 values / rowids / types 陣列"""
+        counts = [0] * (num_nodes + 1)
+        for key in keys:
+            counts[key + 1] += 1
+        offsets = array("i", accumulate(counts))
+        # sorted 為穩定排序：同一節點的邊維持 rowid 遞增
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        return (
+            offsets,
+            array("i", map(values.__getitem__, order)),
+            array("q", map(rowids.__getitem__, order)),
+            array("H", map(types.__getitem__, order)),
+        )
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.out_targets)
+
+    def _type_code(self, relation_type: Optional[str]) -> Optional[int]:
+        """relation_type 轉代碼；None 表示不過濾，-1 表示快照中不存在此類型"""
+        if relation_type is None:
+            return None
+        return self.type_index.get(relation_type, -1)
+
+    def _edges(
+        self,
+        idx: int,
+        direction: str,
+        code: Optional[int],
+    ) -> Iterable[Tuple[int, int]]:
+        """逐一產生 (鄰居節點 index, 邊 rowid)，先 outgoing 後 incoming"""
+        if direction in ("outgoing", "both"):
+            for pos in range(self.out_offsets[idx], self.out_offsets[idx + 1]):
+                if code is None or self.out_types[pos] == code:
+                    yield self.out_targets[pos], self.out_edges[pos]
+        if direction in ("incoming", "both"):
+            for pos in range(self.in_offsets[idx], self.in_offsets[idx + 1]):
+                if code is None or self.in_types[pos] == code:
+                    yield self.in_sources[pos], self.in_edges[pos]
+
+    def neighbor_ids(
+        self,
+        entity_id: str,
+        relation_type: Optional[str] = None,
+        direction: str = "both",
+    ) -> List[str]:
+        """鄰居實體 id（依出現順序去重，先 outgoing 後 incoming）"""
+        idx = self.node_index.get(entity_id)
+        code = self._type_code(relation_type)
+        if idx is None or code == -1:
+            return []
+        seen: Dict[int, None] = {}
+        for neighbor, _ in self._edges(idx, direction, code):
+            seen.setdefault(neighbor, None)
+        return [self.node_ids[n] for n in seen]
+
+    def relation_rowids(self, entity_id: str, direction: str = "both") -> List[int]:
+        """與實體相連的關係 rowid（依 rowid 去重）"""
+        idx = self.node_index.get(entity_id)
+        if idx is None:
+            return []
+        return list(dict.fromkeys(rowid for _, rowid in self._edges(idx, direction, None)))
+
+    def paths(
+        self,
+        source_id: str,
+        target_id: str,
+        max_hops: int,
+        max_rows: int,
+        max_paths: int,
+    ) -> Tuple[List[List[str]], bool]:
+        """
+        與 SQL 遞迴 CTE 相同語意的路徑列舉：沿 outgoing、無環、依 hop 數 BFS，
+        走訪列數上限 max_rows（含起點），回傳 (路徑, 是否截斷)
+        """
+        src = self.node_index.get(source_id)
+        dst = self.node_index.get(target_id)
+        if src is None or dst is None:
+            return [], False
+
+        found: List[List[str]] = []
+        queue = deque([(src, (src,))])
+        rows = 1
+        truncated = False
+        while queue:
+            node, path = queue.popleft()
+            if node == dst or len(path) > max_hops:
+                continue
+            for pos in range(self.out_offsets[node], self.out_offsets[node + 1]):
+                neighbor = self.out_targets[pos]
+                if neighbor in path:
+                    continue
+                if rows >= max_rows:
+                    truncated = True
+                    queue.clear()
+                    break
+                rows += 1
+                next_path = path + (neighbor,)
+                if neighbor == dst:
+                    found.append([self.node_ids[n] for n in next_path])
+                else:
+                    queue.append((neighbor, next_path))
+        found.sort(key=len)
+        return found[:max_paths], truncated
+
+    def subgraph(
+        self,
+        entity_ids: Sequence[str],
+        max_depth: int,
+        max_nodes: int,
+        max_edges: int,
+    ) -> TraversalResult:
+        """
+        雙向逐層擴展至 max_depth，回傳已拜訪節點與其相連的關係 rowid；
+        不在快照中的起點（無任何關係）仍列入節點
+        """
+        nodes: Dict[str, None] = dict.fromkeys(entity_ids)
+        visited: Set[int] = set()
+        frontier = [self.node_index[n] for n in nodes if n in self.node_index]
+        visited.update(frontier)
+        truncated = False
+        depth = 0
+        while frontier and depth < max_depth and not truncated:
+            next_frontier: List[int] = []
+            for idx in frontier:
+                for neighbor, _ in self._edges(idx, "both", None):
+                    if neighbor in visited:
+                        continue
+                    if len(nodes) >= max_nodes:
+                        truncated = True
+                        break
+                    visited.add(neighbor)
+                    nodes[self.node_ids[neighbor]] = None
+                    next_frontier.append(neighbor)
+                if truncated:
+                    break
+            frontier = next_frontier
+            depth += 1
+
+        edge_rowids: Dict[int, None] = {}
+        for node_id in nodes:
+            for rowid in self.relation_rowids(node_id):
+                if len(edge_rowids) >= max_edges:
+                    return TraversalResult(list(nodes), list(edge_rowids), True)
+                edge_rowids[rowid] = None
+        return TraversalResult(list(nodes), list(edge_rowids), truncated)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        快照佔用的記憶體（位元組）：arrays 為 CSR 陣列，ids 為 id 字串 + 索引 dict
+        """
+        arrays = sum(
+            memoryview(a).nbytes
+            for a in (
+                self.out_offsets, self.out_targets, self.out_edges, self.out_types,
+                self.in_offsets, self.in_sources, self.in_edges, self.in_types,
+            )
+        )
+        ids = (
+            sys.getsizeof(self.node_ids)
+            + sum(sys.getsizeof(node_id) for node_id in self.node_ids)
+            + sys.getsizeof(self.node_index)
+            + sys.getsizeof(self.type_names)
+            + sum(sys.getsizeof(name) for name in self.type_names)
+            + sys.getsizeof(self.type_index)
+        )
+        total = arrays + ids
+        return {
+            "nodes": self.num_nodes,
+            "edges": self.num_edges,
+            "array_bytes": arrays,
+            "id_bytes": ids,
+            "total_bytes": total,
+            "bytes_per_edge": round(total / self.num_edges, 1) if self.num_edges else 0.0,
+        }
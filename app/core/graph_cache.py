@@ -0,0 +1,347 @@
+"""
+GraphStore 實體快取層
+以有界、依大小計量的 LRU 快取包裝任意 GraphStore，減少 get_entity 重複查詢與 JSON 解碼
+
+更新時間：2026-10-18 16:40
+作者：AI Assistant
+修改摘要：iter_entities 傳遞 order
+
+更新時間：2026-10-18 16:20
+作者：AI Assistant
+修改摘要：項目大小改以 Entity.properties_size() 估計，回填快取不再解碼 properties（保留延遲解碼）
+
+更新時間：2026-10-18 05:50
+作者：AI Assistant
+修改摘要：委派 flush
+
+更新時間：2026-10-18 04:40
+作者：AI Assistant
+修改摘要：委派 get_importance_scores
+
+更新時間：2026-10-18 03:30
+作者：AI Assistant
+修改摘要：委派 compute_importance；get_neighbors 傳遞 order_by / limit
+
+更新時間：2026-10-18 02:20
+作者：AI Assistant
+修改摘要：委派 get_relations_by_entities
+
+更新時間：2026-10-17 23:50
+作者：AI Assistant
+修改摘要：委派 export_snapshot；load_snapshot 成功後清空快取
+
+更新時間：2026-10-17 23:20
+作者：AI Assistant
+修改摘要：委派 recompute_statistics
+
+更新時間：2026-10-17 18:40
+作者：AI Assistant
+修改摘要：建立 CachedGraphStore：快取 get_entity / get_entities_many，
+          add_entity / delete_entity / add_entities_bulk 寫入時失效；命中 / 未命中輸出至 Prometheus
+"""
+import logging
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.graph_importance import DEFAULT_DAMPING, DEFAULT_MAX_ITERATIONS
+from app.core.graph_store import Entity, GraphStore, Relation
+from app.utils.metrics import GRAPH_ENTITY_CACHE_ENTRIES, GRAPH_ENTITY_CACHE_HITS, GRAPH_ENTITY_CACHE_MISSES
+
+# 每個快取項目的固定成本估計（Entity 物件、dict、datetime 與 OrderedDict 節點）
+_ENTRY_OVERHEAD_BYTES = 512
+
+
+def _estimate_entity_bytes(entity: Entity) -> int:
+    """粗估實體佔用記憶體：字串欄位長度 + properties 大小估計 + 固定成本（properties_size 不解碼延遲載入的 JSON）"""
+    return _ENTRY_OVERHEAD_BYTES + len(entity.id) + len(entity.type) + len(entity.name) + entity.properties_size()
+
+
+class CachedGraphStore(GraphStore):
+    """
+    GraphStore 實體 LRU 快取包裝
+
+    - 以 max_entries 與 max_bytes 兩個上限淘汰最久未使用的實體
+    - 快取回傳的是同一個 Entity 物件，呼叫端不應就地修改 properties
+    - 其餘方法直接委派給內部 store；未定義於 GraphStore 的方法（如 get_all_entities、pool_stats）經 __getattr__ 轉交
+    """
+
+    def __init__(
+        self,
+        inner: GraphStore,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self.inner = inner
+        self.max_entries = max_entries if max_entries is not None else settings.GRAPH_ENTITY_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes if max_bytes is not None else settings.GRAPH_ENTITY_CACHE_MAX_BYTES
+        self.logger = logging.getLogger("CachedGraphStore")
+        self._entries: "OrderedDict[str, Entity]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        # 每次實體寫入遞增；查詢期間若有寫入則不回填，避免把寫入前讀到的舊值放回快取
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+    # ---- 快取操作 ----
+
+    def _lookup(self, entity_id: str) -> Optional[Entity]:
+        entity = self._entries.get(entity_id)
+        if entity is not None:
+            self._entries.move_to_end(entity_id)
+        return entity
+
+    def _store(self, entity: Entity) -> None:
+        size = _estimate_entity_bytes(entity)
+        if size > self.max_bytes:
+            return
+        self._discard(entity.id)
+        self._entries[entity.id] = entity
+        self._sizes[entity.id] = size
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest, _ = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(oldest)
+        GRAPH_ENTITY_CACHE_ENTRIES.set(len(self._entries))
+
+    def _discard(self, entity_id: str) -> None:
+        if self._entries.pop(entity_id, None) is not None:
+            self._bytes -= self._sizes.pop(entity_id)
+
+    def _invalidate(self, entity_ids: List[str]) -> None:
+        self._generation += 1
+        for entity_id in entity_ids:
+            self._discard(entity_id)
+        GRAPH_ENTITY_CACHE_ENTRIES.set(len(self._entries))
+
+    def _record(self, hits: int, misses: int) -> None:
+        if hits:
+            self.hits += hits
+            GRAPH_ENTITY_CACHE_HITS.inc(hits)
+        if misses:
+            self.misses += misses
+            GRAPH_ENTITY_CACHE_MISSES.inc(misses)
+
+    def clear_cache(self) -> int:
+        """清空快取，回傳清除的項目數"""
+        count = len(self._entries)
+        self._invalidate(list(self._entries))
+        return count
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """快取統計（entries / bytes / hits / misses / hit_rate）"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    # ---- 快取讀取 ----
+
+    async def get_entity(self, entity_id: str) -> Optional[Entity]:
+        entity = self._lookup(entity_id)
+        if entity is not None:
+            self._record(1, 0)
+            return entity
+        self._record(0, 1)
+        generation = self._generation
+        entity = await self.inner.get_entity(entity_id)
+        if entity is not None and generation == self._generation:
+            self._store(entity)
+        return entity
+
+    async def get_entities_many(self, entity_ids: List[str]) -> Dict[str, Entity]:
+        found: Dict[str, Entity] = {}
+        missing: List[str] = []
+        for entity_id in dict.fromkeys(entity_ids):
+            entity = self._lookup(entity_id)
+            if entity is not None:
+                found[entity_id] = entity
+            else:
+                missing.append(entity_id)
+        self._record(len(found), len(missing))
+        if missing:
+            generation = self._generation
+            loaded = await self.inner.get_entities_many(missing)
+            if generation == self._generation:
+                for entity in loaded.values():
+                    self._store(entity)
+            found.update(loaded)
+        return found
+
+    # ---- 寫入（失效） ----
+    # 寫入前後各失效一次：寫入完成前開始的讀取不會把舊值回填快取
+
+    async def add_entity(self, entity: Entity) -> bool:
+        self._invalidate([entity.id])
+        try:
+            return await self.inner.add_entity(entity)
+        finally:
+            self._invalidate([entity.id])
+
+    async def delete_entity(self, entity_id: str) -> bool:
+        self._invalidate([entity_id])
+        try:
+            return await self.inner.delete_entity(entity_id)
+        finally:
+            self._invalidate([entity_id])
+
+    async def add_entities_bulk(
+        self,
+        entities: List[Entity],
+        batch_size: Optional[int] = None
+    ) -> List[bool]:
+        entity_ids = [entity.id for entity in entities]
+        self._invalidate(entity_ids)
+        try:
+            return await self.inner.add_entities_bulk(entities, batch_size)
+        finally:
+            self._invalidate(entity_ids)
+
+    # ---- 直接委派 ----
+
+    async def initialize(self) -> bool:
+        return await self.inner.initialize()
+
+    async def add_relation(self, relation: Relation) -> bool:
+        return await self.inner.add_relation(relation)
+
+    async def add_relations_bulk(
+        self,
+        relations: List[Relation],
+        batch_size: Optional[int] = None
+    ) -> List[bool]:
+        return await self.inner.add_relations_bulk(relations, batch_size)
+
+    async def get_relation(self, relation_id: str) -> Optional[Relation]:
+        return await self.inner.get_relation(relation_id)
+
+    async def delete_relation(self, relation_id: str) -> bool:
+        return await self.inner.delete_relation(relation_id)
+
+    async def get_entities_by_type(self, entity_type: str, limit: int = 100) -> List[Entity]:
+        return await self.inner.get_entities_by_type(entity_type, limit)
+
+    def iter_entities(
+        self,
+        entity_type: Optional[str] = None,
+        batch: int = 500,
+        order: str = "id"
+    ) -> AsyncIterator[Entity]:
+        return self.inner.iter_entities(entity_type, batch, order)
+
+    def iter_relations(
+        self,
+        relation_type: Optional[str] = None,
+        batch: int = 500
+    ) -> AsyncIterator[Relation]:
+        return self.inner.iter_relations(relation_type, batch)
+
+    async def get_entities_by_document(
+        self,
+        document_id: str,
+        entity_type: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Entity], Optional[str]]:
+        return await self.inner.get_entities_by_document(document_id, entity_type, limit, cursor)
+
+    async def search_entities(
+        self,
+        query: str,
+        limit: int = 10,
+        *,
+        include_type_match: bool = True,
+        order_by: str = "name"
+    ) -> List[Entity]:
+        return await self.inner.search_entities(
+            query, limit, include_type_match=include_type_match, order_by=order_by
+        )
+
+    async def get_neighbors(
+        self,
+        entity_id: str,
+        relation_type: Optional[str] = None,
+        direction: str = "both",
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Entity]:
+        return await self.inner.get_neighbors(entity_id, relation_type, direction, order_by, limit)
+
+    async def get_path(
+        self,
+        source_id: str,
+        target_id: str,
+        max_hops: int = 3
+    ) -> List[List[str]]:
+        return await self.inner.get_path(source_id, target_id, max_hops)
+
+    async def get_subgraph(
+        self,
+        entity_ids: List[str],
+        max_depth: int = 2
+    ) -> Dict[str, Any]:
+        return await self.inner.get_subgraph(entity_ids, max_depth)
+
+    async def get_statistics(self) -> Dict[str, Any]:
+        return await self.inner.get_statistics()
+
+    async def recompute_statistics(self) -> Dict[str, Any]:
+        return await self.inner.recompute_statistics()
+
+    async def flush(self) -> None:
+        await self.inner.flush()
+
+    async def compute_importance(
+        self,
+        damping: float = DEFAULT_DAMPING,
+        max_iterations: int = DEFAULT_MAX_ITERATIONS
+    ) -> Dict[str, Any]:
+        return await self.inner.compute_importance(damping, max_iterations)
+
+    async def get_importance_scores(self) -> Dict[str, Tuple[float, Optional[float], int]]:
+        return await self.inner.get_importance_scores()
+
+    async def export_snapshot(self, path: str) -> Dict[str, Any]:
+        return await self.inner.export_snapshot(path)
+
+    async def load_snapshot(self, path: str) -> bool:
+        loaded = await self.inner.load_snapshot(path)
+        if loaded:
+            self.clear_cache()
+        return loaded
+
+    async def get_relations_by_entity(
+        self,
+        entity_id: str,
+        direction: str = "both"
+    ) -> List[Relation]:
+        return await self.inner.get_relations_by_entity(entity_id, direction)
+
+    async def get_relations_by_entities(
+        self,
+        entity_ids: List[str],
+        direction: str = "both"
+    ) -> Dict[str, Relation]:
+        return await self.inner.get_relations_by_entities(entity_ids, direction)
+
+    async def get_relations_by_type(
+        self,
+        relation_type: str,
+        limit: int = 100
+    ) -> List[Relation]:
+        return await self.inner.get_relations_by_type(relation_type, limit)
+
+    async def close(self):
+        self.clear_cache()
+        if hasattr(self.inner, "close"):
+            await self.inner.close()
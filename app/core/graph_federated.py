@@ -0,0 +1,581 @@
+"""
+聯邦 GraphStore
+以多個具名 shard（如 graph.db 與 graph_qa.db，或依文件集合切分的資料庫）組成單一 GraphStore：
+讀取並行查詢各 shard 後合併，寫入依 document_id、實體類型或實體 id 前綴路由到單一 shard
+
+更新時間：2026-10-18 18:20
+作者：AI Assistant
+修改摘要：依類型路由的實體與其 Document 寫入同一 shard（Document 先寫入他處時搬移、後寫入時跟隨已有的實體），
+          匯入腳本的 Document → QA（CONTAINS_QA）關係不再因跨 shard 寫入失敗
+
+更新時間：2026-10-18 18:00
+作者：AI Assistant
+修改摘要：clear_cache 清除全部 shard 的快取並回傳總數
+
+更新時間：2026-10-18 17:40
+作者：AI Assistant
+修改摘要：新增 type_routes（實體類型 → shard），檔名衍生 id 的 QA 實體不再落入 default_shard；
+          route_entity 改讀 Entity.document_id 屬性，未設定 document_routes 時關係路由不讀取 properties，路由不觸發延遲解碼
+
+更新時間：2026-10-18 16:40
+作者：AI Assistant
+修改摘要：iter_entities(order="insertion") 依 shards 順序逐一串流（各 shard 內依寫入順序）
+
+更新時間：2026-10-18 07:00
+作者：AI Assistant
+修改摘要：建立 FederatedGraphStore；iter_entities / iter_relations 以 k 路合併維持依 id 排序，
+          get_entities_by_document 的 cursor 帶 shard 名稱，可跨 shard 續頁
+"""
+import asyncio
+import heapq
+import logging
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from app.core.graph_importance import DEFAULT_DAMPING, DEFAULT_MAX_ITERATIONS
+from app.core.graph_store import Entity, GraphStore, Relation
+
+T = TypeVar("T")
+
+# 文件實體類型：依類型路由的實體以 document_id 指向的 Document 須與其同 shard
+DOCUMENT_ENTITY_TYPE = "Document"
+
+
+def _merge_counts(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """合併各 shard 的統計：數值相加，{type: count} 逐鍵相加"""
+    merged: Dict[str, Any] = {}
+    for stats in results:
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                bucket = merged.setdefault(key, {})
+                for name, count in value.items():
+                    bucket[name] = bucket.get(name, 0) + count
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+async def _chain_by_shard(iterators: List[AsyncIterator[Any]]) -> AsyncIterator[Any]:
+    """依 shards 順序逐一串流（各 shard 內維持寫入順序）；同一 id 只保留排在前面的 shard，與 get_entities_by_type 合併相同"""
+    seen = set()
+    for iterator in iterators:
+        async for item in iterator:
+            if item.id not in seen:
+                seen.add(item.id)
+                yield item
+
+
+async def _merge_by_id(iterators: List[AsyncIterator[Any]]) -> AsyncIterator[Any]:
+    """k 路合併各 shard 依 id 排序的串流；同一 id 只保留排在前面的 shard"""
+    heads: List[Tuple[str, int, Any]] = []
+    for index, iterator in enumerate(iterators):
+        item = await anext(iterator, None)
+        if item is not None:
+            heads.append((item.id, index, item))
+    heapq.heapify(heads)
+    last_id = None
+    while heads:
+        item_id, index, item = heapq.heappop(heads)
+        if item_id != last_id:
+            last_id = item_id
+            yield item
+        item = await anext(iterators[index], None)
+        if item is not None:
+            heapq.heappush(heads, (item.id, index, item))
+
+
+class FederatedGraphStore(GraphStore):
+    """
+    聯邦 GraphStore
+
+    - shards：{名稱: GraphStore}，字典順序即合併時的優先順序（同一 id 出現在多個 shard 時以路由到的 shard 為準，其次依此順序）
+    - 寫入路由：實體的 document_id 命中 document_routes → 實體類型命中 type_routes → 最長命中的 id 前綴（prefix_routes）
+      → default_shard；依類型路由的實體與其 Document 視為一個單位寫入同一 shard（見 _route_entities）；
+      關係寫入來源實體所在的 shard（關係的兩端須位於同一 shard，跨 shard 的關係會因端點不存在而寫入失敗）
+    - 讀取：點查詢先查路由到的 shard，未命中再並行查其餘 shard；列表 / 搜尋 / 統計並行查詢全部 shard 後合併
+    """
+
+    def __init__(
+        self,
+        shards: Dict[str, GraphStore],
+        default_shard: Optional[str] = None,
+        prefix_routes: Optional[Dict[str, str]] = None,
+        document_routes: Optional[Dict[str, str]] = None,
+        type_routes: Optional[Dict[str, str]] = None
+    ):
+        if not shards:
+            raise ValueError("FederatedGraphStore requires at least one shard")
+        self.shards = dict(shards)
+        self.default_shard = default_shard or next(iter(self.shards))
+        self.document_routes = dict(document_routes or {})
+        self.type_routes = dict(type_routes or {})
+        # 最長前綴優先
+        self.prefix_routes = sorted((prefix_routes or {}).items(), key=lambda route: -len(route[0]))
+        targets = {
+            self.default_shard, *self.document_routes.values(), *self.type_routes.values(),
+            *(name for _, name in self.prefix_routes)
+        }
+        unknown = targets - set(self.shards)
+        if unknown:
+            raise ValueError(f"Unknown shards in routes: {sorted(unknown)}")
+        self.logger = logging.getLogger("FederatedGraphStore")
+
+    # ---- 路由 ----
+
+    def route_id(self, item_id: str) -> str:
+        """依 id 前綴決定 shard（未命中任何前綴時為 default_shard）"""
+        for prefix, name in self.prefix_routes:
+            if item_id.startswith(prefix):
+                return name
+        return self.default_shard
+
+    def route_entity(self, entity: Entity) -> str:
+        """決定實體寫入的 shard：document_id 路由優先，其次實體類型、id 前綴（只讀欄位屬性，不解碼 properties）"""
+        document_id = entity.document_id
+        if document_id is not None and document_id in self.document_routes:
+            return self.document_routes[document_id]
+        if entity.type in self.type_routes:
+            return self.type_routes[entity.type]
+        return self.route_id(entity.id)
+
+    def _follows_document(self, entity: Entity) -> bool:
+        """依類型路由且帶 document_id 的實體須與其 Document 位於同一 shard（文件 → 實體的關係才寫得進去）"""
+        return (
+            entity.document_id is not None
+            and entity.type in self.type_routes
+            and entity.document_id not in self.document_routes
+        )
+
+    async def _route_entities(self, entities: List[Entity]) -> List[str]:
+        """
+        決定每個實體寫入的 shard：route_entity，並讓同一文件的 Document 與其實體落在同一 shard
+        - 依類型路由的實體：其 Document 已在他處時搬到實體的 shard（Document 尚無關係時），否則實體改隨 Document
+        - Document：已有實體以其 id 為 document_id 時寫入那些實體所在的 shard（先寫實體、後寫 Document 或重新匯入）
+        """
+        routes = [self.route_entity(entity) for entity in entities]
+        if not self.type_routes:
+            return routes
+        wanted: Dict[str, str] = {}
+        for entity, name in zip(entities, routes):
+            if self._follows_document(entity):
+                wanted.setdefault(entity.document_id, name)
+        placed = await self._colocate_documents(wanted) if wanted else {}
+        # 同批次內的 Document 隨同批次的實體；其餘查已寫入的實體
+        placed = {**wanted, **placed}
+        document_ids = [
+            entity.id for entity in entities if entity.type == DOCUMENT_ENTITY_TYPE and entity.id not in placed
+        ]
+        placed.update(await self._locate_document_members(list(dict.fromkeys(document_ids))))
+        return [
+            placed.get(entity.document_id, name) if self._follows_document(entity)
+            else placed.get(entity.id, name) if entity.type == DOCUMENT_ENTITY_TYPE
+            else name
+            for entity, name in zip(entities, routes)
+        ]
+
+    async def _colocate_documents(self, wanted: Dict[str, str]) -> Dict[str, str]:
+        """把 Document 搬到其實體路由到的 shard；回傳 {document_id: 實體應寫入的 shard}（Document 不存在者不出現）"""
+        placed: Dict[str, str] = {}
+        for document_id, current in (await self._locate_entities(list(wanted))).items():
+            target = wanted[document_id]
+            if current == target or await self._move_document(document_id, current, target):
+                placed[document_id] = target
+            else:
+                placed[document_id] = current
+        return placed
+
+    async def _move_document(self, document_id: str, source: str, target: str) -> bool:
+        """把尚無關係的 Document 實體自 source 搬到 target；已有關係（搬移會讓關係跨 shard）或非 Document 時不搬"""
+        entity = await self.shards[source].get_entity(document_id)
+        if entity is None or entity.type != DOCUMENT_ENTITY_TYPE:
+            return False
+        if await self.shards[source].get_relations_by_entity(document_id):
+            self.logger.warning(
+                f"Document {document_id} has relations in shard {source}; its entities are written there instead of {target}"
+            )
+            return False
+        if not await self.shards[target].add_entity(entity):
+            return False
+        await self.shards[source].delete_entity(document_id)
+        return True
+
+    async def _locate_document_members(self, document_ids: List[str]) -> Dict[str, str]:
+        """查出已有實體以指定 id 為 document_id 的 shard（依 shards 順序取第一個）"""
+        holders: Dict[str, str] = {}
+        for document_id in document_ids:
+            found = await self._fan_out(lambda shard: shard.get_entities_by_document(document_id, limit=1))
+            for name, (page, _) in found:
+                if page:
+                    holders[document_id] = name
+                    break
+        return holders
+
+    def _routed_first(self, item_id: str) -> List[str]:
+        primary = self.route_id(item_id)
+        return [primary] + [name for name in self.shards if name != primary]
+
+    async def _fan_out(self, call: Callable[[GraphStore], Awaitable[T]]) -> List[Tuple[str, T]]:
+        """並行對全部 shard 呼叫 call，依 shards 順序回傳 (名稱, 結果)"""
+        results = await asyncio.gather(*(call(shard) for shard in self.shards.values()))
+        return list(zip(self.shards, results))
+
+    async def _locate_entities(self, entity_ids: List[str]) -> Dict[str, str]:
+        """查出實體所在的 shard（依 _routed_first 的優先順序）；不存在者不出現在結果中"""
+        if not entity_ids:
+            return {}
+        found = await self._fan_out(lambda shard: shard.get_entities_many(entity_ids))
+        located: Dict[str, str] = {}
+        for name, entities in found:
+            for entity_id in entities:
+                if entity_id not in located or self.route_id(entity_id) == name:
+                    located[entity_id] = name
+        return located
+
+    async def _route_relations(self, relations: List[Relation]) -> List[str]:
+        """決定每個關係寫入的 shard：document_id 路由、來源 id 前綴，皆未命中時寫入來源實體所在的 shard"""
+        routes: List[Optional[str]] = []
+        unresolved: List[str] = []
+        for relation in relations:
+            # 關係沒有 document_id 欄位，只在設定了 document_routes 時才讀取（可能解碼）properties
+            document_id = relation.properties.get("document_id") if self.document_routes else None
+            if document_id is not None and document_id in self.document_routes:
+                routes.append(self.document_routes[document_id])
+                continue
+            name = self.route_id(relation.source_id)
+            if name == self.default_shard and len(self.shards) > 1:
+                routes.append(None)
+                unresolved.append(relation.source_id)
+            else:
+                routes.append(name)
+        located = await self._locate_entities(list(dict.fromkeys(unresolved)))
+        return [
+            name if name is not None else located.get(relation.source_id, self.default_shard)
+            for name, relation in zip(routes, relations)
+        ]
+
+    async def _bulk_by_shard(
+        self,
+        items: List[Any],
+        routes: List[str],
+        write: Callable[[GraphStore, List[Any]], Awaitable[List[bool]]]
+    ) -> List[bool]:
+        """依路由分組後並行批次寫入，依原順序組回成功旗標"""
+        groups: Dict[str, List[int]] = {}
+        for index, name in enumerate(routes):
+            groups.setdefault(name, []).append(index)
+        flags = [False] * len(items)
+        results = await asyncio.gather(*(
+            write(self.shards[name], [items[i] for i in indexes]) for name, indexes in groups.items()
+        ))
+        for indexes, shard_flags in zip(groups.values(), results):
+            for index, ok in zip(indexes, shard_flags):
+                flags[index] = ok
+        return flags
+
+    # ---- 生命週期 ----
+
+    async def initialize(self) -> bool:
+        results = await self._fan_out(lambda shard: shard.initialize())
+        for name, ok in results:
+            if not ok:
+                self.logger.error(f"Shard {name} failed to initialize")
+        return all(ok for _, ok in results)
+
+    async def flush(self) -> None:
+        await self._fan_out(lambda shard: shard.flush())
+
+    def clear_cache(self) -> int:
+        return sum(shard.clear_cache() for shard in self.shards.values())
+
+    async def close(self):
+        await asyncio.gather(*(shard.close() for shard in self.shards.values() if hasattr(shard, "close")))
+
+    # ---- 寫入 ----
+
+    async def add_entity(self, entity: Entity) -> bool:
+        (name,) = await self._route_entities([entity])
+        return await self.shards[name].add_entity(entity)
+
+    async def add_entities_bulk(
+        self,
+        entities: List[Entity],
+        batch_size: Optional[int] = None
+    ) -> List[bool]:
+        return await self._bulk_by_shard(
+            entities,
+            await self._route_entities(entities),
+            lambda shard, group: shard.add_entities_bulk(group, batch_size)
+        )
+
+    async def delete_entity(self, entity_id: str) -> bool:
+        results = await self._fan_out(lambda shard: shard.delete_entity(entity_id))
+        return any(deleted for _, deleted in results)
+
+    async def add_relation(self, relation: Relation) -> bool:
+        (name,) = await self._route_relations([relation])
+        return await self.shards[name].add_relation(relation)
+
+    async def add_relations_bulk(
+        self,
+        relations: List[Relation],
+        batch_size: Optional[int] = None
+    ) -> List[bool]:
+        return await self._bulk_by_shard(
+            relations,
+            await self._route_relations(relations),
+            lambda shard, group: shard.add_relations_bulk(group, batch_size)
+        )
+
+    async def delete_relation(self, relation_id: str) -> bool:
+        results = await self._fan_out(lambda shard: shard.delete_relation(relation_id))
+        return any(deleted for _, deleted in results)
+
+    # ---- 點查詢 ----
+
+    async def get_entity(self, entity_id: str) -> Optional[Entity]:
+        primary, *others = self._routed_first(entity_id)
+        entity = await self.shards[primary].get_entity(entity_id)
+        if entity is not None or not others:
+            return entity
+        for entity in await asyncio.gather(*(self.shards[name].get_entity(entity_id) for name in others)):
+            if entity is not None:
+                return entity
+        return None
+
+    async def get_entities_many(self, entity_ids: List[str]) -> Dict[str, Entity]:
+        if not entity_ids:
+            return {}
+        found = await self._fan_out(lambda shard: shard.get_entities_many(entity_ids))
+        merged: Dict[str, Entity] = {}
+        for name, entities in found:
+            for entity_id, entity in entities.items():
+                if entity_id not in merged or self.route_id(entity_id) == name:
+                    merged[entity_id] = entity
+        return merged
+
+    async def get_relation(self, relation_id: str) -> Optional[Relation]:
+        primary, *others = self._routed_first(relation_id)
+        relation = await self.shards[primary].get_relation(relation_id)
+        if relation is not None or not others:
+            return relation
+        for relation in await asyncio.gather(*(self.shards[name].get_relation(relation_id) for name in others)):
+            if relation is not None:
+                return relation
+        return None
+
+    # ---- 合併讀取 ----
+
+    async def get_entities_by_type(self, entity_type: str, limit: int = 100) -> List[Entity]:
+        results = await self._fan_out(lambda shard: shard.get_entities_by_type(entity_type, limit))
+        merged: Dict[str, Entity] = {}
+        for _, entities in results:
+            for entity in entities:
+                merged.setdefault(entity.id, entity)
+        return list(merged.values())[:limit]
+
+    async def search_entities(
+        self,
+        query: str,
+        limit: int = 10,
+        *,
+        include_type_match: bool = True,
+        order_by: str = "name"
+    ) -> List[Entity]:
+        """各 shard 取前 limit 筆後依同一排序鍵合併（rank：name 命中優先、較短名稱優先；各 shard 的 bm25 分數不可比）"""
+        results = await self._fan_out(lambda shard: shard.search_entities(
+            query, limit, include_type_match=include_type_match, order_by=order_by
+        ))
+        merged: Dict[str, Entity] = {}
+        for _, entities in results:
+            for entity in entities:
+                merged.setdefault(entity.id, entity)
+        query_lower = query.lower()
+        if order_by == "rank":
+            key = lambda e: (0 if query_lower in e.name.lower() else 1, len(e.name), e.name.lower())
+        else:
+            key = lambda e: (e.name or "").lower()
+        return heapq.nsmallest(limit, merged.values(), key=key)
+
+    async def get_neighbors(
+        self,
+        entity_id: str,
+        relation_type: Optional[str] = None,
+        direction: str = "both",
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Entity]:
+        """各 shard 的鄰居依路由優先順序串接去重（重要度只在 shard 內可比，不跨 shard 重排）"""
+        results = await self._fan_out(lambda shard: shard.get_neighbors(
+            entity_id, relation_type, direction, order_by, limit
+        ))
+        by_shard = dict(results)
+        merged: Dict[str, Entity] = {}
+        for name in self._routed_first(entity_id):
+            for entity in by_shard[name]:
+                merged.setdefault(entity.id, entity)
+        return list(merged.values())[:limit]
+
+    async def get_path(
+        self,
+        source_id: str,
+        target_id: str,
+        max_hops: int = 3
+    ) -> List[List[str]]:
+        """各 shard 內的路徑聯集（關係不跨 shard，故不存在跨 shard 的路徑）"""
+        results = await self._fan_out(lambda shard: shard.get_path(source_id, target_id, max_hops))
+        paths: Dict[Tuple[str, ...], List[str]] = {}
+        for _, shard_paths in results:
+            for path in shard_paths:
+                paths.setdefault(tuple(path), path)
+        return list(paths.values())
+
+    async def get_subgraph(
+        self,
+        entity_ids: List[str],
+        max_depth: int = 2
+    ) -> Dict[str, Any]:
+        results = await self._fan_out(lambda shard: shard.get_subgraph(entity_ids, max_depth))
+        entities: Dict[str, Dict[str, Any]] = {}
+        relations: Dict[str, Dict[str, Any]] = {}
+        for _, subgraph in results:
+            for entity in subgraph.get("entities", []):
+                entities.setdefault(entity["id"], entity)
+            for relation in subgraph.get("relations", []):
+                relations.setdefault(relation["id"], relation)
+        return {"entities": list(entities.values()), "relations": list(relations.values())}
+
+    def iter_entities(
+        self,
+        entity_type: Optional[str] = None,
+        batch: int = 500,
+        order: str = "id"
+    ) -> AsyncIterator[Entity]:
+        if order == "insertion":
+            return _chain_by_shard([shard.iter_entities(entity_type, batch, order) for shard in self.shards.values()])
+        return _merge_by_id([shard.iter_entities(entity_type, batch) for shard in self.shards.values()])
+
+    def iter_relations(
+        self,
+        relation_type: Optional[str] = None,
+        batch: int = 500
+    ) -> AsyncIterator[Relation]:
+        return _merge_by_id([shard.iter_relations(relation_type, batch) for shard in self.shards.values()])
+
+    async def get_entities_by_document(
+        self,
+        document_id: str,
+        entity_type: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Entity], Optional[str]]:
+        """
+        document_routes 命中時只查該 shard，否則依 shards 順序逐一查詢直到湊滿 limit。
+        cursor 格式為「shard 名稱:該 shard 的 cursor」（冒號後為空表示自該 shard 第一頁開始）
+        """
+        routed = self.document_routes.get(document_id)
+        names = [routed] if routed else list(self.shards)
+        start, inner = 0, None
+        if cursor:
+            name, _, inner_cursor = cursor.partition(":")
+            if name not in names:
+                raise ValueError(f"Invalid cursor for document {document_id}: {cursor}")
+            start, inner = names.index(name), inner_cursor or None
+
+        entities: List[Entity] = []
+        for position in range(start, len(names)):
+            page, next_cursor = await self.shards[names[position]].get_entities_by_document(
+                document_id, entity_type, limit - len(entities), inner if position == start else None
+            )
+            entities.extend(page)
+            if next_cursor is not None:
+                return entities, f"{names[position]}:{next_cursor}"
+            if len(entities) >= limit:
+                following = names[position + 1:]
+                return entities, (f"{following[0]}:" if following else None)
+        return entities, None
+
+    async def get_relations_by_entity(
+        self,
+        entity_id: str,
+        direction: str = "both"
+    ) -> List[Relation]:
+        results = await self._fan_out(lambda shard: shard.get_relations_by_entity(entity_id, direction))
+        merged: Dict[str, Relation] = {}
+        for _, relations in results:
+            for relation in relations:
+                merged.setdefault(relation.id, relation)
+        return list(merged.values())
+
+    async def get_relations_by_entities(
+        self,
+        entity_ids: List[str],
+        direction: str = "both"
+    ) -> Dict[str, Relation]:
+        results = await self._fan_out(lambda shard: shard.get_relations_by_entities(entity_ids, direction))
+        merged: Dict[str, Relation] = {}
+        for _, relations in results:
+            for relation_id, relation in relations.items():
+                merged.setdefault(relation_id, relation)
+        return merged
+
+    async def get_relations_by_type(
+        self,
+        relation_type: str,
+        limit: int = 100
+    ) -> List[Relation]:
+        results = await self._fan_out(lambda shard: shard.get_relations_by_type(relation_type, limit))
+        merged: Dict[str, Relation] = {}
+        for _, relations in results:
+            for relation in relations:
+                merged.setdefault(relation.id, relation)
+        return list(merged.values())[:limit]
+
+    # ---- 統計與重要度 ----
+
+    async def get_statistics(self) -> Dict[str, Any]:
+        return _merge_counts([stats for _, stats in await self._fan_out(lambda shard: shard.get_statistics())])
+
+    async def recompute_statistics(self) -> Dict[str, Any]:
+        return _merge_counts([stats for _, stats in await self._fan_out(lambda shard: shard.recompute_statistics())])
+
+    async def compute_importance(
+        self,
+        damping: float = DEFAULT_DAMPING,
+        max_iterations: int = DEFAULT_MAX_ITERATIONS
+    ) -> Dict[str, Any]:
+        """各 shard 各自計算（關係不跨 shard，PageRank 在各 shard 內獨立收斂）"""
+        results = await self._fan_out(lambda shard: shard.compute_importance(damping, max_iterations))
+        return {
+            "entities": sum(result.get("entities", 0) for _, result in results),
+            "relations": sum(result.get("relations", 0) for _, result in results),
+            "shards": dict(results),
+        }
+
+    async def get_importance_scores(self) -> Dict[str, Tuple[float, Optional[float], int]]:
+        merged: Dict[str, Tuple[float, Optional[float], int]] = {}
+        for _, scores in await self._fan_out(lambda shard: shard.get_importance_scores()):
+            for entity_id, score in scores.items():
+                merged.setdefault(entity_id, score)
+        return merged
+
+    # ---- 快照（每個 shard 一個檔案：<path>.<shard 名稱>） ----
+
+    def shard_snapshot_path(self, path: str, name: str) -> str:
+        return f"{path}.{name}"
+
+    async def export_snapshot(self, path: str) -> Dict[str, Any]:
+        results = await asyncio.gather(*(
+            shard.export_snapshot(self.shard_snapshot_path(path, name)) for name, shard in self.shards.items()
+        ))
+        return {"shards": dict(zip(self.shards, results))}
+
+    async def load_snapshot(self, path: str) -> bool:
+        """載入各 shard 的快照檔；全部 shard 皆採用時回傳 True（缺檔的 shard 視為未採用）"""
+        async def load(name: str, shard: GraphStore) -> bool:
+            shard_path = self.shard_snapshot_path(path, name)
+            if not os.path.exists(shard_path):
+                return False
+            return await shard.load_snapshot(shard_path)
+
+        results = await asyncio.gather(*(load(name, shard) for name, shard in self.shards.items()))
+        return all(results)
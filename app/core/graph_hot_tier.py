@@ -0,0 +1,335 @@
+"""
+GraphStore 常駐記憶體讀取層
+啟動時把持久化 store（通常是 SQLiteGraphStore）整張圖載入已建索引的 MemoryGraphStore，請求路徑的讀取不經 SQLite
+
+更新時間：2026-10-18 18:00
+作者：AI Assistant
+修改摘要：clear_cache 委派給 inner
+
+更新時間：2026-10-18 16:40
+作者：AI Assistant
+修改摘要：依寫入順序自 inner 載入實體並委派 iter_entities 的 order，get_entities_by_type 順序與 inner 一致
+
+更新時間：2026-10-18 05:50
+作者：AI Assistant
+修改摘要：委派 flush；寫入不再以鎖逐一執行（保留 SQLiteGraphStore 寫入佇列的合併提交），
+          重新載入期間完成的寫入記錄後於替換前重放
+
+更新時間：2026-10-18 04:40
+作者：AI Assistant
+修改摘要：建立 HotTierGraphStore：讀取由記憶體回答（get_entity / get_entities_many / get_relation 未命中時回查 inner 並補入），
+          寫入先寫 inner 再套用到記憶體（write-through）；compute_importance 後重新載入重要度分數
+"""
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.graph_importance import DEFAULT_DAMPING, DEFAULT_MAX_ITERATIONS
+from app.core.graph_store import Entity, GraphStore, MemoryGraphStore, Relation
+
+# 載入時每批讀取筆數（iter_entities / iter_relations 的 batch）
+_LOAD_BATCH = 5000
+
+
+class HotTierGraphStore(GraphStore):
+    """
+    以 MemoryGraphStore 作為 inner 的常駐讀取層
+
+    - initialize / reload 時串流 inner 的全部實體、關係與重要度分數，建好後一次替換
+    - 讀取全部由記憶體回答；點查詢（get_entity / get_entities_many / get_relation）未命中時回查 inner
+      （涵蓋其他程序寫入的資料），查詢期間若有寫入則不回填
+    - 寫入先寫 inner，成功者才套用到記憶體；記憶體中缺少關係端點時先自 inner 補入實體
+    - 未定義於 GraphStore 的方法（如 pool_stats、importance_stale）經 __getattr__ 轉交 inner
+    """
+
+    def __init__(self, inner: GraphStore):
+        self.inner = inner
+        self.hot = MemoryGraphStore()
+        self.logger = logging.getLogger("HotTierGraphStore")
+        self._reload_lock = asyncio.Lock()
+        # 重新載入期間套用的寫入（載入完成後重放到新資料）；None 表示未在載入
+        self._replay: Optional[List[Callable[[MemoryGraphStore], Any]]] = None
+        # 寫入前後各遞增一次；回查期間若有寫入則不回填，避免把寫入前讀到的舊值放回記憶體
+        self._generation = 0
+        self.read_through_queries = 0
+        self.load_seconds = 0.0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+    def tier_stats(self) -> Dict[str, Any]:
+        """記憶體層統計（entities / relations / read_through_queries / load_seconds）"""
+        return {
+            "entities": len(self.hot.entities),
+            "relations": len(self.hot.relations),
+            "read_through_queries": self.read_through_queries,
+            "load_seconds": self.load_seconds,
+        }
+
+    # ---- 載入 ----
+
+    async def initialize(self) -> bool:
+        initialized = await self.inner.initialize()
+        if initialized:
+            await self.reload()
+        return initialized
+
+    async def reload(self) -> Dict[str, Any]:
+        """自 inner 重新載入整張圖；載入期間讀取仍由舊資料回答，期間完成的寫入於替換前重放"""
+        async with self._reload_lock:
+            start = time.perf_counter()
+            self._replay = []
+            try:
+                hot = MemoryGraphStore()
+                # 依寫入順序載入，記憶體中 get_entities_by_type / iter_entities(order="insertion") 的順序與 inner 相同
+                async for entity in self.inner.iter_entities(batch=_LOAD_BATCH, order="insertion"):
+                    hot._put_entity(entity)
+                async for relation in self.inner.iter_relations(batch=_LOAD_BATCH):
+                    hot._put_relation(relation)
+                hot.importance = await self.inner.get_importance_scores()
+                for change in self._replay:
+                    change(hot)
+                self.hot = hot
+            finally:
+                self._replay = None
+            self._generation += 1
+            self.load_seconds = time.perf_counter() - start
+        self.logger.info(
+            f"Hot tier loaded: {len(hot.entities)} entities, {len(hot.relations)} relations "
+            f"in {self.load_seconds:.2f}s"
+        )
+        return self.tier_stats()
+
+    def _apply(self, change: Callable[[MemoryGraphStore], Any]) -> None:
+        """套用變更到記憶體；重新載入期間一併記錄，供載入完成後重放"""
+        change(self.hot)
+        if self._replay is not None:
+            self._replay.append(change)
+
+    # ---- 點查詢（未命中回查 inner） ----
+
+    async def get_entity(self, entity_id: str) -> Optional[Entity]:
+        entity = self.hot.entities.get(entity_id)
+        if entity is not None:
+            return entity
+        self.read_through_queries += 1
+        generation = self._generation
+        entity = await self.inner.get_entity(entity_id)
+        if entity is not None and generation == self._generation:
+            self._apply(lambda hot: hot._put_entity(entity))
+        return entity
+
+    async def get_entities_many(self, entity_ids: List[str]) -> Dict[str, Entity]:
+        found = await self.hot.get_entities_many(entity_ids)
+        missing = [entity_id for entity_id in dict.fromkeys(entity_ids) if entity_id not in found]
+        if missing:
+            self.read_through_queries += 1
+            generation = self._generation
+            loaded = await self.inner.get_entities_many(missing)
+            if generation == self._generation:
+                self._apply(lambda hot: [hot._put_entity(entity) for entity in loaded.values()])
+            found.update(loaded)
+        return found
+
+    async def get_relation(self, relation_id: str) -> Optional[Relation]:
+        relation = self.hot.relations.get(relation_id)
+        if relation is not None:
+            return relation
+        self.read_through_queries += 1
+        generation = self._generation
+        relation = await self.inner.get_relation(relation_id)
+        if relation is not None and generation == self._generation:
+            await self._put_relations([relation])
+        return relation
+
+    async def _put_relations(self, relations: List[Relation]) -> None:
+        """套用關係到記憶體；端點不在記憶體時（其他程序寫入）先自 inner 補入"""
+        missing = {
+            entity_id
+            for relation in relations
+            for entity_id in (relation.source_id, relation.target_id)
+            if entity_id not in self.hot.entities
+        }
+        if missing:
+            endpoints = await self.inner.get_entities_many(list(missing))
+            self._apply(lambda hot: [hot._put_entity(entity) for entity in endpoints.values()])
+        self._apply(lambda hot: [hot._put_relation(relation) for relation in relations])
+
+    # ---- 寫入（write-through） ----
+    # 不另加鎖：inner 依序提交（SQLiteGraphStore 的寫入鎖 / 寫入佇列皆為 FIFO），完成後即套用，
+    # 記憶體的套用順序與提交順序一致，並行寫入仍可由寫入佇列合併提交
+
+    async def _write_through(self, write: Awaitable[Any]) -> Any:
+        self._generation += 1
+        try:
+            return await write
+        finally:
+            self._generation += 1
+
+    async def add_entity(self, entity: Entity) -> bool:
+        added = await self._write_through(self.inner.add_entity(entity))
+        if added:
+            self._apply(lambda hot: hot._put_entity(entity))
+        return added
+
+    async def delete_entity(self, entity_id: str) -> bool:
+        deleted = await self._write_through(self.inner.delete_entity(entity_id))
+        if deleted:
+            self._apply(lambda hot: hot._remove_entity(entity_id))
+        return deleted
+
+    async def add_entities_bulk(
+        self,
+        entities: List[Entity],
+        batch_size: Optional[int] = None
+    ) -> List[bool]:
+        results = await self._write_through(self.inner.add_entities_bulk(entities, batch_size))
+        added = [entity for entity, ok in zip(entities, results) if ok]
+        self._apply(lambda hot: [hot._put_entity(entity) for entity in added])
+        return results
+
+    async def add_relation(self, relation: Relation) -> bool:
+        added = await self._write_through(self.inner.add_relation(relation))
+        if added:
+            await self._put_relations([relation])
+        return added
+
+    async def add_relations_bulk(
+        self,
+        relations: List[Relation],
+        batch_size: Optional[int] = None
+    ) -> List[bool]:
+        results = await self._write_through(self.inner.add_relations_bulk(relations, batch_size))
+        await self._put_relations([relation for relation, ok in zip(relations, results) if ok])
+        return results
+
+    async def delete_relation(self, relation_id: str) -> bool:
+        deleted = await self._write_through(self.inner.delete_relation(relation_id))
+        if deleted:
+            self._apply(lambda hot: hot._remove_relation(relation_id))
+        return deleted
+
+    async def compute_importance(
+        self,
+        damping: float = DEFAULT_DAMPING,
+        max_iterations: int = DEFAULT_MAX_ITERATIONS
+    ) -> Dict[str, Any]:
+        result = await self.inner.compute_importance(damping, max_iterations)
+        self.hot.importance = await self.inner.get_importance_scores()
+        return result
+
+    # ---- 記憶體讀取 ----
+
+    async def get_entities_by_type(self, entity_type: str, limit: int = 100) -> List[Entity]:
+        return await self.hot.get_entities_by_type(entity_type, limit)
+
+    def iter_entities(
+        self,
+        entity_type: Optional[str] = None,
+        batch: int = 500,
+        order: str = "id"
+    ) -> AsyncIterator[Entity]:
+        return self.hot.iter_entities(entity_type, batch, order)
+
+    def iter_relations(
+        self,
+        relation_type: Optional[str] = None,
+        batch: int = 500
+    ) -> AsyncIterator[Relation]:
+        return self.hot.iter_relations(relation_type, batch)
+
+    async def get_entities_by_document(
+        self,
+        document_id: str,
+        entity_type: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Entity], Optional[str]]:
+        return await self.hot.get_entities_by_document(document_id, entity_type, limit, cursor)
+
+    async def search_entities(
+        self,
+        query: str,
+        limit: int = 10,
+        *,
+        include_type_match: bool = True,
+        order_by: str = "name"
+    ) -> List[Entity]:
+        return await self.hot.search_entities(
+            query, limit, include_type_match=include_type_match, order_by=order_by
+        )
+
+    async def get_neighbors(
+        self,
+        entity_id: str,
+        relation_type: Optional[str] = None,
+        direction: str = "both",
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Entity]:
+        return await self.hot.get_neighbors(entity_id, relation_type, direction, order_by, limit)
+
+    async def get_path(
+        self,
+        source_id: str,
+        target_id: str,
+        max_hops: int = 3
+    ) -> List[List[str]]:
+        return await self.hot.get_path(source_id, target_id, max_hops)
+
+    async def get_subgraph(
+        self,
+        entity_ids: List[str],
+        max_depth: int = 2
+    ) -> Dict[str, Any]:
+        return await self.hot.get_subgraph(entity_ids, max_depth)
+
+    async def get_statistics(self) -> Dict[str, Any]:
+        return await self.hot.get_statistics()
+
+    async def get_importance_scores(self) -> Dict[str, Tuple[float, Optional[float], int]]:
+        return await self.hot.get_importance_scores()
+
+    async def get_relations_by_entity(
+        self,
+        entity_id: str,
+        direction: str = "both"
+    ) -> List[Relation]:
+        return await self.hot.get_relations_by_entity(entity_id, direction)
+
+    async def get_relations_by_entities(
+        self,
+        entity_ids: List[str],
+        direction: str = "both"
+    ) -> Dict[str, Relation]:
+        return await self.hot.get_relations_by_entities(entity_ids, direction)
+
+    async def get_relations_by_type(
+        self,
+        relation_type: str,
+        limit: int = 100
+    ) -> List[Relation]:
+        return await self.hot.get_relations_by_type(relation_type, limit)
+
+    # ---- 直接委派 ----
+
+    async def recompute_statistics(self) -> Dict[str, Any]:
+        return await self.inner.recompute_statistics()
+
+    async def flush(self) -> None:
+        await self.inner.flush()
+
+    def clear_cache(self) -> int:
+        # 常駐的 hot store 是資料本身而非快取，只清除 inner 的快取
+        return self.inner.clear_cache()
+
+    async def export_snapshot(self, path: str) -> Dict[str, Any]:
+        return await self.inner.export_snapshot(path)
+
+    async def load_snapshot(self, path: str) -> bool:
+        return await self.inner.load_snapshot(path)
+
+    async def close(self):
+        if hasattr(self.inner, "close"):
+            await self.inner.close()
@@ -0,0 +1,303 @@
+"""
+圖結構二進位快照（匯出 / 記憶體映射載入）
+建置映像時由資料庫匯出一次，服務啟動時以 mmap 載入，不需重新掃描 relations 建立鄰接快照
+
+更新時間：2026-10-17 23:50
+作者：AI Assistant
+修改摘要：建立快照格式 v1：字串表（interning）、實體 / 關係欄位陣列、原始 JSON properties、
+          CSR 鄰接陣列；檔頭含格式版本與 SHA-256 校驗，載入時各區段以 memoryview 直接映射
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.graph_adjacency import AdjacencySnapshot
+
+MAGIC = b"CRGSNAP\x00"
+FORMAT_VERSION = 1
+
+# 檔頭：magic、格式版本、區段數、SHA-256（涵蓋檔頭之後的全部內容）
+_HEADER = struct.Struct("<8sII32s")
+# 區段目錄：名稱、array typecode、檔案內位移、位元組數
+_SECTION = struct.Struct("<16s4sQQ")
+# 區段起點對齊（memoryview.cast 後的元素不跨越對齊邊界）
+_ALIGN = 8
+
+# 實體參數順序（與 SQLiteGraphStore._entity_params 一致）
+# (id, type, name, properties_json, created_at, updated_at, document_id)
+EntityParams = Tuple[str, str, str, str, str, str, Optional[str]]
+# 關係參數順序（與 SQLiteGraphStore._relation_params 一致）
+# (id, source_id, target_id, type, properties_json, weight, created_at)
+RelationParams = Tuple[str, str, str, str, str, float, str]
+
+
+class SnapshotWriter:
+    """
+    快照寫入器：逐筆收集實體與關係，write() 時一次編碼寫檔
+
+    - 所有字串（id、類型、名稱、時間戳、document_id）集中於字串表，其餘區段只存索引
+    - properties 保留原始 JSON 位元組，載入後沿用 Entity / Relation 的延遲解碼
+    - 關係以 relations.rowid 識別，鄰接陣列與 AdjacencySnapshot 相同
+    """
+
+    def __init__(self):
+        self._entities: List[EntityParams] = []
+        self._relations: List[Tuple[int, RelationParams]] = []
+
+    def add_entity(self, params: EntityParams) -> None:
+        self._entities.append(params)
+
+    def add_relation(self, rowid: int, params: RelationParams) -> None:
+        self._relations.append((rowid, params))
+
+    def write(self, path: str, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """寫入快照（先寫暫存檔再 rename，不會留下半寫入的檔案），回傳 meta"""
+        strings: Dict[str, int] = {}
+        str_blob = bytearray()
+        str_offsets = array("q", [0])
+
+        def intern(value: Optional[str]) -> int:
+            if value is None:
+                return -1
+            idx = strings.get(value)
+            if idx is None:
+                idx = strings[value] = len(strings)
+                str_blob.extend(value.encode("utf-8"))
+                str_offsets.append(len(str_blob))
+            return idx
+
+        # 實體依 id 排序，載入後可二分搜尋
+        entities = sorted(self._entities, key=lambda params: params[0])
+        ent_cols = [array("i") for _ in range(6)]
+        ent_props, ent_prop_offsets = bytearray(), array("q", [0])
+        for entity_id, entity_type, name, properties, created_at, updated_at, document_id in entities:
+            for column, value in zip(ent_cols, (entity_id, entity_type, name, created_at, updated_at, document_id)):
+                column.append(intern(value))
+            ent_props.extend(properties.encode("utf-8"))
+            ent_prop_offsets.append(len(ent_props))
+
+        # 關係依 rowid 排序（AdjacencySnapshot.build 的前提）
+        relations = sorted(self._relations, key=lambda item: item[0])
+        rel_rowids, rel_weights = array("q"), array("d")
+        rel_cols = [array("i") for _ in range(5)]
+        rel_props, rel_prop_offsets = bytearray(), array("q", [0])
+        for rowid, (relation_id, source_id, target_id, relation_type, properties, weight, created_at) in relations:
+            rel_rowids.append(rowid)
+            for column, value in zip(rel_cols, (relation_id, source_id, target_id, relation_type, created_at)):
+                column.append(intern(value))
+            rel_weights.append(weight if weight is not None else 1.0)
+            rel_props.extend(properties.encode("utf-8"))
+            rel_prop_offsets.append(len(rel_props))
+
+        adjacency = AdjacencySnapshot.build(
+            (rowid, params[1], params[2], params[3]) for rowid, params in relations
+        )
+
+        meta = dict(meta or {})
+        meta.update({
+            "format_version": FORMAT_VERSION,
+            "byteorder": sys.byteorder,
+            "entities": len(entities),
+            "relations": len(relations),
+            "strings": len(strings),
+        })
+
+        sections: List[Tuple[str, str, Any]] = [
+            ("meta", "B", json.dumps(meta, ensure_ascii=False).encode("utf-8")),
+            ("str_offsets", "q", str_offsets),
+            ("str_blob", "B", str_blob),
+            ("ent_id", "i", ent_cols[0]),
+            ("ent_type", "i", ent_cols[1]),
+            ("ent_name", "i", ent_cols[2]),
+            ("ent_created", "i", ent_cols[3]),
+            ("ent_updated", "i", ent_cols[4]),
+            ("ent_document", "i", ent_cols[5]),
+            ("ent_prop_offsets", "q", ent_prop_offsets),
+            ("ent_props", "B", ent_props),
+            ("rel_rowid", "q", rel_rowids),
+            ("rel_id", "i", rel_cols[0]),
+            ("rel_source", "i", rel_cols[1]),
+            ("rel_target", "i", rel_cols[2]),
+            ("rel_type", "i", rel_cols[3]),
+            ("rel_created", "i", rel_cols[4]),
+            ("rel_weight", "d", rel_weights),
+            ("rel_prop_offsets", "q", rel_prop_offsets),
+            ("rel_props", "B", rel_props),
+            ("adj_nodes", "i", array("i", map(strings.__getitem__, adjacency.node_ids))),
+            ("adj_types", "i", array("i", map(strings.__getitem__, adjacency.type_names))),
+            ("out_offsets", "i", adjacency.out_offsets),
+            ("out_targets", "i", adjacency.out_targets),
+            ("out_edges", "q", adjacency.out_edges),
+            ("out_types", "H", adjacency.out_types),
+            ("in_offsets", "i", adjacency.in_offsets),
+            ("in_sources", "i", adjacency.in_sources),
+            ("in_edges", "q", adjacency.in_edges),
+            ("in_types", "H", adjacency.in_types),
+        ]
+
+        directory = bytearray()
+        payload = bytearray()
+        base = _HEADER.size + _SECTION.size * len(sections)
+        for name, typecode, data in sections:
+            payload.extend(b"\x00" * (-(base + len(payload)) % _ALIGN))
+            data = memoryview(data).cast("B")
+            directory.extend(_SECTION.pack(name.encode("ascii"), typecode.encode("ascii"), base + len(payload), len(data)))
+            payload.extend(data)
+
+        digest = hashlib.sha256(directory)
+        digest.update(payload)
+        header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(sections), digest.digest())
+
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(target.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(directory)
+            f.write(payload)
+        os.replace(tmp_path, target)
+        meta["bytes"] = len(header) + len(directory) + len(payload)
+        return meta
+
+
+class GraphSnapshot:
+    """
+    以 mmap 開啟的唯讀快照
+
+    各區段為指向映射記憶體的 memoryview，不複製資料；字串與 properties 於存取時才解碼。
+    版本不符、位元組序不同或校驗失敗時拋出 ValueError。
+    """
+
+    def __init__(self, path: str, verify: bool = True):
+        self.path = str(path)
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        if len(view) < _HEADER.size:
+            raise ValueError(f"Graph snapshot too small: {path}")
+        magic, version, section_count, digest = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a graph snapshot: {path}")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported graph snapshot version {version} (expected {FORMAT_VERSION}): {path}")
+        if verify and hashlib.sha256(view[_HEADER.size:]).digest() != digest:
+            raise ValueError(f"Graph snapshot checksum mismatch: {path}")
+
+        self._sections: Dict[str, memoryview] = {}
+        for i in range(section_count):
+            name, typecode, offset, size = _SECTION.unpack_from(view, _HEADER.size + i * _SECTION.size)
+            typecode = typecode.rstrip(b"\x00").decode("ascii")
+            self._sections[name.rstrip(b"\x00").decode("ascii")] = view[offset:offset + size].cast(typecode)
+
+        self.meta: Dict[str, Any] = json.loads(bytes(self._sections["meta"]))
+        if self.meta.get("byteorder") != sys.byteorder:
+            raise ValueError(f"Graph snapshot byte order {self.meta.get('byteorder')} does not match host: {path}")
+
+        self._str_offsets = self._sections["str_offsets"]
+        self._str_blob = self._sections["str_blob"]
+
+    @property
+    def entity_count(self) -> int:
+        return self.meta["entities"]
+
+    @property
+    def relation_count(self) -> int:
+        return self.meta["relations"]
+
+    def string(self, idx: int) -> Optional[str]:
+        """字串表第 idx 項（-1 表示 None）"""
+        if idx < 0:
+            return None
+        return str(self._str_blob[self._str_offsets[idx]:self._str_offsets[idx + 1]], "utf-8")
+
+    @staticmethod
+    def _blob(offsets: memoryview, blob: memoryview, idx: int) -> str:
+        return str(blob[offsets[idx]:offsets[idx + 1]], "utf-8")
+
+    def _entity_row(self, i: int) -> Dict[str, Any]:
+        s = self._sections
+        return {
+            "id": self.string(s["ent_id"][i]),
+            "type": self.string(s["ent_type"][i]),
+            "name": self.string(s["ent_name"][i]),
+            "properties": self._blob(s["ent_prop_offsets"], s["ent_props"], i),
+            "created_at": self.string(s["ent_created"][i]),
+            "updated_at": self.string(s["ent_updated"][i]),
+            "document_id": self.string(s["ent_document"][i]),
+        }
+
+    def strings(self) -> List[str]:
+        """一次解碼整個字串表（全量載入時使用，避免逐筆切片解碼）"""
+        blob = bytes(self._str_blob)
+        offsets = self._str_offsets
+        return [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+    def entity_rows(self) -> Iterator[Dict[str, Any]]:
+        """依 id 順序產生實體資料列（欄位同 entities 表，可直接交給 Entity.from_row）"""
+        s = self._sections
+        strings = self.strings() + [None]  # 索引 -1 對應 None
+        props, prop_offsets = bytes(s["ent_props"]), s["ent_prop_offsets"]
+        columns = zip(s["ent_id"], s["ent_type"], s["ent_name"], s["ent_created"], s["ent_updated"], s["ent_document"])
+        for i, (entity_id, entity_type, name, created_at, updated_at, document_id) in enumerate(columns):
+            yield {
+                "id": strings[entity_id],
+                "type": strings[entity_type],
+                "name": strings[name],
+                "properties": props[prop_offsets[i]:prop_offsets[i + 1]].decode("utf-8"),
+                "created_at": strings[created_at],
+                "updated_at": strings[updated_at],
+                "document_id": strings[document_id],
+            }
+
+    def find_entity_row(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        """以二分搜尋取得單一實體資料列"""
+        ids = self._sections["ent_id"]
+        lo, hi = 0, self.entity_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.string(ids[mid]) < entity_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.entity_count and self.string(ids[lo]) == entity_id:
+            return self._entity_row(lo)
+        return None
+
+    def relation_rows(self) -> Iterator[Dict[str, Any]]:
+        """依 rowid 順序產生關係資料列（含 _rowid，可直接交給 Relation.from_row）"""
+        s = self._sections
+        strings = self.strings()
+        props, prop_offsets = bytes(s["rel_props"]), s["rel_prop_offsets"]
+        columns = zip(
+            s["rel_rowid"], s["rel_id"], s["rel_source"], s["rel_target"],
+            s["rel_type"], s["rel_weight"], s["rel_created"],
+        )
+        for i, (rowid, relation_id, source_id, target_id, relation_type, weight, created_at) in enumerate(columns):
+            yield {
+                "_rowid": rowid,
+                "id": strings[relation_id],
+                "source_id": strings[source_id],
+                "target_id": strings[target_id],
+                "type": strings[relation_type],
+                "properties": props[prop_offsets[i]:prop_offsets[i + 1]].decode("utf-8"),
+                "weight": weight,
+                "created_at": strings[created_at],
+            }
+
+    def adjacency(self, version: int = 0) -> AdjacencySnapshot:
+        """以映射中的 CSR 陣列建立 AdjacencySnapshot（僅解碼節點 id 與類型名稱）"""
+        s = self._sections
+        return AdjacencySnapshot(
+            [self.string(idx) for idx in s["adj_nodes"]],
+            [self.string(idx) for idx in s["adj_types"]],
+            s["out_offsets"], s["out_targets"], s["out_edges"], s["out_types"],
+            s["in_offsets"], s["in_sources"], s["in_edges"], s["in_types"],
+            version=version,
+        )
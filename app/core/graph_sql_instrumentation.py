@@ -0,0 +1,232 @@
+"""
+GraphStore SQL 語句量測
+包裝 aiosqlite 連線與 cursor：每個語句計時並記錄於 Prometheus（依發出語句的 SQLiteGraphStore 方法名稱標記），
+超過門檻的語句以 WARNING 記錄（參數只記錄型別與長度，不寫入日誌內容），並可註冊監聽器取得每個語句（供 EXPLAIN 稽核）
+
+更新時間：2026-10-18 09:20
+作者：AI Assistant
+修改摘要：建立 SQLInstrumentation / InstrumentedConnection / InstrumentedCursor；語句耗時含 execute 與其後的 fetch，
+          於下一個語句、fetchall 或 cursor 關閉時結算
+"""
+import logging
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.utils.metrics import GRAPH_SQL_LATENCY
+
+# 監聽器：(方法名稱, SQL, 參數, 耗時秒數)；executemany 時參數為第一列
+StatementListener = Callable[[str, str, Any, float], None]
+
+# 不在 SQLiteGraphStore 方法內發出的語句（寫入佇列背景工作的 BEGIN / SAVEPOINT、腳本與測試直接使用 store.conn）
+OTHER_METHOD = "other"
+
+_WHITESPACE = re.compile(r"\s+")
+# 「?,?,?...」（IN 查詢佔位符）於日誌中摺疊為 ?×n
+_PLACEHOLDER_RUN = re.compile(r"\?(?:\s*,\s*\?){3,}")
+
+
+def normalize_sql(sql: str) -> str:
+    """壓縮空白、摺疊長串佔位符（日誌與稽核報告用）"""
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    return _PLACEHOLDER_RUN.sub(lambda m: f"?×{m.group(0).count('?')}", sql)
+
+
+def redact_params(params: Any) -> str:
+    """以型別與長度取代參數值（ID、問答內容等不寫入日誌）"""
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{key}: {_redact_value(value)}" for key, value in params.items()) + "}"
+    return "(" + ", ".join(_redact_value(value) for value in params) + ")"
+
+
+def _redact_value(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+class SQLInstrumentation:
+    """
+    單一 store 的語句量測設定與結算
+
+    - owner：方法名稱取自呼叫堆疊中最外層、qualname 以「owner.」開頭的 frame
+      （寫入佇列背景工作執行的操作為 add_entity.<locals>.op 等閉包，取其所屬方法）
+    - slow_query_ms：超過此毫秒數記錄 WARNING；<= 0 不記錄
+    """
+
+    def __init__(self, owner: str, slow_query_ms: float, logger: Optional[logging.Logger] = None):
+        self.owner_prefix = f"{owner}."
+        self.slow_seconds = slow_query_ms / 1000 if slow_query_ms > 0 else None
+        self.logger = logger or logging.getLogger("GraphSQL")
+        self.listeners: List[StatementListener] = []
+        # code 物件 -> 方法名稱（不屬於 owner 者為空字串）
+        self._method_by_code: Dict[Any, str] = {}
+        # 方法名稱 -> 已標記的 histogram（labels() 每次查找的成本高於 observe 本身）
+        self._histograms: Dict[str, Any] = {}
+
+    def wrap(self, conn: Any) -> "InstrumentedConnection":
+        return InstrumentedConnection(conn, self)
+
+    def caller_method(self) -> str:
+        """呼叫堆疊中最外層的 owner 方法名稱"""
+        method = ""
+        frame = sys._getframe(1)
+        cache = self._method_by_code
+        while frame is not None:
+            code = frame.f_code
+            name = cache.get(code)
+            if name is None:
+                qualname = getattr(code, "co_qualname", code.co_name)
+                name = qualname[len(self.owner_prefix):].split(".", 1)[0] if qualname.startswith(self.owner_prefix) else ""
+                cache[code] = name
+            if name:
+                method = name
+            frame = frame.f_back
+        return method or OTHER_METHOD
+
+    def record(self, method: str, sql: str, params: Any, seconds: float, rows: int = 1) -> None:
+        histogram = self._histograms.get(method)
+        if histogram is None:
+            histogram = self._histograms[method] = GRAPH_SQL_LATENCY.labels(method=method)
+        histogram.observe(seconds)
+        if self.slow_seconds is not None and seconds >= self.slow_seconds:
+            detail = f"{rows} rows, first {redact_params(params)}" if rows != 1 else redact_params(params)
+            self.logger.warning(f"Slow SQL {seconds * 1000:.1f} ms in {method}: {normalize_sql(sql)} params={detail}")
+        for listener in self.listeners:
+            listener(method, sql, params, seconds)
+
+
+class InstrumentedCursor:
+    """
+    計時的 aiosqlite cursor
+
+    語句耗時 = execute + 其後 fetchone / fetchall / fetchmany 的時間；
+    於下一個 execute、fetchall 或 close 時結算（同一 cursor 依序執行多個語句時各自計算）
+    """
+
+    __slots__ = ("_cursor", "_instrumentation", "_pending")
+
+    def __init__(self, cursor: Any, instrumentation: SQLInstrumentation):
+        self._cursor = cursor
+        self._instrumentation = instrumentation
+        self._pending: Optional[List[Any]] = None  # [method, sql, params, seconds, rows]
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    async def __aenter__(self) -> "InstrumentedCursor":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _finish(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            self._instrumentation.record(*pending)
+
+    async def execute(self, sql: str, parameters: Optional[Sequence[Any]] = None) -> "InstrumentedCursor":
+        self._finish()
+        method = self._instrumentation.caller_method()
+        start = time.perf_counter()
+        try:
+            await self._cursor.execute(sql, parameters)
+        finally:
+            self._pending = [method, sql, parameters, time.perf_counter() - start, 1]
+        return self
+
+    async def executemany(self, sql: str, parameters: Sequence[Sequence[Any]]) -> "InstrumentedCursor":
+        self._finish()
+        method = self._instrumentation.caller_method()
+        rows = parameters if isinstance(parameters, list) else list(parameters)
+        start = time.perf_counter()
+        try:
+            await self._cursor.executemany(sql, rows)
+        finally:
+            self._pending = [method, sql, rows[0] if rows else None, time.perf_counter() - start, len(rows)]
+            self._finish()
+        return self
+
+    async def _timed_fetch(self, fetch: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return await fetch()
+        finally:
+            if self._pending is not None:
+                self._pending[3] += time.perf_counter() - start
+
+    async def fetchone(self) -> Any:
+        return await self._timed_fetch(self._cursor.fetchone)
+
+    async def fetchmany(self, size: Optional[int] = None) -> Any:
+        return await self._timed_fetch(lambda: self._cursor.fetchmany(size))
+
+    async def fetchall(self) -> Any:
+        rows = await self._timed_fetch(self._cursor.fetchall)
+        self._finish()
+        return rows
+
+    async def close(self) -> None:
+        self._finish()
+        await self._cursor.close()
+
+
+class _CursorContext:
+    """conn.cursor() / conn.execute() 的回傳值：可 await 取得 cursor，也可 async with（離開時關閉）"""
+
+    __slots__ = ("_conn", "_instrumentation", "_sql", "_parameters", "_cursor")
+
+    def __init__(self, conn: Any, instrumentation: SQLInstrumentation, sql: Optional[str] = None, parameters: Any = None):
+        self._conn = conn
+        self._instrumentation = instrumentation
+        self._sql = sql
+        self._parameters = parameters
+        self._cursor: Optional[InstrumentedCursor] = None
+
+    async def _open(self) -> InstrumentedCursor:
+        cursor = InstrumentedCursor(await self._conn.cursor(), self._instrumentation)
+        if self._sql is not None:
+            await cursor.execute(self._sql, self._parameters)
+        return cursor
+
+    async def _open_settled(self) -> InstrumentedCursor:
+        # 直接 await（不以 async with 關閉）時於 execute 後立即結算，避免語句因 cursor 未關閉而漏記
+        cursor = await self._open()
+        cursor._finish()
+        return cursor
+
+    def __await__(self):
+        return self._open_settled().__await__()
+
+    async def __aenter__(self) -> InstrumentedCursor:
+        self._cursor = await self._open()
+        return self._cursor
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._cursor.close()
+
+
+class InstrumentedConnection:
+    """以 InstrumentedCursor 取代 cursor() / execute() 的 aiosqlite 連線包裝；其餘屬性轉交原連線"""
+
+    def __init__(self, conn: Any, instrumentation: SQLInstrumentation):
+        self._inner = conn
+        self._instrumentation = instrumentation
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    @property
+    def inner(self) -> Any:
+        return self._inner
+
+    def cursor(self) -> _CursorContext:
+        return _CursorContext(self._inner, self._instrumentation)
+
+    def execute(self, sql: str, parameters: Optional[Sequence[Any]] = None) -> _CursorContext:
+        return _CursorContext(self._inner, self._instrumentation, sql, parameters)
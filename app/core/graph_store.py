@@ -1,6 +1,132 @@
 """
 GraphRAG 圖結構儲存系統
 
+更新時間：2026-10-18 20:40
+作者：AI Assistant
+修改摘要：移除未使用的 Iterable 匯入
+
+更新時間：2026-10-18 20:00
+作者：AI Assistant
+修改摘要：唯讀連線池 waited 改為取用前池已空即計入（原本以取得後池是否為空與耗時判斷，漏計已歸還的等待、誤計排程延遲）
+
+更新時間：2026-10-18 19:20
+作者：AI Assistant
+修改摘要：relations_version 更新觸發器加上 WHEN（端點或類型實際變更時才遞增，v1 / v2 皆同），既有資料庫啟動時重建；
+          重複寫入相同關係不再使二進位快照與實體重要度過期
+
+更新時間：2026-10-18 18:00
+作者：AI Assistant
+修改摘要：GraphStore 新增 clear_cache()（預設回傳 0），各包裝層逐層委派，/cache/clear 不再依具體型別判斷
+
+更新時間：2026-10-18 17:00
+作者：AI Assistant
+修改摘要：MemoryGraphStore.get_path / get_subgraph 改為與 SQLite 遞迴 CTE 相同語意：套用 GRAPH_TRAVERSAL_MAX_NODES /
+          GRAPH_TRAVERSAL_MAX_EDGES 並於截斷時記錄警告，路徑不再共用全域 visited（熱層讀取不再無界擴展熱點實體）
+
+更新時間：2026-10-18 16:40
+作者：AI Assistant
+修改摘要：iter_entities 新增 order="insertion"（SQLite 以 rowid keyset 分頁），恢復 (type) 索引，
+          get_entities_by_type 明確依 rowid 排序，與原本依寫入順序回傳一致
+
+更新時間：2026-10-18 16:20
+作者：AI Assistant
+修改摘要：Entity 新增 properties_size()：未解碼時以原始 JSON 長度估計大小，快取計量不再觸發 properties 解碼
+
+更新時間：2026-10-18 09:20
+作者：AI Assistant
+修改摘要：SQLiteGraphStore 的寫入與唯讀連線以 InstrumentedConnection 包裝（GRAPH_SQL_METRICS_ENABLED，見 graph_sql_instrumentation）：
+          每個語句的耗時依方法名稱記錄於 Prometheus，超過 GRAPH_SLOW_QUERY_MS 者記錄慢查詢（參數已遮蔽）
+
+更新時間：2026-10-18 08:10
+作者：AI Assistant
+修改摘要：SQLiteGraphStore 新增唯讀模式（GRAPH_DB_READONLY 或 readonly=True）：以 mode=ro&immutable=1 開啟寫入與唯讀連線，
+          套用 mmap_size / cache_size，略過 WAL 切換與 _create_tables（改由 _inspect_schema 偵測結構版本與 FTS），
+          寫入與維護作業拋出 ReadOnlyStoreError
+
+更新時間：2026-10-18 05:50
+作者：AI Assistant
+修改摘要：SQLiteGraphStore 寫入改以「對 cursor 執行的操作」經 _write 執行；GRAPH_WRITE_QUEUE_ENABLED 時由 GroupCommitQueue
+          （見 graph_write_queue）把多個協程的寫入合併為一個交易，提交後才回傳；新增 flush；
+          寫入與 recompute_statistics / compute_importance / rebuild_fts_index / migrate_to_schema_v2 以 _write_lock 互斥，
+          不再於共用連線上交錯 commit / rollback；_existing_entity_ids 改由唯讀連線查詢
+
+更新時間：2026-10-18 04:40
+作者：AI Assistant
+修改摘要：MemoryGraphStore 維護類型 / 文件 / 鄰接（有序集合，刪除 O(1)）/ 名稱 bigram 索引與類型計數，
+          get_entities_by_type、get_entities_by_document、search_entities、get_statistics 不再掃描或排序全部實體，
+          作為 HotTierGraphStore（見 graph_hot_tier）的常駐讀取層；新增 get_importance_scores 供記憶體層載入重要度
+
+更新時間：2026-10-18 03:30
+作者：AI Assistant
+修改摘要：新增 compute_importance（離線計算全域 / 文件內 PageRank 與度數，寫入 entity_importance，見 graph_importance）；
+          get_neighbors 新增 order_by="importance" 與 limit，依預先算好的分數排序後截斷；
+          MemoryGraphStore.get_neighbors 改以實體 ID 字典去重
+
+更新時間：2026-10-18 02:20
+作者：AI Assistant
+修改摘要：新增 get_relations_by_entities：多個實體的關係一次取得並依關係 ID 去重（SQLite 單一查詢 / 快照 rowid 批次取得）；
+          MemoryGraphStore.get_subgraph 改以關係 ID 字典去重，消除 relation not in list 的 O(n²) 線性比對
+
+更新時間：2026-10-18 01:10
+作者：AI Assistant
+修改摘要：新增可選的精簡結構 v2（PRAGMA user_version = 2，新資料庫由 GRAPH_DB_SCHEMA_VERSION 決定，既有資料庫以
+          scripts/migrate_graph_schema_v2.py 轉換）：entity_store / relation_store 以整數 pk 為內部鍵，關係端點存實體 pk、
+          關係類型存 relation_types 代碼，時間戳為 epoch 微秒整數，question / answer / code 自 properties 提升為欄位；
+          entities / relations 改為相容檢視表，讀取 SQL 不變（提升欄位由 Entity.from_row 延遲合併回 properties），
+          寫入與 get_neighbors 依結構版本選用 SQL（v2 直接以 pk 連接）
+
+更新時間：2026-10-17 23:50
+作者：AI Assistant
+修改摘要：新增 export_snapshot / load_snapshot（二進位快照，見 graph_snapshot）；SQLiteGraphStore 可指定 snapshot_path，
+          啟動時驗證快照與資料庫一致（graph_meta.relations_version 由觸發器於關係寫入時遞增）後直接採用其 CSR 鄰接陣列
+
+更新時間：2026-10-17 23:20
+作者：AI Assistant
+修改摘要：新增 graph_stats 統計表（觸發器隨寫入增減各類型計數），get_statistics 改讀統計表、不再全表 COUNT / GROUP BY；
+          新增 recompute_statistics() 重算統計表；關係寫入改為 UPSERT，使取代既有關係時觸發器計數正確
+
+更新時間：2026-10-17 22:10
+作者：AI Assistant
+修改摘要：新增 iter_entities / iter_relations 非同步串流（依 id keyset 分頁，每批各自取讀取連線），取代一次載入上萬筆；
+          類型索引改為 (type, id) 以支援依類型分頁
+
+更新時間：2026-10-17 21:00
+作者：AI Assistant
+修改摘要：entities 新增 document_id 欄位與索引（既有資料庫自動 ALTER 並由 properties.document_id / QA id 回填），
+          Entity 新增 document_id 屬性；新增 get_entities_by_document(document_id, entity_type, limit, cursor) 分頁查詢
+
+更新時間：2026-10-17 19:50
+作者：AI Assistant
+修改摘要：Entity / Relation 改為 __slots__ 類別，新增 from_row：properties 與時間戳保留原始字串、首次存取才解碼
+          （to_dict / from_dict / 建構子參數不變）；寫入時未解碼的 properties 直接沿用原始 JSON
+
+更新時間：2026-10-17 17:30
+作者：AI Assistant
+修改摘要：SQLiteGraphStore 可選記憶體內 CSR 鄰接快照（GRAPH_ADJACENCY_SNAPSHOT，見 graph_adjacency.py），
+          get_neighbors / get_relations_by_entity / get_path / get_subgraph 走訪改由快照完成，僅以主鍵批次取回資料；
+          拓撲寫入遞增圖版本使快照失效，過期期間退回 SQL 並於背景重建
+
+更新時間：2026-10-17 16:10
+作者：AI Assistant
+修改摘要：SQLiteGraphStore.get_path / get_subgraph 改為 WITH RECURSIVE 單一查詢走訪（遵守 max_hops / max_depth），
+          以 GRAPH_TRAVERSAL_MAX_NODES / GRAPH_TRAVERSAL_MAX_EDGES 限制熱點實體的走訪規模；MemoryGraphStore BFS 改用 deque
+
+更新時間：2026-10-17 15:00
+作者：AI Assistant
+修改摘要：SQLiteGraphStore 啟用 WAL；讀取改走唯讀連線池（大小由 GRAPH_DB_READ_POOL_SIZE 設定），寫入維持單一連線；連線等待時間輸出至 Prometheus 並可由 pool_stats() 查詢
+
+更新時間：2026-10-17 13:20
+作者：AI Assistant
+修改摘要：search_entities 改走 FTS5 trigram 索引 entities_fts（觸發器同步、支援 CJK，查詢長度 < 3 退回 LIKE），新增 order_by="rank"；實體寫入改為 UPSERT 以保留 rowid；既有資料庫首次初始化自動 rebuild 索引
+
+更新時間：2026-10-17 11:05
+作者：AI Assistant
+修改摘要：新增 get_entities_many 批次取得實體；get_neighbors 改為 relations JOIN entities 單一查詢，get_subgraph 改為逐層批次查詢，消除逐筆 get_entity 的 N+1；資料列轉換集中於 _row_to_entity / _row_to_relation
+
+更新時間：2026-10-17 09:40
+作者：AI Assistant
+修改摘要：新增 add_entities_bulk / add_relations_bulk 批次寫入 API（每批單一交易 executemany，回傳逐筆成功與否），取代匯入流程逐筆 commit
+
 更新時間：2026-03-20 12:10
 作者：AI Assistant
 修改摘要：search_entities 新增參數 include_type_match（預設 True 維持相容）；False 時僅比對 name，避免查詢 token 與圖譜 type（如 Organization）誤匹配造成假陽性（見 docs/bug/missfind.md）
@@ -9,14 +135,19 @@ GraphRAG 圖結構儲存系統
 作者：AI Assistant
 修改摘要：添加 get_all_entities() 和 get_all_relations() 方法，支援獲取所有實體和關係
 """
+import heapq
 import json
+import time
 import uuid
 import asyncio
 import logging
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, asdict
-from datetime import datetime
-from typing import Dict, List, Optional, Any, Tuple
+from array import array
+from collections import deque
+from itertools import islice
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 
 try:
@@ -25,25 +156,509 @@ except ImportError:
     aiosqlite = None
 
 from app.config import settings
+from app.core.exceptions import ReadOnlyStoreError
+from app.core.graph_adjacency import AdjacencySnapshot
+from app.core.graph_importance import DEFAULT_DAMPING, DEFAULT_MAX_ITERATIONS, compute_importance
+from app.core.graph_snapshot import GraphSnapshot, SnapshotWriter
+from app.core.graph_sql_instrumentation import SQLInstrumentation
+from app.core.graph_write_queue import GroupCommitQueue, WriteOp, run_write_ops
+from app.utils.metrics import GRAPH_READ_POOL_WAIT
 
 logger = logging.getLogger("GraphStore")
 
+# 寫入 SQL（單筆與批次共用）
+# 實體與關係皆使用 UPSERT（而非 INSERT OR REPLACE）：保留 rowid，並讓 UPDATE 觸發器同步 FTS 索引與 graph_stats
+# （REPLACE 隱含的刪除在未開啟 recursive_triggers 時不會觸發 DELETE 觸發器）
+_ENTITY_UPSERT_SQL = """
+    INSERT INTO entities (id, type, name, properties, created_at, updated_at, document_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        type = excluded.type,
+        name = excluded.name,
+        properties = excluded.properties,
+        created_at = excluded.created_at,
+        updated_at = excluded.updated_at,
+        document_id = excluded.document_id
+"""
+_RELATION_UPSERT_SQL = """
+    INSERT INTO relations (id, source_id, target_id, type, properties, weight, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        source_id = excluded.source_id,
+        target_id = excluded.target_id,
+        type = excluded.type,
+        properties = excluded.properties,
+        weight = excluded.weight,
+        created_at = excluded.created_at
+"""
+
+# 結構版本（PRAGMA user_version）：v1 為原始 TEXT 結構（舊資料庫 user_version 為 0，視同 v1），v2 為精簡結構
+SCHEMA_V1 = 1
+SCHEMA_V2 = 2
+# v2 自 properties 提升為欄位的常用欄位（僅字串值提升，其餘型別留在 properties JSON）
+_HOT_PROPERTIES = ("question", "answer", "code")
+# v2 時間戳：naive datetime 與 1970-01-01 的微秒差（帶時區者先轉 UTC）
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# v2 實體表：pk 即 rowid；properties 只存未提升的欄位，為空時存 NULL
+# v2 關係表：source / target 為實體 pk、type 為 relation_types 代碼；刪除實體時由觸發器級聯刪除關係
+_SCHEMA_V2_TABLES_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS entity_store (
+        pk INTEGER PRIMARY KEY,
+        id TEXT NOT NULL UNIQUE,
+        type TEXT NOT NULL,
+        name TEXT NOT NULL,
+        document_id TEXT,
+        question TEXT,
+        answer TEXT,
+        code TEXT,
+        properties TEXT,
+        created_at INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_entity_store_type ON entity_store(type)",
+    "CREATE INDEX IF NOT EXISTS idx_entity_store_type_id ON entity_store(type, id)",
+    "CREATE INDEX IF NOT EXISTS idx_entity_store_name ON entity_store(name)",
+    "CREATE INDEX IF NOT EXISTS idx_entity_store_document ON entity_store(document_id)",
+    # 關係檢視表以 pk 換 id 時的覆蓋索引，避免為了 id 讀取含答案全文的資料列
+    "CREATE INDEX IF NOT EXISTS idx_entity_store_pk_id ON entity_store(pk, id)",
+    """
+    CREATE TABLE IF NOT EXISTS relation_types (
+        pk INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS relation_store (
+        pk INTEGER PRIMARY KEY,
+        id TEXT NOT NULL UNIQUE,
+        source INTEGER NOT NULL,
+        target INTEGER NOT NULL,
+        type INTEGER NOT NULL,
+        properties TEXT,
+        weight REAL DEFAULT 1.0,
+        created_at INTEGER NOT NULL,
+        CHECK (source != target)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_relation_store_source ON relation_store(source)",
+    "CREATE INDEX IF NOT EXISTS idx_relation_store_target ON relation_store(target)",
+    "CREATE INDEX IF NOT EXISTS idx_relation_store_type_id ON relation_store(type, id)",
+    """
+    CREATE TRIGGER IF NOT EXISTS entity_store_cascade_ad AFTER DELETE ON entity_store BEGIN
+        DELETE FROM relation_store WHERE source = old.pk OR target = old.pk;
+    END
+    """,
+]
+
+
+# v2 相容檢視表：欄位與 v1 資料表相同（另含 rowid 欄），既有讀取 SQL 不需修改；
+# entities 的 properties 只含未提升欄位，提升欄位另列於後，由 Entity.from_row(hot_columns=True) 延遲合併
+_SCHEMA_V2_VIEWS_SQL = [
+    f"""
+    CREATE VIEW IF NOT EXISTS entities AS
+    SELECT e.pk AS rowid, e.id, e.type, e.name, e.properties,
+           e.created_at, e.updated_at, e.document_id, {", ".join(f"e.{field}" for field in _HOT_PROPERTIES)}
+    FROM entity_store e
+    """,
+    """
+    CREATE VIEW IF NOT EXISTS relations AS
+    SELECT r.pk AS rowid, r.id, s.id AS source_id, t.id AS target_id, rt.name AS type,
+           COALESCE(r.properties, '{}') AS properties, r.weight, r.created_at
+    FROM relation_store r
+    JOIN entity_store s ON s.pk = r.source
+    JOIN entity_store t ON t.pk = r.target
+    JOIN relation_types rt ON rt.pk = r.type
+    """,
+]
+
+_ENTITY_UPSERT_V2_SQL = """
+    INSERT INTO entity_store (id, type, name, document_id, question, answer, code, properties, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        type = excluded.type,
+        name = excluded.name,
+        document_id = excluded.document_id,
+        question = excluded.question,
+        answer = excluded.answer,
+        code = excluded.code,
+        properties = excluded.properties,
+        created_at = excluded.created_at,
+        updated_at = excluded.updated_at
+"""
+_RELATION_TYPE_INTERN_SQL = "INSERT OR IGNORE INTO relation_types (name) VALUES (?)"
+# 端點與類型以子查詢換成 pk；端點不存在時為 NULL，違反 NOT NULL 而寫入失敗
+_RELATION_UPSERT_V2_SQL = """
+    INSERT INTO relation_store (id, source, target, type, properties, weight, created_at)
+    VALUES (
+        ?,
+        (SELECT pk FROM entity_store WHERE id = ?),
+        (SELECT pk FROM entity_store WHERE id = ?),
+        (SELECT pk FROM relation_types WHERE name = ?),
+        ?, ?, ?
+    )
+    ON CONFLICT(id) DO UPDATE SET
+        source = excluded.source,
+        target = excluded.target,
+        type = excluded.type,
+        properties = excluded.properties,
+        weight = excluded.weight,
+        created_at = excluded.created_at
+"""
+# IN (...) 查詢每段最多參數數（低於舊版 SQLite 999 上限）
+_SQL_IN_CHUNK = 500
+
+# 遞迴 CTE 走訪：路徑字串以 char(31)（unit separator）分隔實體 id，供循環檢查與切分
+_PATH_SEP = "\x1f"
+_MAX_PATHS = 100
+
+# get_path：有向、無環、依 hop 數由小到大（ORDER BY depth 使 CTE 佇列為 BFS 順序）；
+# LIMIT 限制走訪列數，走到目標即停止延伸
+_PATH_CTE_SQL = """
+    WITH RECURSIVE walk(node, path, depth) AS (
+        SELECT :source, char(31) || :source || char(31), 0
+        UNION ALL
+        SELECT r.target_id, w.path || r.target_id || char(31), w.depth + 1
+        FROM walk w JOIN relations r ON r.source_id = w.node
+        WHERE w.depth < :max_hops
+          AND w.node != :target
+          AND instr(w.path, char(31) || r.target_id || char(31)) = 0
+        ORDER BY 3
+        LIMIT :max_rows
+    )
+    SELECT COUNT(*) AS visits,
+           json_group_array(path) FILTER (WHERE node = :target AND depth > 0) AS paths
+    FROM walk
+"""
+
+# get_subgraph：自起點（json 陣列）雙向擴展至 max_depth，(node, depth) 以 UNION 去重；
+# 回傳每個節點與其實體資料（不存在者 e.* 為 NULL），visits 為總走訪列數（判斷是否截斷）
+_SUBGRAPH_NODES_CTE_SQL = """
+    WITH RECURSIVE walk(node, depth) AS (
+        SELECT value, 0 FROM json_each(:seeds)
+        UNION
+        SELECT r.target_id, w.depth + 1
+        FROM walk w JOIN relations r ON r.source_id = w.node
+        WHERE w.depth < :max_depth
+        UNION
+        SELECT r.source_id, w.depth + 1
+        FROM walk w JOIN relations r ON r.target_id = w.node
+        WHERE w.depth < :max_depth
+        ORDER BY 2
+        LIMIT :max_rows
+    ),
+    visited AS (
+        SELECT node, SUM(COUNT(*)) OVER () AS visits FROM walk GROUP BY node
+    )
+    SELECT v.node AS node, v.visits AS visits, e.*
+    FROM visited v LEFT JOIN entities e ON e.id = v.node
+"""
+
+# 子圖關係：與任一已拜訪節點相連的關係（多取一筆以判斷是否超過上限）
+_SUBGRAPH_RELATIONS_SQL = """
+    SELECT r.* FROM relations r WHERE r.source_id IN (SELECT value FROM json_each(:nodes))
+    UNION
+    SELECT r.* FROM relations r WHERE r.target_id IN (SELECT value FROM json_each(:nodes))
+    LIMIT :max_edges
+"""
+
+# 多個實體的關係（id 陣列以 json_each 傳入，不受參數數量上限影響）；both 時兩段 UNION ALL，由呼叫端依 id 去重
+_RELATIONS_BY_ENTITIES_SQL = {
+    "outgoing": "SELECT * FROM relations WHERE source_id IN (SELECT value FROM json_each(?))",
+    "incoming": "SELECT * FROM relations WHERE target_id IN (SELECT value FROM json_each(?))",
+}
+
+# FTS5 trigram 全文索引（external content 指向 entities，觸發器維持同步）
+# {table} 為內容表：v1 為 entities，v2 為 entity_store
+_FTS_TABLE_SQL = """
+    CREATE VIRTUAL TABLE entities_fts USING fts5(
+        name, type,
+        content='{table}', content_rowid='rowid',
+        tokenize='trigram'
+    )
+"""
+_FTS_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS entities_fts_ai AFTER INSERT ON {table} BEGIN
+        INSERT INTO entities_fts(rowid, name, type) VALUES (new.rowid, new.name, new.type);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entities_fts_ad AFTER DELETE ON {table} BEGIN
+        INSERT INTO entities_fts(entities_fts, rowid, name, type)
+        VALUES ('delete', old.rowid, old.name, old.type);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entities_fts_au AFTER UPDATE OF name, type ON {table} BEGIN
+        INSERT INTO entities_fts(entities_fts, rowid, name, type)
+        VALUES ('delete', old.rowid, old.name, old.type);
+        INSERT INTO entities_fts(rowid, name, type) VALUES (new.rowid, new.name, new.type);
+    END
+    """,
+]
+# trigram 分詞器最短可索引查詢長度（更短的查詢改走 LIKE）
+_FTS_MIN_QUERY_CHARS = 3
+
+
+def _fts_phrase(query: str) -> str:
+    """將查詢字串轉為 FTS5 phrase（雙引號跳脫），trigram 下等同子字串比對"""
+    return '"' + query.replace('"', '""') + '"'
+
+
+# 圖統計表：kind 為 entity / relation，每個類型一列；觸發器隨寫入增減，計數歸零的類型即刪除
+_GRAPH_STATS_TABLE_SQL = """
+    CREATE TABLE graph_stats (
+        kind TEXT NOT NULL,
+        type TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (kind, type)
+    ) WITHOUT ROWID
+"""
+_GRAPH_STATS_KINDS = {"entities": "entity", "relations": "relation"}
+
+
+def _graph_stats_triggers(table: str, kind: str, type_of: str = "{row}.type") -> List[str]:
+    """
+    產生 table 的 graph_stats 維護觸發器（新增 / 刪除 / 變更類型）；
+    type_of 為由 new / old 取得類型名稱的運算式（v2 關係類型為代碼，需查 relation_types）
+    """
+    new_type, old_type = type_of.format(row="new"), type_of.format(row="old")
+    increment = f"""
+        INSERT INTO graph_stats (kind, type, count) VALUES ('{kind}', {new_type}, 1)
+        ON CONFLICT(kind, type) DO UPDATE SET count = count + 1;
+    """
+    decrement = f"""
+        UPDATE graph_stats SET count = count - 1 WHERE kind = '{kind}' AND type = {old_type};
+        DELETE FROM graph_stats WHERE kind = '{kind}' AND type = {old_type} AND count <= 0;
+    """
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_stats_ai AFTER INSERT ON {table} BEGIN {increment} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_stats_ad AFTER DELETE ON {table} BEGIN {decrement} END",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_stats_au AFTER UPDATE OF type ON {table}
+            WHEN old.type IS NOT new.type BEGIN {decrement} {increment} END""",
+    ]
+
+
+# 圖中繼資料：relations_version 於關係新增 / 刪除 / 端點或類型變更時遞增，供二進位快照判斷是否仍與資料庫一致
+_GRAPH_META_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS graph_meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    ) WITHOUT ROWID
+"""
+_RELATIONS_VERSION_BUMP = "UPDATE graph_meta SET value = value + 1 WHERE key = 'relations_version';"
+
+# 實體重要度（compute_importance 整批重寫）；graph_meta.importance_relations_version 記錄計算時的 relations_version
+_ENTITY_IMPORTANCE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS entity_importance (
+        entity_id TEXT PRIMARY KEY,
+        pagerank REAL NOT NULL,
+        doc_pagerank REAL,
+        degree INTEGER NOT NULL
+    ) WITHOUT ROWID
+"""
+_ENTITY_IMPORTANCE_INSERT_SQL = (
+    "INSERT INTO entity_importance (entity_id, pagerank, doc_pagerank, degree) VALUES (?, ?, ?, ?)"
+)
+# get_neighbors(order_by="importance")：鄰居（UNION 去重）依重要度排序；未計算者視為 0，同分依 id
+_NEIGHBORS_BY_IMPORTANCE_SQL = """
+    SELECT n.* FROM ({neighbors}) n
+    LEFT JOIN entity_importance i ON i.entity_id = n.id
+    ORDER BY COALESCE(i.pagerank, 0) DESC, COALESCE(i.degree, 0) DESC, n.id
+"""
+
+
+def _graph_meta_triggers(table: str, columns: List[str]) -> List[str]:
+    """
+    產生 table 的 relations_version 觸發器；columns 為影響拓撲的欄位（端點與類型）。
+    UPSERT 的 DO UPDATE 即使值未變也會觸發 UPDATE OF，故只在任一欄位實際變更時遞增（重複匯入相同關係不使快照 / 重要度過期）
+    """
+    changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column in columns)
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_ai AFTER INSERT ON {table} BEGIN {_RELATIONS_VERSION_BUMP} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_ad AFTER DELETE ON {table} BEGIN {_RELATIONS_VERSION_BUMP} END",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_version_au AFTER UPDATE OF {", ".join(columns)} ON {table}
+            WHEN {changed} BEGIN {_RELATIONS_VERSION_BUMP} END""",
+    ]
+
+
+# 延遲解碼欄位的「尚未解碼」標記（與合法值 None 區分）
+_UNDECODED = object()
+
+
+def _decode_json(raw: Optional[str]) -> Dict[str, Any]:
+    return json.loads(raw) if raw else {}
+
+
+def _decode_entity_properties(raw: Any) -> Dict[str, Any]:
+    """實體 properties 解碼：v1 為 JSON 字串；v2 為 (未提升 JSON, *提升欄位) tuple，非 NULL 的提升欄位補回"""
+    if not isinstance(raw, tuple):
+        return _decode_json(raw)
+    properties = _decode_json(raw[0])
+    for field, value in zip(_HOT_PROPERTIES, raw[1:]):
+        if value is not None:
+            properties[field] = value
+    return properties
+
+
+def _decode_timestamp(raw: Any) -> Optional[datetime]:
+    """ISO 字串（v1）或 epoch 微秒整數（v2）轉 datetime"""
+    if raw is None or raw == "":
+        return None
+    if isinstance(raw, int):
+        # timedelta 乘法比 timedelta(microseconds=...) 建構快約一倍，與 fromisoformat 相當
+        return _EPOCH + _MICROSECOND * raw
+    return datetime.fromisoformat(raw)
+
+
+def _to_epoch_us(value: datetime) -> int:
+    """datetime 轉 v2 epoch 微秒整數（與 _decode_timestamp 互逆）"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // _MICROSECOND
+
 
-@dataclass
 class Entity:
-    """實體類別"""
-    id: str
-    type: str
-    name: str
-    properties: Dict[str, Any]
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
-    
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.now()
-        if self.updated_at is None:
-            self.updated_at = datetime.now()
+    """
+    實體類別
+    
+    使用 __slots__ 節省記憶體；由資料列建立（from_row）時 properties 與時間戳保留原始字串，
+    首次存取才解碼（QA 實體的 properties 含完整答案，多數呼叫端只需要 id / name）
+    """
+    __slots__ = (
+        "id", "type", "name", "document_id",
+        "_properties", "_raw_properties",
+        "_created_at", "_raw_created_at",
+        "_updated_at", "_raw_updated_at",
+    )
+    
+    def __init__(
+        self,
+        id: str,
+        type: str,
+        name: str,
+        properties: Dict[str, Any],
+        created_at: Optional[datetime] = None,
+        updated_at: Optional[datetime] = None,
+        document_id: Optional[str] = None
+    ):
+        self.id = id
+        self.type = type
+        self.name = name
+        # 所屬文件（entities.document_id 欄位，有索引）；未指定時沿用 properties["document_id"]
+        if document_id is None and isinstance(properties, dict):
+            document_id = properties.get("document_id")
+        self.document_id = document_id
+        self._properties = properties
+        self._raw_properties = None
+        self._created_at = created_at if created_at is not None else datetime.now()
+        self._raw_created_at = None
+        self._updated_at = updated_at if updated_at is not None else datetime.now()
+        self._raw_updated_at = None
+    
+    @classmethod
+    def from_row(cls, row: Any, hot_columns: bool = False) -> "Entity":
+        """
+        由 entities 資料列建立實體（不解碼 properties / 時間戳）
+        
+        hot_columns 為 True 時（結構 v2）資料列另含提升欄位，與 properties 一併保留至首次存取才合併
+        """
+        entity = cls.__new__(cls)
+        entity.id = row["id"]
+        entity.type = row["type"]
+        entity.name = row["name"]
+        entity.document_id = row["document_id"]
+        entity._properties = _UNDECODED
+        # 順序須與 _HOT_PROPERTIES 一致（逐欄展開，避免每列建立產生器）
+        entity._raw_properties = (
+            (row["properties"], row["question"], row["answer"], row["code"])
+            if hot_columns else row["properties"]
+        )
+        entity._created_at = _UNDECODED
+        entity._raw_created_at = row["created_at"]
+        entity._updated_at = _UNDECODED
+        entity._raw_updated_at = row["updated_at"]
+        return entity
+    
+    @property
+    def properties(self) -> Dict[str, Any]:
+        if self._properties is _UNDECODED:
+            self._properties = _decode_entity_properties(self._raw_properties)
+            self._raw_properties = None
+        return self._properties
+    
+    @properties.setter
+    def properties(self, value: Dict[str, Any]):
+        self._properties = value
+        self._raw_properties = None
+    
+    @property
+    def created_at(self) -> Optional[datetime]:
+        if self._created_at is _UNDECODED:
+            self._created_at = _decode_timestamp(self._raw_created_at)
+            self._raw_created_at = None
+        return self._created_at
+    
+    @created_at.setter
+    def created_at(self, value: Optional[datetime]):
+        self._created_at = value
+        self._raw_created_at = None
+    
+    @property
+    def updated_at(self) -> Optional[datetime]:
+        if self._updated_at is _UNDECODED:
+            self._updated_at = _decode_timestamp(self._raw_updated_at)
+            self._raw_updated_at = None
+        return self._updated_at
+    
+    @updated_at.setter
+    def updated_at(self, value: Optional[datetime]):
+        self._updated_at = value
+        self._raw_updated_at = None
+    
+    def properties_json(self) -> str:
+        """properties 的 JSON 字串；尚未解碼且為 v1 原始字串時直接回傳，避免 loads 後再 dumps"""
+        if self._properties is _UNDECODED and isinstance(self._raw_properties, str):
+            return self._raw_properties
+        return json.dumps(self.properties, ensure_ascii=False)
+    
+    def properties_size(self) -> int:
+        """
+        properties 的大小估計（字元數，供快取計量）；尚未解碼時以原始 JSON（與 v2 提升欄位）長度計算，不觸發解碼，
+        已解碼時為第一層鍵與字串值的長度（非字串值以 64 計）
+        """
+        if self._properties is _UNDECODED:
+            raw = self._raw_properties
+            parts = raw if isinstance(raw, tuple) else (raw,)
+            return sum(len(part) if isinstance(part, str) else 64 for part in parts if part is not None)
+        return sum(
+            len(key) + (len(value) if isinstance(value, str) else 64)
+            for key, value in (self._properties or {}).items()
+        )
+    
+    def _fields(self) -> Tuple[Any, ...]:
+        return (
+            self.id, self.type, self.name, self.properties,
+            self.created_at, self.updated_at, self.document_id
+        )
+    
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+    
+    __hash__ = None  # 與原 dataclass 相同：可變物件不可雜湊
+    
+    def __repr__(self) -> str:
+        return (
+            f"Entity(id={self.id!r}, type={self.type!r}, name={self.name!r}, "
+            f"properties={self.properties!r}, created_at={self.created_at!r}, updated_at={self.updated_at!r}, "
+            f"document_id={self.document_id!r})"
+        )
     
     def to_dict(self) -> Dict[str, Any]:
         """轉換為字典"""
@@ -53,7 +668,8 @@ class Entity:
             "name": self.name,
             "properties": self.properties,
             "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "document_id": self.document_id
         }
     
     @classmethod
@@ -65,26 +681,109 @@ class Entity:
             name=data["name"],
             properties=data.get("properties", {}),
             created_at=datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None,
-            updated_at=datetime.fromisoformat(data["updated_at"]) if data.get("updated_at") else None
+            updated_at=datetime.fromisoformat(data["updated_at"]) if data.get("updated_at") else None,
+            document_id=data.get("document_id")
         )
 
 
-@dataclass
 class Relation:
-    """關係類別"""
-    id: str
-    source_id: str
-    target_id: str
-    type: str
-    properties: Dict[str, Any]
-    weight: float = 1.0
-    created_at: Optional[datetime] = None
-    
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.now()
-        if self.source_id == self.target_id:
+    """
+    關係類別
+    
+    與 Entity 相同：__slots__，from_row 建立時 properties 與 created_at 延遲解碼
+    """
+    __slots__ = (
+        "id", "source_id", "target_id", "type", "weight",
+        "_properties", "_raw_properties",
+        "_created_at", "_raw_created_at",
+    )
+    
+    def __init__(
+        self,
+        id: str,
+        source_id: str,
+        target_id: str,
+        type: str,
+        properties: Dict[str, Any],
+        weight: float = 1.0,
+        created_at: Optional[datetime] = None
+    ):
+        if source_id == target_id:
             raise ValueError("Source and target cannot be the same entity")
+        self.id = id
+        self.source_id = source_id
+        self.target_id = target_id
+        self.type = type
+        self.weight = weight
+        self._properties = properties
+        self._raw_properties = None
+        self._created_at = created_at if created_at is not None else datetime.now()
+        self._raw_created_at = None
+    
+    @classmethod
+    def from_row(cls, row: Any) -> "Relation":
+        """由 relations 資料列建立關係（不解碼 properties / 時間戳）"""
+        relation = cls.__new__(cls)
+        relation.id = row["id"]
+        relation.source_id = row["source_id"]
+        relation.target_id = row["target_id"]
+        relation.type = row["type"]
+        relation.weight = row["weight"]
+        relation._properties = _UNDECODED
+        relation._raw_properties = row["properties"]
+        relation._created_at = _UNDECODED
+        relation._raw_created_at = row["created_at"]
+        return relation
+    
+    @property
+    def properties(self) -> Dict[str, Any]:
+        if self._properties is _UNDECODED:
+            self._properties = _decode_json(self._raw_properties)
+            self._raw_properties = None
+        return self._properties
+    
+    @properties.setter
+    def properties(self, value: Dict[str, Any]):
+        self._properties = value
+        self._raw_properties = None
+    
+    @property
+    def created_at(self) -> Optional[datetime]:
+        if self._created_at is _UNDECODED:
+            self._created_at = _decode_timestamp(self._raw_created_at)
+            self._raw_created_at = None
+        return self._created_at
+    
+    @created_at.setter
+    def created_at(self, value: Optional[datetime]):
+        self._created_at = value
+        self._raw_created_at = None
+    
+    def properties_json(self) -> str:
+        """properties 的 JSON 字串；尚未解碼時直接回傳原始字串"""
+        if self._properties is _UNDECODED and self._raw_properties is not None:
+            return self._raw_properties
+        return json.dumps(self.properties, ensure_ascii=False)
+    
+    def _fields(self) -> Tuple[Any, ...]:
+        return (
+            self.id, self.source_id, self.target_id, self.type,
+            self.properties, self.weight, self.created_at
+        )
+    
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+    
+    __hash__ = None  # 與原 dataclass 相同：可變物件不可雜湊
+    
+    def __repr__(self) -> str:
+        return (
+            f"Relation(id={self.id!r}, source_id={self.source_id!r}, target_id={self.target_id!r}, "
+            f"type={self.type!r}, properties={self.properties!r}, weight={self.weight!r}, "
+            f"created_at={self.created_at!r})"
+        )
     
     def to_dict(self) -> Dict[str, Any]:
         """轉換為字典"""
@@ -112,6 +811,21 @@ class Relation:
         )
 
 
+def _row_to_entity(row: Any) -> Entity:
+    """將 entities 資料列轉為 Entity（properties / 時間戳延遲解碼）"""
+    return Entity.from_row(row)
+
+
+def _row_to_entity_v2(row: Any) -> Entity:
+    """結構 v2 entities 檢視表資料列轉實體（含提升欄位）"""
+    return Entity.from_row(row, hot_columns=True)
+
+
+def _row_to_relation(row: Any) -> Relation:
+    """將 relations 資料列轉為 Relation（properties / 時間戳延遲解碼）"""
+    return Relation.from_row(row)
+
+
 class GraphStore(ABC):
     """圖儲存抽象介面"""
     
@@ -130,6 +844,19 @@ class GraphStore(ABC):
         """取得實體"""
         pass
     
+    @abstractmethod
+    async def get_entities_many(self, entity_ids: List[str]) -> Dict[str, Entity]:
+        """
+        批次取得實體
+        
+        Args:
+            entity_ids: 實體 ID 列表（可重複）
+        
+        Returns:
+            {entity_id: Entity}，不存在的 ID 不會出現在結果中
+        """
+        pass
+    
     @abstractmethod
     async def delete_entity(self, entity_id: str) -> bool:
         """刪除實體（級聯刪除關係）"""
@@ -140,6 +867,42 @@ class GraphStore(ABC):
         """新增關係"""
         pass
     
+    @abstractmethod
+    async def add_entities_bulk(
+        self,
+        entities: List[Entity],
+        batch_size: Optional[int] = None
+    ) -> List[bool]:
+        """
+        批次新增實體
+        
+        Args:
+            entities: 實體列表
+            batch_size: 每批筆數（每批一個交易；預設 settings.GRAPH_BULK_BATCH_SIZE）
+        
+        Returns:
+            與 entities 等長的成功旗標列表
+        """
+        pass
+    
+    @abstractmethod
+    async def add_relations_bulk(
+        self,
+        relations: List[Relation],
+        batch_size: Optional[int] = None
+    ) -> List[bool]:
+        """
+        批次新增關係（來源或目標實體不存在者標記為失敗）
+        
+        Args:
+            relations: 關係列表
+            batch_size: 每批筆數（每批一個交易；預設 settings.GRAPH_BULK_BATCH_SIZE）
+        
+        Returns:
+            與 relations 等長的成功旗標列表
+        """
+        pass
+    
     @abstractmethod
     async def get_relation(self, relation_id: str) -> Optional[Relation]:
         """取得關係"""
@@ -157,12 +920,18 @@ class GraphStore(ABC):
     
     @abstractmethod
     async def search_entities(
-        self, query: str, limit: int = 10, *, include_type_match: bool = True
+        self,
+        query: str,
+        limit: int = 10,
+        *,
+        include_type_match: bool = True,
+        order_by: str = "name"
     ) -> List[Entity]:
         """
         搜尋實體。
         include_type_match=True：name 或 type 子字串匹配（既有行為）。
         include_type_match=False：僅 name 匹配；供 graph 關鍵字 fallback，避免英文 token 命中 schema 類名。
+        order_by="name"：依 name 排序（既有行為）；order_by="rank"：依相關度排序（name 命中優先、較短名稱優先）。
         """
         pass
     
@@ -171,9 +940,18 @@ class GraphStore(ABC):
         self,
         entity_id: str,
         relation_type: Optional[str] = None,
-        direction: str = "both"
+        direction: str = "both",
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None
     ) -> List[Entity]:
-        """取得實體的鄰居節點"""
+        """
+        取得實體的鄰居節點
+        
+        Args:
+            order_by: "importance" 時依 compute_importance 預先算好的重要度（PageRank、度數）由高至低排序；
+                      其餘值維持實作原本的順序
+            limit: 最多回傳筆數（None 不限制）；搭配 order_by="importance" 即保留最重要的鄰居
+        """
         pass
     
     @abstractmethod
@@ -195,6 +973,54 @@ class GraphStore(ABC):
         """取得包含指定實體的子圖"""
         pass
     
+    @abstractmethod
+    def iter_entities(
+        self,
+        entity_type: Optional[str] = None,
+        batch: int = 500,
+        order: str = "id"
+    ) -> AsyncIterator[Entity]:
+        """
+        逐批串流所有實體（keyset 分頁：每批 WHERE id > 上一批最後 id）
+        
+        Args:
+            entity_type: 實體類型（可選）
+            batch: 每批筆數
+            order: "id" 依 id 排序；"insertion" 依寫入順序（SQLite 為 rowid，與 get_entities_by_type 相同）
+        """
+        pass
+    
+    @abstractmethod
+    def iter_relations(
+        self,
+        relation_type: Optional[str] = None,
+        batch: int = 500
+    ) -> AsyncIterator[Relation]:
+        """逐批串流所有關係（依 id 排序，keyset 分頁）"""
+        pass
+    
+    @abstractmethod
+    async def get_entities_by_document(
+        self,
+        document_id: str,
+        entity_type: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Entity], Optional[str]]:
+        """
+        取得屬於指定文件的實體（依 document_id 索引查詢，依寫入順序分頁）
+        
+        Args:
+            document_id: 文件 ID
+            entity_type: 實體類型（可選，如 "QA"）
+            limit: 每頁筆數
+            cursor: 上一頁回傳的 next_cursor（None 表示第一頁）
+        
+        Returns:
+            (實體列表, next_cursor)；next_cursor 為 None 表示已無下一頁
+        """
+        pass
+    
     @abstractmethod
     async def get_statistics(self) -> Dict[str, Any]:
         """
@@ -209,6 +1035,72 @@ class GraphStore(ABC):
         """
         pass
     
+    async def recompute_statistics(self) -> Dict[str, Any]:
+        """
+        重新計算統計資訊（維護增量統計的實作覆寫此方法；預設直接回傳 get_statistics）
+        
+        Returns:
+            與 get_statistics 相同格式的字典
+        """
+        return await self.get_statistics()
+    
+    async def flush(self) -> None:
+        """提交尚在佇列中的寫入並等待完成（關閉前呼叫；無寫入佇列的實作不需動作）"""
+        return None
+    
+    def clear_cache(self) -> int:
+        """清空讀取快取，回傳清除的項目數（無快取的實作回傳 0；包裝層委派給內層 store）"""
+        return 0
+    
+    @abstractmethod
+    async def compute_importance(
+        self,
+        damping: float = DEFAULT_DAMPING,
+        max_iterations: int = DEFAULT_MAX_ITERATIONS
+    ) -> Dict[str, Any]:
+        """
+        離線計算每個實體的重要度（全域 PageRank、文件內 PageRank、度數）並保存，供 get_neighbors(order_by="importance") 使用
+        
+        Returns:
+            計算摘要（entities、relations、iterations 等）
+        """
+        pass
+    
+    async def get_importance_scores(self) -> Dict[str, Tuple[float, Optional[float], int]]:
+        """
+        取得 compute_importance 保存的全部分數（供記憶體讀取層載入；未計算或不支援時為空字典）
+        
+        Returns:
+            {entity_id: (pagerank, doc_pagerank, degree)}
+        """
+        return {}
+    
+    @abstractmethod
+    async def export_snapshot(self, path: str) -> Dict[str, Any]:
+        """
+        將整個圖匯出為二進位快照（格式見 app.core.graph_snapshot）
+        
+        Args:
+            path: 快照檔案路徑
+        
+        Returns:
+            快照 meta（entities / relations / bytes 等）
+        """
+        pass
+    
+    @abstractmethod
+    async def load_snapshot(self, path: str) -> bool:
+        """
+        載入二進位快照
+        
+        Args:
+            path: 快照檔案路徑
+        
+        Returns:
+            是否採用快照（格式錯誤或與現有資料不一致時回傳 False）
+        """
+        pass
+    
     @abstractmethod
     async def get_relations_by_entity(
         self,
@@ -227,6 +1119,27 @@ class GraphStore(ABC):
         """
         pass
     
+    async def get_relations_by_entities(
+        self,
+        entity_ids: List[str],
+        direction: str = "both"
+    ) -> Dict[str, Relation]:
+        """
+        批次獲取多個實體的關係，依關係 ID 去重（預設逐一呼叫 get_relations_by_entity；實作可覆寫為單一查詢）
+        
+        Args:
+            entity_ids: 實體 ID 列表
+            direction: 關係方向 ("incoming", "outgoing", "both")
+        
+        Returns:
+            關係 ID -> 關係（每個關係只出現一次；順序依實作而定）
+        """
+        relations: Dict[str, Relation] = {}
+        for entity_id in entity_ids:
+            for relation in await self.get_relations_by_entity(entity_id, direction):
+                relations.setdefault(relation.id, relation)
+        return relations
+    
     @abstractmethod
     async def get_relations_by_type(
         self,
@@ -249,10 +1162,41 @@ class GraphStore(ABC):
 class SQLiteGraphStore(GraphStore):
     """SQLite 圖儲存實作"""
     
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        snapshot_path: Optional[str] = None,
+        readonly: Optional[bool] = None
+    ):
         self.db_path = db_path or settings.GRAPH_DB_PATH
+        # 唯讀模式（預設依 GRAPH_DB_READONLY）：建置時產生、服務期間不寫入的資料庫以 immutable 開啟
+        self.readonly = settings.GRAPH_DB_READONLY if readonly is None else readonly
+        # 建置時匯出的二進位快照；存在且與資料庫一致時，啟動直接採用其鄰接陣列
+        self.snapshot_path = snapshot_path
         self.conn: Optional[Any] = None
         self.logger = logging.getLogger("SQLiteGraphStore")
+        # FTS5 trigram 索引是否可用（由 _create_tables 偵測）
+        self._fts_enabled = False
+        # 結構版本（由 _create_tables 偵測）；v2 的實際資料表為 entity_store / relation_store
+        self._schema_version = SCHEMA_V1
+        # 唯讀連線池（WAL 模式下並行讀取；None 表示讀取共用寫入連線）
+        self._read_pool: Optional[asyncio.Queue] = None
+        self._read_conns: List[Any] = []
+        self._pool_stats: Dict[str, float] = {"acquires": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+        # 記憶體內 CSR 鄰接快照（GRAPH_ADJACENCY_SNAPSHOT 啟用時建立）；
+        # 拓撲寫入會遞增 _graph_version，快照版本不符時退回 SQL 並於背景重建
+        self._graph_version = 0
+        self._adjacency: Optional[AdjacencySnapshot] = None
+        self._adjacency_task: Optional[asyncio.Task] = None
+        # 寫入連線上的交易互斥（寫入操作、寫入佇列的合併提交與維護作業共用）
+        self._write_lock = asyncio.Lock()
+        # GRAPH_WRITE_QUEUE_ENABLED 時由 initialize 建立（group commit）；None 表示每個寫入單獨一個交易
+        self._write_queue: Optional[GroupCommitQueue] = None
+        # 語句量測（initialize 開啟的連線皆經此包裝）；None 表示不包裝。稽核腳本可於 initialize 前替換並註冊監聽器
+        self.sql_instrumentation: Optional[SQLInstrumentation] = (
+            SQLInstrumentation("SQLiteGraphStore", settings.GRAPH_SLOW_QUERY_MS)
+            if settings.GRAPH_SQL_METRICS_ENABLED else None
+        )
         
         if aiosqlite is None:
             raise ImportError("aiosqlite is required for SQLiteGraphStore. Install it with: pip install aiosqlite")
@@ -260,25 +1204,385 @@ class SQLiteGraphStore(GraphStore):
     async def initialize(self) -> bool:
         """初始化資料庫"""
         try:
-            # 確保目錄存在
-            db_dir = Path(self.db_path).parent
-            db_dir.mkdir(parents=True, exist_ok=True)
+            if self.readonly:
+                # 不可變資料庫：不建表、不切換日誌模式，連線池不依賴 WAL
+                journal_mode = "immutable"
+                self.conn = await self._connect_readonly()
+                await self._inspect_schema()
+                await self._open_read_pool(settings.GRAPH_DB_READ_POOL_SIZE)
+            else:
+                # 確保目錄存在
+                db_dir = Path(self.db_path).parent
+                db_dir.mkdir(parents=True, exist_ok=True)
+                
+                conn = await aiosqlite.connect(self.db_path)
+                conn.row_factory = aiosqlite.Row
+                self.conn = self._instrument(conn)
+                
+                # WAL：讀取不阻塞寫入，唯讀連線可並行查詢
+                journal_mode = await self._enable_wal()
+                
+                # 建立資料表
+                await self._create_tables()
+                
+                if journal_mode == "wal":
+                    await self._open_read_pool(settings.GRAPH_DB_READ_POOL_SIZE)
             
-            self.conn = await aiosqlite.connect(self.db_path)
-            self.conn.row_factory = aiosqlite.Row
+            if settings.GRAPH_WRITE_QUEUE_ENABLED and not self.readonly:
+                self._write_queue = GroupCommitQueue(
+                    self.conn, self._write_lock,
+                    settings.GRAPH_WRITE_QUEUE_MAX_DELAY_MS, settings.GRAPH_WRITE_QUEUE_MAX_ROWS
+                )
             
-            # 建立資料表
-            await self._create_tables()
+            loaded = False
+            if self.snapshot_path and Path(self.snapshot_path).exists():
+                loaded = await self.load_snapshot(self.snapshot_path)
+            if settings.GRAPH_ADJACENCY_SNAPSHOT and not loaded:
+                await self.rebuild_adjacency_snapshot()
             
-            self.logger.info(f"GraphStore initialized: {self.db_path}")
+            self.logger.info(
+                f"GraphStore initialized: {self.db_path} "
+                f"(journal_mode={journal_mode}, read_pool={len(self._read_conns)})"
+            )
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to initialize GraphStore: {str(e)}")
             raise
     
+    async def _enable_wal(self) -> str:
+        """切換為 WAL 日誌模式，回傳實際的 journal_mode（:memory: 等不支援 WAL 時維持原模式）"""
+        async with self.conn.execute("PRAGMA journal_mode=WAL") as cursor:
+            row = await cursor.fetchone()
+        journal_mode = str(row[0]).lower() if row else ""
+        if journal_mode == "wal":
+            # WAL 下 NORMAL 仍保證一致性，僅 checkpoint 時 fsync
+            await self.conn.execute("PRAGMA synchronous=NORMAL")
+        return journal_mode
+    
+    async def _connect_readonly(self) -> Any:
+        """以 mode=ro&immutable=1 開啟連線並套用 mmap / 頁面快取設定（唯讀模式）"""
+        path = Path(self.db_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Read-only graph database not found: {self.db_path}")
+        wal_path = Path(f"{self.db_path}-wal")
+        if wal_path.exists() and wal_path.stat().st_size > 0:
+            # immutable 不讀取 -wal：未 checkpoint 的寫入不可見
+            self.logger.warning(f"Read-only graph database has a non-empty WAL file, its changes are ignored: {wal_path}")
+        conn = await aiosqlite.connect(f"{path.resolve().as_uri()}?mode=ro&immutable=1", uri=True)
+        conn.row_factory = aiosqlite.Row
+        await conn.execute(f"PRAGMA mmap_size={int(settings.GRAPH_DB_MMAP_SIZE)}")
+        await conn.execute(f"PRAGMA cache_size={-int(settings.GRAPH_DB_CACHE_SIZE_KB)}")
+        await conn.execute("PRAGMA temp_store=MEMORY")
+        return self._instrument(conn)
+    
+    def _instrument(self, conn: Any) -> Any:
+        """依 sql_instrumentation 包裝連線（未啟用時原樣回傳）"""
+        if self.sql_instrumentation is None:
+            return conn
+        return self.sql_instrumentation.wrap(conn)
+    
+    async def _inspect_schema(self):
+        """唯讀模式下取代 _create_tables：只偵測結構版本與 FTS 索引，不建立任何物件"""
+        async with self.conn.cursor() as cursor:
+            await cursor.execute("PRAGMA user_version")
+            user_version = (await cursor.fetchone())[0]
+            await cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")
+            names = {row[0] for row in await cursor.fetchall()}
+        if "entities" not in names:
+            raise RuntimeError(f"Read-only graph database has no entities table: {self.db_path}")
+        self._schema_version = SCHEMA_V2 if user_version == SCHEMA_V2 else SCHEMA_V1
+        self._fts_enabled = settings.GRAPH_FTS_ENABLED and "entities_fts" in names
+        missing = {"graph_stats", "graph_meta", "entity_importance"} - names
+        if missing:
+            self.logger.warning(
+                f"Read-only graph database lacks {sorted(missing)} (initialize it once in write mode at build time): {self.db_path}"
+            )
+    
+    def _check_writable(self):
+        """唯讀模式下拒絕寫入與維護作業"""
+        if self.readonly:
+            raise ReadOnlyStoreError(f"GraphStore is read-only (GRAPH_DB_READONLY): {self.db_path}")
+    
+    async def _open_read_pool(self, size: int):
+        """開啟 size 條唯讀連線（mode=ro；唯讀模式下為 immutable），讀取請求輪流取用"""
+        if size <= 0:
+            return
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        pool: asyncio.Queue = asyncio.Queue()
+        try:
+            for _ in range(size):
+                if self.readonly:
+                    conn = await self._connect_readonly()
+                else:
+                    conn = await aiosqlite.connect(uri, uri=True)
+                    conn.row_factory = aiosqlite.Row
+                    conn = self._instrument(conn)
+                self._read_conns.append(conn)
+                pool.put_nowait(conn)
+        except Exception as e:
+            self.logger.warning(f"Failed to open read pool, reads share the writer connection: {str(e)}")
+            await self._close_read_pool()
+            return
+        self._read_pool = pool
+    
+    async def _close_read_pool(self):
+        """關閉所有唯讀連線"""
+        self._read_pool = None
+        conns, self._read_conns = self._read_conns, []
+        for conn in conns:
+            try:
+                await conn.close()
+            except Exception:
+                pass
+    
+    @asynccontextmanager
+    async def _reader(self):
+        """取得讀取用連線；無連線池時使用寫入連線。等待時間記錄於 Prometheus 與 pool_stats()"""
+        pool = self._read_pool
+        if pool is None:
+            yield self.conn
+            return
+        # 取用前池已空才算等待（須等其他讀取歸還連線）；不以耗時判斷，避免計入無競爭時的排程延遲
+        contended = pool.empty()
+        start = time.perf_counter()
+        conn = await pool.get()
+        wait = time.perf_counter() - start
+        GRAPH_READ_POOL_WAIT.observe(wait)
+        stats = self._pool_stats
+        stats["acquires"] += 1
+        stats["wait_seconds"] += wait
+        if contended:
+            stats["waited"] += 1
+        if wait > stats["max_wait_seconds"]:
+            stats["max_wait_seconds"] = wait
+        try:
+            yield conn
+        finally:
+            pool.put_nowait(conn)
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """唯讀連線池統計（size / available / acquires / waited / 平均與最大等待秒數）"""
+        stats = self._pool_stats
+        acquires = int(stats["acquires"])
+        return {
+            "size": len(self._read_conns),
+            "available": self._read_pool.qsize() if self._read_pool else 0,
+            "acquires": acquires,
+            "waited": int(stats["waited"]),
+            "avg_wait_seconds": stats["wait_seconds"] / acquires if acquires else 0.0,
+            "max_wait_seconds": stats["max_wait_seconds"],
+        }
+    
+    async def rebuild_adjacency_snapshot(self) -> Optional[AdjacencySnapshot]:
+        """自 relations 表重建 CSR 鄰接快照（CSR 建構於執行緒中進行，不阻塞事件迴圈）"""
+        try:
+            version = self._graph_version
+            start = time.perf_counter()
+            async with self._reader() as conn, conn.cursor() as cursor:
+                await cursor.execute(
+                    "SELECT rowid, source_id, target_id, type FROM relations ORDER BY rowid"
+                )
+                rows = [tuple(row) for row in await cursor.fetchall()]
+            snapshot = await asyncio.to_thread(AdjacencySnapshot.build, rows, version)
+            self._adjacency = snapshot
+            usage = snapshot.memory_usage()
+            self.logger.info(
+                f"Adjacency snapshot built: {usage['nodes']} nodes, {usage['edges']} edges, "
+                f"{usage['total_bytes'] / 1024 / 1024:.1f} MiB ({usage['bytes_per_edge']} B/edge) "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+            return snapshot
+        except Exception as e:
+            self.logger.error(f"Failed to build adjacency snapshot: {str(e)}")
+            self._adjacency = None
+            return None
+    
+    def _graph_changed(self):
+        """拓撲寫入後呼叫：遞增圖版本，使快照失效並排程背景重建（同時間最多一個重建工作）"""
+        self._graph_version += 1
+        if self._adjacency is None:
+            return
+        if self._adjacency_task is None or self._adjacency_task.done():
+            self._adjacency_task = asyncio.ensure_future(self._refresh_adjacency())
+    
+    async def _refresh_adjacency(self):
+        """背景重建直到快照追上目前版本（重建期間若又有寫入則再建一次）"""
+        while self._adjacency is not None and self._adjacency.version != self._graph_version:
+            if await self.rebuild_adjacency_snapshot() is None:
+                break
+    
+    def _current_adjacency(self) -> Optional[AdjacencySnapshot]:
+        """回傳與目前圖版本一致的快照；未啟用或已過期時回傳 None（呼叫端改走 SQL）"""
+        snapshot = self._adjacency
+        if snapshot is not None and snapshot.version == self._graph_version:
+            return snapshot
+        return None
+    
+    async def _order_by_importance(self, entity_ids: List[str]) -> List[str]:
+        """依 entity_importance 分數由高至低排序實體 id（未計算者視為 0，同分依 id）"""
+        if not entity_ids:
+            return entity_ids
+        # 排序鍵取負值：分數高者在前
+        keys: Dict[str, Tuple[float, int]] = {}
+        async with self._reader() as conn, conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT entity_id, pagerank, degree FROM entity_importance "
+                "WHERE entity_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(entity_ids),)
+            )
+            for row in await cursor.fetchall():
+                keys[row[0]] = (-row[1], -row[2])
+        return sorted(entity_ids, key=lambda i: (*keys.get(i, (0.0, 0)), i))
+    
+    async def _get_relations_by_rowids(self, rowids: List[int]) -> List[Relation]:
+        """依 relations.rowid 批次取得關係（維持輸入順序，快照參照已刪除者略過）"""
+        found: Dict[int, Relation] = {}
+        async with self._reader() as conn, conn.cursor() as cursor:
+            for start in range(0, len(rowids), _SQL_IN_CHUNK):
+                chunk = rowids[start:start + _SQL_IN_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                await cursor.execute(
+                    f"SELECT rowid AS _rowid, * FROM relations WHERE rowid IN ({placeholders})", chunk
+                )
+                for row in await cursor.fetchall():
+                    found[row["_rowid"]] = _row_to_relation(row)
+        return [found[rowid] for rowid in rowids if rowid in found]
+    
+    async def _snapshot_fingerprint(self) -> Dict[str, int]:
+        """快照與資料庫是否一致的判斷依據（皆為 O(1) 查詢）"""
+        async with self._reader() as conn, conn.cursor() as cursor:
+            await cursor.execute("SELECT value FROM graph_meta WHERE key = 'relations_version'")
+            relations_version = (await cursor.fetchone())[0]
+            await cursor.execute("SELECT COALESCE(SUM(count), 0) FROM graph_stats WHERE kind = 'relation'")
+            relation_count = (await cursor.fetchone())[0]
+            await cursor.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {self._relation_table}")
+            max_rowid = (await cursor.fetchone())[0]
+        return {
+            "relations_version": relations_version,
+            "relation_count": relation_count,
+            "max_relation_rowid": max_rowid,
+        }
+    
+    async def export_snapshot(self, path: str) -> Dict[str, Any]:
+        """匯出二進位快照（實體依 id、關係依 rowid 分批讀取；編碼與寫檔於執行緒中進行）"""
+        if not self.conn:
+            await self.initialize()
+        start = time.perf_counter()
+        fingerprint = await self._snapshot_fingerprint()
+        writer = SnapshotWriter()
+        async for entity in self.iter_entities():
+            writer.add_entity(self._entity_params(entity))
+        last_rowid = 0
+        while True:
+            async with self._reader() as conn, conn.cursor() as cursor:
+                await cursor.execute(
+                    "SELECT rowid AS _rowid, * FROM relations WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, settings.GRAPH_BULK_BATCH_SIZE)
+                )
+                rows = await cursor.fetchall()
+            for row in rows:
+                writer.add_relation(row["_rowid"], self._relation_params(_row_to_relation(row)))
+            if len(rows) < settings.GRAPH_BULK_BATCH_SIZE:
+                break
+            last_rowid = rows[-1]["_rowid"]
+        meta = await asyncio.to_thread(
+            writer.write, path, {"source": Path(self.db_path).name, **fingerprint}
+        )
+        self.logger.info(
+            f"Graph snapshot exported: {path} ({meta['entities']} entities, {meta['relations']} relations, "
+            f"{meta['bytes'] / 1024 / 1024:.1f} MiB) in {time.perf_counter() - start:.2f}s"
+        )
+        return meta
+    
+    async def load_snapshot(self, path: str) -> bool:
+        """
+        載入二進位快照並採用其 CSR 鄰接陣列（取代自 relations 表重建）。
+        實體 / 關係資料仍由資料庫讀取；快照與資料庫不一致時不採用並回傳 False
+        """
+        if not self.conn:
+            await self.initialize()
+        start = time.perf_counter()
+        try:
+            snapshot = await asyncio.to_thread(GraphSnapshot, path)
+            fingerprint = await self._snapshot_fingerprint()
+            stale = {
+                key: (snapshot.meta.get(key), value)
+                for key, value in fingerprint.items()
+                if snapshot.meta.get(key) != value
+            }
+            if stale:
+                self.logger.warning(f"Graph snapshot does not match database, ignored: {path} {stale}")
+                return False
+            version = self._graph_version
+            adjacency = await asyncio.to_thread(snapshot.adjacency, version)
+        except Exception as e:
+            self.logger.warning(f"Failed to load graph snapshot {path}: {str(e)}")
+            return False
+        self._adjacency = adjacency
+        if version != self._graph_version and (self._adjacency_task is None or self._adjacency_task.done()):
+            # 載入期間有寫入：快照已過期，交由背景重建
+            self._adjacency_task = asyncio.ensure_future(self._refresh_adjacency())
+        self.logger.info(
+            f"Graph snapshot loaded: {path} ({adjacency.num_nodes} nodes, {adjacency.num_edges} edges) "
+            f"in {time.perf_counter() - start:.3f}s"
+        )
+        return True
+    
+    @property
+    def schema_version(self) -> int:
+        return self._schema_version
+    
+    @property
+    def _entity_table(self) -> str:
+        """實體的實際資料表（寫入觸發器與刪除使用）"""
+        return "entity_store" if self._schema_version == SCHEMA_V2 else "entities"
+    
+    @property
+    def _relation_table(self) -> str:
+        """關係的實際資料表（寫入觸發器與刪除使用）"""
+        return "relation_store" if self._schema_version == SCHEMA_V2 else "relations"
+    
+    @property
+    def _row_to_entity(self) -> Callable[[Any], Entity]:
+        """entities 資料列轉實體的函式（v2 檢視表另含提升欄位）"""
+        return _row_to_entity_v2 if self._schema_version == SCHEMA_V2 else _row_to_entity
+    
+    async def _detect_schema_version(self) -> int:
+        """
+        由 PRAGMA user_version 判斷結構版本；全新資料庫依 GRAPH_DB_SCHEMA_VERSION 建立並寫入 user_version
+        """
+        async with self.conn.cursor() as cursor:
+            await cursor.execute("PRAGMA user_version")
+            user_version = (await cursor.fetchone())[0]
+            if user_version == SCHEMA_V2:
+                return SCHEMA_V2
+            await cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'entities'")
+            if await cursor.fetchone() is not None:
+                return SCHEMA_V1
+            version = SCHEMA_V2 if settings.GRAPH_DB_SCHEMA_VERSION == SCHEMA_V2 else SCHEMA_V1
+            await cursor.execute(f"PRAGMA user_version = {version}")
+        return version
+    
     async def _create_tables(self):
-        """建立資料表"""
+        """建立資料表（依結構版本建立 v1 資料表或 v2 資料表與相容檢視表）"""
+        self._schema_version = await self._detect_schema_version()
+        if self._schema_version == SCHEMA_V2:
+            async with self.conn.cursor() as cursor:
+                for sql in _SCHEMA_V2_TABLES_SQL + _SCHEMA_V2_VIEWS_SQL:
+                    await cursor.execute(sql)
+            await self.conn.commit()
+        else:
+            await self._create_tables_v1()
+        
+        await self._ensure_graph_stats()
+        await self._ensure_graph_meta()
+        await self.conn.execute(_ENTITY_IMPORTANCE_TABLE_SQL)
+        await self.conn.commit()
+        await self._ensure_fts_index()
+    
+    async def _create_tables_v1(self):
+        """建立 v1 資料表"""
         async with self.conn.cursor() as cursor:
             # Entities 表
             await cursor.execute("""
@@ -288,13 +1592,19 @@ class SQLiteGraphStore(GraphStore):
                     name TEXT NOT NULL,
                     properties TEXT NOT NULL,
                     created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
+                    updated_at TEXT NOT NULL,
+                    document_id TEXT
                 )
             """)
             
+            # (type)：同類型項目依 rowid 排序，供 get_entities_by_type 與 iter_entities(order="insertion") 依寫入順序分頁
             await cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_entities_type ON entities(type)
             """)
+            # (type, id)：iter_entities 依 id keyset 分頁
+            await cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_entities_type_id ON entities(type, id)
+            """)
             
             await cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_entities_name ON entities(name)
@@ -324,71 +1634,623 @@ class SQLiteGraphStore(GraphStore):
                 CREATE INDEX IF NOT EXISTS idx_relations_target ON relations(target_id)
             """)
             
+            await cursor.execute("DROP INDEX IF EXISTS idx_relations_type")
             await cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_relations_type ON relations(type)
+                CREATE INDEX IF NOT EXISTS idx_relations_type_id ON relations(type, id)
             """)
             
             await self.conn.commit()
+        
+        await self._ensure_document_id_column()
     
-    async def add_entity(self, entity: Entity) -> bool:
-        """新增實體"""
+    async def _ensure_document_id_column(self):
+        """
+        確保 entities.document_id 欄位與索引存在；既有資料庫首次升級時回填：
+        properties.document_id 優先，其次 QA 實體 id（{document_id}_qa_{n}）
+        索引僅含 document_id，SQLite 會以 rowid 排序同一文件的項目，供 get_entities_by_document 依寫入順序分頁
+        """
+        async with self.conn.cursor() as cursor:
+            await cursor.execute("PRAGMA table_info(entities)")
+            columns = {row["name"] for row in await cursor.fetchall()}
+            if "document_id" not in columns:
+                await cursor.execute("ALTER TABLE entities ADD COLUMN document_id TEXT")
+                await cursor.execute("""
+                    UPDATE entities SET document_id = json_extract(properties, '$.document_id')
+                    WHERE json_valid(properties) AND json_type(properties, '$.document_id') = 'text'
+                """)
+                await cursor.execute(r"""
+                    SELECT id FROM entities
+                    WHERE document_id IS NULL AND type = 'QA' AND id LIKE '%\_qa\_%' ESCAPE '\'
+                """)
+                backfill = [
+                    (entity_id.rsplit("_qa_", 1)[0], entity_id)
+                    for (entity_id,) in await cursor.fetchall()
+                ]
+                await cursor.executemany("UPDATE entities SET document_id = ? WHERE id = ?", backfill)
+                self.logger.info(f"Added entities.document_id and back-filled {cursor.rowcount} QA entities")
+            await cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entities_document ON entities(document_id)"
+            )
+            await self.conn.commit()
+    
+    async def _ensure_graph_stats(self):
+        """建立 graph_stats 與維護觸發器；首次建立時由現有資料計算（等同遷移）"""
+        async with self.conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'graph_stats'"
+            )
+            created = await cursor.fetchone() is None
+            if created:
+                await cursor.execute(_GRAPH_STATS_TABLE_SQL)
+            if self._schema_version == SCHEMA_V2:
+                triggers = _graph_stats_triggers("entity_store", "entity") + _graph_stats_triggers(
+                    "relation_store", "relation", "(SELECT name FROM relation_types WHERE pk = {row}.type)"
+                )
+            else:
+                triggers = [
+                    trigger_sql
+                    for table, kind in _GRAPH_STATS_KINDS.items()
+                    for trigger_sql in _graph_stats_triggers(table, kind)
+                ]
+            for trigger_sql in triggers:
+                await cursor.execute(trigger_sql)
+            if created:
+                await self._fill_graph_stats(cursor)
+        await self.conn.commit()
+        if created:
+            self.logger.info(f"graph_stats table created: {self.db_path}")
+    
+    async def _ensure_graph_meta(self):
+        """建立 graph_meta 與 relations_version 觸發器"""
+        async with self.conn.cursor() as cursor:
+            await cursor.execute(_GRAPH_META_TABLE_SQL)
+            await cursor.execute(
+                "INSERT OR IGNORE INTO graph_meta (key, value) VALUES ('relations_version', 0)"
+            )
+            columns = ["source", "target", "type"] if self._schema_version == SCHEMA_V2 else ["source_id", "target_id", "type"]
+            # 既有資料庫的更新觸發器可能缺少 WHEN 條件，重建之
+            await cursor.execute(f"DROP TRIGGER IF EXISTS {self._relation_table}_version_au")
+            for trigger_sql in _graph_meta_triggers(self._relation_table, columns):
+                await cursor.execute(trigger_sql)
+        await self.conn.commit()
+    
+    @staticmethod
+    async def _fill_graph_stats(cursor):
+        """清空並依 entities / relations 重新計算 graph_stats（呼叫端負責 commit）"""
+        await cursor.execute("DELETE FROM graph_stats")
+        for table, kind in _GRAPH_STATS_KINDS.items():
+            await cursor.execute(f"""
+                INSERT INTO graph_stats (kind, type, count)
+                SELECT '{kind}', type, COUNT(*) FROM {table} GROUP BY type
+            """)
+    
+    async def recompute_statistics(self) -> Dict[str, Any]:
+        """全表重算 graph_stats（統計與資料不一致時使用，如觸發器建立前以外部工具寫入），回傳重算後的統計"""
+        self._check_writable()
+        if not self.conn:
+            await self.initialize()
+        async with self._write_lock:
+            try:
+                async with self.conn.cursor() as cursor:
+                    await self._fill_graph_stats(cursor)
+                await self.conn.commit()
+            except Exception as e:
+                self.logger.error(f"Failed to recompute statistics: {str(e)}")
+                await self.conn.rollback()
+                raise
+        return await self.get_statistics()
+    
+    async def compute_importance(
+        self,
+        damping: float = DEFAULT_DAMPING,
+        max_iterations: int = DEFAULT_MAX_ITERATIONS
+    ) -> Dict[str, Any]:
+        """
+        讀出全部實體 / 關係端點，於執行緒計算 PageRank 後整批重寫 entity_importance（單一交易）。
+        先讀 relations_version 再讀關係：計算期間若有寫入，記錄的版本較舊，importance_stale 即為 True。
+        """
+        self._check_writable()
+        if not self.conn:
+            await self.initialize()
+        async with self._reader() as conn, conn.cursor() as cursor:
+            await cursor.execute("SELECT value FROM graph_meta WHERE key = 'relations_version'")
+            relations_version = (await cursor.fetchone())[0]
+            await cursor.execute("SELECT id, document_id FROM entities")
+            entities = [(row[0], row[1]) for row in await cursor.fetchall()]
+            await cursor.execute("SELECT source_id, target_id, weight FROM relations")
+            relations = [(row[0], row[1], row[2]) for row in await cursor.fetchall()]
+        
+        result = await asyncio.to_thread(compute_importance, entities, relations, damping, max_iterations)
+        async with self._write_lock:
+            try:
+                async with self.conn.cursor() as cursor:
+                    await cursor.execute("BEGIN IMMEDIATE")
+                    await cursor.execute("DELETE FROM entity_importance")
+                    await cursor.executemany(_ENTITY_IMPORTANCE_INSERT_SQL, result.rows)
+                    await cursor.execute("""
+                        INSERT INTO graph_meta (key, value) VALUES ('importance_relations_version', ?)
+                        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+                    """, (relations_version,))
+                await self.conn.commit()
+            except Exception as e:
+                self.logger.error(f"Failed to compute importance: {str(e)}")
+                await self.conn.rollback()
+                raise
+        return {
+            "entities": len(result.rows),
+            "relations": result.relations,
+            "iterations": result.iterations,
+            "doc_iterations": result.doc_iterations,
+            "relations_version": relations_version,
+        }
+    
+    async def get_importance_scores(self) -> Dict[str, Tuple[float, Optional[float], int]]:
+        """讀出 entity_importance 全部分數"""
+        async with self._reader() as conn, conn.cursor() as cursor:
+            await cursor.execute("SELECT entity_id, pagerank, doc_pagerank, degree FROM entity_importance")
+            return {row[0]: (row[1], row[2], row[3]) for row in await cursor.fetchall()}
+    
+    async def importance_stale(self) -> bool:
+        """重要度是否未計算或計算後關係已變更"""
+        async with self._reader() as conn, conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT key, value FROM graph_meta WHERE key IN ('relations_version', 'importance_relations_version')"
+            )
+            versions = {row[0]: row[1] for row in await cursor.fetchall()}
+        return versions.get("importance_relations_version") != versions.get("relations_version")
+    
+    async def _ensure_fts_index(self):
+        """
+        建立 entities_fts（FTS5 trigram）與同步觸發器。
+        既有資料庫首次建立索引時自動 rebuild（等同遷移）；SQLite 不支援 FTS5 / trigram 時退回 LIKE 查詢。
+        """
+        self._fts_enabled = False
+        if not settings.GRAPH_FTS_ENABLED:
+            return
         try:
             async with self.conn.cursor() as cursor:
-                await cursor.execute("""
-                    INSERT OR REPLACE INTO entities (id, type, name, properties, created_at, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    entity.id,
-                    entity.type,
-                    entity.name,
-                    json.dumps(entity.properties, ensure_ascii=False),
-                    entity.created_at.isoformat(),
-                    entity.updated_at.isoformat()
-                ))
+                await cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'entities_fts'"
+                )
+                created = await cursor.fetchone() is None
+                if created:
+                    await cursor.execute(_FTS_TABLE_SQL.format(table=self._entity_table))
+                for trigger_sql in _FTS_TRIGGERS_SQL:
+                    await cursor.execute(trigger_sql.format(table=self._entity_table))
+                if created:
+                    await cursor.execute("INSERT INTO entities_fts(entities_fts) VALUES ('rebuild')")
+            await self.conn.commit()
+            self._fts_enabled = True
+            if created:
+                self.logger.info(f"FTS5 trigram index created: {self.db_path}")
+        except Exception as e:
+            await self.conn.rollback()
+            self.logger.warning(f"FTS5 trigram index unavailable, search_entities falls back to LIKE: {str(e)}")
+    
+    async def rebuild_fts_index(self) -> bool:
+        """依 entities 表重建 FTS 索引（索引與資料不一致時使用）"""
+        self._check_writable()
+        if not self._fts_enabled:
+            return False
+        async with self._write_lock:
+            try:
+                async with self.conn.cursor() as cursor:
+                    await cursor.execute("INSERT INTO entities_fts(entities_fts) VALUES ('rebuild')")
                 await self.conn.commit()
                 return True
+            except Exception as e:
+                self.logger.error(f"Failed to rebuild FTS index: {str(e)}")
+                await self.conn.rollback()
+                return False
+    
+    async def migrate_to_schema_v2(
+        self,
+        batch_size: Optional[int] = None,
+        progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> Dict[str, int]:
+        """
+        將 v1 資料庫就地轉換為 v2（單一交易，失敗即回滾；轉換期間不應有其他寫入）。
+        實體 / 關係的 pk 沿用原 rowid；端點已不存在的關係無法以 pk 表示，略過並計入 skipped_relations。
+        progress(階段, 已完成, 總數) 於每批完成後呼叫。
+        """
+        self._check_writable()
+        if not self.conn:
+            await self.initialize()
+        counts = {"entities": 0, "relations": 0, "skipped_relations": 0}
+        if self._schema_version == SCHEMA_V2:
+            return counts
+        batch_size = max(1, batch_size or settings.GRAPH_BULK_BATCH_SIZE)
+        
+        async with self._write_lock:
+            try:
+                async with self.conn.cursor() as cursor:
+                    await cursor.execute("BEGIN IMMEDIATE")
+                    await cursor.execute("SELECT COUNT(*) FROM entities")
+                    total_entities = (await cursor.fetchone())[0]
+                    await cursor.execute("SELECT COUNT(*) FROM relations")
+                    total_relations = (await cursor.fetchone())[0]
+                    
+                    await cursor.execute("DROP TABLE IF EXISTS entities_fts")
+                    for sql in _SCHEMA_V2_TABLES_SQL:
+                        await cursor.execute(sql)
+                    
+                    last_rowid = 0
+                    while True:
+                        await cursor.execute(
+                            "SELECT rowid AS _rowid, * FROM entities WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                            (last_rowid, batch_size)
+                        )
+                        rows = await cursor.fetchall()
+                        if not rows:
+                            break
+                        await cursor.executemany(
+                            "INSERT INTO entity_store (pk, id, type, name, document_id, question, answer, code, "
+                            "properties, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            [(row["_rowid"],) + self._entity_params_v2(_row_to_entity(row)) for row in rows]
+                        )
+                        last_rowid = rows[-1]["_rowid"]
+                        counts["entities"] += len(rows)
+                        if progress:
+                            progress("entities", counts["entities"], total_entities)
+                    
+                    await cursor.execute(
+                        "INSERT INTO relation_types (name) SELECT DISTINCT type FROM relations ORDER BY type"
+                    )
+                    await cursor.execute("SELECT pk, name FROM relation_types")
+                    type_pks = {row["name"]: row["pk"] for row in await cursor.fetchall()}
+                    
+                    last_rowid = 0
+                    while True:
+                        await cursor.execute("""
+                            SELECT r.rowid AS _rowid, r.*, s.rowid AS _source, t.rowid AS _target
+                            FROM relations r
+                            JOIN entities s ON s.id = r.source_id
+                            JOIN entities t ON t.id = r.target_id
+                            WHERE r.rowid > ? ORDER BY r.rowid LIMIT ?
+                        """, (last_rowid, batch_size))
+                        rows = await cursor.fetchall()
+                        if not rows:
+                            break
+                        params = []
+                        for row in rows:
+                            relation = _row_to_relation(row)
+                            params.append((
+                                row["_rowid"], relation.id, row["_source"], row["_target"], type_pks[relation.type],
+                                row["properties"] if row["properties"] not in (None, "", "{}") else None,
+                                relation.weight, _to_epoch_us(relation.created_at)
+                            ))
+                        await cursor.executemany(
+                            "INSERT INTO relation_store (pk, id, source, target, type, properties, weight, created_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            params
+                        )
+                        last_rowid = rows[-1]["_rowid"]
+                        counts["relations"] += len(rows)
+                        if progress:
+                            progress("relations", counts["relations"], total_relations)
+                    counts["skipped_relations"] = total_relations - counts["relations"]
+                    
+                    # 刪除 v1 資料表（索引與觸發器一併移除），檢視表、觸發器與 FTS 由 _create_tables 依 v2 重建
+                    await cursor.execute("DROP TABLE relations")
+                    await cursor.execute("DROP TABLE entities")
+                    await cursor.execute("UPDATE graph_meta SET value = value + 1 WHERE key = 'relations_version'")
+                    await cursor.execute(f"PRAGMA user_version = {SCHEMA_V2}")
+                await self.conn.commit()
+            except Exception as e:
+                self.logger.error(f"Failed to migrate {self.db_path} to schema v2: {str(e)}")
+                await self.conn.rollback()
+                raise
+        
+        await self._create_tables()
+        await self.recompute_statistics()
+        self._graph_changed()
+        if counts["skipped_relations"]:
+            self.logger.warning(
+                f"Skipped {counts['skipped_relations']} relations whose source or target entity no longer exists"
+            )
+        self.logger.info(
+            f"Migrated {self.db_path} to schema v2: {counts['entities']} entities, {counts['relations']} relations"
+        )
+        return counts
+    
+    @staticmethod
+    def _entity_params(entity: Entity) -> Tuple[Any, ...]:
+        """實體寫入參數（與 _ENTITY_UPSERT_SQL 欄位順序一致）"""
+        return (
+            entity.id,
+            entity.type,
+            entity.name,
+            entity.properties_json(),
+            entity.created_at.isoformat(),
+            entity.updated_at.isoformat(),
+            entity.document_id
+        )
+    
+    @staticmethod
+    def _relation_params(relation: Relation) -> Tuple[Any, ...]:
+        """關係寫入參數（與 _RELATION_UPSERT_SQL 欄位順序一致）"""
+        return (
+            relation.id,
+            relation.source_id,
+            relation.target_id,
+            relation.type,
+            relation.properties_json(),
+            relation.weight,
+            relation.created_at.isoformat()
+        )
+    
+    @staticmethod
+    def _entity_params_v2(entity: Entity) -> Tuple[Any, ...]:
+        """v2 實體寫入參數（與 _ENTITY_UPSERT_V2_SQL 欄位順序一致）：字串型的常用欄位自 properties 提升"""
+        properties = entity.properties
+        hot = [properties.get(field) if isinstance(properties.get(field), str) else None for field in _HOT_PROPERTIES]
+        cold = {
+            key: value for key, value in properties.items()
+            if not (key in _HOT_PROPERTIES and isinstance(value, str))
+        }
+        return (
+            entity.id,
+            entity.type,
+            entity.name,
+            entity.document_id,
+            *hot,
+            json.dumps(cold, ensure_ascii=False) if cold else None,
+            _to_epoch_us(entity.created_at),
+            _to_epoch_us(entity.updated_at)
+        )
+    
+    @staticmethod
+    def _relation_params_v2(relation: Relation) -> Tuple[Any, ...]:
+        """v2 關係寫入參數（與 _RELATION_UPSERT_V2_SQL 欄位順序一致）"""
+        properties = relation.properties_json()
+        return (
+            relation.id,
+            relation.source_id,
+            relation.target_id,
+            relation.type,
+            properties if properties != "{}" else None,
+            relation.weight,
+            _to_epoch_us(relation.created_at)
+        )
+    
+    def _entity_write(self) -> Tuple[str, Any]:
+        """目前結構版本的實體寫入 (SQL, 參數函式)"""
+        if self._schema_version == SCHEMA_V2:
+            return _ENTITY_UPSERT_V2_SQL, self._entity_params_v2
+        return _ENTITY_UPSERT_SQL, self._entity_params
+    
+    def _relation_write(self) -> Tuple[str, Any]:
+        """目前結構版本的關係寫入 (SQL, 參數函式)"""
+        if self._schema_version == SCHEMA_V2:
+            return _RELATION_UPSERT_V2_SQL, self._relation_params_v2
+        return _RELATION_UPSERT_SQL, self._relation_params
+    
+    async def _intern_relation_types(self, cursor: Any, relation_types: List[str]):
+        """v2：於寫入交易內確保關係類型已登錄於 relation_types（v1 不需要）"""
+        if self._schema_version != SCHEMA_V2 or not relation_types:
+            return
+        await cursor.executemany(
+            _RELATION_TYPE_INTERN_SQL, [(name,) for name in dict.fromkeys(relation_types)]
+        )
+    
+    async def _write(self, op: WriteOp, rows: int = 1) -> Any:
+        """
+        執行寫入操作並回傳其結果（交易提交後）；操作失敗時拋出其例外。
+        啟用寫入佇列時與其他協程的寫入合併提交，否則單獨一個交易
+        """
+        self._check_writable()
+        if self._write_queue is not None:
+            return await self._write_queue.submit(op, rows)
+        async with self._write_lock:
+            ok, value = (await run_write_ops(self.conn, [op]))[0]
+        if not ok:
+            raise value
+        return value
+    
+    async def flush(self) -> None:
+        """提交寫入佇列中已排入的寫入並等待完成"""
+        if self._write_queue is not None:
+            await self._write_queue.flush()
+    
+    def write_queue_stats(self) -> Optional[Dict[str, Any]]:
+        """寫入佇列統計（pending / commits / ops / ops_per_commit）；未啟用時為 None"""
+        return self._write_queue.stats() if self._write_queue is not None else None
+    
+    async def add_entity(self, entity: Entity) -> bool:
+        """新增實體"""
+        self._check_writable()
+        try:
+            sql, to_params = self._entity_write()
+            params = to_params(entity)
+            
+            async def op(cursor) -> bool:
+                await cursor.execute(sql, params)
+                return True
+            
+            return await self._write(op)
         except Exception as e:
             self.logger.error(f"Failed to add entity: {str(e)}")
-            await self.conn.rollback()
             return False
     
+    async def _existing_entity_ids(self, entity_ids: List[str]) -> set:
+        """回傳 entity_ids 中實際存在於 entities 表的 id 集合（分段 IN 查詢，避免超過 SQLite 參數上限）"""
+        existing: set = set()
+        unique_ids = list(dict.fromkeys(entity_ids))
+        async with self._reader() as conn, conn.cursor() as cursor:
+            for start in range(0, len(unique_ids), _SQL_IN_CHUNK):
+                chunk = unique_ids[start:start + _SQL_IN_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                await cursor.execute(
+                    f"SELECT id FROM entities WHERE id IN ({placeholders})", chunk
+                )
+                existing.update(row[0] for row in await cursor.fetchall())
+        return existing
+    
+    async def _executemany_batch(
+        self,
+        sql: str,
+        params: List[Tuple[Any, ...]],
+        relation_types: Optional[List[str]] = None
+    ) -> List[bool]:
+        """
+        以單一交易 executemany 寫入一批資料（啟用寫入佇列時與其他寫入合併提交）。
+        整批失敗時回滾至 SAVEPOINT 並改為逐筆寫入（仍為同一交易），以取得逐筆成功旗標。
+        """
+        if not params:
+            return []
+        
+        async def op(cursor) -> List[bool]:
+            await self._intern_relation_types(cursor, relation_types or [])
+            await cursor.execute("SAVEPOINT bulk_batch")
+            try:
+                await cursor.executemany(sql, params)
+                await cursor.execute("RELEASE bulk_batch")
+                return [True] * len(params)
+            except Exception as e:
+                self.logger.warning(f"Bulk batch failed, retrying row by row: {str(e)}")
+                await cursor.execute("ROLLBACK TO bulk_batch")
+                await cursor.execute("RELEASE bulk_batch")
+        
+            flags: List[bool] = []
+            for row in params:
+                try:
+                    await cursor.execute(sql, row)
+                    flags.append(True)
+                except Exception as e:
+                    self.logger.error(f"Failed to write row {row[0]}: {str(e)}")
+                    flags.append(False)
+            return flags
+        
+        return await self._write(op, rows=len(params))
+    
+    async def add_entities_bulk(
+        self,
+        entities: List[Entity],
+        batch_size: Optional[int] = None
+    ) -> List[bool]:
+        """批次新增實體（每批一個交易）"""
+        self._check_writable()
+        batch_size = max(1, batch_size or settings.GRAPH_BULK_BATCH_SIZE)
+        sql, to_params = self._entity_write()
+        results: List[bool] = []
+        try:
+            for start in range(0, len(entities), batch_size):
+                batch = entities[start:start + batch_size]
+                flags = [False] * len(batch)
+                params: List[Tuple[Any, ...]] = []
+                positions: List[int] = []
+                for i, entity in enumerate(batch):
+                    try:
+                        params.append(to_params(entity))
+                        positions.append(i)
+                    except Exception as e:
+                        self.logger.error(f"Failed to encode entity {entity.id}: {str(e)}")
+                
+                for i, ok in zip(positions, await self._executemany_batch(sql, params)):
+                    flags[i] = ok
+                results.extend(flags)
+        except Exception as e:
+            self.logger.error(f"Failed to add entities in bulk: {str(e)}")
+            results.extend([False] * (len(entities) - len(results)))
+        return results
+    
+    async def add_relations_bulk(
+        self,
+        relations: List[Relation],
+        batch_size: Optional[int] = None
+    ) -> List[bool]:
+        """批次新增關係（每批一個交易；來源/目標實體以一次 IN 查詢檢查）"""
+        self._check_writable()
+        batch_size = max(1, batch_size or settings.GRAPH_BULK_BATCH_SIZE)
+        sql, to_params = self._relation_write()
+        results: List[bool] = []
+        try:
+            for start in range(0, len(relations), batch_size):
+                batch = relations[start:start + batch_size]
+                existing = await self._existing_entity_ids(
+                    [r.source_id for r in batch] + [r.target_id for r in batch]
+                )
+                flags = [False] * len(batch)
+                params: List[Tuple[Any, ...]] = []
+                positions: List[int] = []
+                missing = 0
+                for i, relation in enumerate(batch):
+                    if relation.source_id not in existing or relation.target_id not in existing:
+                        missing += 1
+                        continue
+                    try:
+                        params.append(to_params(relation))
+                        positions.append(i)
+                    except Exception as e:
+                        self.logger.error(f"Failed to encode relation {relation.id}: {str(e)}")
+                if missing:
+                    self.logger.warning(f"Source or target entity not found for {missing} relations in bulk batch")
+                
+                relation_types = [batch[i].type for i in positions]
+                for i, ok in zip(positions, await self._executemany_batch(sql, params, relation_types)):
+                    flags[i] = ok
+                results.extend(flags)
+        except Exception as e:
+            self.logger.error(f"Failed to add relations in bulk: {str(e)}")
+            results.extend([False] * (len(relations) - len(results)))
+        if any(results):
+            self._graph_changed()
+        return results
+    
     async def get_entity(self, entity_id: str) -> Optional[Entity]:
         """取得實體"""
         try:
-            async with self.conn.cursor() as cursor:
+            async with self._reader() as conn, conn.cursor() as cursor:
                 await cursor.execute("""
                     SELECT * FROM entities WHERE id = ?
                 """, (entity_id,))
                 row = await cursor.fetchone()
                 
                 if row:
-                    return Entity(
-                        id=row["id"],
-                        type=row["type"],
-                        name=row["name"],
-                        properties=json.loads(row["properties"]),
-                        created_at=datetime.fromisoformat(row["created_at"]),
-                        updated_at=datetime.fromisoformat(row["updated_at"])
-                    )
+                    return self._row_to_entity(row)
                 return None
         except Exception as e:
             self.logger.error(f"Failed to get entity: {str(e)}")
             return None
     
+    async def get_entities_many(self, entity_ids: List[str]) -> Dict[str, Entity]:
+        """批次取得實體（分段 IN 查詢）"""
+        try:
+            unique_ids = list(dict.fromkeys(entity_ids))
+            entities: Dict[str, Entity] = {}
+            async with self._reader() as conn, conn.cursor() as cursor:
+                for start in range(0, len(unique_ids), _SQL_IN_CHUNK):
+                    chunk = unique_ids[start:start + _SQL_IN_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    await cursor.execute(
+                        f"SELECT * FROM entities WHERE id IN ({placeholders})", chunk
+                    )
+                    for row in await cursor.fetchall():
+                        entities[row["id"]] = self._row_to_entity(row)
+            return entities
+        except Exception as e:
+            self.logger.error(f"Failed to get entities: {str(e)}")
+            return {}
+    
     async def delete_entity(self, entity_id: str) -> bool:
         """刪除實體（級聯刪除關係）"""
+        self._check_writable()
+        
+        async def op(cursor) -> bool:
+            await cursor.execute(f"DELETE FROM {self._entity_table} WHERE id = ?", (entity_id,))
+            return cursor.rowcount > 0
+        
         try:
-            async with self.conn.cursor() as cursor:
-                await cursor.execute("DELETE FROM entities WHERE id = ?", (entity_id,))
-                await self.conn.commit()
-                return cursor.rowcount > 0
+            deleted = await self._write(op)
+            self._graph_changed()
+            return deleted
         except Exception as e:
             self.logger.error(f"Failed to delete entity: {str(e)}")
-            await self.conn.rollback()
             return False
     
     async def add_relation(self, relation: Relation) -> bool:
         """新增關係"""
+        self._check_writable()
         try:
             # 檢查實體是否存在
             source = await self.get_entity(relation.source_id)
@@ -397,47 +2259,33 @@ class SQLiteGraphStore(GraphStore):
             if not source or not target:
                 self.logger.warning(f"Source or target entity not found for relation {relation.id}")
                 return False
-            
-            async with self.conn.cursor() as cursor:
-                await cursor.execute("""
-                    INSERT OR REPLACE INTO relations 
-                    (id, source_id, target_id, type, properties, weight, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    relation.id,
-                    relation.source_id,
-                    relation.target_id,
-                    relation.type,
-                    json.dumps(relation.properties, ensure_ascii=False),
-                    relation.weight,
-                    relation.created_at.isoformat()
-                ))
-                await self.conn.commit()
+            
+            sql, to_params = self._relation_write()
+            params = to_params(relation)
+            
+            async def op(cursor) -> bool:
+                await self._intern_relation_types(cursor, [relation.type])
+                await cursor.execute(sql, params)
                 return True
+            
+            added = await self._write(op)
+            self._graph_changed()
+            return added
         except Exception as e:
             self.logger.error(f"Failed to add relation: {str(e)}")
-            await self.conn.rollback()
             return False
     
     async def get_relation(self, relation_id: str) -> Optional[Relation]:
         """取得關係"""
         try:
-            async with self.conn.cursor() as cursor:
+            async with self._reader() as conn, conn.cursor() as cursor:
                 await cursor.execute("""
                     SELECT * FROM relations WHERE id = ?
                 """, (relation_id,))
                 row = await cursor.fetchone()
                 
                 if row:
-                    return Relation(
-                        id=row["id"],
-                        source_id=row["source_id"],
-                        target_id=row["target_id"],
-                        type=row["type"],
-                        properties=json.loads(row["properties"]),
-                        weight=row["weight"],
-                        created_at=datetime.fromisoformat(row["created_at"])
-                    )
+                    return _row_to_relation(row)
                 return None
         except Exception as e:
             self.logger.error(f"Failed to get relation: {str(e)}")
@@ -445,119 +2293,244 @@ class SQLiteGraphStore(GraphStore):
     
     async def delete_relation(self, relation_id: str) -> bool:
         """刪除關係"""
+        self._check_writable()
+        
+        async def op(cursor) -> bool:
+            await cursor.execute(f"DELETE FROM {self._relation_table} WHERE id = ?", (relation_id,))
+            return cursor.rowcount > 0
+        
         try:
-            async with self.conn.cursor() as cursor:
-                await cursor.execute("DELETE FROM relations WHERE id = ?", (relation_id,))
-                await self.conn.commit()
-                return cursor.rowcount > 0
+            deleted = await self._write(op)
+            self._graph_changed()
+            return deleted
         except Exception as e:
             self.logger.error(f"Failed to delete relation: {str(e)}")
-            await self.conn.rollback()
             return False
     
     async def get_entities_by_type(self, entity_type: str, limit: int = 100) -> List[Entity]:
-        """依類型查詢實體"""
+        """依類型查詢實體（依寫入順序，即 rowid）"""
         try:
-            async with self.conn.cursor() as cursor:
+            async with self._reader() as conn, conn.cursor() as cursor:
                 await cursor.execute("""
-                    SELECT * FROM entities WHERE type = ? LIMIT ?
+                    SELECT * FROM entities WHERE type = ? ORDER BY rowid LIMIT ?
                 """, (entity_type, limit))
                 rows = await cursor.fetchall()
                 
-                return [
-                    Entity(
-                        id=row["id"],
-                        type=row["type"],
-                        name=row["name"],
-                        properties=json.loads(row["properties"]),
-                        created_at=datetime.fromisoformat(row["created_at"]),
-                        updated_at=datetime.fromisoformat(row["updated_at"])
-                    )
-                    for row in rows
-                ]
+                return [self._row_to_entity(row) for row in rows]
         except Exception as e:
             self.logger.error(f"Failed to get entities by type: {str(e)}")
             return []
     
+    async def get_entities_by_document(
+        self,
+        document_id: str,
+        entity_type: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Entity], Optional[str]]:
+        """依 document_id 索引取得文件實體；以 rowid 為 keyset 游標（即寫入順序）"""
+        try:
+            query = "SELECT rowid AS _rowid, * FROM entities WHERE document_id = ?"
+            params: List[Any] = [document_id]
+            if entity_type:
+                query += " AND type = ?"
+                params.append(entity_type)
+            if cursor:
+                query += " AND rowid > ?"
+                params.append(int(cursor))
+            query += " ORDER BY rowid LIMIT ?"
+            params.append(limit + 1)
+            
+            async with self._reader() as conn, conn.cursor() as db_cursor:
+                await db_cursor.execute(query, params)
+                rows = await db_cursor.fetchall()
+            
+            next_cursor = str(rows[limit - 1]["_rowid"]) if len(rows) > limit else None
+            return [self._row_to_entity(row) for row in rows[:limit]], next_cursor
+        except Exception as e:
+            self.logger.error(f"Failed to get entities by document: {str(e)}")
+            return [], None
+    
+    async def _iter_rows(
+        self, table: str, row_type: Optional[str], batch: int, order: str = "id"
+    ) -> AsyncIterator[Any]:
+        """
+        keyset 分頁逐批讀取資料列；每批各自取得讀取連線，長時間串流不佔住連線池。
+        order="insertion" 時以 rowid 為游標（寫入順序），否則依 id
+        """
+        batch = max(1, batch)
+        key = "rowid" if order == "insertion" else "id"
+        last_key: Any = None
+        while True:
+            query = f"SELECT rowid AS _rowid, * FROM {table}"
+            conditions: List[str] = []
+            params: List[Any] = []
+            if row_type:
+                conditions.append("type = ?")
+                params.append(row_type)
+            if last_key is not None:
+                conditions.append(f"{key} > ?")
+                params.append(last_key)
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += f" ORDER BY {key} LIMIT ?"
+            params.append(batch)
+            
+            async with self._reader() as conn, conn.cursor() as cursor:
+                await cursor.execute(query, params)
+                rows = await cursor.fetchall()
+            for row in rows:
+                yield row
+            if len(rows) < batch:
+                return
+            last_key = rows[-1]["_rowid" if order == "insertion" else "id"]
+    
+    async def iter_entities(
+        self,
+        entity_type: Optional[str] = None,
+        batch: int = 500,
+        order: str = "id"
+    ) -> AsyncIterator[Entity]:
+        """逐批串流實體（依 id 或 rowid keyset 分頁）"""
+        async for row in self._iter_rows("entities", entity_type, batch, order):
+            yield self._row_to_entity(row)
+    
+    async def iter_relations(
+        self,
+        relation_type: Optional[str] = None,
+        batch: int = 500
+    ) -> AsyncIterator[Relation]:
+        """逐批串流關係（依 id keyset 分頁）"""
+        async for row in self._iter_rows("relations", relation_type, batch):
+            yield _row_to_relation(row)
+    
     async def search_entities(
-        self, query: str, limit: int = 10, *, include_type_match: bool = True
+        self,
+        query: str,
+        limit: int = 10,
+        *,
+        include_type_match: bool = True,
+        order_by: str = "name"
     ) -> List[Entity]:
-        """搜尋實體；include_type_match=False 時僅依 name LIKE 匹配。"""
+        """
+        搜尋實體；include_type_match=False 時僅比對 name。
+        查詢長度 >= 3 且 FTS5 可用時走 trigram 索引（可用 order_by="rank" 依 bm25 排序），否則退回 LIKE 全表掃描。
+        """
         try:
-            async with self.conn.cursor() as cursor:
-                if include_type_match:
-                    await cursor.execute("""
-                        SELECT * FROM entities 
-                        WHERE name LIKE ? OR type LIKE ?
-                        ORDER BY name
-                        LIMIT ?
-                    """, (f"%{query}%", f"%{query}%", limit))
-                else:
-                    await cursor.execute("""
-                        SELECT * FROM entities 
-                        WHERE name LIKE ?
-                        ORDER BY name
-                        LIMIT ?
-                    """, (f"%{query}%", limit))
-                rows = await cursor.fetchall()
-                
-                return [
-                    Entity(
-                        id=row["id"],
-                        type=row["type"],
-                        name=row["name"],
-                        properties=json.loads(row["properties"]),
-                        created_at=datetime.fromisoformat(row["created_at"]),
-                        updated_at=datetime.fromisoformat(row["updated_at"])
-                    )
-                    for row in rows
-                ]
+            if self._fts_enabled and len(query) >= _FTS_MIN_QUERY_CHARS:
+                try:
+                    return await self._search_entities_fts(query, limit, include_type_match, order_by)
+                except Exception as e:
+                    self.logger.warning(f"FTS search failed, falling back to LIKE: {str(e)}")
+            return await self._search_entities_like(query, limit, include_type_match, order_by)
         except Exception as e:
             self.logger.error(f"Failed to search entities: {str(e)}")
             return []
     
+    async def _search_entities_fts(
+        self, query: str, limit: int, include_type_match: bool, order_by: str
+    ) -> List[Entity]:
+        """FTS5 trigram 查詢（子字串語意與 LIKE '%q%' 相同）"""
+        columns = "{name type}" if include_type_match else "{name}"
+        order_clause = "f.rank" if order_by == "rank" else "e.name"
+        async with self._reader() as conn, conn.cursor() as cursor:
+            await cursor.execute(f"""
+                SELECT e.* FROM entities_fts f
+                JOIN entities e ON e.rowid = f.rowid
+                WHERE entities_fts MATCH ?
+                ORDER BY {order_clause}
+                LIMIT ?
+            """, (f"{columns} : {_fts_phrase(query)}", limit))
+            rows = await cursor.fetchall()
+        return [self._row_to_entity(row) for row in rows]
+    
+    async def _search_entities_like(
+        self, query: str, limit: int, include_type_match: bool, order_by: str
+    ) -> List[Entity]:
+        """LIKE 子字串查詢（短查詢或 FTS 不可用時）"""
+        pattern = f"%{query}%"
+        if include_type_match:
+            where_clause, params = "name LIKE ? OR type LIKE ?", [pattern, pattern]
+        else:
+            where_clause, params = "name LIKE ?", [pattern]
+        if order_by == "rank":
+            order_clause = "CASE WHEN name LIKE ? THEN 0 ELSE 1 END, length(name), name"
+            params.append(pattern)
+        else:
+            order_clause = "name"
+        async with self._reader() as conn, conn.cursor() as cursor:
+            await cursor.execute(f"""
+                SELECT * FROM entities
+                WHERE {where_clause}
+                ORDER BY {order_clause}
+                LIMIT ?
+            """, params + [limit])
+            rows = await cursor.fetchall()
+        return [self._row_to_entity(row) for row in rows]
+    
     async def get_neighbors(
         self,
         entity_id: str,
         relation_type: Optional[str] = None,
-        direction: str = "both"
+        direction: str = "both",
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None
     ) -> List[Entity]:
-        """取得實體的鄰居節點"""
+        """
+        取得實體的鄰居節點（relations JOIN entities，單一查詢完成；有快照時由快照取鄰居 id）
+        
+        order_by="importance" 時於 SQL 內 JOIN entity_importance 排序並 LIMIT；快照路徑先依分數排序截斷 id 再取實體
+        """
         try:
-            neighbors = []
+            by_importance = order_by == "importance"
+            snapshot = self._current_adjacency()
+            if snapshot is not None:
+                neighbor_ids = snapshot.neighbor_ids(entity_id, relation_type, direction)
+                if by_importance:
+                    neighbor_ids = await self._order_by_importance(neighbor_ids)
+                if limit is not None:
+                    neighbor_ids = neighbor_ids[:limit]
+                found = await self.get_entities_many(neighbor_ids)
+                return [found[i] for i in neighbor_ids if i in found]
             
-            async with self.conn.cursor() as cursor:
-                if direction in ["outgoing", "both"]:
-                    query = "SELECT target_id FROM relations WHERE source_id = ?"
-                    params = [entity_id]
-                    if relation_type:
-                        query += " AND type = ?"
-                        params.append(relation_type)
-                    
-                    await cursor.execute(query, params)
-                    target_ids = [row[0] for row in await cursor.fetchall()]
-                    
-                    for target_id in target_ids:
-                        entity = await self.get_entity(target_id)
-                        if entity:
-                            neighbors.append(entity)
-                
-                if direction in ["incoming", "both"]:
-                    query = "SELECT source_id FROM relations WHERE target_id = ?"
-                    params = [entity_id]
-                    if relation_type:
-                        query += " AND type = ?"
-                        params.append(relation_type)
-                    
-                    await cursor.execute(query, params)
-                    source_ids = [row[0] for row in await cursor.fetchall()]
-                    
-                    for source_id in source_ids:
-                        entity = await self.get_entity(source_id)
-                        if entity and entity not in neighbors:
-                            neighbors.append(entity)
+            if self._schema_version == SCHEMA_V2:
+                # v2：直接以整數 pk 連接 relation_store，省去經檢視表換回字串 id 後再查 entities
+                edge_sql = (
+                    "SELECT e.* FROM relation_store r JOIN entities e ON e.rowid = r.{near} "
+                    "WHERE r.{far} = (SELECT pk FROM entity_store WHERE id = ?)"
+                )
+                columns = {"outgoing": ("target", "source"), "incoming": ("source", "target")}
+                type_clause = " AND r.type = (SELECT pk FROM relation_types WHERE name = ?)" if relation_type else ""
+            else:
+                edge_sql = "SELECT e.* FROM relations r JOIN entities e ON e.id = r.{near} WHERE r.{far} = ?"
+                columns = {"outgoing": ("target_id", "source_id"), "incoming": ("source_id", "target_id")}
+                type_clause = " AND r.type = ?" if relation_type else ""
+            parts: List[str] = []
+            params: List[Any] = []
+            for edge_direction, (near, far) in columns.items():
+                if direction in [edge_direction, "both"]:
+                    parts.append(edge_sql.format(near=near, far=far) + type_clause)
+                    params.extend([entity_id, relation_type] if relation_type else [entity_id])
+            if not parts:
+                return []
+            
+            if by_importance:
+                query = _NEIGHBORS_BY_IMPORTANCE_SQL.format(neighbors=" UNION ".join(parts))
+                if limit is not None:
+                    query += " LIMIT ?"
+                    params.append(limit)
+            else:
+                query = " UNION ALL ".join(parts)
+            async with self._reader() as conn, conn.cursor() as cursor:
+                await cursor.execute(query, params)
+                rows = await cursor.fetchall()
             
-            return neighbors
+            # 依出現順序去重（先 outgoing 後 incoming；依重要度時已由 UNION 去重並排序）
+            neighbors: Dict[str, Entity] = {}
+            for row in rows:
+                if row["id"] not in neighbors:
+                    neighbors[row["id"]] = self._row_to_entity(row)
+            return list(neighbors.values())[:limit]
         except Exception as e:
             self.logger.error(f"Failed to get neighbors: {str(e)}")
             return []
@@ -568,97 +2541,112 @@ class SQLiteGraphStore(GraphStore):
         target_id: str,
         max_hops: int = 3
     ) -> List[List[str]]:
-        """取得從 source_id 到 target_id 的所有路徑（BFS）"""
+        """
+        取得從 source_id 到 target_id 的所有路徑（遞迴 CTE，單一查詢）
+        
+        僅沿 outgoing 關係、不含循環，依 hop 數由小到大回傳最多 100 條；
+        走訪列數上限為 GRAPH_TRAVERSAL_MAX_NODES，超過時截斷並記錄警告
+        """
         if source_id == target_id:
             return [[source_id]]
         
-        paths = []
-        queue = [(source_id, [source_id])]
-        visited = set()
+        max_rows = settings.GRAPH_TRAVERSAL_MAX_NODES
+        snapshot = self._current_adjacency()
+        if snapshot is not None:
+            paths, truncated = snapshot.paths(source_id, target_id, max_hops, max_rows, _MAX_PATHS)
+            if truncated:
+                self.logger.warning(
+                    f"get_path({source_id} -> {target_id}, max_hops={max_hops}) truncated "
+                    f"at {max_rows} visited nodes"
+                )
+            return paths
+        
+        async with self._reader() as conn, conn.cursor() as cursor:
+            await cursor.execute(_PATH_CTE_SQL, {
+                "source": source_id,
+                "target": target_id,
+                "max_hops": max_hops,
+                "max_rows": max_rows,
+            })
+            row = await cursor.fetchone()
         
-        while queue and len(paths) < 100:  # 限制路徑數量
-            current_id, path = queue.pop(0)
-            
-            if len(path) > max_hops:
-                continue
-            
-            if current_id in visited:
-                continue
-            
-            visited.add(current_id)
-            
-            # 取得鄰居
-            neighbors = await self.get_neighbors(current_id, direction="outgoing")
-            
-            for neighbor in neighbors:
-                if neighbor.id == target_id:
-                    paths.append(path + [neighbor.id])
-                elif neighbor.id not in path:  # 避免循環
-                    queue.append((neighbor.id, path + [neighbor.id]))
+        if row["visits"] >= max_rows:
+            self.logger.warning(
+                f"get_path({source_id} -> {target_id}, max_hops={max_hops}) truncated "
+                f"at {max_rows} visited nodes"
+            )
         
-        return paths
+        paths = [path.strip(_PATH_SEP).split(_PATH_SEP) for path in json.loads(row["paths"])]
+        paths.sort(key=len)
+        return paths[:_MAX_PATHS]
     
     async def get_subgraph(
         self,
         entity_ids: List[str],
         max_depth: int = 2
     ) -> Dict[str, Any]:
-        """取得包含指定實體的子圖"""
-        entities_set = set(entity_ids)
-        relations_list = []
+        """
+        取得包含指定實體的子圖（遞迴 CTE 走訪節點 + 一次關係查詢）
         
-        # BFS 擴展
-        queue = [(entity_id, 0) for entity_id in entity_ids]
-        visited = set()
+        子圖含距起點 max_depth 以內的節點，以及與這些節點相連的所有關係；
+        節點數上限 GRAPH_TRAVERSAL_MAX_NODES、關係數上限 GRAPH_TRAVERSAL_MAX_EDGES，超過時截斷並記錄警告
+        """
+        seeds = list(dict.fromkeys(entity_ids))
+        if not seeds:
+            return {"entities": [], "relations": []}
         
-        while queue:
-            entity_id, depth = queue.pop(0)
-            
-            if entity_id in visited or depth > max_depth:
-                continue
-            
-            visited.add(entity_id)
-            entity = await self.get_entity(entity_id)
-            if entity:
-                entities_set.add(entity_id)
+        max_rows = settings.GRAPH_TRAVERSAL_MAX_NODES
+        max_edges = settings.GRAPH_TRAVERSAL_MAX_EDGES
+        snapshot = self._current_adjacency()
+        if snapshot is not None:
+            result = snapshot.subgraph(seeds, max_depth, max_rows, max_edges)
+            if result.truncated:
+                self.logger.warning(
+                    f"get_subgraph({len(seeds)} seeds, max_depth={max_depth}) truncated: "
+                    f"{len(result.nodes)} nodes (cap {max_rows}), "
+                    f"{len(result.edge_rowids)} relations (cap {max_edges})"
+                )
+            found = await self.get_entities_many(result.nodes)
+            relations = await self._get_relations_by_rowids(result.edge_rowids)
+            return {
+                "entities": [found[i].to_dict() for i in result.nodes if i in found],
+                "relations": [r.to_dict() for r in relations]
+            }
+        
+        nodes: List[str] = []
+        entities: List[Entity] = []
+        relations: List[Relation] = []
+        visits = 0
+        
+        async with self._reader() as conn, conn.cursor() as cursor:
+            await cursor.execute(_SUBGRAPH_NODES_CTE_SQL, {
+                "seeds": json.dumps(seeds),
+                "max_depth": max_depth,
+                "max_rows": max_rows,
+            })
+            for row in await cursor.fetchall():
+                nodes.append(row["node"])
+                visits = row["visits"]
+                if row["id"] is not None:
+                    entities.append(self._row_to_entity(row))
             
-            # 取得關係
-            async with self.conn.cursor() as cursor:
-                await cursor.execute("""
-                    SELECT * FROM relations 
-                    WHERE source_id = ? OR target_id = ?
-                """, (entity_id, entity_id))
-                rows = await cursor.fetchall()
-                
-                for row in rows:
-                    relation = Relation(
-                        id=row["id"],
-                        source_id=row["source_id"],
-                        target_id=row["target_id"],
-                        type=row["type"],
-                        properties=json.loads(row["properties"]),
-                        weight=row["weight"],
-                        created_at=datetime.fromisoformat(row["created_at"])
-                    )
-                    
-                    if relation not in relations_list:
-                        relations_list.append(relation)
-                    
-                    # 添加到隊列
-                    next_id = relation.target_id if relation.source_id == entity_id else relation.source_id
-                    if next_id not in visited and depth < max_depth:
-                        queue.append((next_id, depth + 1))
+            await cursor.execute(_SUBGRAPH_RELATIONS_SQL, {
+                "nodes": json.dumps(nodes),
+                "max_edges": max_edges + 1,
+            })
+            relations = [_row_to_relation(row) for row in await cursor.fetchall()]
         
-        # 取得所有實體
-        entities = []
-        for entity_id in entities_set:
-            entity = await self.get_entity(entity_id)
-            if entity:
-                entities.append(entity)
+        if visits >= max_rows or len(relations) > max_edges:
+            self.logger.warning(
+                f"get_subgraph({len(seeds)} seeds, max_depth={max_depth}) truncated: "
+                f"{len(nodes)} nodes (cap {max_rows}), "
+                f"{min(len(relations), max_edges)} relations (cap {max_edges})"
+            )
+            relations = relations[:max_edges]
         
         return {
             "entities": [e.to_dict() for e in entities],
-            "relations": [r.to_dict() for r in relations_list]
+            "relations": [r.to_dict() for r in relations]
         }
     
     async def get_statistics(self) -> Dict[str, Any]:
@@ -667,30 +2655,16 @@ class SQLiteGraphStore(GraphStore):
             if not self.conn:
                 await self.initialize()
             
-            async with self.conn.cursor() as cursor:
-                # 獲取實體總數
-                await cursor.execute("SELECT COUNT(*) FROM entities")
-                total_entities = (await cursor.fetchone())[0]
-                
-                # 獲取關係總數
-                await cursor.execute("SELECT COUNT(*) FROM relations")
-                total_relations = (await cursor.fetchone())[0]
-                
-                # 獲取實體類型統計
-                await cursor.execute("""
-                    SELECT type, COUNT(*) as count 
-                    FROM entities 
-                    GROUP BY type
-                """)
-                entity_types = {row['type']: row['count'] for row in await cursor.fetchall()}
-                
-                # 獲取關係類型統計
-                await cursor.execute("""
-                    SELECT type, COUNT(*) as count 
-                    FROM relations 
-                    GROUP BY type
-                """)
-                relation_types = {row['type']: row['count'] for row in await cursor.fetchall()}
+            # 讀取觸發器維護的 graph_stats（每個類型一列），不掃描 entities / relations
+            counts: Dict[str, Dict[str, int]] = {"entity": {}, "relation": {}}
+            async with self._reader() as conn, conn.cursor() as cursor:
+                await cursor.execute("SELECT kind, type, count FROM graph_stats")
+                for row in await cursor.fetchall():
+                    counts[row["kind"]][row["type"]] = row["count"]
+            entity_types = counts["entity"]
+            relation_types = counts["relation"]
+            total_entities = sum(entity_types.values())
+            total_relations = sum(relation_types.values())
             
             return {
                 "total_entities": total_entities,
@@ -717,8 +2691,14 @@ class SQLiteGraphStore(GraphStore):
             if not self.conn:
                 await self.initialize()
             
+            snapshot = self._current_adjacency()
+            if snapshot is not None:
+                if direction not in ("both", "outgoing", "incoming"):
+                    return []
+                return await self._get_relations_by_rowids(snapshot.relation_rowids(entity_id, direction))
+            
             relations = []
-            async with self.conn.cursor() as cursor:
+            async with self._reader() as conn, conn.cursor() as cursor:
                 if direction == "both":
                     await cursor.execute("""
                         SELECT * FROM relations 
@@ -739,21 +2719,48 @@ class SQLiteGraphStore(GraphStore):
                 
                 rows = await cursor.fetchall()
                 for row in rows:
-                    relations.append(Relation(
-                        id=row["id"],
-                        source_id=row["source_id"],
-                        target_id=row["target_id"],
-                        type=row["type"],
-                        properties=json.loads(row["properties"]),
-                        weight=row["weight"],
-                        created_at=datetime.fromisoformat(row["created_at"])
-                    ))
+                    relations.append(_row_to_relation(row))
             
             return relations
         except Exception as e:
             self.logger.error(f"Failed to get relations by entity: {str(e)}")
             return []
     
+    async def get_relations_by_entities(
+        self,
+        entity_ids: List[str],
+        direction: str = "both"
+    ) -> Dict[str, Relation]:
+        """批次獲取多個實體的關係（單一查詢，依關係 ID 去重；有快照時以 rowid 批次取得）"""
+        try:
+            if not self.conn:
+                await self.initialize()
+            directions = ["outgoing", "incoming"] if direction == "both" else [direction]
+            if not entity_ids or any(d not in _RELATIONS_BY_ENTITIES_SQL for d in directions):
+                return {}
+            
+            snapshot = self._current_adjacency()
+            if snapshot is not None:
+                rowids: Dict[int, None] = {}
+                for entity_id in entity_ids:
+                    rowids.update(dict.fromkeys(snapshot.relation_rowids(entity_id, direction)))
+                return {relation.id: relation for relation in await self._get_relations_by_rowids(list(rowids))}
+            
+            ids_json = json.dumps(list(entity_ids))
+            relations: Dict[str, Relation] = {}
+            async with self._reader() as conn, conn.cursor() as cursor:
+                await cursor.execute(
+                    " UNION ALL ".join(_RELATIONS_BY_ENTITIES_SQL[d] for d in directions),
+                    [ids_json] * len(directions)
+                )
+                for row in await cursor.fetchall():
+                    if row["id"] not in relations:
+                        relations[row["id"]] = _row_to_relation(row)
+            return relations
+        except Exception as e:
+            self.logger.error(f"Failed to get relations by entities: {str(e)}")
+            return {}
+    
     async def get_relations_by_type(
         self,
         relation_type: str,
@@ -765,7 +2772,7 @@ class SQLiteGraphStore(GraphStore):
                 await self.initialize()
             
             relations = []
-            async with self.conn.cursor() as cursor:
+            async with self._reader() as conn, conn.cursor() as cursor:
                 await cursor.execute("""
                     SELECT * FROM relations 
                     WHERE type = ?
@@ -774,15 +2781,7 @@ class SQLiteGraphStore(GraphStore):
                 
                 rows = await cursor.fetchall()
                 for row in rows:
-                    relations.append(Relation(
-                        id=row["id"],
-                        source_id=row["source_id"],
-                        target_id=row["target_id"],
-                        type=row["type"],
-                        properties=json.loads(row["properties"]),
-                        weight=row["weight"],
-                        created_at=datetime.fromisoformat(row["created_at"])
-                    ))
+                    relations.append(_row_to_relation(row))
             
             return relations
         except Exception as e:
@@ -796,21 +2795,14 @@ class SQLiteGraphStore(GraphStore):
                 await self.initialize()
             
             entities = []
-            async with self.conn.cursor() as cursor:
+            async with self._reader() as conn, conn.cursor() as cursor:
                 await cursor.execute("""
                     SELECT * FROM entities LIMIT ?
                 """, (limit,))
                 
                 rows = await cursor.fetchall()
                 for row in rows:
-                    entities.append(Entity(
-                        id=row["id"],
-                        type=row["type"],
-                        name=row["name"],
-                        properties=json.loads(row["properties"]),
-                        created_at=datetime.fromisoformat(row["created_at"]),
-                        updated_at=datetime.fromisoformat(row["updated_at"])
-                    ))
+                    entities.append(self._row_to_entity(row))
             
             return entities
         except Exception as e:
@@ -824,22 +2816,14 @@ class SQLiteGraphStore(GraphStore):
                 await self.initialize()
             
             relations = []
-            async with self.conn.cursor() as cursor:
+            async with self._reader() as conn, conn.cursor() as cursor:
                 await cursor.execute("""
                     SELECT * FROM relations LIMIT ?
                 """, (limit,))
                 
                 rows = await cursor.fetchall()
                 for row in rows:
-                    relations.append(Relation(
-                        id=row["id"],
-                        source_id=row["source_id"],
-                        target_id=row["target_id"],
-                        type=row["type"],
-                        properties=json.loads(row["properties"]),
-                        weight=row["weight"],
-                        created_at=datetime.fromisoformat(row["created_at"])
-                    ))
+                    relations.append(_row_to_relation(row))
             
             return relations
         except Exception as e:
@@ -847,7 +2831,14 @@ class SQLiteGraphStore(GraphStore):
             return []
     
     async def close(self):
-        """關閉資料庫連線"""
+        """關閉資料庫連線（先提交寫入佇列中已排入的寫入）"""
+        if self._write_queue is not None and self.conn:
+            await self._write_queue.flush()
+            self._write_queue = None
+        if self._adjacency_task is not None and not self._adjacency_task.done():
+            self._adjacency_task.cancel()
+        self._adjacency = None
+        await self._close_read_pool()
         if self.conn:
             try:
                 # 確保連接正確關閉，但允許被取消
@@ -866,14 +2857,165 @@ class SQLiteGraphStore(GraphStore):
                 raise  # 重新拋出 CancelledError
 
 
+# 名稱倒排索引的 n-gram 長度：2 可涵蓋兩字中文查詢（如「批價」），更短的查詢退回全表掃描
+_NAME_GRAM = 2
+
+
+class _NameGramIndex:
+    """
+    實體名稱 bigram 倒排索引（小寫比對）
+
+    每個實體配一個整數槽位（依首次寫入順序），posting 為槽位的 array；改名不回收舊 posting，
+    查詢時以槽位目前的名稱驗證子字串。刪除累積的空槽位超過存活數時整體重建
+    """
+
+    def __init__(self):
+        self._slot_of: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._names: List[Optional[str]] = []
+        self._postings: Dict[str, array] = {}
+
+    @staticmethod
+    def _grams(text: str) -> set:
+        return {text[i:i + _NAME_GRAM] for i in range(len(text) - _NAME_GRAM + 1)}
+
+    def add(self, entity_id: str, name: str) -> None:
+        slot = self._slot_of.get(entity_id)
+        if slot is None:
+            slot = len(self._ids)
+            self._slot_of[entity_id] = slot
+            self._ids.append(entity_id)
+            self._names.append(None)
+        elif self._names[slot] == name:
+            return
+        self._names[slot] = name
+        for gram in self._grams((name or "").lower()):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("i")
+            postings.append(slot)
+
+    def remove(self, entity_id: str) -> None:
+        slot = self._slot_of.pop(entity_id, None)
+        if slot is None:
+            return
+        self._ids[slot] = None
+        self._names[slot] = None
+        if len(self._ids) > 1024 and len(self._ids) > 2 * len(self._slot_of):
+            live = [(i, n) for i, n in zip(self._ids, self._names) if i is not None]
+            self.__init__()
+            for live_id, live_name in live:
+                self.add(live_id, live_name)
+
+    def candidates(self, query_lower: str) -> Optional[List[str]]:
+        """
+        名稱包含 query 的實體 id（依首次寫入順序）；查詢短於一個 gram 時回傳 None，需全表掃描。
+        由最短的 posting 起依序交集（後續 posting 遠長於目前候選時停止），再以索引內的名稱驗證子字串
+        """
+        grams = self._grams(query_lower)
+        if not grams:
+            return None
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        slots = set(postings[0])
+        for other in postings[1:]:
+            if len(slots) <= 64 or len(other) > 8 * len(slots):
+                break
+            slots.intersection_update(other)
+        ids, names = self._ids, self._names
+        return [
+            ids[slot] for slot in sorted(slots)
+            if ids[slot] is not None and query_lower in names[slot].lower()
+        ]
+
+
 class MemoryGraphStore(GraphStore):
-    """記憶體圖儲存（用於測試）"""
+    """
+    記憶體圖儲存（測試，以及 HotTierGraphStore 的常駐讀取層）
+
+    維護類型 / 文件 / 鄰接 / 名稱 bigram 索引與類型計數，查詢不需掃描全部實體或關係
+    """
     
     def __init__(self):
+        self.logger = logging.getLogger("MemoryGraphStore")
+        self._reset()
+    
+    def _reset(self) -> None:
         self.entities: Dict[str, Entity] = {}
         self.relations: Dict[str, Relation] = {}
-        self.entity_relations: Dict[str, List[str]] = {}  # entity_id -> [relation_ids]
-        self.logger = logging.getLogger("MemoryGraphStore")
+        # entity_id -> 相連關係 id（以 dict 作有序集合：重複寫入不重複、刪除 O(1)）
+        self.entity_relations: Dict[str, Dict[str, None]] = {}
+        self.importance: Dict[str, Tuple[float, Optional[float], int]] = {}  # entity_id -> (pagerank, doc_pagerank, degree)
+        self._by_type: Dict[str, Dict[str, None]] = {}
+        self._by_document: Dict[str, Dict[str, None]] = {}
+        self._relation_type_counts: Dict[str, int] = {}
+        self._name_index = _NameGramIndex()
+    
+    # ---- 索引維護（同步，供 HotTierGraphStore 直接套用寫入） ----
+    
+    def _unindex_entity(self, entity: Entity) -> None:
+        for index, key in ((self._by_type, entity.type), (self._by_document, entity.document_id)):
+            members = index.get(key)
+            if members is not None:
+                members.pop(entity.id, None)
+                if not members:
+                    del index[key]
+    
+    def _put_entity(self, entity: Entity) -> None:
+        previous = self.entities.get(entity.id)
+        if previous is not None and (previous.type, previous.document_id) != (entity.type, entity.document_id):
+            self._unindex_entity(previous)
+        self.entities[entity.id] = entity
+        self._by_type.setdefault(entity.type, {})[entity.id] = None
+        if entity.document_id:
+            self._by_document.setdefault(entity.document_id, {})[entity.id] = None
+        self._name_index.add(entity.id, entity.name)
+        self.entity_relations.setdefault(entity.id, {})
+    
+    def _remove_entity(self, entity_id: str) -> bool:
+        entity = self.entities.get(entity_id)
+        if entity is None:
+            return False
+        # 級聯刪除關係
+        for rel_id in list(self.entity_relations.get(entity_id, ())):
+            self._remove_relation(rel_id)
+        self._unindex_entity(entity)
+        self._name_index.remove(entity_id)
+        del self.entities[entity_id]
+        self.entity_relations.pop(entity_id, None)
+        self.importance.pop(entity_id, None)
+        return True
+    
+    def _put_relation(self, relation: Relation) -> bool:
+        if relation.source_id not in self.entities or relation.target_id not in self.entities:
+            return False
+        previous = self.relations.get(relation.id)
+        if previous is not None:
+            self._unindex_relation(previous)
+        self.relations[relation.id] = relation
+        self.entity_relations[relation.source_id][relation.id] = None
+        self.entity_relations[relation.target_id][relation.id] = None
+        self._relation_type_counts[relation.type] = self._relation_type_counts.get(relation.type, 0) + 1
+        return True
+    
+    def _unindex_relation(self, relation: Relation) -> None:
+        for entity_id in (relation.source_id, relation.target_id):
+            relation_ids = self.entity_relations.get(entity_id)
+            if relation_ids is not None:
+                relation_ids.pop(relation.id, None)
+        count = self._relation_type_counts.get(relation.type, 0) - 1
+        if count > 0:
+            self._relation_type_counts[relation.type] = count
+        else:
+            self._relation_type_counts.pop(relation.type, None)
+    
+    def _remove_relation(self, relation_id: str) -> bool:
+        relation = self.relations.pop(relation_id, None)
+        if relation is None:
+            return False
+        self._unindex_relation(relation)
+        return True
+    
+    # ---- GraphStore 介面 ----
     
     async def initialize(self) -> bool:
         """初始化（記憶體模式不需要）"""
@@ -881,44 +3023,44 @@ class MemoryGraphStore(GraphStore):
     
     async def add_entity(self, entity: Entity) -> bool:
         """新增實體"""
-        self.entities[entity.id] = entity
-        if entity.id not in self.entity_relations:
-            self.entity_relations[entity.id] = []
+        self._put_entity(entity)
         return True
     
     async def get_entity(self, entity_id: str) -> Optional[Entity]:
         """取得實體"""
         return self.entities.get(entity_id)
     
+    async def get_entities_many(self, entity_ids: List[str]) -> Dict[str, Entity]:
+        """批次取得實體"""
+        return {
+            entity_id: self.entities[entity_id]
+            for entity_id in entity_ids
+            if entity_id in self.entities
+        }
+    
     async def delete_entity(self, entity_id: str) -> bool:
-        """刪除實體"""
-        if entity_id in self.entities:
-            # 刪除相關關係
-            relation_ids = self.entity_relations.get(entity_id, [])
-            for rel_id in relation_ids[:]:
-                await self.delete_relation(rel_id)
-            
-            del self.entities[entity_id]
-            del self.entity_relations[entity_id]
-            return True
-        return False
+        """刪除實體（級聯刪除關係）"""
+        return self._remove_entity(entity_id)
     
     async def add_relation(self, relation: Relation) -> bool:
         """新增關係"""
-        if relation.source_id not in self.entities or relation.target_id not in self.entities:
-            return False
-        
-        self.relations[relation.id] = relation
-        
-        if relation.source_id not in self.entity_relations:
-            self.entity_relations[relation.source_id] = []
-        if relation.target_id not in self.entity_relations:
-            self.entity_relations[relation.target_id] = []
-        
-        self.entity_relations[relation.source_id].append(relation.id)
-        self.entity_relations[relation.target_id].append(relation.id)
-        
-        return True
+        return self._put_relation(relation)
+    
+    async def add_entities_bulk(
+        self,
+        entities: List[Entity],
+        batch_size: Optional[int] = None
+    ) -> List[bool]:
+        """批次新增實體（記憶體模式無交易，逐筆寫入）"""
+        return [await self.add_entity(entity) for entity in entities]
+    
+    async def add_relations_bulk(
+        self,
+        relations: List[Relation],
+        batch_size: Optional[int] = None
+    ) -> List[bool]:
+        """批次新增關係（記憶體模式無交易，逐筆寫入）"""
+        return [await self.add_relation(relation) for relation in relations]
     
     async def get_relation(self, relation_id: str) -> Optional[Relation]:
         """取得關係"""
@@ -926,48 +3068,100 @@ class MemoryGraphStore(GraphStore):
     
     async def delete_relation(self, relation_id: str) -> bool:
         """刪除關係"""
-        if relation_id in self.relations:
-            relation = self.relations[relation_id]
-            
-            if relation.source_id in self.entity_relations:
-                self.entity_relations[relation.source_id].remove(relation_id)
-            if relation.target_id in self.entity_relations:
-                self.entity_relations[relation.target_id].remove(relation_id)
-            
-            del self.relations[relation_id]
-            return True
-        return False
+        return self._remove_relation(relation_id)
     
     async def get_entities_by_type(self, entity_type: str, limit: int = 100) -> List[Entity]:
-        """依類型查詢實體"""
-        return [e for e in self.entities.values() if e.type == entity_type][:limit]
+        """依類型查詢實體（類型索引）"""
+        return [self.entities[entity_id] for entity_id in islice(self._by_type.get(entity_type, ()), limit)]
+    
+    async def get_entities_by_document(
+        self,
+        document_id: str,
+        entity_type: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Entity], Optional[str]]:
+        """依 document_id 取得文件實體（文件索引）；游標為插入順序位置"""
+        start = int(cursor) if cursor else 0
+        matched = (self.entities[entity_id] for entity_id in self._by_document.get(document_id, ()))
+        if entity_type:
+            matched = (e for e in matched if e.type == entity_type)
+        # 多取一筆判斷是否還有下一頁
+        page = list(islice(matched, start, start + limit + 1))
+        next_cursor = str(start + limit) if len(page) > limit else None
+        return page[:limit], next_cursor
+    
+    async def iter_entities(
+        self,
+        entity_type: Optional[str] = None,
+        batch: int = 500,
+        order: str = "id"
+    ) -> AsyncIterator[Entity]:
+        """依 id 排序串流實體；order="insertion" 時依插入順序（與 get_entities_by_type 相同）"""
+        entity_ids = self._by_type.get(entity_type, ()) if entity_type else self.entities
+        if order != "insertion":
+            entity_ids = sorted(entity_ids)
+        for entity_id in list(entity_ids):
+            entity = self.entities.get(entity_id)
+            if entity and (not entity_type or entity.type == entity_type):
+                yield entity
+    
+    async def iter_relations(
+        self,
+        relation_type: Optional[str] = None,
+        batch: int = 500
+    ) -> AsyncIterator[Relation]:
+        """依 id 排序串流關係"""
+        for relation_id in sorted(self.relations):
+            relation = self.relations.get(relation_id)
+            if relation and (not relation_type or relation.type == relation_type):
+                yield relation
     
     async def search_entities(
-        self, query: str, limit: int = 10, *, include_type_match: bool = True
+        self,
+        query: str,
+        limit: int = 10,
+        *,
+        include_type_match: bool = True,
+        order_by: str = "name"
     ) -> List[Entity]:
-        """搜尋實體；include_type_match=False 時僅比對 name。"""
-        results = []
+        """
+        搜尋實體；include_type_match=False 時僅比對 name；order_by="rank" 時 name 命中優先、較短名稱優先。
+        名稱命中由 bigram 索引取得，只排序命中者（同名者依寫入順序，與全表排序結果一致）
+        """
         query_lower = query.lower()
-        # 穩定順序：依 name 排序後掃描（與 SQLite ORDER BY name 對齊）
-        for entity in sorted(self.entities.values(), key=lambda e: (e.name or "").lower()):
-            name_hit = query_lower in entity.name.lower()
-            type_hit = include_type_match and (query_lower in entity.type.lower())
-            if name_hit or type_hit:
-                results.append(entity)
-                if len(results) >= limit:
-                    break
+        type_hits = {t for t in self._by_type if query_lower in t.lower()} if include_type_match else set()
+        name_hit_ids = self._name_index.candidates(query_lower)
+        if name_hit_ids is not None and not type_hits:
+            hits = [(0, self.entities[entity_id]) for entity_id in name_hit_ids]
+        else:
+            # 查詢短於一個 gram 或有類型命中：依寫入順序掃描全部實體
+            hits = []
+            for entity in self.entities.values():
+                name_hit = query_lower in entity.name.lower()
+                if name_hit or entity.type in type_hits:
+                    hits.append((0 if name_hit else 1, entity))
         
-        return results
+        if order_by == "rank":
+            # 與 SQLite LIKE 路徑的 rank 排序一致
+            key = lambda h: (h[0], len(h[1].name), h[1].name.lower())
+        else:
+            # 與 SQLite ORDER BY name 對齊
+            key = lambda h: (h[1].name or "").lower()
+        # nsmallest 與 sorted(...)[:limit] 等價（穩定），但只需 O(n log limit)
+        return [h[1] for h in heapq.nsmallest(limit, hits, key=key)]
     
     async def get_neighbors(
         self,
         entity_id: str,
         relation_type: Optional[str] = None,
-        direction: str = "both"
+        direction: str = "both",
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None
     ) -> List[Entity]:
-        """取得實體的鄰居節點"""
-        neighbors = []
-        relation_ids = self.entity_relations.get(entity_id, [])
+        """取得實體的鄰居節點（鄰接索引；依實體 ID 去重）"""
+        neighbors: Dict[str, Entity] = {}
+        relation_ids = self.entity_relations.get(entity_id, ())
         
         for rel_id in relation_ids:
             relation = self.relations.get(rel_id)
@@ -979,15 +3173,21 @@ class MemoryGraphStore(GraphStore):
             
             if direction in ["outgoing", "both"] and relation.source_id == entity_id:
                 neighbor = self.entities.get(relation.target_id)
-                if neighbor and neighbor not in neighbors:
-                    neighbors.append(neighbor)
+                if neighbor:
+                    neighbors.setdefault(neighbor.id, neighbor)
             
             if direction in ["incoming", "both"] and relation.target_id == entity_id:
                 neighbor = self.entities.get(relation.source_id)
-                if neighbor and neighbor not in neighbors:
-                    neighbors.append(neighbor)
+                if neighbor:
+                    neighbors.setdefault(neighbor.id, neighbor)
         
-        return neighbors
+        result = list(neighbors.values())
+        if order_by == "importance":
+            def sort_key(entity: Entity) -> Tuple[float, int, str]:
+                pagerank, _, degree = self.importance.get(entity.id, (0.0, None, 0))
+                return (-pagerank, -degree, entity.id)
+            result.sort(key=sort_key)
+        return result[:limit]
     
     async def get_path(
         self,
@@ -995,98 +3195,118 @@ class MemoryGraphStore(GraphStore):
         target_id: str,
         max_hops: int = 3
     ) -> List[List[str]]:
-        """取得路徑（BFS）"""
+        """
+        取得路徑（BFS，與 SQLiteGraphStore 遞迴 CTE 相同語意）
+        
+        僅沿 outgoing 關係、各路徑內不含循環（不共用全域 visited），依 hop 數由小到大回傳最多 100 條；
+        走訪列數上限為 GRAPH_TRAVERSAL_MAX_NODES（含起點），超過時截斷並記錄警告
+        """
         if source_id == target_id:
             return [[source_id]]
         
-        paths = []
-        queue = [(source_id, [source_id])]
-        visited = set()
-        
-        while queue and len(paths) < 100:
-            current_id, path = queue.pop(0)
-            
-            if len(path) > max_hops:
-                continue
-            
-            if current_id in visited:
+        max_rows = settings.GRAPH_TRAVERSAL_MAX_NODES
+        paths: List[List[str]] = []
+        queue = deque([(source_id, (source_id,))])
+        rows = 1
+        truncated = False
+        while queue:
+            current_id, path = queue.popleft()
+            # path 含起點，節點數 - 1 即 hop 數
+            if current_id == target_id or len(path) > max_hops:
                 continue
-            
-            visited.add(current_id)
-            neighbors = await self.get_neighbors(current_id, direction="outgoing")
-            
-            for neighbor in neighbors:
-                if neighbor.id == target_id:
-                    paths.append(path + [neighbor.id])
-                elif neighbor.id not in path:
-                    queue.append((neighbor.id, path + [neighbor.id]))
+            for rel_id in self.entity_relations.get(current_id, ()):
+                relation = self.relations[rel_id]
+                if relation.source_id != current_id or relation.target_id in path:
+                    continue
+                if rows >= max_rows:
+                    truncated = True
+                    queue.clear()
+                    break
+                rows += 1
+                next_path = path + (relation.target_id,)
+                if relation.target_id == target_id:
+                    paths.append(list(next_path))
+                else:
+                    queue.append((relation.target_id, next_path))
         
-        return paths
+        if truncated:
+            self.logger.warning(
+                f"get_path({source_id} -> {target_id}, max_hops={max_hops}) truncated "
+                f"at {max_rows} visited nodes"
+            )
+        paths.sort(key=len)
+        return paths[:_MAX_PATHS]
     
     async def get_subgraph(
         self,
         entity_ids: List[str],
         max_depth: int = 2
     ) -> Dict[str, Any]:
-        """取得子圖"""
-        entities_set = set(entity_ids)
-        relations_list = []
-        queue = [(entity_id, 0) for entity_id in entity_ids]
-        visited = set()
+        """
+        取得子圖（雙向逐層擴展至 max_depth，與 SQLiteGraphStore 相同語意）
         
-        while queue:
-            entity_id, depth = queue.pop(0)
-            
-            if entity_id in visited or depth > max_depth:
-                continue
-            
-            visited.add(entity_id)
-            entities_set.add(entity_id)
-            
-            relation_ids = self.entity_relations.get(entity_id, [])
-            for rel_id in relation_ids:
-                relation = self.relations.get(rel_id)
-                if relation and relation not in relations_list:
-                    relations_list.append(relation)
-                    
+        子圖含距起點 max_depth 以內的節點，以及與這些節點相連的所有關係；
+        節點數上限 GRAPH_TRAVERSAL_MAX_NODES、關係數上限 GRAPH_TRAVERSAL_MAX_EDGES，超過時截斷並記錄警告
+        """
+        seeds = list(dict.fromkeys(entity_ids))
+        if not seeds:
+            return {"entities": [], "relations": []}
+        
+        max_nodes = settings.GRAPH_TRAVERSAL_MAX_NODES
+        max_edges = settings.GRAPH_TRAVERSAL_MAX_EDGES
+        nodes: Dict[str, None] = dict.fromkeys(seeds)
+        frontier = list(nodes)
+        truncated = False
+        depth = 0
+        while frontier and depth < max_depth and not truncated:
+            next_frontier: List[str] = []
+            for entity_id in frontier:
+                for rel_id in self.entity_relations.get(entity_id, ()):
+                    relation = self.relations[rel_id]
                     next_id = relation.target_id if relation.source_id == entity_id else relation.source_id
-                    if next_id not in visited and depth < max_depth:
-                        queue.append((next_id, depth + 1))
+                    if next_id in nodes:
+                        continue
+                    if len(nodes) >= max_nodes:
+                        truncated = True
+                        break
+                    nodes[next_id] = None
+                    next_frontier.append(next_id)
+                if truncated:
+                    break
+            frontier = next_frontier
+            depth += 1
         
-        entities = [self.entities[eid] for eid in entities_set if eid in self.entities]
+        relations_by_id: Dict[str, Relation] = {}
+        for entity_id in nodes:
+            for rel_id in self.entity_relations.get(entity_id, ()):
+                if rel_id in relations_by_id:
+                    continue
+                if len(relations_by_id) >= max_edges:
+                    truncated = True
+                    break
+                relations_by_id[rel_id] = self.relations[rel_id]
+            if truncated and len(relations_by_id) >= max_edges:
+                break
         
+        if truncated:
+            self.logger.warning(
+                f"get_subgraph({len(seeds)} seeds, max_depth={max_depth}) truncated: "
+                f"{len(nodes)} nodes (cap {max_nodes}), "
+                f"{len(relations_by_id)} relations (cap {max_edges})"
+            )
         return {
-            "entities": [e.to_dict() for e in entities],
-            "relations": [r.to_dict() for r in relations_list]
+            "entities": [self.entities[eid].to_dict() for eid in nodes if eid in self.entities],
+            "relations": [r.to_dict() for r in relations_by_id.values()]
         }
     
     async def get_statistics(self) -> Dict[str, Any]:
-        """取得圖結構統計資訊"""
-        try:
-            # 統計實體類型
-            entity_types: Dict[str, int] = {}
-            for entity in self.entities.values():
-                entity_types[entity.type] = entity_types.get(entity.type, 0) + 1
-            
-            # 統計關係類型
-            relation_types: Dict[str, int] = {}
-            for relation in self.relations.values():
-                relation_types[relation.type] = relation_types.get(relation.type, 0) + 1
-            
-            return {
-                "total_entities": len(self.entities),
-                "total_relations": len(self.relations),
-                "entity_types": entity_types,
-                "relation_types": relation_types
-            }
-        except Exception as e:
-            self.logger.error(f"Failed to get statistics: {str(e)}")
-            return {
-                "total_entities": 0,
-                "total_relations": 0,
-                "entity_types": {},
-                "relation_types": {}
-            }
+        """取得圖結構統計資訊（由類型索引與關係類型計數取得，不掃描）"""
+        return {
+            "total_entities": len(self.entities),
+            "total_relations": len(self.relations),
+            "entity_types": {entity_type: len(ids) for entity_type, ids in self._by_type.items()},
+            "relation_types": dict(self._relation_type_counts)
+        }
     
     async def get_relations_by_entity(
         self,
@@ -1111,6 +3331,26 @@ class MemoryGraphStore(GraphStore):
         
         return relations
     
+    async def get_relations_by_entities(
+        self,
+        entity_ids: List[str],
+        direction: str = "both"
+    ) -> Dict[str, Relation]:
+        """批次獲取多個實體的關係（依關係 ID 去重）"""
+        relations: Dict[str, Relation] = {}
+        for entity_id in entity_ids:
+            for rel_id in self.entity_relations.get(entity_id, []):
+                relation = self.relations.get(rel_id)
+                if relation is None or rel_id in relations:
+                    continue
+                if (
+                    direction == "both"
+                    or (direction == "outgoing" and relation.source_id == entity_id)
+                    or (direction == "incoming" and relation.target_id == entity_id)
+                ):
+                    relations[rel_id] = relation
+        return relations
+    
     async def get_relations_by_type(
         self,
         relation_type: str,
@@ -1125,3 +3365,50 @@ class MemoryGraphStore(GraphStore):
                     break
         return relations
 
+    
+    async def compute_importance(
+        self,
+        damping: float = DEFAULT_DAMPING,
+        max_iterations: int = DEFAULT_MAX_ITERATIONS
+    ) -> Dict[str, Any]:
+        """計算重要度並保存於 self.importance"""
+        result = compute_importance(
+            ((e.id, e.document_id) for e in self.entities.values()),
+            ((r.source_id, r.target_id, r.weight) for r in self.relations.values()),
+            damping,
+            max_iterations,
+        )
+        self.importance = {row[0]: row[1:] for row in result.rows}
+        return {
+            "entities": len(result.rows),
+            "relations": result.relations,
+            "iterations": result.iterations,
+            "doc_iterations": result.doc_iterations,
+        }
+    
+    async def get_importance_scores(self) -> Dict[str, Tuple[float, Optional[float], int]]:
+        """目前保存的重要度分數"""
+        return dict(self.importance)
+    
+    async def export_snapshot(self, path: str) -> Dict[str, Any]:
+        """匯出二進位快照（關係 rowid 依寫入順序編號）"""
+        writer = SnapshotWriter()
+        for entity in self.entities.values():
+            writer.add_entity(SQLiteGraphStore._entity_params(entity))
+        for rowid, relation in enumerate(self.relations.values(), 1):
+            writer.add_relation(rowid, SQLiteGraphStore._relation_params(relation))
+        return await asyncio.to_thread(writer.write, path, {"source": "memory"})
+    
+    async def load_snapshot(self, path: str) -> bool:
+        """以快照內容取代目前資料（properties 維持原始 JSON，首次存取才解碼）"""
+        try:
+            snapshot = await asyncio.to_thread(GraphSnapshot, path)
+        except Exception as e:
+            self.logger.warning(f"Failed to load graph snapshot {path}: {str(e)}")
+            return False
+        self._reset()
+        for row in snapshot.entity_rows():
+            self._put_entity(Entity.from_row(row))
+        for row in snapshot.relation_rows():
+            self._put_relation(Relation.from_row(row))
+        return True
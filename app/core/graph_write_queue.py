@@ -0,0 +1,131 @@
+"""
+GraphStore 寫入佇列（group commit）
+多個協程的寫入由單一背景工作合併為一個交易提交：累積 max_delay 毫秒或 max_rows 筆即提交，
+呼叫端 await 的結果於交易 COMMIT 後才回傳（durable acknowledgement）
+
+更新時間：2026-10-18 05:50
+作者：AI Assistant
+修改摘要：建立 GroupCommitQueue；寫入以「對 cursor 執行的操作」表示，同一交易內每個操作各自一個 SAVEPOINT，
+          單一操作失敗只回滾該操作並把例外交給其呼叫端
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from app.utils.metrics import GRAPH_WRITE_GROUP_OPS
+
+# 寫入操作：於交易內以 cursor 執行，回傳值交給呼叫端（不可自行 commit / rollback）
+WriteOp = Callable[[Any], Awaitable[Any]]
+
+
+async def run_write_ops(conn: Any, ops: List[WriteOp]) -> List[Tuple[bool, Any]]:
+    """
+    以單一交易執行多個寫入操作，回傳每個操作的 (成功, 回傳值或例外)。
+    多個操作時各自包在 SAVEPOINT 中，失敗者回滾至其 SAVEPOINT 後繼續；COMMIT 失敗時整批回滾並拋出
+    """
+    outcomes: List[Tuple[bool, Any]] = []
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute("BEGIN IMMEDIATE")
+            if len(ops) == 1:
+                try:
+                    outcomes.append((True, await ops[0](cursor)))
+                except Exception as e:
+                    await conn.rollback()
+                    return [(False, e)]
+            else:
+                for op in ops:
+                    await cursor.execute("SAVEPOINT write_op")
+                    try:
+                        outcomes.append((True, await op(cursor)))
+                    except Exception as e:
+                        await cursor.execute("ROLLBACK TO write_op")
+                        outcomes.append((False, e))
+                    await cursor.execute("RELEASE write_op")
+        await conn.commit()
+    except Exception:
+        await conn.rollback()
+        raise
+    return outcomes
+
+
+class GroupCommitQueue:
+    """
+    寫入佇列
+
+    - submit 把操作排入佇列並等待其所在交易提交；第一個操作排入後最多等待 max_delay_ms，
+      或累積 max_rows 筆（由 submit 指定每個操作的筆數）時立即提交
+    - 每次提交前取得 lock（與同一連線上的其他交易互斥）
+    - flush 立即提交已排入的操作並等待完成（關閉前呼叫）
+    """
+
+    def __init__(self, conn: Any, lock: asyncio.Lock, max_delay_ms: float, max_rows: int):
+        self.conn = conn
+        self.lock = lock
+        self.max_delay = max(max_delay_ms, 0) / 1000
+        self.max_rows = max(max_rows, 1)
+        self.logger = logging.getLogger("GroupCommitQueue")
+        self._pending: List[Tuple[WriteOp, "asyncio.Future[Any]"]] = []
+        self._pending_rows = 0
+        self._ready = asyncio.Event()
+        self._flush_requested = False
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.commits = 0
+        self.ops = 0
+
+    async def submit(self, op: WriteOp, rows: int = 1) -> Any:
+        """排入寫入操作，回傳操作結果（交易提交後）；操作失敗時拋出其例外"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((op, future))
+        self._pending_rows += rows
+        if self._pending_rows >= self.max_rows:
+            self._ready.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return await future
+
+    async def flush(self) -> None:
+        """立即提交已排入的操作並等待背景工作結束"""
+        while self._task is not None and not self._task.done():
+            self._flush_requested = True
+            self._ready.set()
+            await asyncio.shield(self._task)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "commits": self.commits,
+            "ops": self.ops,
+            "ops_per_commit": self.ops / self.commits if self.commits else 0.0,
+        }
+
+    async def _run(self) -> None:
+        while self._pending:
+            if self._pending_rows < self.max_rows and not self._flush_requested:
+                self._ready.clear()
+                try:
+                    await asyncio.wait_for(self._ready.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            batch, self._pending, self._pending_rows = self._pending, [], 0
+            await self._commit(batch)
+        self._flush_requested = False
+
+    async def _commit(self, batch: List[Tuple[WriteOp, "asyncio.Future[Any]"]]) -> None:
+        try:
+            async with self.lock:
+                outcomes = await run_write_ops(self.conn, [op for op, _ in batch])
+        except Exception as e:
+            self.logger.error(f"Group commit of {len(batch)} writes failed: {str(e)}")
+            outcomes = [(False, e)] * len(batch)
+        else:
+            self.commits += 1
+            self.ops += len(batch)
+            GRAPH_WRITE_GROUP_OPS.observe(len(batch))
+        for (_, future), (ok, value) in zip(batch, outcomes):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
@@ -1,5 +1,11 @@
 """
 GraphRAG 編排器
+更新時間：2026-10-18 03:30
+作者：AI Assistant
+修改摘要：圖增強的鄰居改以 get_neighbors(order_by="importance", limit=GRAPH_QUERY_MAX_NEIGHBORS) 取得，截斷時保留預先計算重要度最高者，而非 SQL 任意順序的前幾筆
+更新時間：2026-10-18 02:20
+作者：AI Assistant
+修改摘要：圖增強的關係改以 get_relations_by_entities 一次取得（依關係 ID 去重的字典），取代逐實體查詢後 relation not in list 的 O(n²) 合併
 更新時間：2026-04-01 10:24
 作者：AI Assistant
 修改摘要：在最終 sources 合併後統一以 QA_MIN_SCORE 過濾所有路徑（含 graph keyword / 圖增強），避免低分來源繞過門檻仍被送進 LLM 產出答案
@@ -249,31 +255,25 @@ class GraphOrchestrator:
             max_neighbors = settings.GRAPH_QUERY_MAX_NEIGHBORS
             
             neighbor_tasks = []
-            relation_tasks = []
             
             for entity in graph_entities[:max_entities]:
                 # 查詢鄰居
                 neighbor_tasks.append(
                     self.graph_store.get_neighbors(
                         entity.id,
-                        direction="both"
-                    )
-                )
-                # 查詢關係（問題 3：關係提取使用）
-                relation_tasks.append(
-                    self.graph_store.get_relations_by_entity(
-                        entity.id,
-                        direction="both"
+                        direction="both",
+                        order_by="importance",
+                        limit=max_neighbors
                     )
                 )
             
-            # 並行執行
-            neighbors_results = await asyncio.gather(
-                *neighbor_tasks,
-                return_exceptions=True
-            )
-            relations_results = await asyncio.gather(
-                *relation_tasks,
+            # 並行執行；關係（問題 3：關係提取使用）一次取得，store 已依關係 ID 去重
+            neighbors_results, relations_by_id = await asyncio.gather(
+                asyncio.gather(*neighbor_tasks, return_exceptions=True),
+                self.graph_store.get_relations_by_entities(
+                    [entity.id for entity in graph_entities[:max_entities]],
+                    direction="both"
+                ),
                 return_exceptions=True
             )
             
@@ -309,11 +309,8 @@ class GraphOrchestrator:
                             })
             
             # 8. 處理關係結果（問題 3：關係提取使用）
-            for relations in relations_results:
-                if isinstance(relations, list):
-                    for relation in relations:
-                        if relation not in graph_relations:
-                            graph_relations.append(relation)
+            if isinstance(relations_by_id, dict):
+                graph_relations = list(relations_by_id.values())
             
             return GraphEnhancementResult(
                 sources=graph_sources,
@@ -1,5 +1,11 @@
 """
 Care RAG API 主應用程式
+更新時間：2026-10-18 07:00
+作者：AI Assistant
+修改摘要：關閉階段一併關閉 /qa/* 共用的常駐 QA GraphStore
+更新時間：2026-10-18 05:50
+作者：AI Assistant
+修改摘要：關閉階段先 flush GraphStore 寫入佇列（提交已排入的寫入）再關閉連線
 更新時間：2025-12-26 16:50
 作者：AI Assistant
 修改摘要：修復 Ctrl+C 無法停止服務的問題，正確處理 CancelledError 和設置超時
@@ -50,6 +56,11 @@ async def lifespan(app: FastAPI):
         # 清理 GraphStore 連接（設置超時避免阻塞）
         if graph_store:
             try:
+                # 先提交寫入佇列中已排入的寫入，避免關閉連線時遺失
+                try:
+                    await asyncio.wait_for(graph_store.flush(), timeout=5.0)
+                except asyncio.TimeoutError:
+                    logger.warning("GraphStore write queue flush timeout")
                 if hasattr(graph_store, 'close'):
                     # 設置 2 秒超時，避免關閉操作阻塞 Ctrl+C
                     try:
@@ -71,6 +82,15 @@ async def lifespan(app: FastAPI):
             except Exception as e:
                 logger.warning(f"Error closing GraphStore: {str(e)}")
         
+        # 關閉 /qa/* 共用的 QA GraphStore（聯邦模式下已隨主 GraphStore 關閉）
+        try:
+            from app.api.v1.dependencies import close_shared_qa_graph_store
+            await asyncio.wait_for(close_shared_qa_graph_store(), timeout=2.0)
+        except asyncio.TimeoutError:
+            logger.warning("QA GraphStore close timeout, forcing shutdown")
+        except Exception as e:
+            logger.warning(f"Error closing QA GraphStore: {str(e)}")
+        
         logger.info("Care RAG API shutdown complete")
 
 # 建立 FastAPI 應用程式
@@ -1,6 +1,10 @@
 """
 圖構建服務
 從文件內容構建圖結構
+
+更新時間：2026-10-17 09:40
+作者：AI Assistant
+修改摘要：實體與關係改用 add_entities_bulk / add_relations_bulk 批次寫入，每批單一交易，避免逐筆 commit
 """
 import logging
 import os
@@ -63,11 +67,10 @@ class GraphBuilder:
             entities.append(doc_entity)
             
             # 3. 儲存實體
-            saved_entities = []
-            for entity in entities:
-                success = await self.graph_store.add_entity(entity)
-                if success:
-                    saved_entities.append(entity)
+            entity_flags = await self.graph_store.add_entities_bulk(entities)
+            saved_entities = [
+                entity for entity, success in zip(entities, entity_flags) if success
+            ]
             
             # #region agent log
             import json
@@ -145,8 +148,8 @@ class GraphBuilder:
             # 6. 儲存關係
             saved_relations = []
             failed_relations = []
-            for relation in relations:
-                success = await self.graph_store.add_relation(relation)
+            relation_flags = await self.graph_store.add_relations_bulk(relations)
+            for relation, success in zip(relations, relation_flags):
                 if success:
                     saved_relations.append(relation)
                 else:
@@ -0,0 +1,133 @@
+"""
+QA 向量近似最近鄰索引（IVF-flat）
+以球面 k-means 將 L2 正規化向量分群（倒排清單），查詢時只對最接近的 nprobe 個分群的向量計算內積；
+分群指派依 entity_id 保存於 .npz，載入後依 id 對應到目前的列，新增或更新的向量只需指派到最近的分群，不需重新訓練
+
+更新時間：2026-10-18 14:00
+作者：AI Assistant
+修改摘要：建立 IVFFlatIndex（train / assign / candidates / save / load），供 QAEmbeddingIndex 於向量數較多時使用
+"""
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+ANN_FORMAT_VERSION = 1
+# k-means 訓練樣本：每個分群最多取樣的向量數（向量數較少時使用全部）
+TRAIN_SAMPLES_PER_LIST = 64
+TRAIN_ITERATIONS = 10
+# 指派分群時每批計算的向量數（限制 n × nlist 分數矩陣的記憶體）
+ASSIGN_BATCH = 8192
+
+
+def default_nlist(count: int) -> int:
+    """分群數：約 √n（每個分群約 √n 個向量）"""
+    return max(1, int(round(math.sqrt(count))))
+
+
+def assign(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """每個向量內積最大的分群（向量與中心皆已正規化，即 cosine 最大）"""
+    labels = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), ASSIGN_BATCH):
+        batch = np.asarray(matrix[start:start + ASSIGN_BATCH], dtype=np.float32)
+        labels[start:start + len(batch)] = np.argmax(batch @ centroids.T, axis=1)
+    return labels
+
+
+class IVFFlatIndex:
+    """
+    IVF-flat 倒排索引：centroids 為 (nlist, dim) 的正規化分群中心，labels[i] 為第 i 列向量所屬分群。
+    列號即 QAEmbeddingIndex 主要維度矩陣的列；倒排清單（CSR）於 labels 變更後的第一次查詢時重建
+    """
+
+    def __init__(self, centroids: np.ndarray, labels: np.ndarray, trained_rows: int):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.labels = np.asarray(labels, dtype=np.int32)
+        # 訓練時的向量數；之後新增過多時由呼叫端重新訓練
+        self.trained_rows = trained_rows
+        self._list_rows: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def dim(self) -> int:
+        return self.centroids.shape[1]
+
+    @classmethod
+    def train(cls, matrix: np.ndarray, nlist: int = 0, seed: int = 0) -> "IVFFlatIndex":
+        """以取樣向量訓練球面 k-means，再指派全部向量；nlist <= 0 時取 default_nlist"""
+        count = len(matrix)
+        nlist = min(count, nlist if nlist > 0 else default_nlist(count))
+        rng = np.random.default_rng(seed)
+        sample_size = min(count, nlist * TRAIN_SAMPLES_PER_LIST)
+        sample = np.asarray(matrix[np.sort(rng.choice(count, sample_size, replace=False))], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(TRAIN_ITERATIONS):
+            labels = assign(sample, centroids)
+            order = np.argsort(labels, kind="stable")
+            present, starts = np.unique(labels[order], return_index=True)
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids[present] = sums / np.maximum(norms, 1e-12)
+            # 空分群改以隨機樣本重新播種
+            empty = np.setdiff1d(np.arange(nlist), present)
+            if len(empty):
+                centroids[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+        return cls(centroids, assign(matrix, centroids), count)
+
+    def _ensure_lists(self) -> None:
+        if self._list_rows is None:
+            self._list_rows = np.argsort(self.labels, kind="stable").astype(np.intp)
+            self._offsets = np.searchsorted(self.labels[self._list_rows], np.arange(self.nlist + 1))
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """與查詢（已正規化）最接近的 nprobe 個分群內的列號"""
+        self._ensure_lists()
+        if nprobe >= self.nlist:
+            return self._list_rows
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self._list_rows[self._offsets[c]:self._offsets[c + 1]] for c in probe])
+
+    def save(self, path: str, ids: Sequence[str]) -> None:
+        """依 entity_id 保存分群指派（先寫入暫存檔再 rename）"""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix=".npz.tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                version=np.int32(ANN_FORMAT_VERSION),
+                centroids=self.centroids,
+                labels=self.labels,
+                ids=np.asarray(ids, dtype=np.str_),
+                trained_rows=np.int64(self.trained_rows),
+            )
+        os.replace(tmp_path, target)
+
+    @classmethod
+    def load(cls, path: str, ids: Sequence[str], reassign: Sequence[int], matrix: np.ndarray) -> Tuple["IVFFlatIndex", int]:
+        """
+        載入保存的分群並依 entity_id 對應到目前的列（ids[i] 為第 i 列）；
+        保存時不存在的列與 reassign 指定的列（更新過的向量）指派到最近的分群。回傳 (索引, 重新指派的列數)
+        """
+        with np.load(path) as data:
+            if int(data["version"]) != ANN_FORMAT_VERSION:
+                raise ValueError(f"unsupported ANN index version: {int(data['version'])}")
+            centroids = data["centroids"]
+            saved: Dict[str, int] = dict(zip(data["ids"].tolist(), data["labels"].tolist()))
+            trained_rows = int(data["trained_rows"])
+        if centroids.shape[1] != matrix.shape[1]:
+            raise ValueError(f"ANN index dimension {centroids.shape[1]} != vectors dimension {matrix.shape[1]}")
+        labels = np.fromiter((saved.get(entity_id, -1) for entity_id in ids), dtype=np.int32, count=len(ids))
+        if len(reassign):
+            labels[np.asarray(reassign, dtype=np.intp)] = -1
+        missing = np.flatnonzero(labels < 0)
+        if len(missing):
+            labels[missing] = assign(matrix[missing], centroids)
+        return cls(centroids, labels, trained_rows), len(missing)
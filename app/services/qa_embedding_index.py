@@ -1,5 +1,34 @@
 """
 QA 向量索引（基於 sqlite 的簡易實作）
+更新時間：2026-10-18 17:20
+作者：AI Assistant
+修改摘要：向量匯出檔改以資料庫內容指紋判斷是否過期（列數、最大 rowid 與觸發器維護的寫入序號 qa_vectors_state），
+          重新 embedding 既有 id（列數不變）後不再沿用舊向量；匯出格式版本升為 2，舊匯出檔視為過期
+更新時間：2026-10-18 15:10
+作者：AI Assistant
+修改摘要：新增 search_many 批次搜尋：同維度的查詢以一次矩陣-矩陣乘積計算分數（依 SEARCH_MANY_BLOCK_SCORES 分段），
+          回傳每個查詢各自的結果清單；近似搜尋與未安裝 numpy 時逐筆計算
+更新時間：2026-10-18 14:00
+作者：AI Assistant
+修改摘要：新增近似搜尋選項（ann，預設依 QA_ANN_ENABLED）：主要維度的向量數達 QA_ANN_MIN_VECTORS 時以 IVF-flat
+          （qa_ann_index）只掃描最接近的 nprobe 個分群；分群保存於 ann_path，upsert 的向量於下次載入時指派、不需重新訓練
+更新時間：2026-10-18 12:50
+作者：AI Assistant
+修改摘要：export_vectors 將正規化矩陣匯出為 .npy（ids / metadata 寫入 .meta.json）；設定 vectors_path
+          （預設 QA_VECTORS_MMAP_PATH）時以 np.load(mmap_mode="r") 開啟，多個 worker 共用頁面快取、不各自複製向量
+更新時間：2026-10-18 11:40
+作者：AI Assistant
+修改摘要：儲存格式 v2：embedding 改為 little-endian float32 BLOB 並新增 dim / model 欄位，新建資料庫即為 v2；
+          載入以 numpy.frombuffer 整組轉換（不解析文字）；migrate_to_blob_storage 將 v1（JSON 文字）資料庫就地轉換，
+          v1 資料庫仍可讀寫
+更新時間：2026-10-18 10:30
+作者：AI Assistant
+修改摘要：載入後以連續的 float32 矩陣保存 L2 正規化向量，search 以一次矩陣-向量乘積 + argpartition 取 top-k；
+          min_score 過濾與同分排序（依載入順序）與原本一致；未安裝 numpy 時以預先正規化的 list 逐筆計算
+更新時間：2026-10-18 08:10
+作者：AI Assistant
+修改摘要：新增唯讀模式（GRAPH_DB_READONLY 或 readonly=True）：以 mode=ro&immutable=1 開啟並套用 mmap_size / cache_size，
+          不建表；資料庫不存在時視為空索引，upsert 拋出 ReadOnlyStoreError
 更新時間：2026-03-11 00:00
 作者：AI Assistant
 修改摘要：search() 新增 min_score 參數（預設 0.0），過濾低相似度結果，解決負向查詢誤報問題
@@ -15,126 +44,704 @@ import logging
 import math
 import os
 import sqlite3
+import sys
+import tempfile
+import time
+from array import array
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.core.exceptions import ReadOnlyStoreError
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+    NUMPY_AVAILABLE = False
 
 logger = logging.getLogger("QAEmbeddingIndex")
 
+# qa_vectors 儲存格式：v1 embedding 為 JSON 文字；v2 為 little-endian float32 BLOB + dim / model
+STORAGE_JSON = 1
+STORAGE_BLOB = 2
+
+_BLOB_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        entity_id TEXT PRIMARY KEY,
+        text      TEXT NOT NULL,
+        embedding BLOB NOT NULL,
+        dim       INTEGER NOT NULL,
+        model     TEXT,
+        metadata  TEXT
+    )
+"""
+
+
+# 寫入序號：qa_vectors 每次新增 / 更新 / 刪除由觸發器遞增（含其他程序或直接以 SQL 寫入），
+# 與列數、最大 rowid 組成資料庫內容指紋，判斷向量匯出檔是否過期（重新 embedding 同一 id 時列數不變）
+_WRITE_SEQ_SQL = [
+    "CREATE TABLE IF NOT EXISTS qa_vectors_state (id INTEGER PRIMARY KEY CHECK (id = 1), write_seq INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO qa_vectors_state (id, write_seq) VALUES (1, 0)",
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS qa_vectors_seq_{suffix} AFTER {event} ON qa_vectors BEGIN
+        UPDATE qa_vectors_state SET write_seq = write_seq + 1 WHERE id = 1;
+    END
+    """
+    for suffix, event in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE"))
+]
+
+# 向量匯出檔旁附的 ids / metadata（<name>.npy -> <name>.meta.json）
+_VECTORS_META_SUFFIX = ".meta.json"
+# v2：以 source_fingerprint（列數、最大 rowid、寫入序號）取代只比對列數的 source_rows
+VECTORS_EXPORT_VERSION = 2
+
+# search_many 每次矩陣乘積的分數上限（查詢數 × 向量數；float32 約 64 MiB），查詢較多時分段計算
+SEARCH_MANY_BLOCK_SCORES = 16 * 1024 * 1024
+
+
+def vectors_meta_path(vectors_path: str) -> Path:
+    return Path(vectors_path).with_suffix(_VECTORS_META_SUFFIX)
+
+
+def encode_embedding(embedding: Sequence[float]) -> bytes:
+    """向量 -> little-endian float32 bytes"""
+    if NUMPY_AVAILABLE:
+        return np.asarray(embedding, dtype="<f4").tobytes()
+    values = array("f", embedding)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def decode_embedding(blob: bytes) -> List[float]:
+    """little-endian float32 bytes -> list（未安裝 numpy 時的載入路徑與遷移檢查用）"""
+    values = array("f")
+    values.frombytes(blob)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tolist()
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    """L2 正規化（零向量原樣回傳，cosine 視為 0）"""
+    norm = math.sqrt(sum(x * x for x in vector))
+    if norm == 0.0:
+        return [0.0] * len(vector)
+    return [x / norm for x in vector]
+
+
+def _select_top_k(rows: Any, scores: Any, top_k: int, threshold: float) -> List[Tuple[int, float]]:
+    """
+    分數 >= threshold 的前 top_k 筆（分數由高至低，同分依列號）；rows 為各分數對應的列號（None 表示 0..n-1，須遞增）。
+    以 argpartition 取第 k 大的分數，同分者全部保留後再排序，結果與全量穩定排序取前 k 相同
+    """
+    if top_k < len(scores):
+        kth = scores[np.argpartition(scores, len(scores) - top_k)[len(scores) - top_k]]
+        keep = np.flatnonzero(scores >= max(kth, threshold))
+    else:
+        keep = np.flatnonzero(scores >= threshold)
+    keep = keep[np.lexsort((keep, -scores[keep]))][:top_k]
+    if rows is None:
+        return [(int(i), float(scores[i])) for i in keep]
+    return [(int(rows[i]), float(scores[i])) for i in keep]
+
+
+class _LoadedVectors:
+    """
+    載入到記憶體的向量：ids / metadata 依載入順序；向量 L2 正規化後依維度分組保存
+    （numpy 可用時每組為連續 float32 ndarray，否則為 list of list）。
+    查詢只與同維度的組計算內積，其餘列分數為 0.0（與原本 cosine 對長度不符回傳 0.0 相同）；一般只有一組
+    """
+
+    __slots__ = ("ids", "metadata", "groups", "ann", "ann_checked")
+
+    def __init__(
+        self,
+        ids: List[str],
+        metadata: List[Dict[str, Any]],
+        groups: Dict[int, Tuple[List[int], Any]],
+        normalized: bool = False,
+    ):
+        """
+        groups：維度 -> (列號, 向量；ndarray 或 list of list)
+        normalized：向量已正規化（匯出檔的 mmap 矩陣），直接使用不複製
+        """
+        self.ids = ids
+        self.metadata = metadata
+        # 主要維度組的 IVF-flat 索引（列號為組內位置）；ann_checked 表示已判斷過是否建立
+        self.ann: Any = None
+        self.ann_checked = False
+        # 維度 -> (列號, 正規化向量)
+        self.groups: Dict[int, Tuple[Any, Any]] = {}
+        for dim, (rows, vectors) in groups.items():
+            if dim == 0:
+                continue
+            if normalized:
+                self.groups[dim] = (np.asarray(rows, dtype=np.intp), vectors)
+            elif NUMPY_AVAILABLE:
+                matrix = np.array(vectors, dtype=np.float32)
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                np.divide(matrix, norms, out=matrix, where=norms > 0)
+                self.groups[dim] = (np.asarray(rows, dtype=np.intp), matrix)
+            else:
+                self.groups[dim] = (rows, [_normalize(vector) for vector in vectors])
+
+    @classmethod
+    def empty(cls) -> "_LoadedVectors":
+        return cls([], [], {})
+
+    @classmethod
+    def from_vectors(
+        cls, ids: List[str], vectors: List[Sequence[float]], metadata: List[Dict[str, Any]]
+    ) -> "_LoadedVectors":
+        """逐列向量（v1 JSON 解析結果）依維度分組"""
+        groups: Dict[int, Tuple[List[int], List[Sequence[float]]]] = {}
+        for row, vector in enumerate(vectors):
+            rows, group = groups.setdefault(len(vector), ([], []))
+            rows.append(row)
+            group.append(vector)
+        return cls(ids, metadata, groups)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        """主要維度（列數最多的組）"""
+        return max(self.groups, key=lambda d: len(self.groups[d][0])) if self.groups else 0
+
 
 class QAEmbeddingIndex:
     """
     QA 向量索引：
     - 使用 sqlite 檔案（預設 data/qa_vectors.db）
-    - 儲存 entity_id, text, embedding(JSON), metadata(JSON)
-    - 搜尋時讀入所有向量到記憶體，計算 cosine 相似度
+    - 儲存 entity_id, text, embedding(float32 BLOB), dim, model, metadata(JSON)；v1 資料庫的 embedding 為 JSON 文字
+    - 第一次搜尋時讀入所有向量，保存為 L2 正規化的 float32 矩陣；cosine 相似度 = 矩陣與查詢向量的內積
+    - 唯讀模式（預設依 GRAPH_DB_READONLY）：建置時產生的資料庫以 immutable 開啟，不可寫入
+    - vectors_path（預設依 QA_VECTORS_MMAP_PATH）：由 export_vectors 匯出的 .npy 以 mmap 開啟，不從資料庫載入向量
+    - ann（預設依 QA_ANN_ENABLED）：向量數較多時以 IVF-flat 近似搜尋，分群保存於 ann_path（預設 QA_ANN_INDEX_PATH
+      或與資料庫同名的 .ivf.npz）；ann_nprobe 為每次查詢掃描的分群數
     """
 
-    def __init__(self, db_path: str = "data/qa_vectors.db") -> None:
+    def __init__(
+        self,
+        db_path: str = "data/qa_vectors.db",
+        readonly: Optional[bool] = None,
+        vectors_path: Optional[str] = None,
+        ann: Optional[bool] = None,
+        ann_path: Optional[str] = None,
+    ) -> None:
         self.db_path = db_path
+        self.readonly = settings.GRAPH_DB_READONLY if readonly is None else readonly
+        self.vectors_path = vectors_path if vectors_path is not None else settings.QA_VECTORS_MMAP_PATH
+        self.ann_enabled = settings.QA_ANN_ENABLED if ann is None else ann
+        self.ann_path = ann_path or settings.QA_ANN_INDEX_PATH or str(Path(db_path).with_suffix(".ivf.npz"))
+        self.ann_nprobe = settings.QA_ANN_NPROBE
+        # 上次保存分群後 upsert 過的 entity_id：下次建立索引時重新指派分群
+        self._ann_reassign: set = set()
         self._conn: sqlite3.Connection | None = None
-        self._loaded_cache: List[Tuple[str, List[float], Dict[str, Any]]] | None = None
+        self._loaded_cache: _LoadedVectors | None = None
+        # STORAGE_JSON / STORAGE_BLOB；唯讀模式且資料表不存在時為 None
+        self.storage_version: Optional[int] = None
         self._ensure_db()
 
     def _ensure_db(self) -> None:
+        if self.readonly:
+            self._open_readonly()
+            return
         Path(os.path.dirname(self.db_path) or ".").mkdir(parents=True, exist_ok=True)
         # 在 API 環境中，QAEmbeddingIndex 可能在一個執行緒建立、在另一個執行緒（請求處理）中使用，
         # 因此關閉 sqlite 預設的同執行緒檢查，避免出現
         # "SQLite objects created in a thread can only be used in that same thread" 錯誤。
         self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self._conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS qa_vectors (
-                entity_id TEXT PRIMARY KEY,
-                text      TEXT NOT NULL,
-                embedding TEXT NOT NULL,
-                metadata  TEXT
-            )
-            """
-        )
+        # 新建資料庫為 v2；既有 v1 資料表不受影響（以 migrate_to_blob_storage 轉換）
+        self._conn.execute(_BLOB_TABLE_SQL.format(table="qa_vectors"))
+        self._ensure_write_seq()
         self._conn.commit()
+        self.storage_version = self._detect_storage()
+
+    def _ensure_write_seq(self) -> None:
+        """建立寫入序號表與觸發器（既有資料庫首次以可寫模式開啟時補上；重建 qa_vectors 後須重新建立觸發器）"""
+        for sql in _WRITE_SEQ_SQL:
+            self._conn.execute(sql)
+
+    def _open_readonly(self) -> None:
+        """以 mode=ro&immutable=1 開啟（不建表）；資料庫不存在時視為空索引"""
+        path = Path(self.db_path)
+        if not path.exists():
+            logger.warning(f"QAEmbeddingIndex 唯讀模式找不到資料庫，視為空索引：{self.db_path}")
+            if not self.vectors_path:
+                self._loaded_cache = _LoadedVectors.empty()
+            return
+        self._conn = sqlite3.connect(
+            f"{path.resolve().as_uri()}?mode=ro&immutable=1", uri=True, check_same_thread=False
+        )
+        self._conn.execute(f"PRAGMA mmap_size={int(settings.GRAPH_DB_MMAP_SIZE)}")
+        self._conn.execute(f"PRAGMA cache_size={-int(settings.GRAPH_DB_CACHE_SIZE_KB)}")
+        self.storage_version = self._detect_storage()
+
+    def _detect_storage(self) -> Optional[int]:
+        """依 qa_vectors 欄位判斷儲存格式（有 dim 欄位為 v2）；資料表不存在回傳 None"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(qa_vectors)")}
+        if not columns:
+            return None
+        return STORAGE_BLOB if "dim" in columns else STORAGE_JSON
 
     def close(self) -> None:
+        if self._ann_reassign and self.ann_enabled and not self.readonly and Path(self.ann_path).exists():
+            # 建置腳本只 upsert 不搜尋：關閉前將新增的向量指派到分群並保存
+            self._ensure_ann(self._load_all())
         if self._conn is not None:
             self._conn.close()
             self._conn = None
 
-    def upsert(self, entity_id: str, text: str, embedding: List[float], metadata: Dict[str, Any]) -> None:
-        """新增或更新一筆 QA 向量紀錄。"""
+    def upsert(
+        self,
+        entity_id: str,
+        text: str,
+        embedding: List[float],
+        metadata: Dict[str, Any],
+        model: Optional[str] = None,
+    ) -> None:
+        """新增或更新一筆 QA 向量紀錄（model：產生 embedding 的模型名稱，v1 資料庫不保存）。"""
+        if self.readonly:
+            raise ReadOnlyStoreError(f"QAEmbeddingIndex is read-only (GRAPH_DB_READONLY): {self.db_path}")
         if self._conn is None:
             self._ensure_db()
-        emb_json = json.dumps(embedding, ensure_ascii=False)
         meta_json = json.dumps(metadata or {}, ensure_ascii=False)
-        self._conn.execute(
-            """
-            INSERT INTO qa_vectors (entity_id, text, embedding, metadata)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(entity_id) DO UPDATE SET
-                text = excluded.text,
-                embedding = excluded.embedding,
-                metadata = excluded.metadata
-            """,
-            (entity_id, text, emb_json, meta_json),
-        )
+        if self.storage_version == STORAGE_JSON:
+            self._conn.execute(
+                """
+                INSERT INTO qa_vectors (entity_id, text, embedding, metadata)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(entity_id) DO UPDATE SET
+                    text = excluded.text,
+                    embedding = excluded.embedding,
+                    metadata = excluded.metadata
+                """,
+                (entity_id, text, json.dumps(embedding, ensure_ascii=False), meta_json),
+            )
+        else:
+            self._conn.execute(
+                """
+                INSERT INTO qa_vectors (entity_id, text, embedding, dim, model, metadata)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(entity_id) DO UPDATE SET
+                    text = excluded.text,
+                    embedding = excluded.embedding,
+                    dim = excluded.dim,
+                    model = excluded.model,
+                    metadata = excluded.metadata
+                """,
+                (entity_id, text, encode_embedding(embedding), len(embedding), model, meta_json),
+            )
         self._conn.commit()
-        # 資料變更時清除快取，讓下次搜尋重新載入
+        # 資料變更時清除快取，讓下次搜尋重新載入；匯出檔已過期，改由資料庫載入
+        self._loaded_cache = None
+        self.vectors_path = None
+        if self.ann_enabled:
+            self._ann_reassign.add(entity_id)
+
+    def migrate_to_blob_storage(
+        self,
+        batch_size: int = 5000,
+        model: Optional[str] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, int]:
+        """
+        將 v1（embedding 為 JSON 文字）資料庫就地轉換為 v2（單一交易，失敗即回滾）；已是 v2 時不做任何事。
+        model：寫入轉換後各列的 model 欄位（v1 未記錄模型）；無法解析的 embedding 略過並計入 skipped。
+        progress(已完成, 總數) 於每批完成後呼叫。檔案大小需於轉換後 VACUUM 才會縮小。
+        """
+        if self.readonly:
+            raise ReadOnlyStoreError(f"QAEmbeddingIndex is read-only (GRAPH_DB_READONLY): {self.db_path}")
+        if self._conn is None:
+            self._ensure_db()
+        counts = {"rows": 0, "skipped": 0}
+        if self.storage_version != STORAGE_JSON:
+            return counts
+        conn = self._conn
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            total = conn.execute("SELECT COUNT(*) FROM qa_vectors").fetchone()[0]
+            conn.execute(_BLOB_TABLE_SQL.format(table="qa_vectors_v2"))
+            last_rowid = 0
+            while True:
+                rows = conn.execute(
+                    "SELECT rowid, entity_id, text, embedding, metadata FROM qa_vectors WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, max(1, batch_size)),
+                ).fetchall()
+                if not rows:
+                    break
+                converted = []
+                for _, entity_id, text, emb_json, meta_json in rows:
+                    try:
+                        emb = json.loads(emb_json)
+                        if not isinstance(emb, list):
+                            raise ValueError("embedding is not a list")
+                        converted.append((entity_id, text, encode_embedding(emb), len(emb), model, meta_json))
+                    except Exception:
+                        counts["skipped"] += 1
+                conn.executemany(
+                    "INSERT INTO qa_vectors_v2 (entity_id, text, embedding, dim, model, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                    converted,
+                )
+                last_rowid = rows[-1][0]
+                counts["rows"] += len(converted)
+                if progress:
+                    progress(counts["rows"] + counts["skipped"], total)
+            conn.execute("DROP TABLE qa_vectors")
+            conn.execute("ALTER TABLE qa_vectors_v2 RENAME TO qa_vectors")
+            self._ensure_write_seq()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self.storage_version = STORAGE_BLOB
         self._loaded_cache = None
+        return counts
 
-    def _load_all(self) -> List[Tuple[str, List[float], Dict[str, Any]]]:
-        """從 DB 載入所有 QA 向量到記憶體。"""
+    def _load_all(self) -> _LoadedVectors:
+        """從 DB 載入所有 QA 向量到記憶體（正規化後的矩陣；不保留原始 list）。"""
         if self._loaded_cache is not None:
             return self._loaded_cache
+        if self.vectors_path:
+            loaded = self._load_mmap()
+            if loaded is not None:
+                self._loaded_cache = loaded
+                logger.info(f"QAEmbeddingIndex 以 mmap 開啟 {len(loaded)} 筆向量（{loaded.dim} 維）：{self.vectors_path}")
+                return loaded
         if self._conn is None:
             self._ensure_db()
-        cur = self._conn.execute("SELECT entity_id, embedding, metadata FROM qa_vectors")
-        rows = cur.fetchall()
-        result: List[Tuple[str, List[float], Dict[str, Any]]] = []
-        for entity_id, emb_json, meta_json in rows:
+            if self._conn is None:
+                # 唯讀模式且資料庫不存在
+                return _LoadedVectors.empty()
+        if self.storage_version is None:
+            loaded = _LoadedVectors.empty()
+        elif self.storage_version == STORAGE_BLOB:
+            loaded = self._load_blob()
+        else:
+            loaded = self._load_json()
+        self._loaded_cache = loaded
+        logger.info(f"QAEmbeddingIndex 載入 {len(loaded)} 筆向量（{loaded.dim} 維）")
+        return loaded
+
+    def _load_mmap(self) -> Optional[_LoadedVectors]:
+        """開啟匯出檔；檔案不存在、未安裝 numpy 或與資料庫內容指紋不符時回傳 None（改由資料庫載入）"""
+        meta_path = vectors_meta_path(self.vectors_path)
+        if not NUMPY_AVAILABLE:
+            logger.warning("QAEmbeddingIndex 向量匯出檔需要 numpy，改由資料庫載入")
+            return None
+        if not Path(self.vectors_path).exists() or not meta_path.exists():
+            logger.warning(f"QAEmbeddingIndex 找不到向量匯出檔，改由資料庫載入：{self.vectors_path}")
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != VECTORS_EXPORT_VERSION:
+            logger.warning(f"QAEmbeddingIndex 向量匯出檔版本不符，請重新匯出；改由資料庫載入：{self.vectors_path}")
+            return None
+        if self._conn is not None and self.storage_version is not None:
+            fingerprint = self._source_fingerprint()
+            if fingerprint != meta["source_fingerprint"]:
+                logger.warning(
+                    f"QAEmbeddingIndex 向量匯出檔已過期（匯出時 {meta['source_fingerprint']}、資料庫 {fingerprint}），改由資料庫載入"
+                )
+                return None
+        matrix = np.load(self.vectors_path, mmap_mode="r")
+        if matrix.ndim != 2 or matrix.shape[0] != len(meta["ids"]) or matrix.dtype != np.float32:
+            logger.warning(f"QAEmbeddingIndex 向量匯出檔格式不符，改由資料庫載入：{self.vectors_path}")
+            return None
+        groups = {matrix.shape[1]: (range(matrix.shape[0]), matrix)} if matrix.shape[0] else {}
+        return _LoadedVectors(meta["ids"], meta["metadata"], groups, normalized=True)
+
+    def export_vectors(self, vectors_path: str) -> Dict[str, int]:
+        """
+        將資料庫中的向量（正規化後）匯出為 float32 .npy，ids / metadata 寫入同名 .meta.json；
+        兩個檔案皆先寫入暫存檔再 rename，服務中的 worker 不會讀到寫一半的檔案。
+        只匯出主要維度的向量（同一模型產生的 embedding 維度相同），其他維度的列計入 omitted。
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy is required for QAEmbeddingIndex.export_vectors. Install it with: pip install numpy")
+        # 一律由資料庫讀取（不使用既有匯出檔）
+        self._loaded_cache = None
+        opened_path, self.vectors_path = self.vectors_path, None
+        try:
+            loaded = self._load_all()
+        finally:
+            self.vectors_path = opened_path
+            self._loaded_cache = None
+        dim = loaded.dim
+        rows, matrix = loaded.groups.get(dim, ([], np.zeros((0, dim), dtype=np.float32)))
+        rows = [int(row) for row in rows]
+        meta = {
+            "version": VECTORS_EXPORT_VERSION,
+            "dim": dim,
+            "source_fingerprint": self._source_fingerprint(),
+            "omitted": len(loaded) - len(rows),
+            "ids": [loaded.ids[row] for row in rows],
+            "metadata": [loaded.metadata[row] for row in rows],
+        }
+        target = Path(vectors_path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        meta_target = vectors_meta_path(vectors_path)
+        fd, tmp_vectors = tempfile.mkstemp(dir=target.parent, suffix=".npy.tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        fd, tmp_meta = tempfile.mkstemp(dir=target.parent, suffix=".json.tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_vectors, target)
+        os.replace(tmp_meta, meta_target)
+        return {"rows": len(rows), "dim": dim, "omitted": meta["omitted"]}
+
+    def _ensure_ann(self, loaded: _LoadedVectors) -> Any:
+        """
+        主要維度組的 IVF-flat 索引（每次載入只判斷一次）：讀取 ann_path 保存的分群並指派新增 / 更新的向量；
+        沒有保存的分群、維度不符或向量數已超過訓練時的兩倍則重新訓練。可寫入時將變更保存回 ann_path
+        """
+        if loaded.ann_checked:
+            return loaded.ann
+        loaded.ann_checked = True
+        group = loaded.groups.get(loaded.dim)
+        if not NUMPY_AVAILABLE or group is None or len(group[0]) < settings.QA_ANN_MIN_VECTORS:
+            return None
+        from app.services.qa_ann_index import IVFFlatIndex
+
+        rows, matrix = group
+        ids = [loaded.ids[row] for row in rows]
+        ann, changed = None, False
+        if Path(self.ann_path).exists():
+            try:
+                reassign = [i for i, entity_id in enumerate(ids) if entity_id in self._ann_reassign]
+                ann, reassigned = IVFFlatIndex.load(self.ann_path, ids, reassign, matrix)
+                changed = reassigned > 0
+                if len(ids) > 2 * ann.trained_rows:
+                    logger.info(f"QAEmbeddingIndex 向量數 {len(ids)} 已超過分群訓練時（{ann.trained_rows}）的兩倍，重新訓練")
+                    ann = None
+            except Exception as e:
+                logger.warning(f"QAEmbeddingIndex 無法載入近似搜尋分群，重新訓練：{e}")
+                ann = None
+        if ann is None:
+            start = time.perf_counter()
+            ann = IVFFlatIndex.train(matrix, settings.QA_ANN_NLIST)
+            changed = True
+            logger.info(f"QAEmbeddingIndex 訓練 IVF-flat：{len(ids)} 筆向量、{ann.nlist} 個分群（{time.perf_counter() - start:.2f}s）")
+        self._ann_reassign.clear()
+        if changed and not self.readonly:
+            ann.save(self.ann_path, ids)
+        loaded.ann = ann
+        return ann
+
+    def _source_fingerprint(self) -> Dict[str, Any]:
+        """
+        資料庫內容指紋（匯出檔是否過期的依據）：列數、最大 rowid 與寫入序號。
+        寫入序號表不存在（本版之前建立、之後只以唯讀模式開啟的資料庫）時 write_seq 為 None，只能依列數與 rowid 判斷
+        """
+        if self._conn is None or self.storage_version is None:
+            return {"rows": 0, "max_rowid": 0, "write_seq": None}
+        rows, max_rowid = self._conn.execute("SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM qa_vectors").fetchone()
+        write_seq = None
+        if self._conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'qa_vectors_state'").fetchone():
+            write_seq = self._conn.execute("SELECT write_seq FROM qa_vectors_state WHERE id = 1").fetchone()[0]
+        return {"rows": rows, "max_rowid": max_rowid, "write_seq": write_seq}
+
+    def _load_blob(self) -> _LoadedVectors:
+        """v2：同維度的 BLOB 串接後以 numpy.frombuffer 一次轉為矩陣（不解析文字）"""
+        ids: List[str] = []
+        metadata: List[Dict[str, Any]] = []
+        # 維度 -> (列號, BLOB)
+        blobs: Dict[int, Tuple[List[int], List[bytes]]] = {}
+        for entity_id, blob, dim, meta_json in self._conn.execute(
+            "SELECT entity_id, embedding, dim, metadata FROM qa_vectors"
+        ):
+            if not isinstance(blob, bytes) or len(blob) != dim * 4:
+                continue
+            try:
+                meta = json.loads(meta_json) if meta_json else {}
+            except Exception:
+                continue
+            rows, group = blobs.setdefault(dim, ([], []))
+            rows.append(len(ids))
+            group.append(blob)
+            ids.append(entity_id)
+            metadata.append(meta)
+        groups: Dict[int, Tuple[List[int], Any]] = {}
+        for dim, (rows, group) in blobs.items():
+            if NUMPY_AVAILABLE:
+                groups[dim] = (rows, np.frombuffer(b"".join(group), dtype="<f4").reshape(len(rows), dim))
+            else:
+                groups[dim] = (rows, [decode_embedding(blob) for blob in group])
+        return _LoadedVectors(ids, metadata, groups)
+
+    def _load_json(self) -> _LoadedVectors:
+        """v1：逐列解析 JSON 文字"""
+        ids: List[str] = []
+        vectors: List[Sequence[float]] = []
+        metadata: List[Dict[str, Any]] = []
+        for entity_id, emb_json, meta_json in self._conn.execute("SELECT entity_id, embedding, metadata FROM qa_vectors"):
             try:
                 emb = json.loads(emb_json)
                 if not isinstance(emb, list):
                     continue
+                if NUMPY_AVAILABLE:
+                    # 逐列轉為 float32，避免同時持有全部的 Python float list
+                    emb = np.asarray(emb, dtype=np.float32)
+                    if emb.ndim != 1:
+                        continue
                 meta = json.loads(meta_json) if meta_json else {}
-                result.append((entity_id, emb, meta))
             except Exception:
                 continue
-        self._loaded_cache = result
-        logger.info(f"QAEmbeddingIndex 載入 {len(result)} 筆向量")
-        return result
+            ids.append(entity_id)
+            vectors.append(emb)
+            metadata.append(meta)
+        return _LoadedVectors.from_vectors(ids, vectors, metadata)
 
     def search(
         self,
         query_emb: List[float],
         top_k: int = 5,
         min_score: float = 0.0,
+        *,
+        nprobe: Optional[int] = None,
     ) -> List[Tuple[str, float, Dict[str, Any]]]:
         """以 cosine 相似度搜尋最相近的 QA，回傳 (entity_id, score, metadata)。
         min_score：低於此門檻的結果不回傳（預設 0.0 不過濾；建議由呼叫端傳入 settings.QA_MIN_SCORE）。
+        同分者依載入順序；與查詢維度不同的向量分數為 0.0。
+        近似搜尋啟用時只計算 nprobe（預設 ann_nprobe）個分群內的向量，nprobe <= 0 為精確搜尋。
         """
-        if not query_emb:
+        if not query_emb or top_k <= 0:
             return []
-        all_vectors = self._load_all()
-        if not all_vectors:
+        loaded = self._load_all()
+        if not len(loaded):
             return []
+        threshold = max(0.0, min_score)
+        if NUMPY_AVAILABLE:
+            ann = self._ensure_ann(loaded) if self.ann_enabled else None
+            nprobe = self.ann_nprobe if nprobe is None else nprobe
+            if ann is not None and nprobe > 0 and len(query_emb) == ann.dim:
+                ranked = self._rank_ann(loaded, ann, query_emb, top_k, threshold, nprobe)
+            else:
+                ranked = self._rank_numpy(loaded, query_emb, top_k, threshold)
+        else:
+            ranked = self._rank_python(loaded, query_emb, top_k, threshold)
+        return [(loaded.ids[row], score, loaded.metadata[row]) for row, score in ranked]
 
-        def cosine(a: List[float], b: List[float]) -> float:
-            if not a or not b or len(a) != len(b):
-                return 0.0
-            dot = sum(x * y for x, y in zip(a, b))
-            na = math.sqrt(sum(x * x for x in a))
-            nb = math.sqrt(sum(y * y for y in b))
-            if na == 0.0 or nb == 0.0:
-                return 0.0
-            return dot / (na * nb)
-
+    def search_many(
+        self,
+        query_embs: Sequence[List[float]],
+        top_k: int = 5,
+        min_score: float = 0.0,
+        *,
+        nprobe: Optional[int] = None,
+    ) -> List[List[Tuple[str, float, Dict[str, Any]]]]:
+        """批次搜尋：回傳與 query_embs 同順序的結果清單，每筆與 search(query_emb, top_k, min_score) 相同
+        （分數僅有 float32 計算順序造成的誤差）。
+        精確搜尋時同維度的查詢以一次矩陣-矩陣乘積計算分數；近似搜尋各查詢的分群不同，仍逐筆只掃描候選向量。
+        """
+        if top_k <= 0 or not query_embs:
+            return [[] for _ in query_embs]
+        loaded = self._load_all()
+        if not len(loaded):
+            return [[] for _ in query_embs]
         threshold = max(0.0, min_score)
-        scored: List[Tuple[str, float, Dict[str, Any]]] = []
-        for entity_id, emb, meta in all_vectors:
-            score = cosine(query_emb, emb)
-            if score >= threshold:
-                scored.append((entity_id, float(score), meta))
+        ranked: List[List[Tuple[int, float]]] = [[] for _ in query_embs]
+        pending = [i for i, query_emb in enumerate(query_embs) if query_emb]
+        if NUMPY_AVAILABLE:
+            ann = self._ensure_ann(loaded) if self.ann_enabled else None
+            nprobe = self.ann_nprobe if nprobe is None else nprobe
+            if ann is not None and nprobe > 0:
+                exact = []
+                for i in pending:
+                    if len(query_embs[i]) == ann.dim:
+                        ranked[i] = self._rank_ann(loaded, ann, query_embs[i], top_k, threshold, nprobe)
+                    else:
+                        exact.append(i)
+                pending = exact
+            batch = self._rank_numpy_many(loaded, [query_embs[i] for i in pending], top_k, threshold)
+            for i, result in zip(pending, batch):
+                ranked[i] = result
+        else:
+            for i in pending:
+                ranked[i] = self._rank_python(loaded, query_embs[i], top_k, threshold)
+        return [[(loaded.ids[row], score, loaded.metadata[row]) for row, score in result] for result in ranked]
 
-        if not scored:
-            return []
+    @staticmethod
+    def _rank_numpy(
+        loaded: _LoadedVectors, query_emb: List[float], top_k: int, threshold: float
+    ) -> List[Tuple[int, float]]:
+        """與同維度向量組做一次矩陣-向量乘積 + argpartition；回傳 (列, 分數)"""
+        group = loaded.groups.get(len(query_emb))
+        query = np.asarray(query_emb, dtype=np.float64)
+        norm = np.linalg.norm(query)
+        if group is not None and norm > 0 and len(group[0]) == len(loaded):
+            scores = group[1] @ (query / norm).astype(np.float32)
+        else:
+            scores = np.zeros(len(loaded), dtype=np.float32)
+            if group is not None and norm > 0:
+                scores[group[0]] = group[1] @ (query / norm).astype(np.float32)
+        return _select_top_k(None, scores, top_k, threshold)
+
+    @staticmethod
+    def _rank_numpy_many(
+        loaded: _LoadedVectors, query_embs: List[List[float]], top_k: int, threshold: float
+    ) -> List[List[Tuple[int, float]]]:
+        """同維度的查詢堆成矩陣，與向量組做矩陣-矩陣乘積（每段最多 SEARCH_MANY_BLOCK_SCORES 個分數）後逐列取 top-k"""
+        ranked: List[List[Tuple[int, float]]] = [[] for _ in query_embs]
+        by_dim: Dict[int, List[int]] = {}
+        for i, query_emb in enumerate(query_embs):
+            by_dim.setdefault(len(query_emb), []).append(i)
+        for dim, positions in by_dim.items():
+            group = loaded.groups.get(dim)
+            if group is None:
+                zeros = np.zeros(len(loaded), dtype=np.float32)
+                for i in positions:
+                    ranked[i] = _select_top_k(None, zeros, top_k, threshold)
+                continue
+            rows, matrix = group
+            queries = np.asarray([query_embs[i] for i in positions], dtype=np.float64)
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            # 零向量查詢維持全 0 分數（與 search 相同）
+            queries = (queries / np.where(norms > 0, norms, 1.0)).astype(np.float32)
+            block = max(1, SEARCH_MANY_BLOCK_SCORES // len(rows))
+            for start in range(0, len(positions), block):
+                for offset, scores in enumerate(queries[start:start + block] @ matrix.T):
+                    if len(rows) != len(loaded):
+                        padded = np.zeros(len(loaded), dtype=np.float32)
+                        padded[rows] = scores
+                        scores = padded
+                    ranked[positions[start + offset]] = _select_top_k(None, scores, top_k, threshold)
+        return ranked
+
+    @staticmethod
+    def _rank_ann(
+        loaded: _LoadedVectors, ann: Any, query_emb: List[float], top_k: int, threshold: float, nprobe: int
+    ) -> List[Tuple[int, float]]:
+        """只與 nprobe 個最接近分群內的向量計算內積（近似：其他分群的向量不列入）"""
+        query = np.asarray(query_emb, dtype=np.float64)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return QAEmbeddingIndex._rank_numpy(loaded, query_emb, top_k, threshold)
+        query = (query / norm).astype(np.float32)
+        rows, matrix = loaded.groups[ann.dim]
+        positions = np.sort(ann.candidates(query, nprobe))
+        scores = matrix[positions] @ query
+        return _select_top_k(np.asarray(rows)[positions], scores, top_k, threshold)
+
+    @staticmethod
+    def _rank_python(
+        loaded: _LoadedVectors, query_emb: List[float], top_k: int, threshold: float
+    ) -> List[Tuple[int, float]]:
+        """未安裝 numpy：與預先正規化的同維度向量逐筆內積"""
+        scores = [0.0] * len(loaded)
+        group = loaded.groups.get(len(query_emb))
+        if group is not None:
+            query = _normalize(query_emb)
+            for row, vector in zip(*group):
+                scores[row] = sum(x * y for x, y in zip(query, vector))
+        scored = [(row, score) for row, score in enumerate(scores) if score >= threshold]
         scored.sort(key=lambda x: x[1], reverse=True)
         return scored[:top_k]
-
@@ -1,5 +1,12 @@
 """
 向量檢索服務
+更新時間：2026-10-18 20:20
+作者：AI Assistant
+修改摘要：search_batch 的 embedding 回傳筆數與查詢數不符時記錄警告，並讓各查詢改走逐筆 QA embedding 檢索（原本靜默略過 QA）
+更新時間：2026-10-18 15:10
+作者：AI Assistant
+修改摘要：新增 search_batch：多個查詢一次呼叫 embedding 並以 QAEmbeddingIndex.search_many 批次搜尋，其餘流程（IC 特殊 QA、
+          IC 守衛、graph keyword / stub 後備）與 search 相同；命中轉為來源的邏輯抽出為 _qa_hits_to_sources 共用
 更新時間：2026-04-23 16:32
 作者：AI Assistant
 修改摘要：修正 IC alias 正規化：即使已含 IC卡 上下文，若代碼因黏在中文後方無法抽取（如「IC卡錯誤01」），仍會改寫成標準「IC卡 [01]」避免被守衛誤擋
@@ -34,7 +41,7 @@
 import asyncio
 import logging
 import re
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 
 from app.services.embedding_service import get_default_embedding_service, BaseEmbeddingService
 from app.services.qa_embedding_index import QAEmbeddingIndex
@@ -200,11 +207,51 @@ class VectorService:
 
     async def search(self, query: str, top_k: int = 3) -> List[Dict]:
         """檢索：若查詢含 IC 錯誤代碼或欄位代碼則優先帶回對應 QA1；其餘依 QA embedding / graph keyword / stub。"""
+        return await self._search_normalized(self._normalize_query(query), top_k)
+
+    async def search_batch(self, queries: List[str], top_k: int = 3) -> List[List[Dict]]:
+        """
+        批次檢索：回傳與 queries 同順序的結果，每筆與 search(query, top_k) 相同。
+        所有查詢一次呼叫 embedding，再以 QAEmbeddingIndex.search_many 一次計算分數；批次 embedding 失敗時各查詢改走 graph / stub，
+        回傳的向量數與查詢數不符時各查詢改為逐筆 QA embedding 檢索。
+        """
+        normalized = [self._normalize_query(query) for query in queries]
+        # None：各查詢於 _search_normalized 自行 embedding + 搜尋
+        qa_hits: Optional[Dict[int, List[Tuple[str, float, Dict[str, Any]]]]] = {}
+        positions = [i for i, query in enumerate(normalized) if query] if self.graph_store else []
+        if positions:
+            try:
+                embs = await self._embedding.embed([normalized[i] for i in positions])
+                if len(embs) == len(positions):
+                    hits = self._qa_index.search_many(embs, top_k=top_k, min_score=settings.QA_MIN_SCORE)
+                    qa_hits = dict(zip(positions, hits))
+                else:
+                    self.logger.warning(
+                        f"Batch QA embedding returned {len(embs)} vectors for {len(positions)} queries, "
+                        f"fallback to per-query QA search"
+                    )
+                    qa_hits = None
+            except Exception as e:
+                self.logger.warning(f"Batch QA embedding search failed, fallback to graph/stub: {e}")
+        return [
+            await self._search_normalized(query, top_k, qa_hits=qa_hits.get(i, []) if qa_hits is not None else None)
+            for i, query in enumerate(normalized)
+        ]
+
+    def _normalize_query(self, query: str) -> str:
+        """IC alias 正規化（如「IC錯誤01」->「IC卡 [01]」）"""
         normalized, reason = _normalize_ic_alias_query(query)
         if reason:
             self.logger.info("Normalized IC alias query: raw=%r normalized=%r reason=%s", (query or "")[:200], normalized, reason)
-        query = normalized
+        return normalized
 
+    async def _search_normalized(
+        self,
+        query: str,
+        top_k: int,
+        qa_hits: Optional[List[Tuple[str, float, Dict[str, Any]]]] = None,
+    ) -> List[Dict]:
+        """search 主流程（query 已正規化）；qa_hits 為批次搜尋已取得的 QA 向量命中，None 時於此 embedding + 搜尋"""
         ic_error_source: Optional[Dict[str, Any]] = None
         ic_field_source: Optional[Dict[str, Any]] = None
         if query and self.graph_store:
@@ -218,7 +265,10 @@ class VectorService:
         # 1) QA embedding 檢索
         try:
             if query and self.graph_store:
-                qa_results = await self._search_from_qa_embeddings(query, top_k)
+                if qa_hits is None:
+                    qa_results = await self._search_from_qa_embeddings(query, top_k)
+                else:
+                    qa_results = await self._qa_hits_to_sources(query, qa_hits)
                 if qa_results or ic_error_source or ic_field_source:
                     merged: List[Dict[str, Any]] = []
                     seen = set()
@@ -282,6 +332,10 @@ class VectorService:
 
         # 從 QA 向量索引搜尋 entity_id + score + metadata（帶相似度門檻過濾低相關結果）
         hits = self._qa_index.search(query_emb, top_k=top_k, min_score=settings.QA_MIN_SCORE)
+        return await self._qa_hits_to_sources(query, hits)
+
+    async def _qa_hits_to_sources(self, query: str, hits: List[Tuple[str, float, Dict[str, Any]]]) -> List[Dict]:
+        """QA 向量命中 (entity_id, score, metadata) 由 graph 取回 QA Entity 組成來源，並套用 IC 守衛。"""
         if not hits:
             return []
 
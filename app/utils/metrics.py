@@ -37,6 +37,36 @@ QUERY_LATENCY = Histogram(
 CACHE_HITS = Counter("care_rag_cache_hits_total", "Total cache hits")
 CACHE_MISSES = Counter("care_rag_cache_misses_total", "Total cache misses")
 
+# GraphStore 唯讀連線池：取得連線前的排隊等待時間
+GRAPH_READ_POOL_WAIT = Histogram(
+    "care_rag_graph_read_pool_wait_seconds",
+    "Time spent waiting for a GraphStore read connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+# GraphStore 實體 LRU 快取（CachedGraphStore）
+GRAPH_ENTITY_CACHE_HITS = Counter("care_rag_graph_entity_cache_hits_total", "GraphStore entity cache hits")
+GRAPH_ENTITY_CACHE_MISSES = Counter("care_rag_graph_entity_cache_misses_total", "GraphStore entity cache misses")
+GRAPH_ENTITY_CACHE_ENTRIES = Gauge(
+    "care_rag_graph_entity_cache_entries",
+    "Current number of entities held in the GraphStore entity cache"
+)
+
+# GraphStore 寫入佇列（GroupCommitQueue）：每次合併提交包含的寫入操作數
+GRAPH_WRITE_GROUP_OPS = Histogram(
+    "care_rag_graph_write_group_ops",
+    "Number of write operations coalesced into one GraphStore transaction",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+# GraphStore SQL 語句耗時（依發出語句的 SQLiteGraphStore 方法標記，見 graph_sql_instrumentation）
+GRAPH_SQL_LATENCY = Histogram(
+    "care_rag_graph_sql_seconds",
+    "SQLiteGraphStore statement latency in seconds (execute plus fetch)",
+    ["method"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
 # WebSocket 指標
 WEBSOCKET_CONNECTIONS = Gauge(
     "care_rag_websocket_connections",
@@ -0,0 +1,221 @@
+"""
+GraphStore 查詢計畫稽核：記錄 SQLiteGraphStore 各方法實際發出的語句，逐一以 EXPLAIN QUERY PLAN 檢查並標示全表掃描
+（SCAN <資料表> 且未使用索引）。本身即需讀取全部資料的方法（iter_* / get_all_* / 統計與重要度重算等）列為預期掃描
+
+用法：
+    python scripts/audit_graph_query_plans.py                 # 以小型隨機圖執行
+    python scripts/audit_graph_query_plans.py --db ./data/graph.db --strict
+
+更新時間：2026-10-18 16:40
+作者：AI Assistant
+修改摘要：稽核 iter_entities(order="insertion")（rowid keyset 分頁）
+
+更新時間：2026-10-18 09:20
+作者：AI Assistant
+修改摘要：建立稽核腳本；以 SQLInstrumentation 監聽器收集語句與參數，於獨立 sqlite3 連線執行 EXPLAIN QUERY PLAN
+"""
+import argparse
+import asyncio
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.core.graph_sql_instrumentation import OTHER_METHOD, SQLInstrumentation, normalize_sql
+from app.core.graph_store import Entity, Relation, SQLiteGraphStore
+
+# 需讀取全部資料的方法：全表掃描為預期行為，不列入 --strict 失敗條件
+# （get_statistics 讀取的 graph_stats 每個類型一列，本身即小表）
+EXPECTED_FULL_SCANS = {
+    "initialize", "iter_entities", "iter_relations", "get_all_entities", "get_all_relations", "get_statistics",
+    "recompute_statistics", "compute_importance", "get_importance_scores", "importance_stale", "rebuild_fts_index",
+    "rebuild_adjacency_snapshot", "export_snapshot", "migrate_to_schema_v2", OTHER_METHOD,
+}
+# 不做 EXPLAIN 的語句（交易控制、結構定義、PRAGMA）
+_SKIP_PREFIXES = ("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "CREATE", "DROP", "ALTER", "ANALYZE", "VACUUM")
+_TABLE_REFERENCE = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_SQL_KEYWORDS = {"WHERE", "ON", "JOIN", "LEFT", "INNER", "CROSS", "USING", "ORDER", "GROUP", "LIMIT", "SET", "VALUES", "UNION", "SELECT"}
+
+
+def table_aliases(sql: str, tables: Set[str]) -> Dict[str, str]:
+    """語句中的資料表名稱 / 別名 -> 實際資料表（CTE 等非資料表名稱不列入）"""
+    aliases: Dict[str, str] = {}
+    for table, alias in _TABLE_REFERENCE.findall(sql):
+        if table not in tables:
+            continue
+        aliases[table] = table
+        if alias and alias.upper() not in _SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def full_scans(plan: List[str], aliases: Dict[str, str]) -> List[str]:
+    """計畫中未使用索引的資料表掃描（SCAN x USING INDEX / 虛擬資料表 / CTE 不算）"""
+    scanned = []
+    for detail in plan:
+        match = re.match(r"SCAN (\w+)(.*)", detail)
+        if not match or "USING" in match.group(2) or "VIRTUAL TABLE" in match.group(2):
+            continue
+        table = aliases.get(match.group(1))
+        if table:
+            scanned.append(table)
+    return scanned
+
+
+async def build_database(db_path: str) -> None:
+    """涵蓋各類實體 / 關係的小型圖"""
+    store = SQLiteGraphStore(db_path)
+    await store.initialize()
+    try:
+        for d in range(20):
+            doc_id = f"doc_{d:03d}"
+            entities = [Entity(id=doc_id, type="Document", name=f"操作手冊 {d}", properties={})]
+            relations = []
+            for q in range(10):
+                qa_id = f"{doc_id}_qa_{q}"
+                entities.append(Entity(
+                    id=qa_id, type="QA", name=f"批價問題 {d}-{q}", properties={"document_id": doc_id, "answer": "略"}
+                ))
+                relations.append(Relation(id=f"{doc_id}_r{q}", source_id=doc_id, target_id=qa_id, type="CONTAINS", properties={}))
+            await store.add_entities_bulk(entities)
+            await store.add_relations_bulk(relations)
+    finally:
+        await store.close()
+
+
+async def exercise(store: SQLiteGraphStore) -> None:
+    """呼叫每個公開讀寫方法一次（含不同參數組合產生的語句變化）"""
+    await store.add_entity(Entity(id="audit_a", type="Concept", name="稽核甲", properties={"document_id": "doc_000"}))
+    await store.add_entity(Entity(id="audit_b", type="Concept", name="稽核乙", properties={}))
+    await store.add_relation(Relation(id="audit_r", source_id="audit_a", target_id="audit_b", type="RELATED", properties={}))
+    await store.flush()
+    await store.compute_importance()
+    await store.importance_stale()
+    await store.get_importance_scores()
+
+    entity_id = "doc_000"
+    await store.get_entity(entity_id)
+    await store.get_entities_many([entity_id, "doc_001", "doc_000_qa_1"])
+    await store.get_entities_by_type("QA", limit=10)
+    page, cursor = await store.get_entities_by_document(entity_id, limit=5)
+    await store.get_entities_by_document(entity_id, "QA", limit=5, cursor=cursor)
+    async for _ in store.iter_entities("QA", batch=50):
+        pass
+    async for _ in store.iter_entities("QA", batch=50, order="insertion"):
+        pass
+    async for _ in store.iter_relations(batch=50):
+        pass
+    for order_by in ("name", "rank"):
+        await store.search_entities("批價", 5, order_by=order_by)
+    await store.search_entities("批價", 5, include_type_match=False)
+    for direction in ("both", "outgoing", "incoming"):
+        await store.get_neighbors(entity_id, direction=direction)
+        await store.get_relations_by_entity(entity_id, direction=direction)
+    await store.get_neighbors(entity_id, relation_type="CONTAINS")
+    await store.get_neighbors(entity_id, order_by="importance", limit=3)
+    await store.get_path(entity_id, "doc_000_qa_1")
+    await store.get_subgraph([entity_id], max_depth=2)
+    await store.get_relations_by_entities([entity_id, "doc_001"])
+    await store.get_relations_by_type("CONTAINS", limit=10)
+    await store.get_relation("audit_r")
+    await store.get_statistics()
+    await store.recompute_statistics()
+    await store.get_all_entities(limit=10)
+    await store.get_all_relations(limit=10)
+
+    await store.delete_relation("audit_r")
+    await store.delete_entity("audit_a")
+    await store.delete_entity("audit_b")
+    await store.flush()
+
+
+def explain(db_path: str, statements: Dict[Tuple[str, str], Any]) -> Dict[str, List[Tuple[str, List[str], List[str]]]]:
+    """方法 -> [(正規化 SQL, 計畫明細, 全表掃描的資料表)]"""
+    report: Dict[str, List[Tuple[str, List[str], List[str]]]] = defaultdict(list)
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = {
+            name for (name, sql) in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'")
+            if not (sql or "").upper().startswith("CREATE VIRTUAL TABLE")
+        }
+        for (method, sql), params in statements.items():
+            try:
+                rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+            except sqlite3.Error as e:
+                report[method].append((normalize_sql(sql), [f"(無法 EXPLAIN: {e})"], []))
+                continue
+            plan = [row[3] for row in rows]
+            report[method].append((normalize_sql(sql), plan, full_scans(plan, table_aliases(sql, tables))))
+    finally:
+        conn.close()
+    return report
+
+
+async def run(db: str, strict: bool, verbose: bool) -> int:
+    # 鄰接快照會讓 get_neighbors 等不經 SQL；稽核時關閉以取得實際語句
+    settings.GRAPH_ADJACENCY_SNAPSHOT = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "graph.db")
+        if db:
+            # 複製一份：稽核會寫入並刪除少量測試資料，不修改原資料庫
+            shutil.copyfile(db, db_path)
+        else:
+            await build_database(db_path)
+
+        statements: Dict[Tuple[str, str], Any] = {}
+
+        def listen(method: str, sql: str, params: Any, seconds: float) -> None:
+            if not sql.lstrip().upper().startswith(_SKIP_PREFIXES):
+                statements.setdefault((method, sql), params)
+
+        store = SQLiteGraphStore(db_path)
+        store.sql_instrumentation = SQLInstrumentation("SQLiteGraphStore", slow_query_ms=0)
+        store.sql_instrumentation.listeners.append(listen)
+        await store.initialize()
+        try:
+            await exercise(store)
+        finally:
+            await store.close()
+
+        report = explain(db_path, statements)
+
+    unexpected = 0
+    print(f"{db or '隨機圖'}：{len(statements)} 個語句，{len(report)} 個方法（schema v{settings.GRAPH_DB_SCHEMA_VERSION}）")
+    for method in sorted(report):
+        for sql, plan, scans in report[method]:
+            expected = method in EXPECTED_FULL_SCANS
+            if scans and not expected:
+                unexpected += 1
+                flag = "全表掃描"
+            elif scans:
+                flag = "預期掃描"
+            else:
+                flag = "ok"
+            if scans or verbose:
+                print(f"[{flag}] {method}: {sql}")
+                for detail in plan:
+                    print(f"      {detail}")
+    print(f"未預期的全表掃描：{unexpected} 個語句")
+    return 1 if strict and unexpected else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLiteGraphStore 語句的 EXPLAIN QUERY PLAN 稽核")
+    parser.add_argument("--db", default="", help="既有圖資料庫（複製後稽核；預設產生小型隨機圖）")
+    parser.add_argument("--strict", action="store_true", help="有未預期的全表掃描時以非零狀態結束（CI 用）")
+    parser.add_argument("--verbose", action="store_true", help="列出所有語句的計畫（預設只列出有掃描者）")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.db, args.strict, args.verbose)))
+
+
+if __name__ == "__main__":
+    main()
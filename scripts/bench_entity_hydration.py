@@ -0,0 +1,115 @@
+"""
+Entity 資料列轉換（hydration）微基準：舊版 dataclass 立即解碼 vs __slots__ 延遲解碼
+
+更新時間：2026-10-17 19:50
+作者：AI Assistant
+修改摘要：建立基準腳本；以 10k 筆 QA 資料列（含完整答案文字）量測只讀 id / name 與 to_dict 兩種情境的耗時與記憶體
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.graph_store import Entity
+
+
+@dataclass
+class LegacyEntity:
+    """舊版實體（dataclass，建立時即解碼 properties 與時間戳）"""
+    id: str
+    type: str
+    name: str
+    properties: Dict[str, Any]
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "type": self.type,
+            "name": self.name,
+            "properties": self.properties,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+def legacy_row_to_entity(row: Dict[str, Any]) -> LegacyEntity:
+    return LegacyEntity(
+        id=row["id"],
+        type=row["type"],
+        name=row["name"],
+        properties=json.loads(row["properties"]),
+        created_at=datetime.fromisoformat(row["created_at"]),
+        updated_at=datetime.fromisoformat(row["updated_at"])
+    )
+
+
+def make_rows(count: int, answer_chars: int) -> List[Dict[str, Any]]:
+    """模擬 QA 實體資料列（properties 含問題、答案、來源與關鍵字）"""
+    now = datetime.now().isoformat()
+    answer = ("請先至批價櫃檯確認掛號資料，再依畫面提示完成操作。" * (answer_chars // 24 + 1))[:answer_chars]
+    return [
+        {
+            "id": f"doc_thisqa_qa_{i}",
+            "type": "QA",
+            "name": f"問題 {i}：如何處理批價異常？",
+            "properties": json.dumps({
+                "question": f"問題 {i}：如何處理批價異常？",
+                "answer": answer,
+                "source_document": "doc_thisqa",
+                "keywords": ["批價", "掛號", "異常", str(i)],
+            }, ensure_ascii=False),
+            "created_at": now,
+            "updated_at": now,
+            "document_id": "doc_thisqa",
+        }
+        for i in range(count)
+    ]
+
+
+def measure(label: str, rows: List[Dict[str, Any]], convert: Callable, use: Callable, repeat: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            use(convert(row))
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    kept = [convert(row) for row in rows]
+    for entity in kept:
+        use(entity)
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<34} {best * 1000:>9.2f} ms   {traced / len(rows):>9.0f} B/entity")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Entity hydration 前後效能比較")
+    parser.add_argument("--rows", type=int, default=10_000, help="QA 資料列數（預設: 10000）")
+    parser.add_argument("--answer-chars", type=int, default=1500, help="答案文字長度（預設: 1500）")
+    parser.add_argument("--repeat", type=int, default=5, help="重複次數，取最佳值（預設: 5）")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.answer_chars)
+    print(f"{args.rows} 筆 QA 資料列，答案 {args.answer_chars} 字")
+    scenarios = [
+        ("只讀 id / name", lambda e: (e.id, e.name)),
+        ("to_dict()", lambda e: e.to_dict()),
+    ]
+    for title, use in scenarios:
+        print(f"\n{title}：")
+        measure("legacy dataclass（立即解碼）", rows, legacy_row_to_entity, use, args.repeat)
+        measure("Entity.from_row（延遲解碼）", rows, Entity.from_row, use, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
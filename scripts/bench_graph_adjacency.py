@@ -0,0 +1,115 @@
+"""
+CSR 鄰接快照基準：量測建立時間、每條邊記憶體與走訪延遲（快照 vs SQL）
+
+更新時間：2026-10-17 17:30
+作者：AI Assistant
+修改摘要：建立基準腳本；可指定既有資料庫（--db，如 ./data/graph.db、./data/graph_qa.db）或以隨機圖量測多種規模
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, Optional
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.graph_adjacency import AdjacencySnapshot
+from app.core.graph_store import SQLiteGraphStore
+from scripts.bench_graph_neighbors import build_graph
+
+
+async def timed(label: str, calls) -> None:
+    start = time.perf_counter()
+    for call in calls:
+        await call()
+    elapsed = time.perf_counter() - start
+    print(f"    {label:<34} {elapsed / len(calls) * 1000:>9.3f} ms/call")
+
+
+async def report(store: SQLiteGraphStore, samples: int, seed: int) -> None:
+    """建立快照並輸出記憶體與走訪延遲"""
+    async with store.conn.execute("SELECT rowid, source_id, target_id, type FROM relations ORDER BY rowid") as cursor:
+        rows = [tuple(row) for row in await cursor.fetchall()]
+    if not rows:
+        print("  （無關係資料，略過）")
+        return
+
+    start = time.perf_counter()
+    snapshot = AdjacencySnapshot.build(rows, store._graph_version)
+    build_seconds = time.perf_counter() - start
+
+    # 另建一次以 tracemalloc 實測常駐配置（追蹤本身會拖慢建立，故不計時）
+    del snapshot
+    tracemalloc.start()
+    snapshot = AdjacencySnapshot.build(rows, store._graph_version)
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+
+    usage = snapshot.memory_usage()
+    print(
+        f"  節點 {usage['nodes']:,}、邊 {usage['edges']:,}，建立 {build_seconds:.2f}s\n"
+        f"  CSR 陣列 {usage['array_bytes'] / 1024 / 1024:.2f} MiB + id 字串/索引 {usage['id_bytes'] / 1024 / 1024:.2f} MiB"
+        f" = {usage['total_bytes'] / 1024 / 1024:.2f} MiB，{usage['bytes_per_edge']} B/edge"
+        f"（tracemalloc 實測 {traced / usage['edges']:.1f} B/edge）"
+    )
+
+    rng = random.Random(seed)
+    ids = [snapshot.node_ids[rng.randrange(snapshot.num_nodes)] for _ in range(samples)]
+    pairs = [(ids[k], ids[-k - 1]) for k in range(min(samples, 50))]
+    for label, use_snapshot in (("SQL", False), ("snapshot", True)):
+        store._adjacency = snapshot if use_snapshot else None
+        print(f"  {label}:")
+        await timed("get_neighbors", [lambda i=i: store.get_neighbors(i) for i in ids])
+        await timed("get_relations_by_entity", [lambda i=i: store.get_relations_by_entity(i) for i in ids])
+        await timed("get_path(max_hops=3)", [lambda p=p: store.get_path(*p) for p in pairs])
+        await timed("get_subgraph(max_depth=2)", [lambda i=i: store.get_subgraph([i]) for i in ids[:50]])
+    store._adjacency = None
+
+
+async def run(sizes: List[int], degree: int, samples: int, seed: int, db_paths: Optional[List[str]]) -> None:
+    if db_paths:
+        for db_path in db_paths:
+            if not Path(db_path).exists():
+                print(f"[WARN] 略過不存在的資料庫: {db_path}")
+                continue
+            print(f"\n{db_path}")
+            store = SQLiteGraphStore(db_path)
+            await store.initialize()
+            try:
+                await report(store, samples, seed)
+            finally:
+                await store.close()
+        return
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            print(f"\n隨機圖：{size:,} 實體 × {degree} 條 outgoing 關係")
+            store = SQLiteGraphStore(str(Path(tmp_dir) / "bench_adjacency.db"))
+            await store.initialize()
+            try:
+                await build_graph(store, size, degree, seed)
+                await report(store, samples, seed)
+            finally:
+                await store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CSR 鄰接快照記憶體與走訪延遲基準")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="隨機圖實體數（預設: 10000 100000）")
+    parser.add_argument("--degree", type=int, default=3, help="每實體 outgoing 關係數（預設: 3）")
+    parser.add_argument("--samples", type=int, default=300, help="每項取樣次數（預設: 300）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", action="append", help="改為量測既有資料庫，可重複指定")
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.degree, args.samples, args.seed, args.db))
+
+
+if __name__ == "__main__":
+    main()
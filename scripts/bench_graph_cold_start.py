@@ -0,0 +1,141 @@
+"""
+冷啟動基準：量測新程序從 import 到回應第一個圖查詢的時間（SQL 重建鄰接 vs 載入二進位快照）
+
+更新時間：2026-10-17 23:50
+作者：AI Assistant
+修改摘要：建立基準腳本；每種模式於獨立子程序執行，父程序量測含 Python 啟動與 import 的總時間，
+          子程序另回報 initialize / 第一次查詢各階段耗時
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# 專案根目錄
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 模式：(說明, 子程序額外環境變數)
+MODES: Dict[str, str] = {
+    "sql-lazy": "SQLiteGraphStore，無鄰接快照（第一次查詢走 SQL）",
+    "sql-rebuild": "SQLiteGraphStore，GRAPH_ADJACENCY_SNAPSHOT=true（啟動時掃描 relations 建 CSR）",
+    "snapshot": "SQLiteGraphStore + GRAPH_SNAPSHOT_PATH（mmap 載入 CSR）",
+    "memory-snapshot": "MemoryGraphStore.load_snapshot（全部實體 / 關係載入記憶體）",
+}
+
+
+async def child(mode: str, db_path: str, snapshot_path: str, source: str, target: str) -> None:
+    """子程序：初始化後執行第一個查詢，以 JSON 輸出各階段耗時"""
+    t0 = time.perf_counter()
+    from app.core.graph_store import MemoryGraphStore, SQLiteGraphStore
+    t_import = time.perf_counter()
+
+    if mode == "memory-snapshot":
+        store = MemoryGraphStore()
+        await store.load_snapshot(snapshot_path)
+    else:
+        store = SQLiteGraphStore(db_path, snapshot_path=snapshot_path if mode == "snapshot" else None)
+        await store.initialize()
+    t_init = time.perf_counter()
+
+    neighbors = await store.get_neighbors(source)
+    paths = await store.get_path(source, target)
+    t_query = time.perf_counter()
+    if hasattr(store, "close"):
+        await store.close()
+
+    print(json.dumps({
+        "import": t_import - t0,
+        "initialize": t_init - t_import,
+        "first_query": t_query - t_init,
+        "neighbors": len(neighbors),
+        "paths": len(paths),
+    }))
+
+
+def run_child(mode: str, db_path: str, snapshot_path: str, source: str, target: str) -> Dict[str, float]:
+    env = dict(os.environ, GRAPH_ADJACENCY_SNAPSHOT="true" if mode == "sql-rebuild" else "false")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode,
+         "--db", db_path, "--snapshot", snapshot_path, "--source", source, "--target", target],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["wall"] = wall
+    return report
+
+
+async def prepare(db_path: str, snapshot_path: str, size: int, degree: int, seed: int) -> List[str]:
+    """建立（或沿用）資料庫、匯出快照，回傳查詢用的起訖實體 id"""
+    from app.core.graph_store import SQLiteGraphStore
+    from scripts.bench_graph_neighbors import build_graph
+
+    store = SQLiteGraphStore(db_path)
+    await store.initialize()
+    try:
+        if size:
+            await build_graph(store, size, degree, seed)
+        meta = await store.export_snapshot(snapshot_path)
+        print(
+            f"  快照 {meta['entities']:,} 實體、{meta['relations']:,} 關係，"
+            f"{meta['bytes'] / 1024 / 1024:.1f} MiB（DB {Path(db_path).stat().st_size / 1024 / 1024:.1f} MiB）"
+        )
+        async with store.conn.execute("SELECT source_id, target_id FROM relations ORDER BY rowid LIMIT 1") as cursor:
+            row = await cursor.fetchone()
+        return [row[0], row[1]] if row else ["", ""]
+    finally:
+        await store.close()
+
+
+def report(db_path: str, snapshot_path: str, source: str, target: str, repeat: int) -> None:
+    print(f"  {'模式':<16} {'總時間':>9} {'import':>9} {'initialize':>11} {'首次查詢':>9}")
+    for mode, description in MODES.items():
+        runs = [run_child(mode, db_path, snapshot_path, source, target) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r["wall"])
+        print(
+            f"  {mode:<16} {best['wall']:>8.3f}s {best['import']:>8.3f}s "
+            f"{best['initialize']:>10.3f}s {best['first_query']:>8.3f}s   {description}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="圖查詢冷啟動時間基準（SQL vs 二進位快照）")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="隨機圖實體數（預設: 10000 100000）")
+    parser.add_argument("--degree", type=int, default=3, help="每實體 outgoing 關係數（預設: 3）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="每種模式執行次數，取最快一次（預設: 3）")
+    parser.add_argument("--db", help="改為量測既有資料庫（快照匯出至暫存目錄）")
+    parser.add_argument("--child", choices=list(MODES), help=argparse.SUPPRESS)
+    parser.add_argument("--snapshot", help=argparse.SUPPRESS)
+    parser.add_argument("--source", help=argparse.SUPPRESS)
+    parser.add_argument("--target", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args.child, args.db, args.snapshot, args.source, args.target))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_path = str(Path(tmp_dir) / "graph.snap")
+        if args.db:
+            print(f"\n{args.db}")
+            source, target = asyncio.run(prepare(args.db, snapshot_path, 0, 0, args.seed))
+            report(args.db, snapshot_path, source, target, args.repeat)
+            return
+        for size in args.sizes:
+            print(f"\n隨機圖：{size:,} 實體 × {args.degree} 條 outgoing 關係")
+            db_path = str(Path(tmp_dir) / f"cold_start_{size}.db")
+            source, target = asyncio.run(prepare(db_path, snapshot_path, size, args.degree, args.seed))
+            report(db_path, snapshot_path, source, target, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
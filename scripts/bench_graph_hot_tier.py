@@ -0,0 +1,162 @@
+"""
+MemoryGraphStore 索引與 HotTierGraphStore 基準：舊版全表掃描 / 排序 vs 類型、名稱 bigram 索引，
+以及自 SQLiteGraphStore 載入記憶體讀取層的耗時與讀取延遲
+
+更新時間：2026-10-18 04:40
+作者：AI Assistant
+修改摘要：建立基準腳本；QA 形狀的圖（文件 -> QA），--entities 預設 200,000，可調至 1,000,000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.graph_hot_tier import HotTierGraphStore
+from app.core.graph_store import Entity, GraphStore, MemoryGraphStore, Relation, SQLiteGraphStore
+
+TOPICS = ["批價", "掛號", "退費", "檢驗", "藥局", "病歷", "排班", "住院"]
+
+
+def build_graph(entities: int, qa_per_document: int) -> "tuple[List[Entity], List[Relation]]":
+    """每份文件 qa_per_document 筆 QA，文件 contains QA"""
+    entity_list: List[Entity] = []
+    relation_list: List[Relation] = []
+    documents = max(entities // (qa_per_document + 1), 1)
+    for d in range(documents):
+        doc_id = f"doc_{d:06d}"
+        entity_list.append(Entity(id=doc_id, type="Document", name=f"操作手冊 {d}", properties={}))
+        for q in range(qa_per_document):
+            qa_id = f"{doc_id}_qa_{q}"
+            topic = TOPICS[(d * qa_per_document + q) % len(TOPICS)]
+            entity_list.append(Entity(
+                id=qa_id, type="QA", name=f"{topic}問題 {d}-{q}", properties={"document_id": doc_id, "answer": "略"}
+            ))
+            relation_list.append(Relation(
+                id=f"{doc_id}_contains_{q}", source_id=doc_id, target_id=qa_id, type="CONTAINS", properties={}
+            ))
+    return entity_list, relation_list
+
+
+def scan_by_type(store: MemoryGraphStore, entity_type: str, limit: int) -> List[Entity]:
+    """舊版 get_entities_by_type（全表掃描）"""
+    return [e for e in store.entities.values() if e.type == entity_type][:limit]
+
+
+def scan_search(store: MemoryGraphStore, query: str, limit: int) -> List[Entity]:
+    """舊版 search_entities（每次依名稱排序全部實體後掃描）"""
+    q = query.lower()
+    results = []
+    for entity in sorted(store.entities.values(), key=lambda e: (e.name or "").lower()):
+        if q in entity.name.lower() or q in entity.type.lower():
+            results.append(entity)
+            if len(results) >= limit:
+                break
+    return results
+
+
+def scan_statistics(store: MemoryGraphStore) -> dict:
+    """舊版 get_statistics（逐筆計數）"""
+    entity_types: dict = {}
+    for entity in store.entities.values():
+        entity_types[entity.type] = entity_types.get(entity.type, 0) + 1
+    relation_types: dict = {}
+    for relation in store.relations.values():
+        relation_types[relation.type] = relation_types.get(relation.type, 0) + 1
+    return {"entity_types": entity_types, "relation_types": relation_types}
+
+
+async def timed(label: str, repeat: int, call: Callable[[], Awaitable[Any]]) -> Any:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await call()
+        best = min(best, time.perf_counter() - start)
+    print(f"    {label:<44} {best * 1000:>10.2f} ms")
+    return result
+
+
+async def bench_memory(entities: List[Entity], relations: List[Relation], repeat: int) -> None:
+    store = MemoryGraphStore()
+    start = time.perf_counter()
+    await store.add_entities_bulk(entities)
+    await store.add_relations_bulk(relations)
+    print(f"  MemoryGraphStore 寫入並建索引 {time.perf_counter() - start:.2f}s")
+
+    async def old_by_type():
+        return scan_by_type(store, "Document", 100)
+
+    async def old_search():
+        return scan_search(store, "退費問題 1", 10)
+
+    async def old_stats():
+        return scan_statistics(store)
+
+    old = await timed("get_entities_by_type：全表掃描", repeat, old_by_type)
+    new = await timed("get_entities_by_type：類型索引", repeat, lambda: store.get_entities_by_type("Document", 100))
+    assert [e.id for e in old] == [e.id for e in new]
+    old = await timed("search_entities：全部排序後掃描", repeat, old_search)
+    new = await timed("search_entities：bigram 候選 + 命中者排序", repeat, lambda: store.search_entities("退費問題 1", 10))
+    assert [e.id for e in old] == [e.id for e in new]
+    old = await timed("get_statistics：逐筆計數", repeat, old_stats)
+    new = await timed("get_statistics：類型計數", repeat, store.get_statistics)
+    assert old["entity_types"] == new["entity_types"]
+
+
+async def bench_hot_tier(entities: List[Entity], relations: List[Relation], repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sqlite_store = SQLiteGraphStore(str(Path(tmp_dir) / "graph.db"))
+        await sqlite_store.initialize()
+        await sqlite_store.add_entities_bulk(entities, batch_size=5000)
+        await sqlite_store.add_relations_bulk(relations, batch_size=5000)
+        hot = HotTierGraphStore(sqlite_store)
+        try:
+            stats = await hot.reload()
+            print(f"  HotTierGraphStore 自 SQLite 載入 {stats['entities']:,} 實體、{stats['relations']:,} 關係："
+                  f"{stats['load_seconds']:.2f}s")
+            doc_ids = [e.id for e in entities if e.type == "Document"][:50]
+            for name, store in (("SQLiteGraphStore", sqlite_store), ("HotTierGraphStore", hot)):
+                store: GraphStore
+
+                async def neighbors():
+                    for doc_id in doc_ids:
+                        await store.get_neighbors(doc_id, limit=3)
+
+                async def entities_many():
+                    for doc_id in doc_ids:
+                        await store.get_entities_many([doc_id, f"{doc_id}_qa_0", f"{doc_id}_qa_1"])
+
+                print(f"  {name}")
+                await timed("get_neighbors × 50", repeat, neighbors)
+                await timed("get_entities_many(3) × 50", repeat, entities_many)
+                await timed("search_entities('退費問題 1')", repeat, lambda: store.search_entities("退費問題 1", 10))
+        finally:
+            await hot.close()
+
+
+async def run(entities: int, qa_per_document: int, repeat: int, skip_sqlite: bool) -> None:
+    entity_list, relation_list = build_graph(entities, qa_per_document)
+    print(f"{len(entity_list):,} 實體、{len(relation_list):,} 關係")
+    await bench_memory(entity_list, relation_list, repeat)
+    if not skip_sqlite:
+        await bench_hot_tier(entity_list, relation_list, repeat)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MemoryGraphStore 索引與 HotTierGraphStore 效能基準")
+    parser.add_argument("--entities", type=int, default=200_000, help="實體數（預設: 200000）")
+    parser.add_argument("--qa-per-document", type=int, default=50, help="每份文件 QA 數（預設: 50）")
+    parser.add_argument("--repeat", type=int, default=3, help="重複次數，取最佳值（預設: 3）")
+    parser.add_argument("--skip-sqlite", action="store_true", help="只量測 MemoryGraphStore 索引（不建 SQLite 資料庫）")
+    args = parser.parse_args()
+    asyncio.run(run(args.entities, args.qa_per_document, args.repeat, args.skip_sqlite))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Hub 實體關係合併基準：舊版逐實體 get_relations_by_entity + `relation not in list`（O(n²)）
+對比 get_relations_by_entities 依關係 ID 去重（O(n)），以及 MemoryGraphStore.get_subgraph
+
+更新時間：2026-10-18 02:20
+作者：AI Assistant
+修改摘要：建立基準腳本；hub 實體預設 5000 條關係，查詢集合為 hub 加上數個 spoke（與圖增強相同的重疊情境）
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.graph_store import Entity, GraphStore, MemoryGraphStore, Relation, SQLiteGraphStore
+
+
+async def build_hub(store: GraphStore, spokes: int) -> None:
+    """hub 實體連到 spokes 個 spoke，相鄰 spoke 之間再串一條 NEXT"""
+    await store.add_entities_bulk(
+        [Entity(id="hub", type="Document", name="操作手冊", properties={"source": "manual.pdf"})]
+        + [
+            Entity(id=f"s{i}", type="QA", name=f"問題 {i}", properties={"answer": f"第 {i} 題的答案" * 5})
+            for i in range(spokes)
+        ]
+    )
+    await store.add_relations_bulk(
+        [Relation(id=f"hub_contains_s{i}", source_id="hub", target_id=f"s{i}", type="CONTAINS", properties={})
+         for i in range(spokes)]
+        + [Relation(id=f"s{i}_next", source_id=f"s{i}", target_id=f"s{i + 1}", type="NEXT", properties={})
+           for i in range(spokes - 1)]
+    )
+
+
+async def merge_list_scan(store: GraphStore, entity_ids: List[str]) -> List[Relation]:
+    """舊版圖增強合併：逐實體查詢後以 relation not in list（dataclass 相等比較）去重"""
+    merged: List[Relation] = []
+    results = await asyncio.gather(*(store.get_relations_by_entity(i, direction="both") for i in entity_ids))
+    for relations in results:
+        for relation in relations:
+            if relation not in merged:
+                merged.append(relation)
+    return merged
+
+
+async def merge_by_id(store: GraphStore, entity_ids: List[str]) -> List[Relation]:
+    return list((await store.get_relations_by_entities(entity_ids, direction="both")).values())
+
+
+def subgraph_list_scan(store: MemoryGraphStore, entity_ids: List[str], max_depth: int) -> Dict[str, Any]:
+    """舊版 MemoryGraphStore.get_subgraph（relations_list 線性去重）"""
+    entities_set = set(entity_ids)
+    relations_list: List[Relation] = []
+    queue = deque((entity_id, 0) for entity_id in entity_ids)
+    visited = set()
+    while queue:
+        entity_id, depth = queue.popleft()
+        if entity_id in visited or depth > max_depth:
+            continue
+        visited.add(entity_id)
+        entities_set.add(entity_id)
+        for rel_id in store.entity_relations.get(entity_id, []):
+            relation = store.relations.get(rel_id)
+            if relation and relation not in relations_list:
+                relations_list.append(relation)
+                next_id = relation.target_id if relation.source_id == entity_id else relation.source_id
+                if next_id not in visited and depth < max_depth:
+                    queue.append((next_id, depth + 1))
+    return {"entities": len(entities_set), "relations": len(relations_list)}
+
+
+async def timed(label: str, repeat: int, call: Callable[[], Awaitable[Any]]) -> Any:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await call()
+        best = min(best, time.perf_counter() - start)
+    print(f"    {label:<44} {best * 1000:>10.2f} ms")
+    return result
+
+
+async def run(spokes: int, query_spokes: int, repeat: int) -> None:
+    entity_ids = ["hub"] + [f"s{i}" for i in range(query_spokes)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sqlite_store = SQLiteGraphStore(str(Path(tmp_dir) / "hub.db"))
+        await sqlite_store.initialize()
+        memory_store = MemoryGraphStore()
+        try:
+            for store in (sqlite_store, memory_store):
+                await build_hub(store, spokes)
+            print(f"hub：{spokes:,} 條 CONTAINS 關係，查詢 hub + {query_spokes} 個 spoke")
+
+            for name, store in (("SQLiteGraphStore", sqlite_store), ("MemoryGraphStore", memory_store)):
+                print(f"  {name}")
+                old = await timed("逐實體查詢 + relation not in list", repeat, lambda: merge_list_scan(store, entity_ids))
+                new = await timed("get_relations_by_entities（依 ID 去重）", repeat, lambda: merge_by_id(store, entity_ids))
+                assert sorted(r.id for r in old) == sorted(r.id for r in new)
+
+            print("  MemoryGraphStore.get_subgraph(['hub'], max_depth=1)")
+
+            async def old_subgraph():
+                return subgraph_list_scan(memory_store, ["hub"], 1)
+
+            old = await timed("舊版 relations_list 線性去重", repeat, old_subgraph)
+            new = await timed("關係 ID 字典去重", repeat, lambda: memory_store.get_subgraph(["hub"], 1))
+            assert old["relations"] == len(new["relations"])
+        finally:
+            await sqlite_store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Hub 實體關係合併效能基準（O(n²) list 去重 vs 依 ID 去重）")
+    parser.add_argument("--spokes", type=int, default=5000, help="hub 的關係數（預設: 5000）")
+    parser.add_argument("--query-spokes", type=int, default=4, help="與 hub 一起查詢的 spoke 數（預設: 4，同 GRAPH_QUERY_MAX_ENTITIES - 1）")
+    parser.add_argument("--repeat", type=int, default=1, help="重複次數，取最佳值（預設: 1；舊版 O(n²) 合併單次即需數十秒）")
+    args = parser.parse_args()
+    asyncio.run(run(args.spokes, args.query_spokes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+get_neighbors / get_subgraph / get_path 效能基準：比較舊版逐筆 get_entity（N+1）與 JOIN / 遞迴 CTE
+
+更新時間：2026-10-17 16:10
+作者：AI Assistant
+修改摘要：get_subgraph 改為量測遞迴 CTE 版本；語句計數涵蓋唯讀連線池；新增 get_path（舊版 queue.pop(0) BFS 對比 WITH RECURSIVE）
+
+更新時間：2026-10-17 11:05
+作者：AI Assistant
+修改摘要：建立基準腳本，於暫存 SQLite 圖（預設 100k 實體）上量測每次呼叫的 SQL 語句數與延遲
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.graph_store import Entity, Relation, SQLiteGraphStore, _row_to_relation
+
+
+class StatementCounter:
+    """以 sqlite trace callback 統計實際執行的 SQL 語句數"""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, statement: str) -> None:
+        self.count += 1
+
+
+async def build_graph(store: SQLiteGraphStore, num_entities: int, degree: int, seed: int) -> None:
+    """建立隨機圖：num_entities 個實體，每個實體 degree 條 outgoing 關係。"""
+    rng = random.Random(seed)
+    entities = [
+        Entity(
+            id=f"e{i}",
+            type="Concept" if i % 10 else "Document",
+            name=f"實體 {i}",
+            properties={"description": f"第 {i} 個實體的說明文字", "rank": i},
+        )
+        for i in range(num_entities)
+    ]
+    await store.add_entities_bulk(entities, batch_size=5000)
+
+    relations: List[Relation] = []
+    for i in range(num_entities):
+        for k in range(degree):
+            j = rng.randrange(num_entities)
+            if j == i:
+                continue
+            relations.append(
+                Relation(id=f"r{i}_{k}", source_id=f"e{i}", target_id=f"e{j}", type="RELATED", properties={})
+            )
+    await store.add_relations_bulk(relations, batch_size=5000)
+
+
+async def legacy_get_neighbors(
+    store: SQLiteGraphStore, entity_id: str, relation_type: Optional[str] = None, direction: str = "both"
+) -> List[Entity]:
+    """舊版實作：先取鄰居 id，再逐筆 get_entity。"""
+    neighbors: List[Entity] = []
+    async with store.conn.cursor() as cursor:
+        if direction in ["outgoing", "both"]:
+            query = "SELECT target_id FROM relations WHERE source_id = ?"
+            params: List[Any] = [entity_id]
+            if relation_type:
+                query += " AND type = ?"
+                params.append(relation_type)
+            await cursor.execute(query, params)
+            for (target_id,) in await cursor.fetchall():
+                entity = await store.get_entity(target_id)
+                if entity:
+                    neighbors.append(entity)
+        if direction in ["incoming", "both"]:
+            query = "SELECT source_id FROM relations WHERE target_id = ?"
+            params = [entity_id]
+            if relation_type:
+                query += " AND type = ?"
+                params.append(relation_type)
+            await cursor.execute(query, params)
+            for (source_id,) in await cursor.fetchall():
+                entity = await store.get_entity(source_id)
+                if entity and entity not in neighbors:
+                    neighbors.append(entity)
+    return neighbors
+
+
+async def legacy_get_subgraph(store: SQLiteGraphStore, entity_ids: List[str], max_depth: int = 2) -> Dict[str, Any]:
+    """舊版實作：逐節點 BFS，每個節點 get_entity 兩次 + 一次關係查詢。"""
+    entities_set = set(entity_ids)
+    relations_list = []
+    queue = [(entity_id, 0) for entity_id in entity_ids]
+    visited = set()
+    while queue:
+        entity_id, depth = queue.pop(0)
+        if entity_id in visited or depth > max_depth:
+            continue
+        visited.add(entity_id)
+        if await store.get_entity(entity_id):
+            entities_set.add(entity_id)
+        async with store.conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT * FROM relations WHERE source_id = ? OR target_id = ?", (entity_id, entity_id)
+            )
+            for row in await cursor.fetchall():
+                relation = _row_to_relation(row)
+                if relation not in relations_list:
+                    relations_list.append(relation)
+                next_id = relation.target_id if relation.source_id == entity_id else relation.source_id
+                if next_id not in visited and depth < max_depth:
+                    queue.append((next_id, depth + 1))
+    entities = []
+    for entity_id in entities_set:
+        entity = await store.get_entity(entity_id)
+        if entity:
+            entities.append(entity)
+    return {"entities": [e.to_dict() for e in entities], "relations": [r.to_dict() for r in relations_list]}
+
+
+async def legacy_get_path(store: SQLiteGraphStore, source_id: str, target_id: str, max_hops: int = 3) -> List[List[str]]:
+    """舊版實作：queue.pop(0) BFS，每個節點一次 get_neighbors。"""
+    if source_id == target_id:
+        return [[source_id]]
+    paths = []
+    queue = [(source_id, [source_id])]
+    visited = set()
+    while queue and len(paths) < 100:
+        current_id, path = queue.pop(0)
+        if len(path) > max_hops or current_id in visited:
+            continue
+        visited.add(current_id)
+        for neighbor in await store.get_neighbors(current_id, direction="outgoing"):
+            if neighbor.id == target_id:
+                paths.append(path + [neighbor.id])
+            elif neighbor.id not in path:
+                queue.append((neighbor.id, path + [neighbor.id]))
+    return paths
+
+
+async def measure(label: str, store: SQLiteGraphStore, counter: StatementCounter, calls) -> None:
+    counter.count = 0
+    start = time.perf_counter()
+    for call in calls:
+        await call()
+    elapsed = time.perf_counter() - start
+    n = len(calls)
+    print(f"  {label:<28} {counter.count / n:>10.1f} stmts/call {elapsed / n * 1000:>10.3f} ms/call")
+
+
+async def run(num_entities: int, degree: int, samples: int, subgraph_samples: int, seed: int, db_path: Optional[str]) -> None:
+    tmp_dir = None
+    if not db_path:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_path = str(Path(tmp_dir.name) / "bench_graph.db")
+    store = SQLiteGraphStore(db_path)
+    await store.initialize()
+    try:
+        stats = await store.get_statistics()
+        if stats["total_entities"] < num_entities:
+            print(f"建立測試圖：{num_entities} 實體，每實體 {degree} 條關係 ...")
+            start = time.perf_counter()
+            await build_graph(store, num_entities, degree, seed)
+            print(f"  完成（{time.perf_counter() - start:.1f}s）")
+        counter = StatementCounter()
+        # 讀取可能走唯讀連線池，所有連線皆掛上計數器
+        connections = [store.conn, *store._read_conns]
+        for conn in connections:
+            await conn.set_trace_callback(counter)
+
+        rng = random.Random(seed + 1)
+        ids = [f"e{rng.randrange(num_entities)}" for _ in range(samples)]
+        print(f"\nget_neighbors(direction='both')，{samples} 次：")
+        await measure("legacy (N+1 get_entity)", store, counter, [lambda i=i: legacy_get_neighbors(store, i) for i in ids])
+        await measure("JOIN", store, counter, [lambda i=i: store.get_neighbors(i) for i in ids])
+
+        sub_ids = ids[:subgraph_samples]
+        print(f"\nget_subgraph(max_depth=2)，{len(sub_ids)} 次：")
+        await measure("legacy (per-node BFS)", store, counter, [lambda i=i: legacy_get_subgraph(store, [i]) for i in sub_ids])
+        await measure("WITH RECURSIVE", store, counter, [lambda i=i: store.get_subgraph([i]) for i in sub_ids])
+
+        pairs = [(ids[k], ids[-k - 1]) for k in range(len(sub_ids))]
+        print(f"\nget_path(max_hops=3)，{len(pairs)} 次：")
+        await measure("legacy (pop(0) BFS)", store, counter, [lambda p=p: legacy_get_path(store, *p) for p in pairs])
+        await measure("WITH RECURSIVE", store, counter, [lambda p=p: store.get_path(*p) for p in pairs])
+        for conn in connections:
+            await conn.set_trace_callback(None)
+    finally:
+        await store.close()
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="get_neighbors / get_subgraph / get_path 前後效能比較")
+    parser.add_argument("--entities", type=int, default=100_000, help="實體數（預設: 100000）")
+    parser.add_argument("--degree", type=int, default=3, help="每實體 outgoing 關係數（預設: 3）")
+    parser.add_argument("--samples", type=int, default=500, help="get_neighbors 取樣次數（預設: 500）")
+    parser.add_argument("--subgraph-samples", type=int, default=50, help="get_subgraph 取樣次數（預設: 50）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", type=str, default=None, help="重複使用既有基準資料庫（預設建立暫存檔）")
+    args = parser.parse_args()
+    asyncio.run(run(args.entities, args.degree, args.samples, args.subgraph_samples, args.seed, args.db))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+唯讀模式基準：WAL + mode=ro 連線池（目前模式）vs mode=ro&immutable=1 + mmap / cache_size（GRAPH_DB_READONLY）
+以多個並行協程模擬請求的讀取組合（點查詢、鄰居、文件分頁、搜尋），比較延遲分位數與吞吐
+
+更新時間：2026-10-18 08:10
+作者：AI Assistant
+修改摘要：建立基準腳本；可指定既有資料庫（--db，如 ./data/graph.db）或以 QA 形狀的隨機圖量測
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.core.graph_store import Entity, Relation, SQLiteGraphStore
+
+TOPICS = ["批價", "掛號", "退費", "檢驗", "藥局", "病歷", "排班", "住院"]
+
+
+async def build_database(db_path: str, documents: int, qa_per_document: int) -> None:
+    """每份文件 qa_per_document 筆 QA，文件 contains QA"""
+    store = SQLiteGraphStore(db_path, readonly=False)
+    await store.initialize()
+    try:
+        for d in range(documents):
+            doc_id = f"doc_{d:05d}"
+            entities = [Entity(id=doc_id, type="Document", name=f"操作手冊 {d}", properties={})]
+            relations = []
+            for q in range(qa_per_document):
+                qa_id = f"{doc_id}_qa_{q}"
+                topic = TOPICS[(d + q) % len(TOPICS)]
+                entities.append(Entity(
+                    id=qa_id, type="QA", name=f"{topic}問題 {d}-{q}",
+                    properties={"document_id": doc_id, "question": f"{topic}如何處理？", "answer": "略" * 200}
+                ))
+                relations.append(Relation(
+                    id=f"{doc_id}_contains_{q}", source_id=doc_id, target_id=qa_id, type="CONTAINS", properties={}
+                ))
+            await store.add_entities_bulk(entities)
+            await store.add_relations_bulk(relations)
+    finally:
+        await store.close()
+
+
+async def worker(store: SQLiteGraphStore, doc_ids: List[str], requests: int, seed: int, latencies: List[float]) -> None:
+    rng = random.Random(seed)
+    for _ in range(requests):
+        doc_id = rng.choice(doc_ids)
+        start = time.perf_counter()
+        await store.get_entity(doc_id)
+        await store.get_neighbors(doc_id, limit=5)
+        await store.get_entities_by_document(doc_id, "QA", limit=20)
+        await store.search_entities(f"{rng.choice(TOPICS)}問題 {rng.randrange(len(doc_ids))}", 5)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_mode(db_path: str, readonly: bool, concurrency: int, requests: int) -> None:
+    store = SQLiteGraphStore(db_path, readonly=readonly)
+    await store.initialize()
+    try:
+        doc_ids = [e.id async for e in store.iter_entities("Document", batch=5000)]
+        # 預熱：讓兩種模式都從熱的頁面快取開始
+        await asyncio.gather(*(worker(store, doc_ids, 5, 1000 + i, []) for i in range(concurrency)))
+        latencies: List[float] = []
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(store, doc_ids, requests, i, latencies) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await store.close()
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    label = "唯讀 immutable + mmap" if readonly else "WAL + mode=ro 連線池"
+    print(f"  {label:<22} p50 {p50:>7.2f} ms  p95 {p95:>7.2f} ms  {len(latencies) / elapsed:>8.1f} req/s")
+
+
+async def run(db: str, documents: int, qa_per_document: int, concurrency: int, requests: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "graph.db")
+        if db:
+            # 複製一份，兩種模式讀同一個已 checkpoint 的檔案，且不修改原資料庫
+            shutil.copyfile(db, db_path)
+        else:
+            await build_database(db_path, documents, qa_per_document)
+        size_mib = os.path.getsize(db_path) / 1024 / 1024
+        print(f"{db or '隨機圖'}（{size_mib:.1f} MiB），{concurrency} 個並行請求 × {requests} 次，"
+              f"連線池 {settings.GRAPH_DB_READ_POOL_SIZE}、mmap {settings.GRAPH_DB_MMAP_SIZE // 1024 // 1024} MiB")
+        await run_mode(db_path, False, concurrency, requests)
+        await run_mode(db_path, True, concurrency, requests)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="GraphStore 並行讀取延遲：目前模式 vs 唯讀 immutable 模式")
+    parser.add_argument("--db", default="", help="既有圖資料庫（預設產生隨機圖）")
+    parser.add_argument("--documents", type=int, default=2000, help="隨機圖的文件數（預設: 2000）")
+    parser.add_argument("--qa-per-document", type=int, default=25, help="每份文件 QA 數（預設: 25）")
+    parser.add_argument("--concurrency", type=int, default=32, help="並行請求數（預設: 32）")
+    parser.add_argument("--requests", type=int, default=50, help="每個並行請求的次數（預設: 50）")
+    args = parser.parse_args()
+    asyncio.run(run(args.db, args.documents, args.qa_per_document, args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+結構 v1 / v2 比較基準：檔案大小、遷移耗時與讀取（hydration）延遲
+
+更新時間：2026-10-18 01:10
+作者：AI Assistant
+修改摘要：建立基準腳本；以 QA 形狀的圖（文件 -> QA 的 contains 關係）建立 v1 資料庫，複製後遷移為 v2，
+          VACUUM 後比較大小，並量測 iter_entities / get_entities_by_document / get_neighbors / iter_relations
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.graph_store import Entity, Relation, SQLiteGraphStore
+from scripts.migrate_graph_schema_v2 import db_size
+
+
+async def build_qa_graph(store: SQLiteGraphStore, documents: int, qa_per_document: int, answer_chars: int, seed: int) -> None:
+    """建立 QA 形狀的圖：每份文件 qa_per_document 筆 QA，文件 contains QA，QA 之間隨機 RELATED"""
+    rng = random.Random(seed)
+    answer = ("請先至批價櫃檯確認掛號資料，再依畫面提示完成操作。" * (answer_chars // 24 + 1))[:answer_chars]
+    entities: List[Entity] = []
+    relations: List[Relation] = []
+    for d in range(documents):
+        doc_id = f"doc_manual_{d:04d}"
+        entities.append(Entity(id=doc_id, type="Document", name=f"操作手冊 {d}", properties={"source": f"manual_{d}.pdf"}))
+        for q in range(qa_per_document):
+            qa_id = f"{doc_id}_qa_{q}"
+            entities.append(Entity(
+                id=qa_id, type="QA", name=f"問題 {d}-{q}：如何處理批價異常？",
+                properties={
+                    "question": f"問題 {d}-{q}：如何處理批價異常？",
+                    "answer": answer,
+                    "code": f"{q:02d}",
+                    "document_id": doc_id,
+                    "keywords": ["批價", "掛號"],
+                },
+            ))
+            relations.append(Relation(id=f"{doc_id}_contains_{qa_id}", source_id=doc_id, target_id=qa_id, type="CONTAINS", properties={}))
+    qa_ids = [e.id for e in entities if e.type == "QA"]
+    for qa_id in qa_ids:
+        other = rng.choice(qa_ids)
+        if other != qa_id:
+            relations.append(Relation(id=f"{qa_id}_related_{other}", source_id=qa_id, target_id=other, type="RELATED", properties={}, weight=0.5))
+    await store.add_entities_bulk(entities, batch_size=5000)
+    await store.add_relations_bulk(relations, batch_size=5000)
+
+
+def vacuum(db_path: str) -> None:
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+async def timed(label: str, repeat: int, call) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        best = min(best, time.perf_counter() - start)
+    print(f"    {label:<40} {best * 1000:>9.2f} ms")
+
+
+async def measure(db_path: str, documents: int, repeat: int) -> None:
+    store = SQLiteGraphStore(db_path)
+    await store.initialize()
+    try:
+        print(f"  schema v{store.schema_version}：{db_size(db_path) / 1024 / 1024:.2f} MiB")
+
+        async def hydrate_all():
+            async for entity in store.iter_entities("QA"):
+                entity.to_dict()
+
+        async def by_document():
+            for d in range(min(documents, 20)):
+                for entity in (await store.get_entities_by_document(f"doc_manual_{d:04d}", "QA", limit=500))[0]:
+                    entity.properties["answer"]
+
+        async def neighbors():
+            for d in range(min(documents, 20)):
+                await store.get_neighbors(f"doc_manual_{d:04d}")
+
+        async def scan_relations():
+            async for relation in store.iter_relations():
+                relation.created_at
+
+        await timed("iter_entities('QA') + to_dict()", repeat, hydrate_all)
+        await timed("get_entities_by_document × 20", repeat, by_document)
+        await timed("get_neighbors(文件) × 20", repeat, neighbors)
+        await timed("iter_relations() + created_at", repeat, scan_relations)
+    finally:
+        await store.close()
+
+
+async def run(documents: int, qa_per_document: int, answer_chars: int, repeat: int, seed: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        v1_path = str(Path(tmp_dir) / "graph_v1.db")
+        v2_path = str(Path(tmp_dir) / "graph_v2.db")
+        store = SQLiteGraphStore(v1_path)
+        await store.initialize()
+        try:
+            await build_qa_graph(store, documents, qa_per_document, answer_chars, seed)
+            stats = await store.get_statistics()
+        finally:
+            await store.close()
+        vacuum(v1_path)
+        print(f"{stats['total_entities']:,} 實體、{stats['total_relations']:,} 關係（答案 {answer_chars} 字）")
+
+        shutil.copyfile(v1_path, v2_path)
+        store = SQLiteGraphStore(v2_path)
+        await store.initialize()
+        start = time.perf_counter()
+        try:
+            await store.migrate_to_schema_v2(batch_size=5000)
+        finally:
+            await store.close()
+        print(f"遷移耗時 {time.perf_counter() - start:.2f}s")
+        vacuum(v2_path)
+
+        for db_path in (v1_path, v2_path):
+            await measure(db_path, documents, repeat)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="圖資料庫結構 v1 / v2 大小與讀取效能比較")
+    parser.add_argument("--documents", type=int, default=200, help="文件數（預設: 200）")
+    parser.add_argument("--qa-per-document", type=int, default=250, help="每份文件 QA 數（預設: 250）")
+    parser.add_argument("--answer-chars", type=int, default=300, help="答案文字長度（預設: 300）")
+    parser.add_argument("--repeat", type=int, default=3, help="重複次數，取最佳值（預設: 3）")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(run(args.documents, args.qa_per_document, args.answer_chars, args.repeat, args.seed))
+
+
+if __name__ == "__main__":
+    main()
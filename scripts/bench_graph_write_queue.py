@@ -0,0 +1,78 @@
+"""
+並行寫入基準：每個寫入單獨一個交易 vs 寫入佇列合併提交（group commit）
+
+更新時間：2026-10-18 05:50
+作者：AI Assistant
+修改摘要：建立基準腳本；模擬並行 /documents 請求，每個請求寫入數批實體與關係（同 GraphBuilder.build_graph_from_text）
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.core.graph_store import Entity, Relation, SQLiteGraphStore
+
+
+async def document_request(store: SQLiteGraphStore, doc: int, chunks: int, entities_per_chunk: int) -> None:
+    """單一文件請求：逐段寫入實體後寫入關係"""
+    for chunk in range(chunks):
+        prefix = f"d{doc}_c{chunk}"
+        entities = [
+            Entity(id=f"{prefix}_e{i}", type="Concept", name=f"概念 {doc}-{chunk}-{i}", properties={"document_id": f"d{doc}"})
+            for i in range(entities_per_chunk)
+        ]
+        await store.add_entities_bulk(entities)
+        await store.add_relations_bulk([
+            Relation(id=f"{prefix}_r{i}", source_id=f"{prefix}_e{i}", target_id=f"{prefix}_e{i + 1}", type="RELATED", properties={})
+            for i in range(entities_per_chunk - 1)
+        ])
+        # 單筆寫入（文件實體更新）
+        await store.add_entity(Entity(id=f"d{doc}", type="Document", name=f"文件 {doc}", properties={"chunks": chunk + 1}))
+
+
+async def run_once(queue: bool, requests: int, chunks: int, entities_per_chunk: int, max_delay_ms: float) -> None:
+    settings.GRAPH_WRITE_QUEUE_ENABLED = queue
+    settings.GRAPH_WRITE_QUEUE_MAX_DELAY_MS = max_delay_ms
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SQLiteGraphStore(str(Path(tmp_dir) / "graph.db"))
+        await store.initialize()
+        try:
+            start = time.perf_counter()
+            await asyncio.gather(*(document_request(store, d, chunks, entities_per_chunk) for d in range(requests)))
+            elapsed = time.perf_counter() - start
+            stats = await store.get_statistics()
+            label = f"寫入佇列（{max_delay_ms:g} ms）" if queue else "逐寫入交易"
+            extra = ""
+            if queue:
+                queue_stats = store.write_queue_stats()
+                extra = f"，{queue_stats['commits']} 次提交（平均 {queue_stats['ops_per_commit']:.1f} 個寫入 / 交易）"
+            print(f"  {label:<16} {elapsed:>7.2f}s  {stats['total_entities']:,} 實體、{stats['total_relations']:,} 關係{extra}")
+        finally:
+            await store.close()
+
+
+async def run(requests: int, chunks: int, entities_per_chunk: int, max_delay_ms: float) -> None:
+    print(f"{requests} 個並行文件請求 × {chunks} 段 × {entities_per_chunk} 實體")
+    await run_once(False, requests, chunks, entities_per_chunk, max_delay_ms)
+    await run_once(True, requests, chunks, entities_per_chunk, max_delay_ms)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="GraphStore 並行寫入：逐寫入交易 vs group commit")
+    parser.add_argument("--requests", type=int, default=32, help="並行請求數（預設: 32）")
+    parser.add_argument("--chunks", type=int, default=20, help="每個請求的段落數（預設: 20）")
+    parser.add_argument("--entities-per-chunk", type=int, default=8, help="每段實體數（預設: 8）")
+    parser.add_argument("--max-delay-ms", type=float, default=5.0, help="寫入佇列最長等待（預設: 5）")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.chunks, args.entities_per_chunk, args.max_delay_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+QA 向量近似搜尋基準：IVF-flat 在不同 nprobe 下的 recall@k 與查詢延遲，對照精確搜尋（float32 矩陣全量內積）
+
+更新時間：2026-10-18 14:00
+作者：AI Assistant
+修改摘要：建立基準腳本；以分群明顯的合成向量（--noise 調整分群鬆緊）建立 v2 資料庫，查詢為資料中的向量加擾動
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.qa_embedding_index import QAEmbeddingIndex, encode_embedding
+
+
+def build_database(db_path: str, count: int, dim: int, clusters: int, noise: float) -> np.ndarray:
+    """分群的合成向量寫入 v2 資料庫，回傳向量（產生查詢用）"""
+    QAEmbeddingIndex(db_path, readonly=False, ann=False).close()
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, count)] + noise * rng.standard_normal((count, dim), dtype=np.float32)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executemany(
+            "INSERT INTO qa_vectors (entity_id, text, embedding, dim, model, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+            ((f"qa_{i}", "略", encode_embedding(row), dim, "bench", "{}") for i, row in enumerate(vectors)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return vectors
+
+
+def timed(index: QAEmbeddingIndex, queries: List[List[float]], top_k: int, nprobe: int):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.search(query, top_k=top_k, nprobe=nprobe)
+        latencies.append(time.perf_counter() - start)
+        results.append([entity_id for entity_id, _, _ in hits])
+    return statistics.median(latencies) * 1000, results
+
+
+def run(count: int, dim: int, clusters: int, noise: float, queries: int, top_k: int, nlist: int, nprobes: List[int]) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "qa_vectors.db")
+        vectors = build_database(db_path, count, dim, clusters, noise)
+        rng = np.random.default_rng(1)
+        picks = rng.choice(count, queries, replace=False)
+        query_vectors = [(vectors[i] + noise * rng.standard_normal(dim)).tolist() for i in picks]
+
+        from app.config import settings
+        settings.QA_ANN_MIN_VECTORS = 0
+        settings.QA_ANN_NLIST = nlist
+        index = QAEmbeddingIndex(db_path, readonly=False, vectors_path="", ann=True, ann_path=str(Path(tmp_dir) / "qa.ivf.npz"))
+        try:
+            start = time.perf_counter()
+            index.search(query_vectors[0], top_k=top_k)
+            ann = index._load_all().ann
+            print(
+                f"{count:,} 筆 {dim} 維（{clusters} 群，noise={noise}），{ann.nlist} 個分群，"
+                f"載入 + 訓練 {time.perf_counter() - start:.2f}s；{queries} 個查詢，top_k={top_k}"
+            )
+            exact_ms, exact = timed(index, query_vectors, top_k, 0)
+            print(f"  {'精確':<10} recall@{top_k} 1.000  p50 {exact_ms:>7.2f} ms")
+            for nprobe in nprobes:
+                if nprobe > ann.nlist:
+                    continue
+                ms, results = timed(index, query_vectors, top_k, nprobe)
+                recall = sum(len(set(a) & set(b)) for a, b in zip(results, exact)) / sum(len(b) for b in exact)
+                scanned = sum(len(ann.candidates(np.asarray(q, dtype=np.float32) / np.linalg.norm(q), nprobe)) for q in query_vectors[:20]) / 20
+                print(
+                    f"  nprobe={nprobe:<4} recall@{top_k} {recall:.3f}  p50 {ms:>7.2f} ms  "
+                    f"（{exact_ms / ms:>5.1f}x，平均掃描 {scanned / count * 100:.1f}% 向量）"
+                )
+        finally:
+            index.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="QA 向量 IVF-flat：recall@k 與延遲 vs 精確搜尋")
+    parser.add_argument("--count", type=int, default=100000, help="向量數（預設: 100000）")
+    parser.add_argument("--dim", type=int, default=768, help="向量維度（預設: 768）")
+    parser.add_argument("--clusters", type=int, default=500, help="合成資料的主題群數（預設: 500）")
+    parser.add_argument("--noise", type=float, default=1.5, help="群內擾動（相對於群中心；越大分群越不明顯，預設: 1.5）")
+    parser.add_argument("--queries", type=int, default=200, help="查詢數（預設: 200）")
+    parser.add_argument("--top-k", type=int, default=10, help="top_k（預設: 10）")
+    parser.add_argument("--nlist", type=int, default=0, help="分群數（預設: 0 = 約 √n）")
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32,64", help="nprobe 清單（預設: 1,2,4,8,16,32,64）")
+    args = parser.parse_args()
+    nprobes = [int(n) for n in args.nprobe.split(",") if n.strip()]
+    run(args.count, args.dim, args.clusters, args.noise, args.queries, args.top_k, args.nlist, nprobes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+QA 向量記憶體基準：多個 worker 程序各自由資料庫載入向量 vs 以 mmap 共用匯出的 .npy
+每個 worker 建立 QAEmbeddingIndex 並搜尋數次後回報 RSS 與 PSS（共用頁面依共用程序數平均分攤，Linux /proc/self/smaps_rollup）
+
+更新時間：2026-10-18 12:50
+作者：AI Assistant
+修改摘要：建立基準腳本；以 multiprocessing（spawn）模擬 uvicorn --workers N，所有 worker 皆存活時才讀取記憶體
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.qa_embedding_index import QAEmbeddingIndex, encode_embedding
+
+
+def build_database(db_path: str, count: int, dim: int) -> None:
+    """v2（float32 BLOB）資料庫"""
+    QAEmbeddingIndex(db_path, readonly=False).close()
+    rng = np.random.default_rng(0)
+    conn = sqlite3.connect(db_path)
+    try:
+        for start in range(0, count, 5000):
+            batch = rng.standard_normal((min(5000, count - start), dim), dtype=np.float32)
+            conn.executemany(
+                "INSERT INTO qa_vectors (entity_id, text, embedding, dim, model, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (f"qa_{start + i}", "略", encode_embedding(row), dim, "bench", f'{{"question": "問題 {start + i}"}}')
+                    for i, row in enumerate(batch)
+                ),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def memory_kib() -> Dict[str, int]:
+    """目前程序的 Rss / Pss（KiB）"""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss", "Pss_Anon", "Pss_File"):
+                values[key] = int(rest.split()[0])
+    return values
+
+
+def worker(db_path: str, vectors_path: str, dim: int, barrier, results) -> None:
+    index = QAEmbeddingIndex(db_path, readonly=True, vectors_path=vectors_path)
+    rng = np.random.default_rng(os.getpid())
+    for _ in range(5):
+        index.search(rng.standard_normal(dim).tolist(), top_k=5)
+    # 全部 worker 都載入完成後才量測（PSS 依當下共用的程序數分攤）
+    barrier.wait()
+    results.put(memory_kib())
+    barrier.wait()
+    index.close()
+
+
+def run_mode(label: str, db_path: str, vectors_path: str, dim: int, workers: int) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(db_path, vectors_path, dim, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    rss = sum(s["Rss"] for s in samples) / len(samples) / 1024
+    pss = sum(s["Pss"] for s in samples) / len(samples) / 1024
+    anon = sum(s.get("Pss_Anon", 0) for s in samples) / len(samples) / 1024
+    total = sum(s["Pss"] for s in samples) / 1024
+    print(f"  {label:<22} RSS {rss:>7.1f} MiB  PSS {pss:>7.1f} MiB（匿名 {anon:>6.1f}）  {workers} 個 worker PSS 合計 {total:>7.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="QA 向量：各 worker 自行載入 vs mmap 共用的記憶體用量")
+    parser.add_argument("--count", type=int, default=100000, help="向量數（預設: 100000）")
+    parser.add_argument("--dim", type=int, default=768, help="向量維度（預設: 768）")
+    parser.add_argument("--workers", type=int, default=4, help="worker 程序數（預設: 4）")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "qa_vectors.db")
+        vectors_path = str(Path(tmp_dir) / "qa_vectors.npy")
+        build_database(db_path, args.count, args.dim)
+        index = QAEmbeddingIndex(db_path, readonly=True, vectors_path="")
+        index.export_vectors(vectors_path)
+        index.close()
+        matrix_mib = Path(vectors_path).stat().st_size / 1024 / 1024
+        print(f"{args.count:,} 筆 {args.dim} 維向量（矩陣 {matrix_mib:.1f} MiB），{args.workers} 個 worker")
+        run_mode("各自由資料庫載入", db_path, "", args.dim, args.workers)
+        run_mode("mmap 共用 .npy", db_path, vectors_path, args.dim, args.workers)
+
+
+if __name__ == "__main__":
+    main()
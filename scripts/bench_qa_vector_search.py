@@ -0,0 +1,172 @@
+"""
+QA 向量搜尋基準：原本的逐筆 cosine + 全量排序 vs QAEmbeddingIndex（float32 矩陣 + argpartition）
+於 1k / 10k / 100k 筆 768 維向量量測載入時間與單次查詢延遲，以及 v1（JSON）/ v2（float32 BLOB）的載入時間與檔案大小
+
+更新時間：2026-10-18 11:40
+作者：AI Assistant
+修改摘要：先建立 v1（JSON）資料庫，轉換為 v2 後再量測一次載入；新增檔案大小欄位
+
+更新時間：2026-10-18 10:30
+作者：AI Assistant
+修改摘要：建立基準腳本；原本實作記憶體用量大（每個 float 為 Python 物件），預設只量測到 10k 筆
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.qa_embedding_index import QAEmbeddingIndex
+
+
+def build_database(db_path: str, count: int, dim: int, seed: int) -> None:
+    """整批寫入 v1（JSON 文字）格式的資料庫，同既有 qa_vectors.db"""
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(
+            "CREATE TABLE qa_vectors (entity_id TEXT PRIMARY KEY, text TEXT NOT NULL, embedding TEXT NOT NULL, metadata TEXT)"
+        )
+        for start in range(0, count, 5000):
+            batch = np.round(rng.standard_normal((min(5000, count - start), dim)), 6)
+            conn.executemany(
+                "INSERT INTO qa_vectors (entity_id, text, embedding, metadata) VALUES (?, ?, ?, ?)",
+                (
+                    (f"qa_{start + i}", "略", json.dumps(row.tolist()), json.dumps({"question": f"問題 {start + i}"}))
+                    for i, row in enumerate(batch)
+                ),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def legacy_load(db_path: str) -> List[Tuple[str, List[float], Dict[str, Any]]]:
+    conn = sqlite3.connect(db_path)
+    try:
+        return [
+            (entity_id, json.loads(emb), json.loads(meta) if meta else {})
+            for entity_id, emb, meta in conn.execute("SELECT entity_id, embedding, metadata FROM qa_vectors")
+        ]
+    finally:
+        conn.close()
+
+
+def legacy_search(all_vectors, query_emb: List[float], top_k: int, min_score: float):
+    """原本的 QAEmbeddingIndex.search"""
+    def cosine(a: List[float], b: List[float]) -> float:
+        if not a or not b or len(a) != len(b):
+            return 0.0
+        dot = sum(x * y for x, y in zip(a, b))
+        na = math.sqrt(sum(x * x for x in a))
+        nb = math.sqrt(sum(y * y for y in b))
+        if na == 0.0 or nb == 0.0:
+            return 0.0
+        return dot / (na * nb)
+
+    threshold = max(0.0, min_score)
+    scored = []
+    for entity_id, emb, meta in all_vectors:
+        score = cosine(query_emb, emb)
+        if score >= threshold:
+            scored.append((entity_id, float(score), meta))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:top_k]
+
+
+def timed_queries(search, queries: List[List[float]]) -> float:
+    """查詢延遲中位數（毫秒）"""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies) * 1000
+
+
+def load_and_query(db_path: str, query_vectors: List[List[float]], top_k: int) -> Tuple[float, float, List[str]]:
+    """(第一次搜尋含載入的秒數, 查詢延遲中位數毫秒, 第一個查詢的結果 id)"""
+    index = QAEmbeddingIndex(db_path, readonly=True)
+    try:
+        start = time.perf_counter()
+        index.search(query_vectors[0], top_k=top_k)
+        load_seconds = time.perf_counter() - start
+        query_ms = timed_queries(lambda q: index.search(q, top_k=top_k), query_vectors)
+        return load_seconds, query_ms, [entity_id for entity_id, _, _ in index.search(query_vectors[0], top_k=top_k)]
+    finally:
+        index.close()
+
+
+def run(sizes: List[int], dim: int, queries: int, legacy_queries: int, legacy_max: int, top_k: int) -> None:
+    rng = np.random.default_rng(0)
+    print(f"{dim} 維，top_k={top_k}，min_score=0.0；延遲為查詢中位數，載入為第一次搜尋的時間")
+    print(
+        f"{'向量數':>8}  {'原本 載入':>9}  {'原本 查詢':>10}  {'JSON 載入':>9}  {'BLOB 載入':>9}  {'矩陣 查詢':>9}  "
+        f"{'加速':>5}  {'JSON 檔案':>10}  {'BLOB 檔案':>10}"
+    )
+    for count in sizes:
+        query_vectors = [rng.standard_normal(dim).tolist() for _ in range(queries)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = str(Path(tmp_dir) / "qa_vectors_v1.db")
+            blob_path = str(Path(tmp_dir) / "qa_vectors.db")
+            build_database(json_path, count, dim, seed=count)
+            shutil.copyfile(json_path, blob_path)
+            index = QAEmbeddingIndex(blob_path, readonly=False)
+            index.migrate_to_blob_storage()
+            index.close()
+            with sqlite3.connect(blob_path) as conn:
+                conn.execute("VACUUM")
+
+            json_load, _, json_sample = load_and_query(json_path, query_vectors[:1], top_k)
+            blob_load, matrix_ms, sample = load_and_query(blob_path, query_vectors, top_k)
+            assert sample == json_sample, (sample, json_sample)
+
+            legacy_cell, legacy_load_cell, speedup = "略過", "略過", ""
+            if count <= legacy_max:
+                start = time.perf_counter()
+                all_vectors = legacy_load(json_path)
+                legacy_load_cell = f"{time.perf_counter() - start:.2f} s"
+                legacy_ms = timed_queries(
+                    lambda q: legacy_search(all_vectors, q, top_k, 0.0), query_vectors[:legacy_queries]
+                )
+                # 結果一致性：與原本實作的前 top_k 相同
+                expected = [entity_id for entity_id, _, _ in legacy_search(all_vectors, query_vectors[0], top_k, 0.0)]
+                assert sample == expected, (sample, expected)
+                legacy_cell = f"{legacy_ms:.1f} ms"
+                speedup = f"{legacy_ms / matrix_ms:.0f}x"
+                del all_vectors
+            json_mib = os.path.getsize(json_path) / 1024 / 1024
+            blob_mib = os.path.getsize(blob_path) / 1024 / 1024
+        print(
+            f"{count:>8,}  {legacy_load_cell:>9}  {legacy_cell:>10}  {json_load:>7.2f} s  {blob_load:>7.2f} s  "
+            f"{matrix_ms:>6.2f} ms  {speedup:>5}  {json_mib:>6.1f} MiB  {blob_mib:>6.1f} MiB"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="QAEmbeddingIndex.search：逐筆 cosine vs float32 矩陣 top-k")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="向量數（逗號分隔，預設: 1000,10000,100000）")
+    parser.add_argument("--dim", type=int, default=768, help="向量維度（預設: 768）")
+    parser.add_argument("--queries", type=int, default=50, help="矩陣搜尋的查詢次數（預設: 50）")
+    parser.add_argument("--legacy-queries", type=int, default=5, help="原本實作的查詢次數（預設: 5）")
+    parser.add_argument("--legacy-max", type=int, default=10000, help="原本實作量測的最大向量數（預設: 10000；100k 約需 3 GB 記憶體）")
+    parser.add_argument("--top-k", type=int, default=5, help="top_k（預設: 5）")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    run(sizes, args.dim, args.queries, args.legacy_queries, args.legacy_max, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
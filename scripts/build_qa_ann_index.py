@@ -0,0 +1,67 @@
+"""
+訓練 QA 向量近似搜尋（IVF-flat）分群並保存為 .ivf.npz
+於資料庫建置完成後執行；服務端設定 QA_ANN_ENABLED=true（與 QA_ANN_INDEX_PATH）即載入，不需於每個 worker 啟動時訓練
+
+用法：
+    python scripts/build_qa_ann_index.py                              # data/qa_vectors.db -> data/qa_vectors.ivf.npz
+    python scripts/build_qa_ann_index.py --db other.db --out other.ivf.npz --nlist 512
+
+更新時間：2026-10-18 14:00
+作者：AI Assistant
+修改摘要：建立訓練腳本；一律重新訓練（覆寫既有分群），完成後以樣本查詢回報 recall@10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.services.qa_ann_index import IVFFlatIndex
+from app.services.qa_embedding_index import QAEmbeddingIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="訓練 QA 向量 IVF-flat 分群")
+    parser.add_argument("--db", default="./data/qa_vectors.db", help="QA 向量資料庫（預設: ./data/qa_vectors.db）")
+    parser.add_argument("--out", default="", help="輸出路徑（預設: QA_ANN_INDEX_PATH 或與資料庫同名 .ivf.npz）")
+    parser.add_argument("--nlist", type=int, default=settings.QA_ANN_NLIST, help="分群數（預設: QA_ANN_NLIST；0 = 約 √n）")
+    parser.add_argument("--nprobe", type=int, default=settings.QA_ANN_NPROBE, help="回報 recall 用的 nprobe（預設: QA_ANN_NPROBE）")
+    parser.add_argument("--samples", type=int, default=200, help="回報 recall 用的樣本查詢數（預設: 200）")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"[X] 找不到資料庫: {args.db}")
+        sys.exit(1)
+    index = QAEmbeddingIndex(args.db, readonly=True, vectors_path="", ann=False)
+    try:
+        loaded = index._load_all()
+        group = loaded.groups.get(loaded.dim)
+        if group is None:
+            print("[X] 資料庫沒有向量")
+            sys.exit(1)
+        rows, matrix = group
+        out = args.out or index.ann_path
+        start = time.perf_counter()
+        ann = IVFFlatIndex.train(matrix, args.nlist)
+        ann.save(out, [loaded.ids[row] for row in rows])
+        print(f"[OK] {len(rows):,} 筆 {loaded.dim} 維向量、{ann.nlist} 個分群（{time.perf_counter() - start:.2f}s）：{out}")
+
+        # 以資料庫中的向量為查詢，比較 nprobe 個分群的候選與精確 top-10
+        samples = random.Random(0).sample(range(len(rows)), min(args.samples, len(rows)))
+        hits = 0
+        for position in samples:
+            query = matrix[position]
+            exact = set((-(matrix @ query)).argsort()[:10].tolist())
+            hits += len(exact & set(ann.candidates(query, args.nprobe).tolist()))
+        print(f"     nprobe={args.nprobe} recall@10 ≈ {hits / (len(samples) * min(10, len(rows))):.3f}")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
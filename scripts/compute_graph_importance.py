@@ -0,0 +1,88 @@
+"""
+離線計算圖實體重要度（全域 / 文件內 PageRank、度數）並寫入 entity_importance
+供 get_neighbors(order_by="importance") 排序；圖資料更新後重新執行（Docker 建置時於匯出快照前執行；
+容器啟動時再以 --if-stale 對實際掛載的資料庫補算）
+
+更新時間：2026-10-18 19:00
+作者：AI Assistant
+修改摘要：新增 --if-stale（重要度已是最新時略過，供容器啟動時對掛載的資料庫執行）；一律以可寫入模式開啟資料庫
+
+更新時間：2026-10-18 03:30
+作者：AI Assistant
+修改摘要：建立計算腳本；輸出迭代次數與全域重要度前幾名實體
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.core.graph_importance import DEFAULT_DAMPING, DEFAULT_MAX_ITERATIONS
+from app.core.graph_store import SQLiteGraphStore
+
+DEFAULT_DB_PATHS = [settings.GRAPH_DB_PATH, "./data/graph_qa.db"]
+
+
+async def compute(db_path: str, damping: float, max_iterations: int, top: int, if_stale: bool = False) -> bool:
+    """計算單一資料庫的重要度，成功回傳 True；if_stale 時重要度已是最新（關係未變更）則略過"""
+    if not Path(db_path).exists():
+        print(f"[WARN] 略過不存在的資料庫: {db_path}")
+        return True
+
+    start = time.perf_counter()
+    # 本腳本即寫入者，不受 GRAPH_DB_READONLY 影響
+    store = SQLiteGraphStore(db_path, readonly=False)
+    try:
+        await store.initialize()
+        if if_stale and not await store.importance_stale():
+            print(f"[OK] {db_path}：重要度已是最新，略過")
+            return True
+        summary = await store.compute_importance(damping, max_iterations)
+        print(
+            f"[OK] {db_path}：{summary['entities']:,} 實體、{summary['relations']:,} 關係，"
+            f"PageRank {summary['iterations']} 次 / 文件內 {summary['doc_iterations']} 次迭代"
+            f"（{time.perf_counter() - start:.2f}s）"
+        )
+        if top:
+            async with store.conn.execute("""
+                SELECT e.id, e.name, i.pagerank, i.degree
+                FROM entity_importance i JOIN entities e ON e.id = i.entity_id
+                ORDER BY i.pagerank DESC LIMIT ?
+            """, (top,)) as cursor:
+                for row in await cursor.fetchall():
+                    print(f"  {row[2]:.6f}  度數 {row[3]:>5}  {row[0]}（{row[1]}）")
+        return True
+    except Exception as e:
+        print(f"[X] {db_path} 計算失敗: {e}")
+        return False
+    finally:
+        await store.close()
+
+
+async def main_async(db_paths, damping: float, max_iterations: int, top: int, if_stale: bool = False) -> bool:
+    ok = True
+    for db_path in db_paths:
+        ok = await compute(db_path, damping, max_iterations, top, if_stale) and ok
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="計算圖實體重要度（PageRank / 度數）")
+    parser.add_argument("--db", action="append", help="資料庫路徑，可重複指定（預設: graph.db 與 graph_qa.db）")
+    parser.add_argument("--damping", type=float, default=DEFAULT_DAMPING, help=f"阻尼係數（預設: {DEFAULT_DAMPING}）")
+    parser.add_argument("--max-iterations", type=int, default=DEFAULT_MAX_ITERATIONS,
+                        help=f"最大迭代次數（預設: {DEFAULT_MAX_ITERATIONS}）")
+    parser.add_argument("--top", type=int, default=10, help="列出重要度前幾名（預設: 10，0 不列出）")
+    parser.add_argument("--if-stale", action="store_true", help="重要度未計算或計算後關係已變更時才計算")
+    args = parser.parse_args()
+    ok = asyncio.run(main_async(args.db or DEFAULT_DB_PATHS, args.damping, args.max_iterations, args.top, args.if_stale))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+由 graph.db 匯出二進位圖快照（供 Docker 建置時產生，服務以 GRAPH_SNAPSHOT_PATH 載入）
+
+更新時間：2026-10-17 23:50
+作者：AI Assistant
+修改摘要：建立匯出腳本；匯出後重新以 mmap 開啟並驗證校驗碼與筆數
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.core.graph_snapshot import GraphSnapshot
+from app.core.graph_store import SQLiteGraphStore
+
+
+async def export(db_path: str, out_path: str) -> bool:
+    """匯出並驗證快照，成功回傳 True"""
+    if not Path(db_path).exists():
+        print(f"[X] 資料庫不存在: {db_path}")
+        return False
+
+    start = time.perf_counter()
+    store = SQLiteGraphStore(db_path)
+    try:
+        await store.initialize()
+        meta = await store.export_snapshot(out_path)
+    finally:
+        await store.close()
+    print(
+        f"[OK] {db_path} -> {out_path}：{meta['entities']} 實體、{meta['relations']} 關係、"
+        f"{meta['strings']} 個字串，{meta['bytes'] / 1024 / 1024:.2f} MiB（{time.perf_counter() - start:.2f}s）"
+    )
+
+    start = time.perf_counter()
+    snapshot = GraphSnapshot(out_path)
+    if snapshot.entity_count != meta["entities"] or snapshot.relation_count != meta["relations"]:
+        print("[X] 驗證失敗：快照筆數與匯出不符")
+        return False
+    print(f"[OK] 校驗通過（{time.perf_counter() - start:.3f}s）")
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="匯出二進位圖快照")
+    parser.add_argument("--db", default=settings.GRAPH_DB_PATH, help=f"來源資料庫（預設: {settings.GRAPH_DB_PATH}）")
+    parser.add_argument("--out", default=None, help="輸出路徑（預設: 與資料庫同目錄、副檔名 .snap）")
+    args = parser.parse_args()
+    out_path = args.out or str(Path(args.db).with_suffix(".snap"))
+    sys.exit(0 if asyncio.run(export(args.db, out_path)) else 1)
+
+
+if __name__ == "__main__":
+    main()
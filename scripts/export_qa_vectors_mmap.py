@@ -0,0 +1,52 @@
+"""
+匯出 QA 向量為 mmap 用的 .npy（float32、L2 正規化）與 .meta.json（ids / metadata）
+服務設定 QA_VECTORS_MMAP_PATH 指向 .npy 後，各 uvicorn worker 以 mmap 唯讀開啟、共用頁面快取
+
+用法：
+    python scripts/export_qa_vectors_mmap.py                          # data/qa_vectors.db -> data/qa_vectors.npy
+    python scripts/export_qa_vectors_mmap.py --db other.db --out /srv/qa_vectors.npy
+
+更新時間：2026-10-18 12:50
+作者：AI Assistant
+修改摘要：建立匯出腳本；於資料庫建置完成後執行（匯出後資料庫再有寫入時，服務會偵測筆數不符而改由資料庫載入）
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.qa_embedding_index import QAEmbeddingIndex, vectors_meta_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="匯出 QA 向量為 mmap 用的 .npy + .meta.json")
+    parser.add_argument("--db", default="./data/qa_vectors.db", help="QA 向量資料庫（預設: ./data/qa_vectors.db）")
+    parser.add_argument("--out", default="./data/qa_vectors.npy", help="輸出的 .npy 路徑（預設: ./data/qa_vectors.npy）")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"[X] 找不到資料庫: {args.db}")
+        sys.exit(1)
+    start = time.perf_counter()
+    index = QAEmbeddingIndex(args.db, readonly=True, vectors_path="")
+    try:
+        counts = index.export_vectors(args.out)
+    finally:
+        index.close()
+    vectors_mib = Path(args.out).stat().st_size / 1024 / 1024
+    meta_mib = vectors_meta_path(args.out).stat().st_size / 1024 / 1024
+    print(
+        f"[OK] {counts['rows']:,} 筆 {counts['dim']} 維向量（{time.perf_counter() - start:.2f}s）："
+        f"{args.out} {vectors_mib:.1f} MiB、{vectors_meta_path(args.out)} {meta_mib:.1f} MiB"
+    )
+    if counts["omitted"]:
+        print(f"[WARN] {counts['omitted']:,} 筆維度與主要維度不同，未匯出（搜尋時分數視為 0）")
+    print(f"服務端設定 QA_VECTORS_MMAP_PATH={args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,14 @@
 解析 IC 卡資料上傳欄位與錯誤對照表並建立問答知識圖譜子圖
 從純文字規格檔 `IC卡資料上傳錯誤對照.txt` 提取欄位代碼與錯誤代碼，寫入共用的 graph_qa.db
 
+更新時間：2026-10-17 21:00
+作者：AI Assistant
+修改摘要：IC_Field / IC_Error 實體寫入 document_id，供 get_entities_by_document 索引查詢
+
+更新時間：2026-10-17 09:40
+作者：AI Assistant
+修改摘要：欄位 / 錯誤實體與關係改用 add_entities_bulk / add_relations_bulk 批次寫入，避免逐筆 commit
+
 更新時間：2026-03-06 17:45
 作者：AI Assistant
 修改摘要：預設改使用 data/Thisqa 版本的 IC 卡錯誤對照檔，並建議以固定 doc-id 搭配 overwrite 方式維護單一版本
@@ -195,12 +203,12 @@ async def import_ic_spec_to_graph(
 
         # 先建立欄位實體，方便之後錯誤與欄位連線
         field_id_to_entity_id: Dict[str, str] = {}
-        field_count = 0
+        field_entities: List[Entity] = []
         for field in fields:
             field_entity_id = f"{document_id}_field_{field['field_id']}"
             field_id_to_entity_id[field["field_id"]] = field_entity_id
 
-            field_entity = Entity(
+            field_entities.append(Entity(
                 id=field_entity_id,
                 type="IC_Field",
                 name=field["name"][:100],
@@ -212,31 +220,33 @@ async def import_ic_spec_to_graph(
                     "source": "ic_error_spec",
                 },
                 created_at=None,
+                document_id=document_id,
+            ))
+
+        field_flags = await graph_store.add_entities_bulk(field_entities)
+        field_relations: List[Relation] = [
+            Relation(
+                id=f"{document_id}_contains_field_{field['field_id']}",
+                source_id=document_id,
+                target_id=field_entity.id,
+                type="CONTAINS_FIELD",
+                properties={"field_id": field["field_id"]},
+                weight=1.0,
+                created_at=None,
             )
-
-            if await graph_store.add_entity(field_entity):
-                field_count += 1
-                relation = Relation(
-                    id=f"{document_id}_contains_field_{field['field_id']}",
-                    source_id=document_id,
-                    target_id=field_entity_id,
-                    type="CONTAINS_FIELD",
-                    properties={"field_id": field["field_id"]},
-                    weight=1.0,
-                    created_at=None,
-                )
-                await graph_store.add_relation(relation)
+            for field, field_entity, ok in zip(fields, field_entities, field_flags)
+            if ok
+        ]
+        await graph_store.add_relations_bulk(field_relations)
+        field_count = len(field_relations)
 
         print(f"建立 {field_count} 個 IC_Field 實體與 CONTAINS_FIELD 關係")
 
         # 再建立錯誤實體與 ERROR_ON_FIELD 關係
-        error_count = 0
-        relation_count = 0
+        error_entities: List[Entity] = []
         for error in errors:
-            error_entity_id = f"{document_id}_error_{error['code']}"
-
-            error_entity = Entity(
-                id=error_entity_id,
+            error_entities.append(Entity(
+                id=f"{document_id}_error_{error['code']}",
                 type="IC_Error",
                 name=error["message"][:100],
                 properties={
@@ -248,39 +258,46 @@ async def import_ic_spec_to_graph(
                     "source": "ic_error_spec",
                 },
                 created_at=None,
-            )
+                document_id=document_id,
+            ))
+
+        error_flags = await graph_store.add_entities_bulk(error_entities)
+        error_count = error_flags.count(True)
 
-            if await graph_store.add_entity(error_entity):
-                error_count += 1
+        contains_error_relations: List[Relation] = []
+        error_field_relations: List[Relation] = []
+        for error, error_entity, ok in zip(errors, error_entities, error_flags):
+            if not ok:
+                continue
+            contains_error_relations.append(Relation(
+                id=f"{document_id}_contains_error_{error['code']}",
+                source_id=document_id,
+                target_id=error_entity.id,
+                type="CONTAINS_ERROR",
+                properties={"code": error["code"]},
+                weight=1.0,
+                created_at=None,
+            ))
 
-                contains_error_rel = Relation(
-                    id=f"{document_id}_contains_error_{error['code']}",
-                    source_id=document_id,
-                    target_id=error_entity_id,
-                    type="CONTAINS_ERROR",
-                    properties={"code": error["code"]},
+            # 建立錯誤到欄位的關係
+            for field_id in error["related_field_ids"]:
+                field_entity_id = field_id_to_entity_id.get(field_id)
+                if not field_entity_id:
+                    continue
+                error_field_relations.append(Relation(
+                    id=f"{error_entity.id}_on_{field_entity_id}",
+                    source_id=error_entity.id,
+                    target_id=field_entity_id,
+                    type="ERROR_ON_FIELD",
+                    properties={"field_id": field_id},
                     weight=1.0,
                     created_at=None,
-                )
-                await graph_store.add_relation(contains_error_rel)
-                relation_count += 1
-
-                # 建立錯誤到欄位的關係
-                for field_id in error["related_field_ids"]:
-                    field_entity_id = field_id_to_entity_id.get(field_id)
-                    if not field_entity_id:
-                        continue
-                    rel = Relation(
-                        id=f"{error_entity_id}_on_{field_entity_id}",
-                        source_id=error_entity_id,
-                        target_id=field_entity_id,
-                        type="ERROR_ON_FIELD",
-                        properties={"field_id": field_id},
-                        weight=1.0,
-                        created_at=None,
-                    )
-                    if await graph_store.add_relation(rel):
-                        relation_count += 1
+                ))
+
+        # 與原逐筆流程一致：CONTAINS_ERROR 一律計數，ERROR_ON_FIELD 僅計成功寫入者
+        await graph_store.add_relations_bulk(contains_error_relations)
+        relation_count = len(contains_error_relations)
+        relation_count += (await graph_store.add_relations_bulk(error_field_relations)).count(True)
 
         print(f"建立 {error_count} 個 IC_Error 實體與 {relation_count} 筆關係")
 
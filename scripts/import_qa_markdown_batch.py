@@ -2,6 +2,14 @@
 批次匯入 QA Markdown 檔案到乾淨的資料庫
 只包含 QA Markdown 資料，不包含其他混雜資料
 
+更新時間：2026-10-17 21:00
+作者：AI Assistant
+修改摘要：QA 實體寫入 document_id，供 /qa/by-document 以索引查詢
+
+更新時間：2026-10-17 09:40
+作者：AI Assistant
+修改摘要：問答實體與 CONTAINS_QA 關係改用 add_entities_bulk / add_relations_bulk 批次寫入，每檔單一交易
+
 更新時間：2026-01-13 15:20
 作者：AI Assistant
 修改摘要：更新標頭註解日期
@@ -140,13 +148,13 @@ async def import_qa_markdown_batch(
                 await graph_store.add_entity(doc_entity)
                 print(f"  [OK] 建立文件實體")
                 
-                # 建立問答對實體和關係
-                qa_count = 0
+                # 建立問答對實體和關係（批次寫入）
+                qa_entities = []
                 for qa in parsed_data["qa_list"]:
                     qa_id = f"{doc_id}_qa_{qa['number']}"
                     
                     # 建立問答實體
-                    qa_entity = Entity(
+                    qa_entities.append(Entity(
                         id=qa_id,
                         type="QA",
                         name=qa["title"][:100],  # 限制名稱長度
@@ -162,26 +170,31 @@ async def import_qa_markdown_batch(
                             "metadata": qa["metadata"],
                             "source": "qa_markdown"
                         },
+                        created_at=None,
+                        document_id=doc_id
+                    ))
+                
+                entity_flags = await graph_store.add_entities_bulk(qa_entities)
+                
+                # 建立文件到問答的關係（僅針對成功寫入的問答實體）
+                relations = []
+                for qa, qa_entity, success in zip(parsed_data["qa_list"], qa_entities, entity_flags):
+                    if not success:
+                        continue
+                    relations.append(Relation(
+                        id=f"{doc_id}_to_{qa_entity.id}",
+                        source_id=doc_id,
+                        target_id=qa_entity.id,
+                        type="CONTAINS_QA",
+                        properties={
+                            "qa_number": qa["number"],
+                            "qa_index": qa["number"]
+                        },
+                        weight=1.0,
                         created_at=None
-                    )
-                    
-                    if await graph_store.add_entity(qa_entity):
-                        qa_count += 1
-                        
-                        # 建立文件到問答的關係
-                        relation = Relation(
-                            id=f"{doc_id}_to_{qa_id}",
-                            source_id=doc_id,
-                            target_id=qa_id,
-                            type="CONTAINS_QA",
-                            properties={
-                                "qa_number": qa["number"],
-                                "qa_index": qa["number"]
-                            },
-                            weight=1.0,
-                            created_at=None
-                        )
-                        await graph_store.add_relation(relation)
+                    ))
+                await graph_store.add_relations_bulk(relations)
+                qa_count = len(relations)
                 
                 print(f"  [OK] 建立 {qa_count} 個問答實體和關係")
                 success_count += 1
@@ -0,0 +1,85 @@
+"""
+為既有 graph.db / graph_qa.db 建立 FTS5 trigram 全文索引（entities_fts）
+
+更新時間：2026-10-17 21:00
+作者：AI Assistant
+修改摘要：初始化時一併完成 entities.document_id 欄位升級與回填，輸出含 document_id 的實體數
+
+更新時間：2026-10-17 13:20
+作者：AI Assistant
+修改摘要：建立遷移腳本；開啟資料庫時由 SQLiteGraphStore 建立 entities_fts 與同步觸發器並 rebuild，
+          可選 --rebuild 強制重建，最後以 FTS5 integrity-check 驗證索引與 entities 一致
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.core.graph_store import SQLiteGraphStore
+
+DEFAULT_DB_PATHS = [settings.GRAPH_DB_PATH, "./data/graph_qa.db"]
+
+
+async def migrate(db_path: str, force_rebuild: bool) -> bool:
+    """對單一資料庫建立 / 重建 FTS 索引並驗證，成功回傳 True。"""
+    if not Path(db_path).exists():
+        print(f"[WARN] 略過不存在的資料庫: {db_path}")
+        return True
+
+    print(f"[步驟] {db_path}")
+    start = time.perf_counter()
+    store = SQLiteGraphStore(db_path)
+    try:
+        await store.initialize()
+        if not store._fts_enabled:
+            print("  [X] 此 SQLite 不支援 FTS5 trigram（需 SQLite >= 3.34），search_entities 將維持 LIKE 查詢")
+            return False
+        if force_rebuild:
+            await store.rebuild_fts_index()
+            print("  [OK] 已強制 rebuild")
+
+        async with store.conn.cursor() as cursor:
+            await cursor.execute("SELECT COUNT(*) FROM entities")
+            total = (await cursor.fetchone())[0]
+            await cursor.execute("INSERT INTO entities_fts(entities_fts, rank) VALUES ('integrity-check', 1)")
+            await cursor.execute("SELECT COUNT(*) FROM entities WHERE document_id IS NOT NULL")
+            with_document = (await cursor.fetchone())[0]
+        print(f"  [OK] 索引一致，實體數 {total}，含 document_id {with_document}（{time.perf_counter() - start:.2f}s）")
+        return True
+    except Exception as e:
+        print(f"  [X] 遷移失敗: {e}")
+        return False
+    finally:
+        await store.close()
+
+
+async def main_async(db_paths, force_rebuild: bool) -> int:
+    failures = 0
+    for db_path in db_paths:
+        if not await migrate(db_path, force_rebuild):
+            failures += 1
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="為既有圖資料庫建立 FTS5 trigram 索引")
+    parser.add_argument(
+        "--db-path",
+        action="append",
+        help=f"資料庫路徑，可重複指定（預設: {', '.join(DEFAULT_DB_PATHS)}）",
+    )
+    parser.add_argument("--rebuild", action="store_true", help="索引已存在時仍強制重建")
+    args = parser.parse_args()
+
+    failures = asyncio.run(main_async(args.db_path or DEFAULT_DB_PATHS, args.rebuild))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+將既有 graph.db / graph_qa.db 就地轉換為精簡結構 v2（整數鍵、epoch 時間戳、關係類型代碼、常用欄位提升）
+
+更新時間：2026-10-18 01:10
+作者：AI Assistant
+修改摘要：建立遷移腳本；預設先以 SQLite backup API 備份為 *.v1.bak，逐批轉換並顯示進度，
+          完成後 VACUUM 並輸出轉換前後檔案大小
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.core.graph_store import SCHEMA_V2, SQLiteGraphStore
+
+DEFAULT_DB_PATHS = [settings.GRAPH_DB_PATH, "./data/graph_qa.db"]
+
+
+def db_size(db_path: str) -> int:
+    """資料庫檔案大小（含 -wal）"""
+    return sum(
+        Path(path).stat().st_size
+        for path in (db_path, db_path + "-wal")
+        if Path(path).exists()
+    )
+
+
+def report_progress(stage: str, done: int, total: int) -> None:
+    percent = done / total * 100 if total else 100.0
+    print(f"\r  {stage:<10} {done:>10,} / {total:,}（{percent:5.1f}%）", end="", flush=True)
+    if done >= total:
+        print()
+
+
+async def migrate(db_path: str, batch_size: int, backup: bool, vacuum: bool) -> bool:
+    """轉換單一資料庫，成功（或已是 v2）回傳 True"""
+    if not Path(db_path).exists():
+        print(f"[WARN] 略過不存在的資料庫: {db_path}")
+        return True
+
+    print(f"[步驟] {db_path}")
+    size_before = db_size(db_path)
+    start = time.perf_counter()
+    store = SQLiteGraphStore(db_path)
+    try:
+        await store.initialize()
+        if store.schema_version == SCHEMA_V2:
+            print("  [OK] 已是 v2，略過")
+            return True
+        if backup:
+            backup_path = db_path + ".v1.bak"
+            with sqlite3.connect(db_path) as source, sqlite3.connect(backup_path) as target:
+                source.backup(target)
+            print(f"  [OK] 已備份至 {backup_path}")
+        counts = await store.migrate_to_schema_v2(batch_size, report_progress)
+        if counts["skipped_relations"]:
+            print(f"  [WARN] 略過 {counts['skipped_relations']:,} 筆端點實體已不存在的關係")
+    except Exception as e:
+        print(f"\n  [X] 遷移失敗（已回滾）: {e}")
+        return False
+    finally:
+        await store.close()
+
+    if vacuum:
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size_after = db_size(db_path)
+    print(
+        f"  [OK] 完成（{time.perf_counter() - start:.2f}s）：{counts['entities']:,} 實體、{counts['relations']:,} 關係，"
+        f"{size_before / 1024 / 1024:.2f} MiB -> {size_after / 1024 / 1024:.2f} MiB"
+        f"（{(1 - size_after / size_before) * 100 if size_before else 0:.1f}% 減少）"
+    )
+    return True
+
+
+async def main_async(db_paths, batch_size: int, backup: bool, vacuum: bool) -> bool:
+    ok = True
+    for db_path in db_paths:
+        ok = await migrate(db_path, batch_size, backup, vacuum) and ok
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="將圖資料庫就地轉換為結構 v2")
+    parser.add_argument("--db", action="append", help="資料庫路徑，可重複指定（預設: graph.db 與 graph_qa.db）")
+    parser.add_argument("--batch", type=int, default=5000, help="每批轉換筆數（預設: 5000）")
+    parser.add_argument("--no-backup", action="store_true", help="不建立 *.v1.bak 備份")
+    parser.add_argument("--no-vacuum", action="store_true", help="轉換後不執行 VACUUM（檔案大小不會縮小）")
+    args = parser.parse_args()
+    ok = asyncio.run(main_async(args.db or DEFAULT_DB_PATHS, args.batch, not args.no_backup, not args.no_vacuum))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
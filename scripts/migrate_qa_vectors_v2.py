@@ -0,0 +1,86 @@
+"""
+將既有 qa_vectors.db 就地轉換為儲存格式 v2（embedding 由 JSON 文字改為 little-endian float32 BLOB，新增 dim / model 欄位）
+
+更新時間：2026-10-18 11:40
+作者：AI Assistant
+修改摘要：建立遷移腳本；預設先以 SQLite backup API 備份為 *.v1.bak，逐批轉換並顯示進度，
+          完成後 VACUUM 並輸出轉換前後檔案大小
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# 專案根目錄
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.qa_embedding_index import STORAGE_BLOB, QAEmbeddingIndex
+
+DEFAULT_DB_PATH = "./data/qa_vectors.db"
+
+
+def report_progress(done: int, total: int) -> None:
+    percent = done / total * 100 if total else 100.0
+    print(f"\r  轉換 {done:>10,} / {total:,}（{percent:5.1f}%）", end="", flush=True)
+    if done >= total:
+        print()
+
+
+def migrate(db_path: str, batch_size: int, model: str, backup: bool, vacuum: bool) -> bool:
+    """轉換單一資料庫，成功（或已是 v2）回傳 True"""
+    if not Path(db_path).exists():
+        print(f"[WARN] 略過不存在的資料庫: {db_path}")
+        return True
+
+    print(f"[步驟] {db_path}")
+    size_before = Path(db_path).stat().st_size
+    start = time.perf_counter()
+    index = QAEmbeddingIndex(db_path, readonly=False)
+    try:
+        if index.storage_version == STORAGE_BLOB:
+            print("  [OK] 已是 v2，略過")
+            return True
+        if backup:
+            backup_path = db_path + ".v1.bak"
+            with sqlite3.connect(db_path) as source, sqlite3.connect(backup_path) as target:
+                source.backup(target)
+            print(f"  [OK] 已備份至 {backup_path}")
+        counts = index.migrate_to_blob_storage(batch_size, model or None, report_progress)
+        if counts["skipped"]:
+            print(f"  [WARN] 略過 {counts['skipped']:,} 筆無法解析的 embedding")
+    except Exception as e:
+        print(f"\n  [X] 遷移失敗（已回滾）: {e}")
+        return False
+    finally:
+        index.close()
+
+    if vacuum:
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("VACUUM")
+    size_after = Path(db_path).stat().st_size
+    print(
+        f"  [OK] 完成（{time.perf_counter() - start:.2f}s）：{counts['rows']:,} 筆向量，"
+        f"{size_before / 1024 / 1024:.2f} MiB -> {size_after / 1024 / 1024:.2f} MiB"
+        f"（{(1 - size_after / size_before) * 100 if size_before else 0:.1f}% 減少）"
+    )
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="將 QA 向量資料庫就地轉換為 float32 BLOB 格式")
+    parser.add_argument("--db", action="append", help=f"資料庫路徑，可重複指定（預設: {DEFAULT_DB_PATH}）")
+    parser.add_argument("--batch", type=int, default=5000, help="每批轉換筆數（預設: 5000）")
+    parser.add_argument("--model", default="", help="寫入 model 欄位的 embedding 模型名稱（v1 未記錄，預設留空）")
+    parser.add_argument("--no-backup", action="store_true", help="不建立 *.v1.bak 備份")
+    parser.add_argument("--no-vacuum", action="store_true", help="轉換後不執行 VACUUM（檔案大小不會縮小）")
+    args = parser.parse_args()
+    ok = True
+    for db_path in args.db or [DEFAULT_DB_PATH]:
+        ok = migrate(db_path, args.batch, args.model, not args.no_backup, not args.no_vacuum) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
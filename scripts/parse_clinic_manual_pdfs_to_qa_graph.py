@@ -2,6 +2,9 @@
 解析衛生所操作手冊 PDF 並建立問答知識圖譜
 從 PDF 文件提取問答對和知識點，建立專門的 graph_qa.db 圖資料庫
 
+更新時間：2026-10-17 21:00
+作者：AI Assistant
+修改摘要：QA / KnowledgePoint 實體寫入 document_id，供 get_entities_by_document 索引查詢
 更新時間：2025-12-30 09:34
 作者：AI Assistant
 修改摘要：優化 LLM 實體和關係提取：1) Token 限制從 1000 增加到 3000；2) 文字處理長度從 5000 增加到 20000 字元；3) 擴展實體類型列表（17 種類型）；4) 關係提取也使用優化文字長度
@@ -413,7 +416,8 @@ async def process_pdf_to_qa_graph(
                     "source": qa.get("source", "unknown"),
                     "qa_index": i + 1
                 },
-                created_at=None
+                created_at=None,
+                document_id=document_id
             )
             
             if await graph_store.add_entity(qa_entity):
@@ -448,7 +452,8 @@ async def process_pdf_to_qa_graph(
                     "keywords": kp.get("keywords", []),
                     "type": kp.get("type", "general")
                 },
-                created_at=None
+                created_at=None,
+                document_id=document_id
             )
             
             if await graph_store.add_entity(kp_entity):
@@ -2,6 +2,9 @@
 解析掛號QA Markdown 檔案並建立問答知識圖譜
 從 Markdown 文件提取結構化問答對，建立專門的 graph_qa.db 圖資料庫
 
+更新時間：2026-10-17 21:00
+作者：AI Assistant
+修改摘要：QA 實體寫入 document_id，供 get_entities_by_document 索引查詢
 更新時間：2026-01-13 15:20
 作者：AI Assistant
 修改摘要：更新標頭註解日期
@@ -247,7 +250,8 @@ async def process_qa_markdown_to_graph(
                     "metadata": qa["metadata"],
                     "source": "qa_markdown"
                 },
-                created_at=None
+                created_at=None,
+                document_id=document_id
             )
             
             if await graph_store.add_entity(qa_entity):
@@ -2,6 +2,14 @@
 從 Thisqa 來源檔（.md / .txt）建圖並寫入 graph.db、向量庫
 供主線 GraphRAG（/api/v1/query）使用；與 graph_qa.db / QA 搜尋端點獨立。
 
+更新時間：2026-10-18 11:40
+作者：AI Assistant
+修改摘要：--reset 改為刪除 qa_vectors 資料表（重建時以 float32 BLOB 格式建立）；upsert 記錄 embedding 模型名稱
+
+更新時間：2026-10-17 09:40
+作者：AI Assistant
+修改摘要：QA / QA1 實體改為收集後以 add_entities_bulk 批次寫入，每檔僅一次交易
+
 更新時間：2026-03-11 10:05
 作者：AI Assistant
 修改摘要：[Fix 4] extract_ic_field_qa_from_txt keywords 補齊 [code] 格式與「資料」關鍵字，改善 [D12] 等欄位代碼查詢命中率
@@ -332,11 +340,12 @@ def chunk_text(path: Path, text: str) -> List[str]:
 
 
 def _reset_qa_vectors_db(db_path: Path) -> None:
-    """清空 qa_vectors.db，確保 --reset 時向量庫與 graph.db 同步乾淨。"""
+    """清空 qa_vectors.db，確保 --reset 時向量庫與 graph.db 同步乾淨。
+    刪除資料表而非清空：舊的 JSON 格式資料庫重建後即為 float32 BLOB 格式。"""
     import sqlite3
     if db_path.exists():
         conn = sqlite3.connect(str(db_path))
-        conn.execute("DELETE FROM qa_vectors")
+        conn.execute("DROP TABLE IF EXISTS qa_vectors")
         conn.commit()
         conn.close()
         print(f"[OK] qa_vectors.db 已清空: {db_path}")
@@ -428,6 +437,7 @@ async def process_thisqa_to_graph(
 
             # 先從 markdown / IC txt 解析 QA 區塊，建立 QA / QA1 Entity 並寫入 QA 向量索引
             qa_blocks: List[dict] = []
+            qa_entities: List[Entity] = []
             qa_ids: List[str] = []
             qa_texts: List[str] = []
             qa_metas: List[dict] = []
@@ -453,7 +463,7 @@ async def process_thisqa_to_graph(
                             properties=properties,
                             created_at=None,
                         )
-                        await graph_store.add_entity(qa_entity)
+                        qa_entities.append(qa_entity)
 
                         # 準備 embedding 用文字與 metadata
                         text_for_emb = (
@@ -502,7 +512,7 @@ async def process_thisqa_to_graph(
                         properties=properties,
                         created_at=None,
                     )
-                    await graph_store.add_entity(qa_entity)
+                    qa_entities.append(qa_entity)
 
                     text_for_emb = (
                         (properties["question"] or "")
@@ -541,7 +551,7 @@ async def process_thisqa_to_graph(
                         properties=properties,
                         created_at=None,
                     )
-                    await graph_store.add_entity(qa_entity)
+                    qa_entities.append(qa_entity)
 
                     text_for_emb = (
                         (properties["question"] or "")
@@ -559,6 +569,13 @@ async def process_thisqa_to_graph(
                         }
                     )
 
+            # QA / QA1 實體批次寫入 graph.db（單一交易，避免逐筆 commit）
+            if qa_entities:
+                flags = await graph_store.add_entities_bulk(qa_entities)
+                failed = flags.count(False)
+                if failed:
+                    print(f"  [WARN] QA 實體寫入失敗 {failed}/{len(qa_entities)} 筆")
+
             # 批次計算 QA / QA1 embedding 並寫入 qa_vectors 索引（不論來源於 .md 或 IC .txt）
             if qa_blocks and qa_texts:
                 try:
@@ -566,14 +583,16 @@ async def process_thisqa_to_graph(
                 except Exception as e:
                     print(f"  [WARN] QA embedding 計算失敗，降級為 Stub 向量: {e}")
                     embeddings = []
+                emb_model = getattr(embedding_service, "model_name", None)
                 if not embeddings or len(embeddings) != len(qa_ids):
                     print("  [WARN] Gemini 未回傳或長度不符，改用 Stub 向量寫入 QA 索引")
                     stub = StubEmbeddingService(dim=getattr(settings, "VECTOR_DIMENSION", 768))
                     embeddings = await stub.embed(qa_texts)
+                    emb_model = "stub"
                 if embeddings and len(embeddings) == len(qa_ids):
                     for eid, text_for_emb, emb, meta in zip(qa_ids, qa_texts, embeddings, qa_metas):
                         try:
-                            qa_index.upsert(eid, text_for_emb, emb, meta)
+                            qa_index.upsert(eid, text_for_emb, emb, meta, model=emb_model)
                         except Exception as e:
                             print(f"  [WARN] QA 向量索引寫入失敗 (entity_id={eid}): {e}")
 
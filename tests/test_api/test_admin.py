@@ -0,0 +1,33 @@
+"""
+管理 API /cache/clear 測試
+更新時間：2026-10-18 18:00
+作者：AI Assistant
+修改摘要：驗證聯邦 / 熱層包裝內的實體 LRU 快取也會被清除，且計入 keys_cleared
+"""
+import json
+
+import pytest
+
+import app.api.v1.endpoints.admin as admin
+from app.core.graph_cache import CachedGraphStore
+from app.core.graph_federated import FederatedGraphStore
+from app.core.graph_hot_tier import HotTierGraphStore
+from app.core.graph_store import Entity, MemoryGraphStore
+from app.services.cache_service import CacheService
+
+
+@pytest.mark.asyncio
+async def test_cache_clear_reaches_wrapped_entity_cache(monkeypatch):
+    cached = CachedGraphStore(MemoryGraphStore(), max_entries=10, max_bytes=1 << 20)
+    store = FederatedGraphStore({"main": HotTierGraphStore(cached), "qa": MemoryGraphStore()}, default_shard="main")
+    await store.initialize()
+    await store.add_entity(Entity(id="e1", type="QA", name="批價問題", properties={}))
+    assert await cached.get_entity("e1")
+    monkeypatch.setattr(admin, "get_graph_store", lambda: store)
+
+    cache_service = CacheService()
+    cache_service.store["query:1"] = "cached"
+    response = await admin.clear_cache(None, cache_service, True)
+    assert json.loads(response.body)["keys_cleared"] == 2
+    assert cached.cache_stats()["entries"] == 0
+    await store.close()
@@ -1,5 +1,8 @@
 """
 單例 TOCTOU 修復驗證：多執行緒同時首次呼叫 get_* 時僅建立一個實例。
+更新時間：2026-10-18 18:40
+作者：AI Assistant
+修改摘要：驗證常駐 QA GraphStore 不經快取 / 記憶體讀取層，程序外匯入後立即可讀
 更新時間：2026-03-11
 """
 import threading
@@ -28,3 +31,32 @@ def test_singleton_llm_service_under_concurrent_first_calls():
     assert len(results) == n
     ids = {id(r) for r in results}
     assert len(ids) == 1, "expected single LLMService instance under concurrent first calls"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("setting", ["GRAPH_ENTITY_CACHE_ENABLED", "GRAPH_HOT_TIER_ENABLED"])
+async def test_shared_qa_store_sees_out_of_process_imports(tmp_path, monkeypatch, setting):
+    """腳本於程序外寫入 graph_qa.db 後，常駐的 QA GraphStore 立即讀到新資料（不經快取 / 記憶體讀取層）"""
+    from app.config import settings
+    from app.core.graph_store import Entity, SQLiteGraphStore
+
+    db_path = str(tmp_path / "graph_qa.db")
+    monkeypatch.setattr(settings, "GRAPH_QA_DB_PATH", db_path)
+    monkeypatch.setattr(settings, "GRAPH_FEDERATION_ENABLED", False)
+    monkeypatch.setattr(settings, setting, True)
+    await deps.close_shared_qa_graph_store()
+
+    importer = SQLiteGraphStore(db_path)
+    await importer.initialize()
+    await importer.add_entity(Entity(id="faq", type="Document", name="faq.md", properties={"qa_count": 1}))
+    try:
+        store = await deps.get_shared_qa_graph_store()
+        assert (await store.get_entity("faq")).properties == {"qa_count": 1}
+        # 重新匯入與新增文件
+        await importer.add_entity(Entity(id="faq", type="Document", name="faq.md", properties={"qa_count": 2}))
+        await importer.add_entity(Entity(id="billing", type="Document", name="billing.md", properties={}))
+        assert (await store.get_entity("faq")).properties == {"qa_count": 2}
+        assert [e.id for e in await store.get_entities_by_type("Document")] == ["faq", "billing"]
+    finally:
+        await deps.close_shared_qa_graph_store()
+        await importer.close()
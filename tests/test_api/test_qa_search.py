@@ -0,0 +1,51 @@
+"""
+QA 關鍵字搜尋（_perform_qa_search）測試
+更新時間：2026-10-18 16:40
+作者：AI Assistant
+修改摘要：驗證未指定 doc_id 時依匯入順序串流，回傳的 QA 與順序與原本 get_entities_by_type("QA", limit=10000) 後逐筆比對相同
+"""
+import pytest
+
+from app.api.v1.endpoints.qa import _perform_qa_search
+from app.api.v1.schemas.qa import QASearchRequest
+from app.core.graph_hot_tier import HotTierGraphStore
+from app.core.graph_store import Entity, SQLiteGraphStore
+
+# 匯入順序刻意與 id 字串排序不同
+_QA_IDS = ["zeta_qa_1", "alpha_qa_9", "mid_qa_10", "alpha_qa_2", "zeta_qa_0", "beta_qa_5", "mid_qa_1"]
+
+
+def _qa(entity_id: str, question: str) -> Entity:
+    return Entity(id=entity_id, type="QA", name=question, properties={"question": question, "answer": "答案"})
+
+
+async def _baseline_ids(store, query: str, limit: int):
+    """原本的實作：一次取出 QA 實體（依寫入順序）後逐筆比對"""
+    matched = []
+    for qa in await store.get_entities_by_type("QA", limit=10000):
+        if query.lower() in qa.properties["question"].lower():
+            matched.append(qa.id)
+    return matched[:limit]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("hot_tier", [False, True])
+async def test_search_without_doc_id_keeps_import_order(tmp_path, hot_tier):
+    store = SQLiteGraphStore(str(tmp_path / "graph_qa.db"))
+    if hot_tier:
+        store = HotTierGraphStore(store)
+    await store.initialize()
+    try:
+        for i, entity_id in enumerate(_QA_IDS):
+            # 奇數筆不含關鍵字
+            await store.add_entity(_qa(entity_id, f"批價作業問題 {i}" if i % 2 == 0 else f"掛號問題 {i}"))
+        # 更新既有 QA（改為含關鍵字）不改變其匯入位置
+        await store.add_entity(_qa("alpha_qa_9", "批價作業問題 更新"))
+
+        for limit in (2, 3, 10):
+            results = await _perform_qa_search(QASearchRequest(query="批價", limit=limit), store)
+            assert [r.id for r in results] == await _baseline_ids(store, "批價", limit)
+        results = await _perform_qa_search(QASearchRequest(query="批價", limit=10), store)
+        assert [r.id for r in results] == ["zeta_qa_1", "alpha_qa_9", "mid_qa_10", "zeta_qa_0", "mid_qa_1"]
+    finally:
+        await store.close()
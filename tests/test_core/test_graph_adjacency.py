@@ -0,0 +1,100 @@
+"""
+AdjacencySnapshot（CSR 鄰接快照）測試
+更新時間：2026-10-18 02:20
+作者：AI Assistant
+修改摘要：快照與 SQL 一致性比對加入 get_relations_by_entities
+更新時間：2026-10-17 17:30
+作者：AI Assistant
+修改摘要：驗證快照走訪結果與 SQL 實作一致，以及寫入後版本失效、背景重建
+"""
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from app.core.graph_adjacency import AdjacencySnapshot
+from app.core.graph_store import Entity, Relation, SQLiteGraphStore
+
+
+def _entity(i: int) -> Entity:
+    return Entity(id=f"e{i}", type="Concept", name=f"實體{i}", properties={"n": i})
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path):
+    s = SQLiteGraphStore(str(tmp_path / "graph.db"))
+    await s.initialize()
+    await s.add_entities_bulk([_entity(i) for i in range(6)])
+    await s.add_relations_bulk([
+        Relation(id="r01", source_id="e0", target_id="e1", type="NEXT", properties={}),
+        Relation(id="r12", source_id="e1", target_id="e2", type="NEXT", properties={}),
+        Relation(id="r23", source_id="e2", target_id="e3", type="NEXT", properties={}),
+        Relation(id="r10", source_id="e1", target_id="e0", type="BACK", properties={}),
+        Relation(id="r02", source_id="e0", target_id="e2", type="SKIP", properties={"w": 1}),
+        Relation(id="r40", source_id="e4", target_id="e0", type="SEE", properties={}),
+    ])
+    yield s
+    await s.close()
+
+
+async def _answers(store):
+    return {
+        "neighbors": [
+            [e.id for e in await store.get_neighbors(f"e{i}", relation_type=t, direction=d)]
+            for i in range(6) for t in (None, "NEXT") for d in ("both", "outgoing", "incoming")
+        ],
+        "relations": [
+            sorted(r.id for r in await store.get_relations_by_entity(f"e{i}", d))
+            for i in range(6) for d in ("both", "outgoing", "incoming")
+        ],
+        "relations_many": [
+            sorted(await store.get_relations_by_entities(["e0", "e1", "e4"], d))
+            for d in ("both", "outgoing", "incoming")
+        ],
+        "paths": [await store.get_path("e0", "e3", h) for h in (1, 2, 3)],
+        "subgraph": [
+            (sorted(e["id"] for e in sub["entities"]), sorted(r["id"] for r in sub["relations"]))
+            for sub in [await store.get_subgraph(["e0", "e5"], d) for d in (0, 1, 2)]
+        ],
+    }
+
+
+@pytest.mark.asyncio
+async def test_snapshot_answers_match_sql(store):
+    expected = await _answers(store)
+    snapshot = await store.rebuild_adjacency_snapshot()
+    assert snapshot.num_edges == 6
+    assert store._current_adjacency() is snapshot
+    assert await _answers(store) == expected
+
+
+@pytest.mark.asyncio
+async def test_write_invalidates_and_rebuilds_snapshot(store):
+    await store.rebuild_adjacency_snapshot()
+    await store.add_relation(Relation(id="r35", source_id="e3", target_id="e5", type="NEXT", properties={}))
+    # 版本已變更：本次查詢退回 SQL，仍看得到新關係
+    assert store._current_adjacency() is None
+    assert [e.id for e in await store.get_neighbors("e5")] == ["e3"]
+
+    await store._adjacency_task
+    assert store._current_adjacency() is not None
+    assert [e.id for e in await store.get_neighbors("e5")] == ["e3"]
+
+    await store.delete_entity("e3")
+    await asyncio.wait_for(store._adjacency_task, timeout=5)
+    assert await store.get_neighbors("e5") == []
+
+
+def test_build_csr_layout_and_memory_usage():
+    snapshot = AdjacencySnapshot.build([
+        (1, "a", "b", "T"),
+        (2, "a", "c", "U"),
+        (3, "c", "a", "T"),
+    ])
+    assert snapshot.neighbor_ids("a") == ["b", "c"]
+    assert snapshot.neighbor_ids("a", relation_type="T") == ["b", "c"]
+    assert snapshot.neighbor_ids("a", relation_type="missing") == []
+    assert snapshot.relation_rowids("a", "incoming") == [3]
+    assert list(snapshot.out_offsets) == [0, 2, 2, 3]
+    usage = snapshot.memory_usage()
+    assert usage["edges"] == 3 and usage["bytes_per_edge"] > 0
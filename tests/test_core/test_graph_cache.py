@@ -0,0 +1,143 @@
+"""
+CachedGraphStore（GraphStore 實體 LRU 快取）測試
+更新時間：2026-10-18 19:40
+作者：AI Assistant
+修改摘要：驗證實體快取預設關閉（程序外寫入不會被快取遮蔽）
+更新時間：2026-10-18 18:00
+作者：AI Assistant
+修改摘要：驗證 clear_cache 經 FederatedGraphStore / HotTierGraphStore 包裝層委派，清除內層的實體快取
+更新時間：2026-10-18 16:20
+作者：AI Assistant
+修改摘要：驗證由 SQLiteGraphStore 回填快取時不解碼 properties，且大小估計與解碼後相近
+更新時間：2026-10-17 18:40
+作者：AI Assistant
+修改摘要：驗證命中 / 未命中統計、寫入失效與項目數 / 位元組上限淘汰
+"""
+import pytest
+
+from app.config import Settings
+from app.core.graph_cache import CachedGraphStore
+from app.core.graph_federated import FederatedGraphStore
+from app.core.graph_hot_tier import HotTierGraphStore
+from app.core.graph_store import Entity, MemoryGraphStore, SQLiteGraphStore
+
+
+def _entity(i: int, text: str = "") -> Entity:
+    return Entity(id=f"e{i}", type="QA", name=f"問題{i}", properties={"answer": text})
+
+
+class CountingStore(MemoryGraphStore):
+    """記錄 get_entity 被呼叫次數的 MemoryGraphStore"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def get_entity(self, entity_id):
+        self.calls += 1
+        return await super().get_entity(entity_id)
+
+
+@pytest.mark.asyncio
+async def test_get_entity_hits_cache_and_invalidates_on_write():
+    inner = CountingStore()
+    store = CachedGraphStore(inner, max_entries=10, max_bytes=1 << 20)
+    await store.initialize()
+    await store.add_entity(_entity(1, "舊答案"))
+
+    assert (await store.get_entity("e1")).properties["answer"] == "舊答案"
+    assert (await store.get_entity("e1")).properties["answer"] == "舊答案"
+    assert inner.calls == 1
+    assert store.cache_stats()["hits"] == 1
+
+    await store.add_entity(_entity(1, "新答案"))
+    assert (await store.get_entity("e1")).properties["answer"] == "新答案"
+    assert inner.calls == 2
+
+    await store.delete_entity("e1")
+    assert await store.get_entity("e1") is None
+
+
+@pytest.mark.asyncio
+async def test_get_entities_many_fills_cache_and_bulk_write_invalidates():
+    inner = MemoryGraphStore()
+    store = CachedGraphStore(inner, max_entries=10, max_bytes=1 << 20)
+    await store.add_entities_bulk([_entity(i) for i in range(3)])
+
+    assert set(await store.get_entities_many(["e0", "e1", "missing"])) == {"e0", "e1"}
+    stats = store.cache_stats()
+    assert (stats["entries"], stats["misses"]) == (2, 3)
+    assert set(await store.get_entities_many(["e0", "e1", "e2"])) == {"e0", "e1", "e2"}
+    assert store.cache_stats()["hits"] == 2
+
+    await store.add_entities_bulk([_entity(0, "更新")])
+    assert store.cache_stats()["entries"] == 2
+    assert (await store.get_entity("e0")).properties["answer"] == "更新"
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_by_entries_and_bytes():
+    inner = MemoryGraphStore()
+    store = CachedGraphStore(inner, max_entries=2, max_bytes=1 << 20)
+    await store.add_entities_bulk([_entity(i) for i in range(3)])
+    for i in (0, 1, 0, 2):
+        await store.get_entity(f"e{i}")
+    # e1 最久未使用，被淘汰
+    assert list(store._entries) == ["e0", "e2"]
+
+    small = CachedGraphStore(inner, max_entries=100, max_bytes=2000)
+    await small.add_entity(_entity(9, "長" * 1500))
+    await small.get_entity("e9")
+    await small.get_entity("e0")
+    assert list(small._entries) == ["e0"]
+    assert small.cache_stats()["bytes"] <= 2000
+
+
+@pytest.mark.asyncio
+async def test_cache_fill_keeps_properties_undecoded(tmp_path):
+    inner = SQLiteGraphStore(str(tmp_path / "graph.db"))
+    await inner.initialize()
+    store = CachedGraphStore(inner, max_entries=10, max_bytes=1 << 20)
+    try:
+        await store.add_entities_bulk([_entity(i, "答案" * 200) for i in range(3)])
+        single = await store.get_entity("e0")
+        many = await store.get_entities_many(["e1", "e2"])
+        for entity in (single, *many.values()):
+            assert entity._raw_properties is not None  # 回填快取未觸發解碼
+        raw_bytes = store.cache_stats()["bytes"]
+        assert (await store.get_entity("e0")) is single
+
+        # 以原始 JSON 估計的大小與解碼後的估計相近
+        raw_size = single.properties_size()
+        assert single.properties["answer"] == "答案" * 200
+        assert abs(single.properties_size() - raw_size) <= 32
+        assert raw_bytes >= 3 * 400
+    finally:
+        await inner.close()
+
+
+@pytest.mark.asyncio
+async def test_clear_cache_delegates_through_wrappers():
+    main_cache = CachedGraphStore(MemoryGraphStore(), max_entries=10, max_bytes=1 << 20)
+    qa_cache = CachedGraphStore(MemoryGraphStore(), max_entries=10, max_bytes=1 << 20)
+    store = FederatedGraphStore(
+        {"main": HotTierGraphStore(main_cache), "qa": qa_cache, "archive": MemoryGraphStore()},
+        default_shard="main",
+        prefix_routes={"q": "qa"},
+    )
+    await store.initialize()
+    await store.add_entities_bulk([_entity(1), _entity(2), Entity(id="q1", type="QA", name="問題", properties={})])
+    for entity_id in ("e1", "e2"):
+        assert await main_cache.get_entity(entity_id)
+    assert await qa_cache.get_entity("q1")
+    assert main_cache.cache_stats()["entries"] == 2 and qa_cache.cache_stats()["entries"] == 1
+
+    assert store.clear_cache() == 3
+    assert main_cache.cache_stats()["entries"] == 0 and qa_cache.cache_stats()["entries"] == 0
+    assert store.clear_cache() == 0
+    await store.close()
+
+
+def test_entity_cache_is_opt_in():
+    # 快取只在經由包裝層的寫入時失效，預設不啟用，程序外寫入 graph.db 後立即可讀
+    assert Settings.model_fields["GRAPH_ENTITY_CACHE_ENABLED"].default is False
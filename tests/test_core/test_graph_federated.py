@@ -0,0 +1,247 @@
+"""
+FederatedGraphStore（聯邦 GraphStore）測試
+更新時間：2026-10-18 18:20
+作者：AI Assistant
+修改摘要：新增匯入腳本完整流程測試（Document + QA + CONTAINS_QA）：Document 與其 QA 寫入同一 shard，關係寫入成功
+更新時間：2026-10-18 17:40
+作者：AI Assistant
+修改摘要：新增類型路由測試：匯入腳本以檔名產生 id 的 QA 實體寫入 qa shard，且路由不解碼延遲載入的 properties
+更新時間：2026-10-18 07:00
+作者：AI Assistant
+修改摘要：驗證寫入依 id 前綴 / document_id / 來源實體所在 shard 路由、讀取並行查詢後合併（依 id 排序串流、統計相加、
+          搜尋重排）、get_entities_by_document 跨 shard 續頁，以及與單一 SQLiteGraphStore 結果一致
+"""
+import pytest
+import pytest_asyncio
+
+from app.core.graph_federated import FederatedGraphStore
+from app.core.graph_store import Entity, MemoryGraphStore, Relation, SQLiteGraphStore
+
+
+def _entity(entity_id: str, name: str, entity_type: str = "QA", document_id: str = None) -> Entity:
+    properties = {"document_id": document_id} if document_id else {}
+    return Entity(id=entity_id, type=entity_type, name=name, properties=properties)
+
+
+def _relation(source_id: str, target_id: str) -> Relation:
+    return Relation(id=f"{source_id}->{target_id}", source_id=source_id, target_id=target_id, type="CONTAINS", properties={})
+
+
+@pytest_asyncio.fixture
+async def federated(tmp_path):
+    store = FederatedGraphStore(
+        {
+            "main": SQLiteGraphStore(str(tmp_path / "graph.db")),
+            "qa": SQLiteGraphStore(str(tmp_path / "graph_qa.db")),
+            "archive": MemoryGraphStore(),
+        },
+        default_shard="main",
+        prefix_routes={"qa_doc_": "qa", "qa_doc_old_": "archive"},
+        document_routes={"manual_2019": "archive"},
+    )
+    assert await store.initialize()
+    yield store
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_writes_route_by_prefix_document_and_source_entity(federated):
+    main, qa, archive = (federated.shards[name] for name in ("main", "qa", "archive"))
+    flags = await federated.add_entities_bulk([
+        _entity("doc_1", "操作手冊", "Document"),
+        _entity("qa_doc_1", "QA 文件", "Document"),
+        _entity("qa_doc_1_qa_1", "批價問題", document_id="qa_doc_1"),
+        _entity("qa_doc_old_1", "舊版文件", "Document"),
+        _entity("e_2019", "掛號問題", document_id="manual_2019"),
+        _entity("e_main", "掛號流程", document_id="doc_1"),
+    ])
+    assert flags == [True] * 6
+    assert await main.get_entity("doc_1") and await main.get_entity("e_main")
+    assert await qa.get_entity("qa_doc_1_qa_1") and await main.get_entity("qa_doc_1_qa_1") is None
+    # 最長前綴優先、document_id 路由優先於前綴
+    assert await archive.get_entity("qa_doc_old_1") and await archive.get_entity("e_2019")
+
+    # 來源 id 無前綴命中時寫入來源實體所在的 shard（此處為依 document_id 路由的 archive）
+    relation_flags = await federated.add_relations_bulk([
+        _relation("qa_doc_1", "qa_doc_1_qa_1"),
+        _relation("e_2019", "qa_doc_old_1"),
+        _relation("doc_1", "e_main"),
+        _relation("doc_1", "qa_doc_1"),  # 跨 shard：端點不在同一 shard，寫入失敗
+    ])
+    assert relation_flags == [True, True, True, False]
+    assert [r.id for r in await archive.get_relations_by_entity("e_2019")] == ["e_2019->qa_doc_old_1"]
+
+    assert {e.id for e in await federated.get_neighbors("qa_doc_1")} == {"qa_doc_1_qa_1"}
+    assert await federated.delete_entity("e_2019") is True
+    assert await federated.get_entity("e_2019") is None
+    assert await federated.get_relation("e_2019->qa_doc_old_1") is None
+
+
+@pytest.mark.asyncio
+async def test_reads_fan_out_and_merge(federated):
+    await federated.add_entities_bulk([
+        _entity("doc_b", "掛號手冊", "Document"),
+        _entity("qa_doc_a", "批價手冊", "Document"),
+        _entity("qa_doc_a_qa_1", "批價退費", document_id="qa_doc_a"),
+        _entity("qa_doc_a_qa_2", "批價作業", document_id="qa_doc_a"),
+        _entity("e_2019", "批價舊制", document_id="manual_2019"),
+    ])
+    await federated.add_relation(_relation("qa_doc_a", "qa_doc_a_qa_1"))
+
+    assert [e.id async for e in federated.iter_entities(batch=2)] == [
+        "doc_b", "e_2019", "qa_doc_a", "qa_doc_a_qa_1", "qa_doc_a_qa_2"
+    ]
+    assert [e.id async for e in federated.iter_entities("QA")] == ["e_2019", "qa_doc_a_qa_1", "qa_doc_a_qa_2"]
+    assert [r.id async for r in federated.iter_relations()] == ["qa_doc_a->qa_doc_a_qa_1"]
+
+    stats = await federated.get_statistics()
+    assert stats["total_entities"] == 5 and stats["total_relations"] == 1
+    assert stats["entity_types"] == {"Document": 2, "QA": 3}
+    assert (await federated.recompute_statistics())["entity_types"] == {"Document": 2, "QA": 3}
+
+    assert [e.name for e in await federated.search_entities("批價", 3)] == ["批價作業", "批價手冊", "批價舊制"]
+    found = await federated.get_entities_many(["doc_b", "qa_doc_a_qa_2", "e_2019", "missing"])
+    assert set(found) == {"doc_b", "qa_doc_a_qa_2", "e_2019"}
+    assert len(await federated.get_entities_by_type("QA", limit=2)) == 2
+    subgraph = await federated.get_subgraph(["qa_doc_a"], max_depth=1)
+    assert {e["id"] for e in subgraph["entities"]} == {"qa_doc_a", "qa_doc_a_qa_1"}
+    assert await federated.get_path("qa_doc_a", "qa_doc_a_qa_1") == [["qa_doc_a", "qa_doc_a_qa_1"]]
+
+
+@pytest.mark.asyncio
+async def test_document_pages_continue_across_shards(federated):
+    # 同一文件的實體分散在兩個 shard（id 前綴不同）
+    await federated.add_entities_bulk(
+        [_entity(f"m{i}", f"主庫 {i}", document_id="doc_x") for i in range(3)]
+        + [_entity(f"qa_doc_x_{i}", f"QA 庫 {i}", document_id="doc_x") for i in range(4)]
+    )
+    pages, cursor = [], None
+    while True:
+        page, cursor = await federated.get_entities_by_document("doc_x", "QA", limit=2, cursor=cursor)
+        pages.append([e.id for e in page])
+        if cursor is None:
+            break
+    assert [entity_id for page in pages for entity_id in page] == [
+        "m0", "m1", "m2", "qa_doc_x_0", "qa_doc_x_1", "qa_doc_x_2", "qa_doc_x_3"
+    ]
+    assert all(len(page) == 2 for page in pages[:-1])
+
+    # document_routes 命中時只查該 shard
+    await federated.add_entity(_entity("e_2019", "掛號問題", document_id="manual_2019"))
+    page, cursor = await federated.get_entities_by_document("manual_2019")
+    assert [e.id for e in page] == ["e_2019"] and cursor is None
+    with pytest.raises(ValueError):
+        await federated.get_entities_by_document("manual_2019", cursor="main:1")
+
+
+def test_routes_must_target_known_shards():
+    with pytest.raises(ValueError):
+        FederatedGraphStore({"main": MemoryGraphStore()}, prefix_routes={"qa_": "qa"})
+    with pytest.raises(ValueError):
+        FederatedGraphStore({"main": MemoryGraphStore()}, type_routes={"QA": "qa"})
+
+
+@pytest.mark.asyncio
+async def test_qa_entities_route_by_type_without_decoding(tmp_path):
+    federated = FederatedGraphStore(
+        {"main": SQLiteGraphStore(str(tmp_path / "graph.db")), "qa": SQLiteGraphStore(str(tmp_path / "graph_qa.db"))},
+        default_shard="main",
+        prefix_routes={"qa_doc_": "qa", "ic_error_spec_": "qa"},
+        type_routes={"QA": "qa"},
+    )
+    assert await federated.initialize()
+    try:
+        main, qa = federated.shards["main"], federated.shards["qa"]
+        # scripts/import_qa_markdown_batch.py 的 id 形式：檔名 → 文件 id，問答為 {doc_id}_qa_{n}
+        entities = [
+            Entity(id="billing_faq_qa_1", type="QA", name="批價退費", properties={"answer": "至櫃台辦理"},
+                   document_id="billing_faq"),
+            Entity(id="billing_faq_qa_2", type="QA", name="批價作業", properties={"answer": "依序叫號"},
+                   document_id="billing_faq"),
+            _entity("doc_1", "操作手冊", "Document"),
+        ]
+        assert await federated.add_entities_bulk(entities) == [True, True, True]
+        assert await qa.get_entity("billing_faq_qa_1") and await main.get_entity("billing_faq_qa_1") is None
+        assert await qa.get_entity("billing_faq_qa_2") and await main.get_entity("doc_1")
+
+        # 由資料庫讀回的實體 / 關係 properties 為延遲解碼；路由只讀欄位屬性
+        loaded = await qa.get_entity("billing_faq_qa_1")
+        assert loaded._raw_properties is not None
+        assert federated.route_entity(loaded) == "qa"
+        assert loaded._raw_properties is not None
+        assert await federated.add_relation(_relation("billing_faq_qa_1", "billing_faq_qa_2"))
+        relations = await qa.get_relations_by_entity("billing_faq_qa_1")
+        assert relations and relations[0]._raw_properties is not None
+        assert await federated._route_relations(relations) == ["qa"]
+        assert relations[0]._raw_properties is not None
+    finally:
+        await federated.close()
+
+
+@pytest_asyncio.fixture
+async def typed(tmp_path):
+    store = FederatedGraphStore(
+        {"main": SQLiteGraphStore(str(tmp_path / "graph.db")), "qa": SQLiteGraphStore(str(tmp_path / "graph_qa.db"))},
+        default_shard="main",
+        prefix_routes={"qa_doc_": "qa"},
+        type_routes={"QA": "qa"},
+    )
+    assert await store.initialize()
+    yield store
+    await store.close()
+
+
+async def _import_qa_document(store, doc_id: str, count: int, document_first: bool = True):
+    """重現 scripts/import_qa_markdown_batch.py：Document → 批次 QA → 批次 CONTAINS_QA 關係"""
+    document = Entity(id=doc_id, type="Document", name=f"{doc_id}.md", properties={"type": "qa_markdown"})
+    qa_entities = [
+        Entity(id=f"{doc_id}_qa_{n}", type="QA", name=f"問題 {n}", properties={"answer": "答案"}, document_id=doc_id)
+        for n in range(1, count + 1)
+    ]
+    if document_first:
+        assert await store.add_entity(document)
+    assert await store.add_entities_bulk(qa_entities) == [True] * count
+    if not document_first:
+        assert await store.add_entity(document)
+    relations = [
+        Relation(id=f"{doc_id}_to_{qa.id}", source_id=doc_id, target_id=qa.id, type="CONTAINS_QA", properties={})
+        for qa in qa_entities
+    ]
+    return await store.add_relations_bulk(relations)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("document_first", [True, False])
+async def test_document_and_qa_entities_route_as_one_unit(typed, document_first):
+    main, qa = typed.shards["main"], typed.shards["qa"]
+    assert await _import_qa_document(typed, "faq", 2, document_first) == [True, True]
+
+    assert await qa.get_entity("faq") and await main.get_entity("faq") is None
+    assert [e.id for e in await qa.get_entities_by_type("Document")] == ["faq"]
+    assert {e.id for e in await typed.get_neighbors("faq")} == {"faq_qa_1", "faq_qa_2"}
+    page, _ = await qa.get_entities_by_document("faq")
+    assert [e.id for e in page] == ["faq_qa_1", "faq_qa_2"]
+
+    # 重新匯入（覆寫 Document）仍寫入 qa，不在 main 產生副本
+    assert await _import_qa_document(typed, "faq", 2) == [True, True]
+    assert await main.get_entity("faq") is None and len(await qa.get_relations_by_entity("faq")) == 2
+
+
+@pytest.mark.asyncio
+async def test_document_with_relations_keeps_its_entities(typed):
+    main, qa = typed.shards["main"], typed.shards["qa"]
+    # 一般文件（main）已有關係時不搬移，依類型路由的實體改隨 Document 寫入 main
+    await typed.add_entities_bulk([_entity("manual", "操作手冊", "Document"), _entity("chunk_1", "段落", "Chunk")])
+    assert await typed.add_relation(_relation("manual", "chunk_1"))
+    assert await typed.add_entity(Entity(id="manual_qa_1", type="QA", name="問題", properties={}, document_id="manual"))
+    assert await main.get_entity("manual_qa_1") and await qa.get_entity("manual_qa_1") is None
+    assert await typed.add_relation(_relation("manual", "manual_qa_1"))
+
+    # 同一批次的 Document 隨其 QA 寫入 qa
+    flags = await typed.add_entities_bulk([
+        Entity(id="batch", type="Document", name="batch.md", properties={}),
+        Entity(id="batch_qa_1", type="QA", name="問題", properties={}, document_id="batch"),
+    ])
+    assert flags == [True, True]
+    assert await qa.get_entity("batch") and await qa.get_entity("batch_qa_1")
+    assert await typed.add_relation(_relation("batch", "batch_qa_1"))
@@ -0,0 +1,197 @@
+"""
+HotTierGraphStore（常駐記憶體讀取層）與 MemoryGraphStore 索引測試
+更新時間：2026-10-18 17:00
+作者：AI Assistant
+修改摘要：以熱點實體圖驗證熱層的 get_path / get_subgraph 與 SQLiteGraphStore 一致，並同樣套用走訪上限與截斷警告
+更新時間：2026-10-18 04:40
+作者：AI Assistant
+修改摘要：驗證 MemoryGraphStore 索引在更新 / 刪除後與全表掃描結果一致；HotTierGraphStore 載入後讀取不經 SQLite、
+          與 SQLiteGraphStore 結果一致，寫入同步寫回、未命中時回查
+"""
+import random
+
+import pytest
+import pytest_asyncio
+
+from app.config import settings
+from app.core.graph_hot_tier import HotTierGraphStore
+from app.core.graph_store import Entity, MemoryGraphStore, Relation, SQLiteGraphStore
+
+NAMES = ["批價管理系統", "批價異常", "掛號流程", "掛號", "系統設定", "A", "Ab 批次", "ab"]
+
+
+def _scan_search(entities, query, limit, include_type_match, order_by):
+    """舊版全表掃描搜尋（作為索引結果的對照）"""
+    q = query.lower()
+    hits = [
+        (0 if q in e.name.lower() else 1, e) for e in entities
+        if q in e.name.lower() or (include_type_match and q in e.type.lower())
+    ]
+    if order_by == "rank":
+        hits.sort(key=lambda h: (h[0], len(h[1].name), h[1].name.lower()))
+    else:
+        hits.sort(key=lambda h: h[1].name.lower())
+    return [h[1].id for h in hits[:limit]]
+
+
+@pytest.mark.asyncio
+async def test_memory_indexes_follow_upserts_and_deletes():
+    rng = random.Random(7)
+    store = MemoryGraphStore()
+    for i in range(300):
+        await store.add_entity(Entity(
+            id=f"e{i}", type=rng.choice(["QA", "Concept"]), name=rng.choice(NAMES) + str(i % 7),
+            properties={"document_id": f"d{i % 3}"}
+        ))
+    # 改名、改類型、改文件與刪除後，索引結果仍須與全表掃描一致
+    for i in range(0, 300, 5):
+        await store.add_entity(Entity(id=f"e{i}", type="Document", name=rng.choice(NAMES), properties={"document_id": "d9"}))
+    for i in range(1, 300, 7):
+        await store.delete_entity(f"e{i}")
+
+    entities = list(store.entities.values())
+    for query in ["批價", "掛號流", "a", "AB", "系統", "document", "qa", "不存在"]:
+        for include_type_match in (True, False):
+            for order_by in ("name", "rank"):
+                hits = await store.search_entities(query, 15, include_type_match=include_type_match, order_by=order_by)
+                assert [e.id for e in hits] == _scan_search(entities, query, 15, include_type_match, order_by)
+
+    assert [e.id for e in await store.get_entities_by_type("Document", limit=1000)] == [
+        e.id for e in entities if e.type == "Document"
+    ]
+    page, cursor = await store.get_entities_by_document("d9", limit=10)
+    assert [e.id for e in page] == [e.id for e in entities if e.document_id == "d9"][:10]
+    assert cursor == "10"
+    stats = await store.get_statistics()
+    assert sum(stats["entity_types"].values()) == stats["total_entities"] == len(entities)
+
+
+@pytest.mark.asyncio
+async def test_memory_relation_upsert_and_cascade_keep_adjacency_consistent():
+    store = MemoryGraphStore()
+    await store.add_entities_bulk([Entity(id=i, type="QA", name=i, properties={}) for i in "abc"])
+    await store.add_relation(Relation(id="r", source_id="a", target_id="b", type="RELATED", properties={}))
+    await store.add_relation(Relation(id="r", source_id="a", target_id="c", type="SEE", properties={}))
+
+    assert [e.id for e in await store.get_neighbors("a")] == ["c"]
+    assert await store.get_neighbors("b") == []
+    assert (await store.get_statistics())["relation_types"] == {"SEE": 1}
+
+    await store.delete_entity("c")
+    assert await store.get_relation("r") is None
+    assert await store.get_relations_by_entity("a") == []
+    assert (await store.get_statistics())["relation_types"] == {}
+
+
+@pytest_asyncio.fixture
+async def sqlite_store(tmp_path):
+    s = SQLiteGraphStore(str(tmp_path / "graph.db"))
+    await s.initialize()
+    await s.add_entities_bulk(
+        [Entity(id="d", type="Document", name="操作手冊", properties={})]
+        + [Entity(id=f"q{i}", type="QA", name=f"批價問題{i}", properties={"document_id": "d"}) for i in range(6)]
+    )
+    await s.add_relations_bulk(
+        [Relation(id=f"d_q{i}", source_id="d", target_id=f"q{i}", type="CONTAINS", properties={}) for i in range(6)]
+        + [Relation(id=f"q{i}_q0", source_id=f"q{i}", target_id="q0", type="RELATED", properties={}) for i in (1, 2, 3)]
+    )
+    await s.compute_importance()
+    yield s
+    await s.close()
+
+
+@pytest.mark.asyncio
+async def test_hot_tier_reads_match_sqlite_without_touching_it(sqlite_store, monkeypatch):
+    expected = {
+        "search": [e.id for e in await sqlite_store.search_entities("批價", 4, order_by="rank")],
+        "neighbors": [e.id for e in await sqlite_store.get_neighbors("d", order_by="importance", limit=3)],
+        "document": [e.id for e in (await sqlite_store.get_entities_by_document("d", "QA", limit=4))[0]],
+        "stats": await sqlite_store.get_statistics(),
+    }
+    store = HotTierGraphStore(sqlite_store)
+    await store.initialize()
+    assert store.tier_stats()["entities"] == 7
+
+    def no_sql(*args, **kwargs):
+        raise AssertionError("hot tier read touched SQLite")
+
+    monkeypatch.setattr(sqlite_store, "_reader", no_sql)
+    assert [e.id for e in await store.search_entities("批價", 4, order_by="rank")] == expected["search"]
+    assert [e.id for e in await store.get_neighbors("d", order_by="importance", limit=3)] == expected["neighbors"]
+    assert [e.id for e in (await store.get_entities_by_document("d", "QA", limit=4))[0]] == expected["document"]
+    assert await store.get_statistics() == expected["stats"]
+    assert (await store.get_entity("q3")).name == "批價問題3"
+    assert store.read_through_queries == 0
+
+
+@pytest.mark.asyncio
+async def test_hot_tier_writes_through_and_reads_through_misses(sqlite_store):
+    store = HotTierGraphStore(sqlite_store)
+    await store.initialize()
+
+    await store.add_entity(Entity(id="q9", type="QA", name="新問題", properties={"document_id": "d"}))
+    assert await store.add_relation(Relation(id="d_q9", source_id="d", target_id="q9", type="CONTAINS", properties={}))
+    assert (await sqlite_store.get_entity("q9")).name == "新問題"
+    assert "q9" in [e.id for e in await store.get_neighbors("d")]
+
+    assert await store.delete_entity("q0")
+    assert await sqlite_store.get_entity("q0") is None
+    assert await store.get_relations_by_entity("q1", direction="outgoing") == []
+
+    # 其他程序直接寫入資料庫：點查詢回查後補入記憶體
+    await sqlite_store.add_entity(Entity(id="x", type="Concept", name="外部寫入", properties={}))
+    await sqlite_store.add_relation(Relation(id="x_d", source_id="x", target_id="d", type="SEE", properties={}))
+    assert (await store.get_relation("x_d")).target_id == "d"
+    assert (await store.get_entity("x")).name == "外部寫入"
+    assert store.read_through_queries == 1
+    assert [e.id for e in await store.get_neighbors("x")] == ["d"]
+
+
+async def _hub_traversals(store):
+    """熱點實體 h：h -> s0..s29 -> t -> u，另有 s0 -> h、t -> h 形成環"""
+    return {
+        "paths": [sorted(await store.get_path(source, "u", hops)) for source in ("h", "s0") for hops in (1, 2, 3, 4)],
+        "cycle": sorted(await store.get_path("s0", "t", 3)),
+        "subgraph": [
+            (sorted(e["id"] for e in sub["entities"]), sorted(r["id"] for r in sub["relations"]))
+            for sub in [await store.get_subgraph(seeds, depth) for seeds in (["u"], ["h", "missing"]) for depth in (0, 1, 2, 3)]
+        ],
+    }
+
+
+@pytest.mark.asyncio
+async def test_hot_tier_traversals_match_sqlite_on_hub_graph(tmp_path, monkeypatch, caplog):
+    sqlite_store = SQLiteGraphStore(str(tmp_path / "hub.db"))
+    await sqlite_store.initialize()
+    spokes = [f"s{i}" for i in range(30)]
+    await sqlite_store.add_entities_bulk(
+        [Entity(id=i, type="Concept", name=i, properties={}) for i in ["h", "t", "u"] + spokes]
+    )
+    await sqlite_store.add_relations_bulk(
+        [Relation(id=f"h_{s}", source_id="h", target_id=s, type="HAS", properties={}) for s in spokes]
+        + [Relation(id=f"{s}_t", source_id=s, target_id="t", type="TO", properties={}) for s in spokes]
+        + [
+            Relation(id="t_u", source_id="t", target_id="u", type="TO", properties={}),
+            Relation(id="s0_h", source_id="s0", target_id="h", type="BACK", properties={}),
+            Relation(id="t_h", source_id="t", target_id="h", type="BACK", properties={}),
+        ]
+    )
+    store = HotTierGraphStore(sqlite_store)
+    try:
+        await store.initialize()
+        expected = await _hub_traversals(sqlite_store)
+        assert len(expected["paths"][2]) == 30  # h -> s* -> t -> u：不因共用 visited 只留一條
+        assert await _hub_traversals(store) == expected
+
+        # 上限：熱點實體的走訪同樣截斷並記錄警告
+        monkeypatch.setattr(settings, "GRAPH_TRAVERSAL_MAX_NODES", 10)
+        monkeypatch.setattr(settings, "GRAPH_TRAVERSAL_MAX_EDGES", 15)
+        for target in (sqlite_store, store):
+            caplog.clear()
+            sub = await target.get_subgraph(["h"], max_depth=3)
+            assert len(sub["entities"]) <= 10 and len(sub["relations"]) == 15
+            paths = await target.get_path("h", "u", 3)
+            assert all(path in expected["paths"][2] for path in paths) and len(paths) < 9
+            assert sum("truncated" in record.message for record in caplog.records) == 2
+    finally:
+        await store.close()
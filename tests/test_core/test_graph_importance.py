@@ -0,0 +1,148 @@
+"""
+實體重要度（graph_importance / get_neighbors(order_by="importance")）測試
+更新時間：2026-10-18 19:20
+作者：AI Assistant
+修改摘要：驗證重複寫入相同關係（UPSERT）不使重要度過期，v1 / v2 皆同；既有資料庫的舊觸發器於啟動時重建
+更新時間：2026-10-18 03:30
+作者：AI Assistant
+修改摘要：驗證 PageRank 與文件內 PageRank 數值、SQLite（SQL / 快照路徑）與 Memory 依重要度排序截斷一致、過期判斷
+"""
+import pytest
+import pytest_asyncio
+
+from app.config import settings
+from app.core.graph_importance import compute_importance
+from app.core.graph_store import SCHEMA_V1, SCHEMA_V2, Entity, MemoryGraphStore, Relation, SQLiteGraphStore
+
+# 文件 d 含 q0..q3；q1..q3 皆指向 q0，q3 另指向 q2 → 依重要度 q0 > q2 > q3（度數 3）> q1（度數 2）
+ENTITIES = [Entity(id="d", type="Document", name="手冊", properties={})] + [
+    Entity(id=f"q{i}", type="QA", name=f"問題{i}", properties={"document_id": "d"}) for i in range(4)
+] + [Entity(id="x", type="Concept", name="外部", properties={})]
+RELATIONS = [
+    Relation(id=f"d_contains_q{i}", source_id="d", target_id=f"q{i}", type="CONTAINS", properties={})
+    for i in range(4)
+] + [
+    Relation(id=f"q{i}_q0", source_id=f"q{i}", target_id="q0", type="RELATED", properties={}) for i in (1, 2, 3)
+] + [
+    Relation(id="q3_q2", source_id="q3", target_id="q2", type="RELATED", properties={}),
+    Relation(id="x_d", source_id="x", target_id="d", type="SEE", properties={}),
+]
+EXPECTED_ORDER = ["q0", "q2", "q3", "q1"]
+
+
+def test_pagerank_matches_closed_form_and_groups_by_document():
+    cycle = compute_importance([("a", None), ("b", None), ("c", None)], [("a", "b", 1.0), ("b", "c", 1.0), ("c", "a", 1.0)])
+    assert [round(row[1], 9) for row in cycle.rows] == [round(1 / 3, 9)] * 3
+    assert [row[3] for row in cycle.rows] == [2, 2, 2]
+
+    result = compute_importance(
+        [(e.id, e.document_id) for e in ENTITIES],
+        [(r.source_id, r.target_id, r.weight) for r in RELATIONS] + [("q1", "missing", 1.0)],
+    )
+    rows = {row[0]: row for row in result.rows}
+    assert result.relations == len(RELATIONS)  # 端點不存在的關係忽略
+    assert abs(sum(row[1] for row in result.rows) - 1.0) < 1e-9
+    # Document 實體 d 依 id 歸入文件 d；x 不屬於任何文件
+    assert abs(sum(rows[i][2] for i in ["d", "q0", "q1", "q2", "q3"]) - 1.0) < 1e-9
+    assert rows["x"][2] is None
+    assert rows["q0"][1] > rows["q2"][1] > rows["q3"][1] == pytest.approx(rows["q1"][1])
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path):
+    s = SQLiteGraphStore(str(tmp_path / "graph.db"))
+    await s.initialize()
+    await s.add_entities_bulk(ENTITIES)
+    await s.add_relations_bulk(RELATIONS)
+    yield s
+    await s.close()
+
+
+@pytest.mark.asyncio
+async def test_get_neighbors_orders_by_importance(store):
+    assert await store.importance_stale()
+    # 尚未計算：全部視為 0，依 id 排序
+    assert [e.id for e in await store.get_neighbors("d", order_by="importance")] == ["q0", "q1", "q2", "q3", "x"]
+
+    summary = await store.compute_importance()
+    assert (summary["entities"], summary["relations"]) == (len(ENTITIES), len(RELATIONS))
+    assert not await store.importance_stale()
+
+    ranked = [e.id for e in await store.get_neighbors("d", direction="outgoing", order_by="importance")]
+    assert ranked == EXPECTED_ORDER
+    assert [e.id for e in await store.get_neighbors(
+        "d", relation_type="CONTAINS", order_by="importance", limit=2
+    )] == EXPECTED_ORDER[:2]
+    # 不指定 order_by 時維持原順序，limit 仍生效
+    assert [e.id for e in await store.get_neighbors("d", direction="outgoing", limit=2)] == ["q0", "q1"]
+
+    await store.rebuild_adjacency_snapshot()
+    assert [e.id for e in await store.get_neighbors("d", direction="outgoing", order_by="importance", limit=3)] == EXPECTED_ORDER[:3]
+
+    memory = MemoryGraphStore()
+    await memory.add_entities_bulk(ENTITIES)
+    await memory.add_relations_bulk(RELATIONS)
+    await memory.compute_importance()
+    assert [e.id for e in await memory.get_neighbors("d", direction="outgoing", order_by="importance")] == EXPECTED_ORDER
+
+    await store.add_relation(Relation(id="q1_q2", source_id="q1", target_id="q2", type="RELATED", properties={}))
+    assert await store.importance_stale()
+
+
+async def _relations_version(store: SQLiteGraphStore) -> int:
+    async with store.conn.execute("SELECT value FROM graph_meta WHERE key = 'relations_version'") as cursor:
+        return (await cursor.fetchone())[0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("schema_version", [SCHEMA_V1, SCHEMA_V2])
+async def test_identical_relation_upsert_keeps_importance_fresh(tmp_path, monkeypatch, schema_version):
+    monkeypatch.setattr(settings, "GRAPH_DB_SCHEMA_VERSION", schema_version)
+    db_path = str(tmp_path / "graph.db")
+    store = SQLiteGraphStore(db_path)
+    await store.initialize()
+    try:
+        await store.add_entities_bulk(ENTITIES)
+        await store.add_relations_bulk(RELATIONS)
+        await store.compute_importance()
+        version = await _relations_version(store)
+
+        # 重新匯入相同關係（含 properties / weight 變更）：拓撲未變
+        assert await store.add_relations_bulk(RELATIONS) == [True] * len(RELATIONS)
+        assert await store.add_relation(
+            Relation(id="x_d", source_id="x", target_id="d", type="SEE", properties={"note": "更新"}, weight=0.5)
+        )
+        assert await _relations_version(store) == version and not await store.importance_stale()
+
+        # 端點或類型變更才遞增
+        assert await store.add_relation(Relation(id="x_d", source_id="x", target_id="d", type="CITES", properties={}))
+        assert await _relations_version(store) == version + 1 and await store.importance_stale()
+    finally:
+        await store.close()
+
+
+@pytest.mark.asyncio
+async def test_legacy_version_trigger_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GRAPH_DB_SCHEMA_VERSION", SCHEMA_V1)
+    db_path = str(tmp_path / "graph.db")
+    store = SQLiteGraphStore(db_path)
+    await store.initialize()
+    # 舊版觸發器：UPDATE OF 無 WHEN 條件
+    await store.conn.execute("DROP TRIGGER relations_version_au")
+    await store.conn.execute(
+        "CREATE TRIGGER relations_version_au AFTER UPDATE OF source_id, target_id, type ON relations "
+        "BEGIN UPDATE graph_meta SET value = value + 1 WHERE key = 'relations_version'; END"
+    )
+    await store.conn.commit()
+    await store.close()
+
+    store = SQLiteGraphStore(db_path)
+    await store.initialize()
+    try:
+        await store.add_entities_bulk(ENTITIES)
+        await store.add_relations_bulk(RELATIONS)
+        await store.compute_importance()
+        await store.add_relations_bulk(RELATIONS)
+        assert not await store.importance_stale()
+    finally:
+        await store.close()
@@ -0,0 +1,94 @@
+"""
+二進位圖快照（graph_snapshot）測試
+更新時間：2026-10-17 23:50
+作者：AI Assistant
+修改摘要：驗證匯出 / mmap 載入往返一致、SQLiteGraphStore 啟動時採用快照鄰接陣列、過期與損毀快照不被採用
+"""
+import pytest
+import pytest_asyncio
+
+from app.core.graph_snapshot import GraphSnapshot
+from app.core.graph_store import Entity, MemoryGraphStore, Relation, SQLiteGraphStore
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path):
+    s = SQLiteGraphStore(str(tmp_path / "graph.db"))
+    await s.initialize()
+    await s.add_entities_bulk([
+        Entity(id=f"e{i}", type="QA" if i % 2 else "Concept", name=f"實體{i}",
+               properties={"n": i, "document_id": "doc_a"} if i < 3 else {"n": i})
+        for i in range(5)
+    ])
+    await s.add_relations_bulk([
+        Relation(id="r01", source_id="e0", target_id="e1", type="NEXT", properties={"w": "一"}),
+        Relation(id="r12", source_id="e1", target_id="e2", type="NEXT", properties={}, weight=0.5),
+        Relation(id="r40", source_id="e4", target_id="e0", type="SEE", properties={}),
+    ])
+    yield s
+    await s.close()
+
+
+@pytest.mark.asyncio
+async def test_export_roundtrip_into_memory_store(store, tmp_path):
+    path = str(tmp_path / "graph.snap")
+    meta = await store.export_snapshot(path)
+    assert (meta["entities"], meta["relations"]) == (5, 3)
+
+    snapshot = GraphSnapshot(path)
+    row = snapshot.find_entity_row("e2")
+    assert row["name"] == "實體2" and row["document_id"] == "doc_a"
+    assert snapshot.find_entity_row("missing") is None
+
+    memory = MemoryGraphStore()
+    assert await memory.load_snapshot(path)
+    assert await memory.get_statistics() == await store.get_statistics()
+    entity = await memory.get_entity("e1")
+    assert entity.to_dict() == (await store.get_entity("e1")).to_dict()
+    relation = await memory.get_relation("r12")
+    assert relation.weight == 0.5 and relation.created_at == (await store.get_relation("r12")).created_at
+    assert [e.id for e in await memory.get_neighbors("e0")] == ["e1", "e4"]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_adopts_matching_snapshot(store, tmp_path):
+    path = str(tmp_path / "graph.snap")
+    await store.export_snapshot(path)
+    expected = [
+        [e.id for e in await store.get_neighbors(f"e{i}")] for i in range(5)
+    ] + [await store.get_path("e4", "e2")]
+
+    warm = SQLiteGraphStore(store.db_path, snapshot_path=path)
+    await warm.initialize()
+    try:
+        assert warm._current_adjacency() is not None
+        assert warm._current_adjacency().num_edges == 3
+        assert [
+            [e.id for e in await warm.get_neighbors(f"e{i}")] for i in range(5)
+        ] + [await warm.get_path("e4", "e2")] == expected
+    finally:
+        await warm.close()
+
+    # 匯出後關係有變更：快照不再採用
+    await store.add_relation(Relation(id="r23", source_id="e2", target_id="e3", type="NEXT", properties={}))
+    stale = SQLiteGraphStore(store.db_path, snapshot_path=path)
+    await stale.initialize()
+    try:
+        assert stale._current_adjacency() is None
+        assert not await stale.load_snapshot(path)
+    finally:
+        await stale.close()
+
+
+@pytest.mark.asyncio
+async def test_corrupted_snapshot_is_rejected(store, tmp_path):
+    path = tmp_path / "graph.snap"
+    await store.export_snapshot(str(path))
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match="checksum"):
+        GraphSnapshot(str(path))
+    assert not await store.load_snapshot(str(path))
+    assert not await MemoryGraphStore().load_snapshot(str(path))
@@ -0,0 +1,81 @@
+"""
+GraphStore SQL 語句量測測試
+更新時間：2026-10-18 09:20
+作者：AI Assistant
+修改摘要：驗證語句依 SQLiteGraphStore 方法名稱標記（含寫入佇列背景提交）、超過門檻的語句記錄 WARNING 且參數已遮蔽，
+          以及 SQL 正規化 / 參數遮蔽
+"""
+import logging
+
+import pytest
+
+from app.config import settings
+from app.core.graph_sql_instrumentation import OTHER_METHOD, SQLInstrumentation, normalize_sql, redact_params
+from app.core.graph_store import Entity, Relation, SQLiteGraphStore
+from app.utils.metrics import GRAPH_SQL_LATENCY
+
+
+async def _store(tmp_path, slow_query_ms: float = 0) -> tuple:
+    store = SQLiteGraphStore(str(tmp_path / "graph.db"))
+    store.sql_instrumentation = SQLInstrumentation("SQLiteGraphStore", slow_query_ms)
+    seen = []
+    store.sql_instrumentation.listeners.append(lambda method, sql, params, seconds: seen.append((method, sql, params)))
+    assert await store.initialize()
+    return store, seen
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("write_queue", [False, True])
+async def test_statements_are_labelled_by_store_method(tmp_path, monkeypatch, write_queue):
+    monkeypatch.setattr(settings, "GRAPH_WRITE_QUEUE_ENABLED", write_queue)
+    store, seen = await _store(tmp_path)
+    try:
+        await store.add_entities_bulk([
+            Entity(id="doc_1", type="Document", name="操作手冊", properties={}),
+            Entity(id="qa_1", type="QA", name="批價問題", properties={"document_id": "doc_1"}),
+        ])
+        await store.add_relation(Relation(id="r1", source_id="doc_1", target_id="qa_1", type="CONTAINS", properties={}))
+        await store.flush()
+        seen.clear()
+
+        before = GRAPH_SQL_LATENCY.labels(method="get_entity")._sum.get()
+        assert (await store.get_entity("qa_1")).name == "批價問題"
+        assert [e.id for e in await store.get_neighbors("doc_1")] == ["qa_1"]
+        methods = {method for method, _, _ in seen}
+        assert {"get_entity", "get_neighbors"} <= methods
+        assert GRAPH_SQL_LATENCY.labels(method="get_entity")._sum.get() > before
+
+        # 寫入佇列由背景工作提交：語句仍歸屬於發出寫入的方法，交易控制語句為 other
+        seen.clear()
+        await store.delete_entity("qa_1")
+        await store.flush()
+        delete_methods = {method for method, sql, _ in seen if sql.lstrip().upper().startswith("DELETE")}
+        assert delete_methods == {"delete_entity"}
+        assert all(method in ("delete_entity", OTHER_METHOD) for method, _, _ in seen)
+    finally:
+        await store.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_statements_are_logged_with_redacted_params(tmp_path, caplog):
+    # 門檻極小：每個語句都視為慢查詢
+    store, _ = await _store(tmp_path, slow_query_ms=1e-6)
+    try:
+        with caplog.at_level(logging.WARNING, logger="GraphSQL"):
+            await store.get_entity("病歷號_A123456789")
+    finally:
+        await store.close()
+    messages = [r.getMessage() for r in caplog.records if "in get_entity" in r.getMessage()]
+    assert messages and "Slow SQL" in messages[0]
+    assert "params=(<str:14>)" in messages[0]
+    assert "A123456789" not in caplog.text
+
+
+def test_normalize_and_redact():
+    assert normalize_sql("SELECT *\n   FROM entities\n WHERE id IN (?, ?, ?, ?, ?)") == (
+        "SELECT * FROM entities WHERE id IN (?×5)"
+    )
+    assert normalize_sql("SELECT ? , ?") == "SELECT ? , ?"
+    assert redact_params(("張三", 3, None, b"\x00\x01")) == "(<str:2>, <int>, NULL, <bytes:2>)"
+    assert redact_params({"seeds": "[\"a\"]"}) == "{seeds: <str:5>}"
+    assert redact_params(None) == "()"
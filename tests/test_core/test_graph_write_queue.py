@@ -0,0 +1,101 @@
+"""
+GraphStore 寫入佇列（group commit）測試
+更新時間：2026-10-18 05:50
+作者：AI Assistant
+修改摘要：驗證並行寫入合併提交且回傳時已持久化、單一操作失敗只回滾該操作、達 max_rows 立即提交、關閉前 flush
+"""
+import asyncio
+import sqlite3
+
+import pytest
+import pytest_asyncio
+
+from app.config import settings
+from app.core.graph_store import Entity, Relation, SQLiteGraphStore
+
+
+def _entity(i: int) -> Entity:
+    return Entity(id=f"e{i}", type="Concept", name=f"實體{i}", properties={"n": i})
+
+
+def _count(db_path: str, table: str = "entities") -> int:
+    """以獨立連線讀取已提交的筆數"""
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+@pytest_asyncio.fixture
+async def queued_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GRAPH_WRITE_QUEUE_ENABLED", True)
+    monkeypatch.setattr(settings, "GRAPH_WRITE_QUEUE_MAX_DELAY_MS", 20.0)
+    s = SQLiteGraphStore(str(tmp_path / "graph.db"))
+    await s.initialize()
+    yield s
+    await s.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_coalesce_and_ack_after_commit(queued_store):
+    db_path = queued_store.db_path
+
+    async def writer(i: int) -> bool:
+        ok = await queued_store.add_entity(_entity(i))
+        # 回傳時已提交：其他連線讀得到
+        assert _count(db_path) >= 1
+        return ok
+
+    results = await asyncio.gather(
+        *(writer(i) for i in range(40)),
+        queued_store.add_entities_bulk([_entity(i) for i in range(40, 60)], batch_size=5),
+    )
+    assert results[:40] == [True] * 40 and results[40] == [True] * 20
+    assert _count(db_path) == 60
+    stats = queued_store.write_queue_stats()
+    assert stats["ops"] == 44
+    assert stats["commits"] < 10
+
+    await queued_store.add_relations_bulk(
+        [Relation(id=f"r{i}", source_id=f"e{i}", target_id=f"e{i + 1}", type="NEXT", properties={}) for i in range(10)]
+    )
+    assert _count(db_path, "relations") == 10
+    assert (await queued_store.get_statistics())["relation_types"] == {"NEXT": 10}
+
+
+@pytest.mark.asyncio
+async def test_failed_operation_rolls_back_only_itself(queued_store):
+    sql, to_params = queued_store._entity_write()
+
+    async def failing(cursor):
+        await cursor.execute(sql, to_params(Entity(id="bad", type="T", name="bad", properties={})))
+        raise RuntimeError("boom")
+
+    outcomes = await asyncio.gather(
+        queued_store.add_entity(_entity(1)),
+        queued_store._write(failing),
+        queued_store.add_entity(_entity(2)),
+        return_exceptions=True,
+    )
+    assert outcomes[0] is True and outcomes[2] is True
+    assert isinstance(outcomes[1], RuntimeError)
+    assert await queued_store.get_entity("bad") is None
+    assert {e.id for e in (await queued_store.get_entities_many(["e1", "e2"])).values()} == {"e1", "e2"}
+
+
+@pytest.mark.asyncio
+async def test_max_rows_commits_without_waiting_for_delay(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GRAPH_WRITE_QUEUE_ENABLED", True)
+    monkeypatch.setattr(settings, "GRAPH_WRITE_QUEUE_MAX_DELAY_MS", 60_000.0)
+    monkeypatch.setattr(settings, "GRAPH_WRITE_QUEUE_MAX_ROWS", 8)
+    store = SQLiteGraphStore(str(tmp_path / "graph.db"))
+    await store.initialize()
+    try:
+        flags = await asyncio.wait_for(store.add_entities_bulk([_entity(i) for i in range(8)]), timeout=5)
+        assert flags == [True] * 8
+
+        # 未達 max_rows 的寫入由 close 前的 flush 提交
+        pending = asyncio.ensure_future(store.add_entity(_entity(99)))
+        await asyncio.sleep(0)
+    finally:
+        await asyncio.wait_for(store.close(), timeout=5)
+    assert await pending is True
+    assert _count(store.db_path) == 9
@@ -0,0 +1,37 @@
+"""
+Orchestrator 圖增強合併測試：關係依 ID 去重、實體不重複（hub 實體大量關係）
+更新時間：2026-10-18 02:20
+作者：AI Assistant
+修改摘要：驗證 _enhance_with_graph 以 get_relations_by_entities 合併關係，重疊的關係只保留一筆
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.graph_store import Entity, MemoryGraphStore, Relation
+from app.core.orchestrator import GraphOrchestrator
+
+
+@pytest.mark.asyncio
+async def test_enhance_with_graph_merges_relations_by_id():
+    store = MemoryGraphStore()
+    await store.add_entities_bulk(
+        [Entity(id="doc", type="Document", name="手冊", properties={})]
+        + [Entity(id=f"qa{i}", type="QA", name=f"問題{i}", properties={"answer": f"答案{i}"}) for i in range(50)]
+    )
+    await store.add_relations_bulk(
+        [Relation(id=f"doc_contains_qa{i}", source_id="doc", target_id=f"qa{i}", type="CONTAINS", properties={})
+         for i in range(50)]
+        + [Relation(id=f"qa{i}_next", source_id=f"qa{i}", target_id=f"qa{i + 1}", type="NEXT", properties={})
+           for i in range(49)]
+    )
+    orchestrator = GraphOrchestrator(rag_service=MagicMock(), graph_store=store, cache_service=None)
+
+    result = await orchestrator._enhance_with_graph("問題", [{"id": "doc"}])
+
+    relation_ids = [r.id for r in result["relations"]]
+    assert len(relation_ids) == len(set(relation_ids))
+    # doc 與前幾個 QA 的關係兩端皆在查詢範圍內，仍只出現一次
+    assert "doc_contains_qa0" in relation_ids and "qa0_next" in relation_ids
+    entity_ids = [e.id for e in result["entities"]]
+    assert len(entity_ids) == len(set(entity_ids))
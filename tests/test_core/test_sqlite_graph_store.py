@@ -0,0 +1,547 @@
+"""
+SQLiteGraphStore 行為測試（使用 tmp_path 暫存資料庫）
+更新時間：2026-10-18 20:00
+作者：AI Assistant
+修改摘要：新增唯讀連線池等待計數測試（依取用前池是否已空判斷）
+更新時間：2026-10-18 08:10
+作者：AI Assistant
+修改摘要：新增唯讀模式測試（immutable 開啟、不建表不寫檔、v2 / FTS 偵測、寫入拋出 ReadOnlyStoreError）
+更新時間：2026-10-18 02:20
+作者：AI Assistant
+修改摘要：新增 get_relations_by_entities 依關係 ID 去重測試（SQLite 與 Memory 一致）
+更新時間：2026-10-18 01:10
+作者：AI Assistant
+修改摘要：新增結構 v2（提升欄位、epoch 時間戳、級聯刪除）與 migrate_to_schema_v2 就地遷移測試
+更新時間：2026-10-17 23:20
+作者：AI Assistant
+修改摘要：新增 graph_stats 觸發器增量統計與 recompute_statistics 測試
+更新時間：2026-10-17 22:10
+作者：AI Assistant
+修改摘要：新增 iter_entities / iter_relations keyset 分頁串流測試
+更新時間：2026-10-17 21:00
+作者：AI Assistant
+修改摘要：新增 get_entities_by_document 分頁與舊資料庫 document_id 回填測試
+更新時間：2026-10-17 19:50
+作者：AI Assistant
+修改摘要：新增 Entity 延遲解碼與寫回測試
+更新時間：2026-10-17 16:10
+作者：AI Assistant
+修改摘要：新增 get_path 遞迴 CTE 路徑排序與走訪上限截斷測試
+更新時間：2026-10-17 15:00
+作者：AI Assistant
+修改摘要：新增 WAL 唯讀連線池並行讀取測試
+更新時間：2026-10-17 09:40
+作者：AI Assistant
+修改摘要：驗證 add_entities_bulk / add_relations_bulk 的逐筆成功旗標與批次大小切分
+"""
+import os
+
+import pytest
+import pytest_asyncio
+
+from app.config import settings
+from app.core.exceptions import ReadOnlyStoreError
+from app.core.graph_store import SCHEMA_V1, SCHEMA_V2, Entity, MemoryGraphStore, Relation, SQLiteGraphStore
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path):
+    s = SQLiteGraphStore(str(tmp_path / "graph.db"))
+    await s.initialize()
+    yield s
+    await s.close()
+
+
+def _entity(i: int, entity_type: str = "Concept") -> Entity:
+    return Entity(id=f"e{i}", type=entity_type, name=f"實體{i}", properties={"n": i})
+
+
+@pytest.mark.asyncio
+async def test_add_entities_bulk_writes_all_batches(store):
+    """批次大小小於總筆數時仍全部寫入，旗標與輸入等長。"""
+    entities = [_entity(i) for i in range(7)]
+    flags = await store.add_entities_bulk(entities, batch_size=3)
+    assert flags == [True] * 7
+    stats = await store.get_statistics()
+    assert stats["total_entities"] == 7
+    loaded = await store.get_entity("e6")
+    assert loaded.properties == {"n": 6}
+
+
+@pytest.mark.asyncio
+async def test_add_relations_bulk_flags_missing_endpoints(store):
+    """來源或目標不存在的關係標記為 False，其餘正常寫入。"""
+    await store.add_entities_bulk([_entity(1), _entity(2)])
+    relations = [
+        Relation(id="r1", source_id="e1", target_id="e2", type="RELATED", properties={}),
+        Relation(id="r2", source_id="e1", target_id="missing", type="RELATED", properties={}),
+        Relation(id="r3", source_id="e2", target_id="e1", type="RELATED", properties={}),
+    ]
+    flags = await store.add_relations_bulk(relations, batch_size=2)
+    assert flags == [True, False, True]
+    assert await store.get_relation("r2") is None
+    assert (await store.get_relation("r3")).source_id == "e2"
+
+
+@pytest.mark.asyncio
+async def test_memory_store_bulk_matches_sqlite_flags():
+    """MemoryGraphStore 批次 API 回傳相同語意的旗標。"""
+    store = MemoryGraphStore()
+    await store.initialize()
+    assert await store.add_entities_bulk([_entity(1), _entity(2)]) == [True, True]
+    flags = await store.add_relations_bulk([
+        Relation(id="r1", source_id="e1", target_id="e2", type="RELATED", properties={}),
+        Relation(id="r2", source_id="e1", target_id="missing", type="RELATED", properties={}),
+    ])
+    assert flags == [True, False]
+
+
+async def _seed_chain(store):
+    """e0 -> e1 -> e2 -> e3，另有 e1 -> e0 反向邊。"""
+    await store.add_entities_bulk([_entity(i) for i in range(4)])
+    await store.add_relations_bulk([
+        Relation(id="r01", source_id="e0", target_id="e1", type="NEXT", properties={}),
+        Relation(id="r12", source_id="e1", target_id="e2", type="NEXT", properties={}),
+        Relation(id="r23", source_id="e2", target_id="e3", type="NEXT", properties={}),
+        Relation(id="r10", source_id="e1", target_id="e0", type="BACK", properties={}),
+    ])
+
+
+@pytest.mark.asyncio
+async def test_get_entities_many_skips_missing_ids(store):
+    await store.add_entities_bulk([_entity(1), _entity(2)])
+    found = await store.get_entities_many(["e2", "missing", "e1", "e2"])
+    assert set(found) == {"e1", "e2"}
+    assert found["e2"].name == "實體2"
+
+
+@pytest.mark.asyncio
+async def test_get_neighbors_dedupes_and_filters_by_type(store):
+    await _seed_chain(store)
+    both = await store.get_neighbors("e1")
+    assert [e.id for e in both] == ["e2", "e0"]
+    outgoing_next = await store.get_neighbors("e1", relation_type="NEXT", direction="outgoing")
+    assert [e.id for e in outgoing_next] == ["e2"]
+    incoming = await store.get_neighbors("e1", direction="incoming")
+    assert [e.id for e in incoming] == ["e0"]
+
+
+@pytest.mark.asyncio
+async def test_get_subgraph_respects_max_depth(store):
+    await _seed_chain(store)
+    sub = await store.get_subgraph(["e0"], max_depth=1)
+    assert {e["id"] for e in sub["entities"]} == {"e0", "e1"}
+    # 深度 1 節點（e1）的關係皆納入，包含通往 e2 的邊
+    assert {r["id"] for r in sub["relations"]} == {"r01", "r10", "r12"}
+
+
+@pytest.mark.asyncio
+async def test_search_entities_fts_matches_cjk_substring_and_type(store):
+    assert store._fts_enabled
+    await store.add_entities_bulk([
+        Entity(id="o1", type="Organization", name="批價管理系統", properties={}),
+        Entity(id="c1", type="Concept", name="門診批價管理作業流程", properties={}),
+    ])
+    hits = await store.search_entities("批價管理", limit=10, include_type_match=False)
+    assert [e.id for e in hits] == ["o1", "c1"]  # ORDER BY name（批 < 門）
+    assert await store.search_entities("Organization", include_type_match=False) == []
+    assert [e.id for e in await store.search_entities("organization")] == ["o1"]
+    ranked = await store.search_entities("批價管理", include_type_match=False, order_by="rank")
+    assert {e.id for e in ranked} == {"c1", "o1"}
+
+
+@pytest.mark.asyncio
+async def test_search_entities_fts_follows_updates_and_deletes(store):
+    await store.add_entity(Entity(id="x", type="Concept", name="舊名稱資料", properties={}))
+    await store.add_entity(Entity(id="x", type="Concept", name="新名稱資料", properties={}))
+    assert await store.search_entities("舊名稱", include_type_match=False) == []
+    assert [e.id for e in await store.search_entities("新名稱", include_type_match=False)] == ["x"]
+    await store.delete_entity("x")
+    assert await store.search_entities("新名稱", include_type_match=False) == []
+
+
+@pytest.mark.asyncio
+async def test_search_entities_short_query_falls_back_to_like(store):
+    await store.add_entity(Entity(id="e1", type="Concept", name="批價", properties={}))
+    assert [e.id for e in await store.search_entities("批", include_type_match=False)] == ["e1"]
+
+
+@pytest.mark.asyncio
+async def test_existing_database_is_migrated_on_initialize(tmp_path):
+    """先以無 FTS 的設定建立資料，再次初始化時自動建立並 rebuild 索引。"""
+    from app.config import settings
+
+    db_path = str(tmp_path / "legacy.db")
+    settings.GRAPH_FTS_ENABLED = False
+    try:
+        legacy = SQLiteGraphStore(db_path)
+        await legacy.initialize()
+        await legacy.add_entity(Entity(id="e1", type="Concept", name="掛號系統操作", properties={}))
+        await legacy.close()
+    finally:
+        settings.GRAPH_FTS_ENABLED = True
+
+    migrated = SQLiteGraphStore(db_path)
+    await migrated.initialize()
+    try:
+        assert [e.id for e in await migrated.search_entities("掛號系統", include_type_match=False)] == ["e1"]
+    finally:
+        await migrated.close()
+
+
+@pytest.mark.asyncio
+async def test_wal_read_pool_serves_concurrent_reads(store):
+    """WAL 模式下讀取走唯讀連線池，並行查詢皆能看到已提交資料。"""
+    import asyncio
+
+    async with store.conn.execute("PRAGMA journal_mode") as cursor:
+        assert (await cursor.fetchone())[0].lower() == "wal"
+    assert store.pool_stats()["size"] > 0
+
+    await store.add_entities_bulk([_entity(i) for i in range(20)])
+    results = await asyncio.gather(*(store.get_entity(f"e{i}") for i in range(20)))
+    assert [e.id for e in results] == [f"e{i}" for i in range(20)]
+    stats = store.pool_stats()
+    assert stats["acquires"] >= 20
+    assert stats["available"] == stats["size"]
+
+
+@pytest.mark.asyncio
+async def test_read_pool_counts_waits_only_when_exhausted(store):
+    """waited 只計入池已空、須等待歸還的取用；無競爭的依序讀取不計入"""
+    import asyncio
+    from contextlib import AsyncExitStack
+
+    await store.add_entity(_entity(1))
+    for _ in range(5):
+        assert await store.get_entity("e1")
+    assert store.pool_stats()["waited"] == 0
+
+    async with AsyncExitStack() as stack:
+        for _ in range(store.pool_stats()["size"]):
+            await stack.enter_async_context(store._reader())
+        pending = asyncio.ensure_future(store.get_entity("e1"))
+        await asyncio.sleep(0)
+        assert not pending.done()
+    # 連線歸還後取得（取得時池可能又是非空），仍計為一次等待
+    assert (await pending).id == "e1"
+    assert store.pool_stats()["waited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_path_recursive_cte_orders_by_hops(store):
+    await _seed_chain(store)
+    await store.add_relation(Relation(id="r02", source_id="e0", target_id="e2", type="SKIP", properties={}))
+    assert await store.get_path("e0", "e3", max_hops=3) == [["e0", "e2", "e3"], ["e0", "e1", "e2", "e3"]]
+    assert await store.get_path("e0", "e3", max_hops=2) == [["e0", "e2", "e3"]]
+    assert await store.get_path("e3", "e0") == []
+    assert await store.get_path("e1", "e1") == [["e1"]]
+
+
+@pytest.mark.asyncio
+async def test_traversal_caps_truncate_hub(store, caplog):
+    """熱點實體：節點 / 關係數超過上限時截斷並記錄警告。"""
+    from app.config import settings
+
+    await store.add_entities_bulk([_entity(i) for i in range(50)])
+    await store.add_relations_bulk([
+        Relation(id=f"h{i}", source_id="e0", target_id=f"e{i}", type="RELATED", properties={})
+        for i in range(1, 50)
+    ])
+    old_nodes, old_edges = settings.GRAPH_TRAVERSAL_MAX_NODES, settings.GRAPH_TRAVERSAL_MAX_EDGES
+    settings.GRAPH_TRAVERSAL_MAX_NODES, settings.GRAPH_TRAVERSAL_MAX_EDGES = 10, 20
+    try:
+        sub = await store.get_subgraph(["e0"], max_depth=2)
+    finally:
+        settings.GRAPH_TRAVERSAL_MAX_NODES, settings.GRAPH_TRAVERSAL_MAX_EDGES = old_nodes, old_edges
+    assert len(sub["entities"]) <= 10
+    assert len(sub["relations"]) == 20
+    assert "truncated" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_entity_rows_decode_lazily_and_round_trip(store):
+    original = Entity(id="qa1", type="QA", name="問題", properties={"answer": "答案" * 100})
+    await store.add_entity(original)
+    loaded = await store.get_entity("qa1")
+    assert loaded._raw_properties is not None  # 尚未解碼
+    assert loaded.name == "問題"
+    assert loaded.properties_json() == loaded._raw_properties
+    assert loaded.to_dict() == original.to_dict()
+    assert loaded == original
+    assert loaded._raw_properties is None  # 存取後已解碼並釋放原始字串
+
+    loaded.properties = {"answer": "新答案"}
+    await store.add_entity(loaded)
+    assert (await store.get_entity("qa1")).properties == {"answer": "新答案"}
+    assert not hasattr(loaded, "__dict__")
+
+
+@pytest.mark.asyncio
+async def test_get_entities_by_document_pages_in_insert_order(store):
+    await store.add_entity(Entity(id="docA", type="Document", name="A", properties={}))
+    await store.add_entities_bulk(
+        [Entity(id=f"docA_qa_{i}", type="QA", name=f"Q{i}", properties={}, document_id="docA") for i in (1, 2, 10, 3)]
+        + [Entity(id="docB_qa_1", type="QA", name="B", properties={"document_id": "docB"})]
+    )
+    page, cursor = await store.get_entities_by_document("docA", "QA", limit=3)
+    assert [e.id for e in page] == ["docA_qa_1", "docA_qa_2", "docA_qa_10"]
+    page, cursor = await store.get_entities_by_document("docA", "QA", limit=3, cursor=cursor)
+    assert [e.id for e in page] == ["docA_qa_3"] and cursor is None
+    assert [e.id for e in (await store.get_entities_by_document("docB"))[0]] == ["docB_qa_1"]
+
+
+@pytest.mark.asyncio
+async def test_document_id_column_is_backfilled_on_upgrade(tmp_path):
+    """舊版 schema（無 document_id）初始化時自動新增欄位並回填。"""
+    import sqlite3
+
+    db_path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE entities (id TEXT PRIMARY KEY, type TEXT NOT NULL, name TEXT NOT NULL, "
+        "properties TEXT NOT NULL, created_at TEXT NOT NULL, updated_at TEXT NOT NULL)"
+    )
+    now = "2026-01-01T00:00:00"
+    conn.executemany("INSERT INTO entities VALUES (?, ?, ?, ?, ?, ?)", [
+        ("doc_x_qa_1", "QA", "q1", "{}", now, now),
+        ("doc_x_qa_2", "QA", "q2", '{"document_id": "doc_y"}', now, now),
+        ("doc_x", "Document", "x", "{}", now, now),
+    ])
+    conn.commit()
+    conn.close()
+
+    upgraded = SQLiteGraphStore(db_path)
+    await upgraded.initialize()
+    try:
+        assert [e.id for e in (await upgraded.get_entities_by_document("doc_x", "QA"))[0]] == ["doc_x_qa_1"]
+        assert [e.id for e in (await upgraded.get_entities_by_document("doc_y"))[0]] == ["doc_x_qa_2"]
+        assert (await upgraded.get_entity("doc_x")).document_id is None
+        # graph_stats 首次建立時由既有資料計算
+        assert (await upgraded.get_statistics())["entity_types"] == {"QA": 2, "Document": 1}
+    finally:
+        await upgraded.close()
+
+
+@pytest.mark.asyncio
+async def test_iter_entities_and_relations_use_keyset_batches(store):
+    await store.add_entities_bulk([_entity(i, "QA" if i % 2 else "Concept") for i in range(11)])
+    await store.add_relations_bulk([
+        Relation(id=f"r{i:02d}", source_id=f"e{i}", target_id=f"e{i + 1}", type="NEXT" if i % 3 else "SKIP", properties={})
+        for i in range(10)
+    ])
+    all_ids = [e.id async for e in store.iter_entities(batch=3)]
+    assert all_ids == sorted(f"e{i}" for i in range(11))
+    qa_ids = [e.id async for e in store.iter_entities("QA", batch=2)]
+    assert qa_ids == sorted(f"e{i}" for i in range(1, 11, 2))
+    assert [r.id async for r in store.iter_relations("SKIP", batch=1)] == ["r00", "r03", "r06", "r09"]
+    assert len([r async for r in store.iter_relations(batch=4)]) == 10
+
+    memory = MemoryGraphStore()
+    await memory.add_entities_bulk([_entity(i, "QA" if i % 2 else "Concept") for i in range(11)])
+    assert [e.id async for e in memory.iter_entities("QA")] == qa_ids
+
+
+@pytest.mark.asyncio
+async def test_statistics_maintained_incrementally_and_recomputed(store):
+    await store.add_entities_bulk([_entity(i, "QA" if i % 2 else "Concept") for i in range(4)])
+    await store.add_relations_bulk([
+        Relation(id="r01", source_id="e0", target_id="e1", type="NEXT", properties={}),
+        Relation(id="r12", source_id="e1", target_id="e2", type="NEXT", properties={}),
+    ])
+    # 覆寫既有實體 / 關係並變更類型：計數移轉而非重複累加
+    await store.add_entity(_entity(0, "QA"))
+    await store.add_relation(Relation(id="r12", source_id="e1", target_id="e2", type="SKIP", properties={}))
+    await store.delete_relation("r01")
+    await store.delete_entity("e3")
+
+    expected = {
+        "total_entities": 3,
+        "total_relations": 1,
+        "entity_types": {"QA": 2, "Concept": 1},
+        "relation_types": {"SKIP": 1},
+    }
+    assert await store.get_statistics() == expected
+
+    await store.conn.execute("UPDATE graph_stats SET count = 99")
+    await store.conn.commit()
+    assert (await store.get_statistics())["total_entities"] != 3
+    assert await store.recompute_statistics() == expected
+
+
+def _qa(i: int, code=None) -> Entity:
+    return Entity(
+        id=f"qa{i}", type="QA", name=f"問題{i}",
+        properties={
+            "question": f"問題{i}", "answer": "答案" * 50, "code": code if code is not None else f"{i:02d}",
+            "document_id": "doc_a", "keywords": ["批價"],
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_schema_v2_promotes_hot_fields_and_cascades(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GRAPH_DB_SCHEMA_VERSION", SCHEMA_V2)
+    s = SQLiteGraphStore(str(tmp_path / "graph_v2.db"))
+    await s.initialize()
+    try:
+        assert s.schema_version == SCHEMA_V2
+        # code 非字串時不提升，留在 properties JSON
+        originals = [_qa(1), _qa(2, code=7), _entity(3)]
+        await s.add_entities_bulk(originals)
+        await s.add_relations_bulk([
+            Relation(id="r12", source_id="qa1", target_id="qa2", type="NEXT", properties={"w": 1}, weight=0.5),
+            Relation(id="r23", source_id="qa2", target_id="e3", type="SEE", properties={}),
+        ])
+
+        async with s.conn.execute(
+            "SELECT question, code, properties, typeof(created_at) FROM entity_store ORDER BY pk"
+        ) as cursor:
+            rows = [tuple(row) for row in await cursor.fetchall()]
+        assert rows[0][:2] == ("問題1", "01") and "answer" not in rows[0][2]
+        assert rows[1][1] is None and '"code": 7' in rows[1][2]
+        assert rows[2][:2] == (None, None) and {row[3] for row in rows} == {"integer"}
+
+        for original in originals:
+            assert (await s.get_entity(original.id)).to_dict() == original.to_dict()
+        assert (await s.get_entities_by_document("doc_a"))[0][0].properties["answer"] == "答案" * 50
+        relation = await s.get_relation("r12")
+        assert (relation.source_id, relation.type, relation.weight) == ("qa1", "NEXT", 0.5)
+        assert [e.id for e in await s.get_neighbors("qa2")] == ["e3", "qa1"]
+        assert [e.id for e in await s.get_neighbors("qa2", relation_type="SEE")] == ["e3"]
+
+        # 刪除實體由觸發器級聯刪除關係，統計同步
+        assert await s.delete_entity("qa2")
+        assert await s.get_relation("r12") is None and await s.get_relation("r23") is None
+        assert await s.get_statistics() == {
+            "total_entities": 2, "total_relations": 0,
+            "entity_types": {"QA": 1, "Concept": 1}, "relation_types": {},
+        }
+    finally:
+        await s.close()
+
+
+@pytest.mark.asyncio
+async def test_migrate_to_schema_v2_preserves_graph(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GRAPH_DB_SCHEMA_VERSION", SCHEMA_V1)
+    store = SQLiteGraphStore(str(tmp_path / "graph.db"))
+    await store.initialize()
+    try:
+        await _check_migration(store)
+    finally:
+        await store.close()
+
+
+async def _check_migration(store):
+    assert store.schema_version == SCHEMA_V1
+    await store.add_entities_bulk([_qa(1), _qa(2), _entity(3), _entity(4)])
+    await store.add_relations_bulk([
+        Relation(id="r12", source_id="qa1", target_id="qa2", type="NEXT", properties={"w": "一"}, weight=0.5),
+        Relation(id="r23", source_id="qa2", target_id="e3", type="SEE", properties={}),
+        Relation(id="r34", source_id="e3", target_id="e4", type="SEE", properties={}),
+    ])
+    # v1 不級聯刪除：留下端點已不存在的關係 r34
+    await store.delete_entity("e4")
+    entities = {e.id: e.to_dict() async for e in store.iter_entities()}
+    relations = {r.id: r.to_dict() async for r in store.iter_relations() if r.id != "r34"}
+    neighbors = [e.id for e in await store.get_neighbors("qa2")]
+
+    stages = []
+    counts = await store.migrate_to_schema_v2(
+        batch_size=2, progress=lambda stage, done, total: stages.append((stage, done, total))
+    )
+    assert counts == {"entities": 3, "relations": 2, "skipped_relations": 1}
+    assert stages[0] == ("entities", 2, 3) and stages[-1][0] == "relations"
+    assert store.schema_version == SCHEMA_V2
+    assert {e.id: e.to_dict() async for e in store.iter_entities()} == entities
+    assert {r.id: r.to_dict() async for r in store.iter_relations()} == relations
+    assert [e.id for e in await store.get_neighbors("qa2")] == neighbors
+    assert (await store.get_statistics())["relation_types"] == {"NEXT": 1, "SEE": 1}
+    assert [e.id for e in await store.search_entities("問題2")] == ["qa2"]
+
+    # 重新開啟時依 user_version 辨識為 v2，可繼續寫入
+    reopened = SQLiteGraphStore(store.db_path)
+    await reopened.initialize()
+    try:
+        assert reopened.schema_version == SCHEMA_V2
+        assert (await reopened.migrate_to_schema_v2())["entities"] == 0  # 已是 v2：不重複轉換
+        assert await reopened.add_relation(Relation(id="r13", source_id="qa1", target_id="e3", type="NEW", properties={}))
+        assert (await reopened.get_statistics())["total_relations"] == 3
+    finally:
+        await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_get_relations_by_entities_dedups_by_id(store):
+    memory = MemoryGraphStore()
+    relations = [
+        Relation(id="r01", source_id="e0", target_id="e1", type="NEXT", properties={}),
+        Relation(id="r12", source_id="e1", target_id="e2", type="NEXT", properties={}),
+        Relation(id="r20", source_id="e2", target_id="e0", type="BACK", properties={}),
+        Relation(id="r34", source_id="e3", target_id="e4", type="NEXT", properties={}),
+    ]
+    for s in (store, memory):
+        await s.add_entities_bulk([_entity(i) for i in range(5)])
+        await s.add_relations_bulk(relations)
+    # 重複寫入同一關係：Memory 的 entity_relations 會出現重複 id，結果仍只保留一筆
+    await memory.add_relation(relations[0])
+
+    for s in (store, memory):
+        both = await s.get_relations_by_entities(["e0", "e1", "e2"])
+        assert sorted(both) == ["r01", "r12", "r20"]
+        assert both["r12"].source_id == "e1"
+        assert sorted(await s.get_relations_by_entities(["e0", "e1"], "outgoing")) == ["r01", "r12"]
+        assert sorted(await s.get_relations_by_entities(["e0", "e1"], "incoming")) == ["r01", "r20"]
+        assert await s.get_relations_by_entities([]) == {}
+        assert await s.get_relations_by_entities(["e0"], "sideways") == {}
+    sub = await memory.get_subgraph(["e0"], max_depth=1)
+    assert sorted(r["id"] for r in sub["relations"]) == ["r01", "r12", "r20"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("schema_version", [SCHEMA_V1, SCHEMA_V2])
+async def test_readonly_mode_reads_baked_database_and_rejects_writes(tmp_path, monkeypatch, schema_version):
+    monkeypatch.setattr(settings, "GRAPH_DB_SCHEMA_VERSION", schema_version)
+    db_path = str(tmp_path / "graph.db")
+    builder = SQLiteGraphStore(db_path)
+    await builder.initialize()
+    await builder.add_entities_bulk([_entity(i) for i in range(5)])
+    await builder.add_relations_bulk([
+        Relation(id=f"r{i}", source_id=f"e{i}", target_id=f"e{i + 1}", type="NEXT", properties={}) for i in range(4)
+    ])
+    await builder.close()
+    files_before = sorted(os.listdir(tmp_path))
+    mtime_before = os.path.getmtime(db_path)
+
+    monkeypatch.setattr(settings, "GRAPH_DB_READONLY", True)
+    store = SQLiteGraphStore(db_path)
+    await store.initialize()
+    try:
+        assert store.readonly and store.schema_version == schema_version
+        assert store.pool_stats()["size"] == settings.GRAPH_DB_READ_POOL_SIZE
+        assert (await store.get_entity("e1")).name == "實體1"
+        assert sorted(e.id for e in await store.get_neighbors("e2")) == ["e1", "e3"]
+        assert [e.id for e in await store.search_entities("實體3")] == ["e3"]
+        assert (await store.get_statistics())["total_relations"] == 4
+
+        with pytest.raises(ReadOnlyStoreError):
+            await store.add_entity(_entity(9))
+        with pytest.raises(ReadOnlyStoreError):
+            await store.add_relations_bulk([])
+        with pytest.raises(ReadOnlyStoreError):
+            await store.delete_entity("e1")
+        with pytest.raises(ReadOnlyStoreError):
+            await store.recompute_statistics()
+    finally:
+        await store.close()
+    # 不建立 -wal / -shm，也不修改資料庫檔案
+    assert sorted(os.listdir(tmp_path)) == files_before
+    assert os.path.getmtime(db_path) == mtime_before
+
+
+@pytest.mark.asyncio
+async def test_readonly_mode_requires_existing_database(tmp_path):
+    store = SQLiteGraphStore(str(tmp_path / "missing.db"), readonly=True)
+    with pytest.raises(FileNotFoundError):
+        await store.initialize()
+    assert not (tmp_path / "missing.db").exists()
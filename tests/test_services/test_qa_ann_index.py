@@ -0,0 +1,70 @@
+"""
+QA 向量近似搜尋（IVF-flat）測試
+更新時間：2026-10-18 14:00
+作者：AI Assistant
+修改摘要：驗證分群訓練與候選列、掃描全部分群時與精確搜尋一致，以及分群保存後 upsert 的向量增量指派（不重新訓練）
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.config import settings
+from app.services.qa_ann_index import IVFFlatIndex
+from app.services.qa_embedding_index import QAEmbeddingIndex
+
+
+def _clustered(count: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """分群明顯的正規化向量（接近實際 embedding 的分佈）"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    vectors = centers[rng.integers(0, clusters, count)] + 0.3 * rng.standard_normal((count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_ivf_candidates_cover_nearest_neighbors():
+    matrix = _clustered(2000, 32, 20)
+    ann = IVFFlatIndex.train(matrix, nlist=20)
+    assert ann.nlist == 20 and ann.labels.shape == (2000,)
+    assert sorted(ann.candidates(matrix[0], nprobe=20).tolist()) == list(range(2000))
+
+    hits = 0
+    for query in matrix[:50]:
+        exact = set(np.argsort(-(matrix @ query))[:10].tolist())
+        candidates = set(ann.candidates(query, nprobe=3).tolist())
+        hits += len(exact & candidates)
+        assert len(candidates) < 2000
+    assert hits / 500 >= 0.9
+
+
+def test_index_persists_clusters_and_assigns_upserts(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "QA_ANN_MIN_VECTORS", 100)
+    monkeypatch.setattr(settings, "QA_ANN_NLIST", 16)
+    matrix = _clustered(400, 24, 8, seed=1)
+    db_path = str(tmp_path / "qa_vectors.db")
+    ann_path = tmp_path / "qa_vectors.ivf.npz"
+
+    index = QAEmbeddingIndex(db_path, readonly=False, ann=True)
+    try:
+        for i, vector in enumerate(matrix):
+            index.upsert(f"qa{i:03d}", "問答", vector.tolist(), {"n": i})
+        assert not ann_path.exists()
+        for query in matrix[:20]:
+            # 掃描全部分群即精確搜尋
+            assert index.search(query.tolist(), top_k=5, nprobe=16) == index.search(query.tolist(), top_k=5, nprobe=0)
+        assert ann_path.exists()
+        centroids = index._load_all().ann.centroids.copy()
+
+        # upsert 的新向量（與 qa000 幾乎相同）於下次載入時指派到既有分群
+        index.upsert("qa_new", "新增", (matrix[0] + 0.01).tolist(), {"n": -1})
+    finally:
+        index.close()
+
+    reopened = QAEmbeddingIndex(db_path, readonly=True, ann=True, ann_path=str(ann_path))
+    try:
+        hits = reopened.search(matrix[0].tolist(), top_k=2, nprobe=2)
+        assert {entity_id for entity_id, _, _ in hits} == {"qa000", "qa_new"}
+        ann = reopened._load_all().ann
+        assert np.array_equal(ann.centroids, centroids) and ann.trained_rows == 400
+        assert reopened.search(matrix[0].tolist(), top_k=3, min_score=0.999, nprobe=2)[0][0] == "qa000"
+    finally:
+        reopened.close()
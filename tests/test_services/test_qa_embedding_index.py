@@ -0,0 +1,277 @@
+"""
+QAEmbeddingIndex 測試
+更新時間：2026-10-18 17:20
+作者：AI Assistant
+修改摘要：驗證匯出後由另一個實例重新 embedding 既有 id（列數不變）或直接以 SQL 更新時，匯出檔視為過期並改由資料庫載入
+更新時間：2026-10-18 15:10
+作者：AI Assistant
+修改摘要：驗證 search_many 各查詢的結果與逐筆 search 相同（含分段計算、維度不符、零向量與空查詢）
+更新時間：2026-10-18 12:50
+作者：AI Assistant
+修改摘要：驗證向量匯出為 .npy 後以 mmap 開啟的搜尋結果與資料庫一致，匯出後資料庫有寫入時改由資料庫載入
+更新時間：2026-10-18 11:40
+作者：AI Assistant
+修改摘要：驗證新建資料庫以 float32 BLOB 儲存、v1（JSON）資料庫可讀寫並可就地轉換（搜尋結果不變、VACUUM 後檔案縮小）
+更新時間：2026-10-18 10:30
+作者：AI Assistant
+修改摘要：驗證矩陣 top-k 搜尋與原本逐筆 cosine + 排序的結果一致（min_score、同分順序、零向量與維度不符）
+更新時間：2026-10-18 08:10
+作者：AI Assistant
+修改摘要：驗證唯讀模式讀取建置時產生的向量資料庫、拒絕寫入，資料庫不存在時視為空索引且不建立檔案
+"""
+import json
+import math
+import random
+import sqlite3
+
+import pytest
+
+from app.core.exceptions import ReadOnlyStoreError
+from app.services import qa_embedding_index
+from app.services.qa_embedding_index import STORAGE_BLOB, STORAGE_JSON, QAEmbeddingIndex
+
+
+def _create_json_database(db_path: str, rows) -> None:
+    """v1 格式：embedding 為 JSON 文字"""
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE qa_vectors (entity_id TEXT PRIMARY KEY, text TEXT NOT NULL, embedding TEXT NOT NULL, metadata TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO qa_vectors VALUES (?, ?, ?, ?)",
+        [(entity_id, entity_id, json.dumps(emb), json.dumps({"id": entity_id})) for entity_id, emb in rows],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _reference_search(vectors, query, top_k, min_score):
+    """原本的實作：逐筆 cosine、過濾後穩定排序取前 top_k"""
+    def cosine(a, b):
+        if not a or not b or len(a) != len(b):
+            return 0.0
+        na = math.sqrt(sum(x * x for x in a))
+        nb = math.sqrt(sum(y * y for y in b))
+        if na == 0.0 or nb == 0.0:
+            return 0.0
+        return sum(x * y for x, y in zip(a, b)) / (na * nb)
+
+    threshold = max(0.0, min_score)
+    scored = [(entity_id, cosine(query, emb)) for entity_id, emb in vectors]
+    scored = [item for item in scored if item[1] >= threshold]
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:top_k]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_search_matches_reference_cosine_ranking(tmp_path, monkeypatch, use_numpy):
+    monkeypatch.setattr(qa_embedding_index, "NUMPY_AVAILABLE", use_numpy and qa_embedding_index.NUMPY_AVAILABLE)
+    rng = random.Random(7)
+    vectors = [(f"qa{i:03d}", [rng.gauss(0, 1) for _ in range(4)]) for i in range(120)]
+    # 同分：相同向量（依載入順序）；零向量與維度不符者分數為 0.0，min_score <= 0 時仍回傳
+    vectors += [(f"dup{i}", list(vectors[i][1])) for i in range(5)]
+    vectors += [("zero", [0.0] * 4), ("short", [1.0, 0.0]), ("axis_a", [1.0, 0.0, 0.0, 0.0]), ("axis_b", [1.0, 0.0, 0.0, 0.0])]
+    index = QAEmbeddingIndex(str(tmp_path / "qa_vectors.db"), readonly=False)
+    try:
+        for entity_id, emb in vectors:
+            index.upsert(entity_id, entity_id, emb, {"id": entity_id})
+        for query in ([1.0, 0.0, 0.0, 0.0], vectors[2][1], [0.0, 0.0, 0.0, 0.0], [1.0, 0.0]):
+            for top_k in (1, 3, 6, 200):
+                for min_score in (-1.0, 0.0, 0.5, 0.99):
+                    hits = index.search(query, top_k=top_k, min_score=min_score)
+                    expected = _reference_search(vectors, query, top_k, min_score)
+                    assert [entity_id for entity_id, _, _ in hits] == [entity_id for entity_id, _ in expected]
+                    assert [score for _, score, _ in hits] == pytest.approx([score for _, score in expected], abs=1e-6)
+                    assert all(meta["id"] == entity_id for entity_id, _, meta in hits)
+    finally:
+        index.close()
+
+
+def test_readonly_index_searches_baked_database_and_rejects_upsert(tmp_path):
+    db_path = str(tmp_path / "qa_vectors.db")
+    builder = QAEmbeddingIndex(db_path, readonly=False)
+    builder.upsert("qa1", "批價", [1.0, 0.0], {"question": "批價"})
+    builder.upsert("qa2", "掛號", [0.0, 1.0], {"question": "掛號"})
+    builder.close()
+
+    index = QAEmbeddingIndex(db_path, readonly=True)
+    try:
+        hits = index.search([0.9, 0.1], top_k=1)
+        assert [(entity_id, meta["question"]) for entity_id, _, meta in hits] == [("qa1", "批價")]
+        with pytest.raises(ReadOnlyStoreError):
+            index.upsert("qa3", "退費", [1.0, 1.0], {})
+    finally:
+        index.close()
+
+
+def test_readonly_index_without_database_is_empty(tmp_path):
+    db_path = tmp_path / "missing.db"
+    index = QAEmbeddingIndex(str(db_path), readonly=True)
+    assert index.search([1.0, 0.0]) == []
+    assert not db_path.exists()
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_new_database_stores_float32_blobs(tmp_path, monkeypatch, use_numpy):
+    monkeypatch.setattr(qa_embedding_index, "NUMPY_AVAILABLE", use_numpy and qa_embedding_index.NUMPY_AVAILABLE)
+    db_path = str(tmp_path / "qa_vectors.db")
+    index = QAEmbeddingIndex(db_path, readonly=False)
+    try:
+        assert index.storage_version == STORAGE_BLOB
+        index.upsert("qa1", "批價", [0.5, -0.25, 1.0], {"question": "批價"}, model="text-embedding-004")
+        index.upsert("qa2", "掛號", [0.0, 1.0, 0.0], {"question": "掛號"})
+        row = index._conn.execute("SELECT embedding, dim, model FROM qa_vectors WHERE entity_id = 'qa1'").fetchone()
+        assert row == (qa_embedding_index.encode_embedding([0.5, -0.25, 1.0]), 3, "text-embedding-004")
+        assert len(row[0]) == 12 and qa_embedding_index.decode_embedding(row[0]) == [0.5, -0.25, 1.0]
+        hits = index.search([0.5, -0.25, 1.0], top_k=2)
+        assert [entity_id for entity_id, _, _ in hits] == ["qa1"]
+        assert hits[0][1] == pytest.approx(1.0, abs=1e-6) and hits[0][2] == {"question": "批價"}
+    finally:
+        index.close()
+
+
+def test_json_database_migrates_to_blob_storage(tmp_path):
+    rng = random.Random(3)
+    rows = [(f"qa{i:03d}", [rng.gauss(0, 1) for _ in range(64)]) for i in range(200)]
+    db_path = str(tmp_path / "qa_vectors.db")
+    _create_json_database(db_path, rows)
+    query = rows[0][1]
+
+    # v1 資料庫：唯讀與可寫模式都能讀取，寫入仍為 JSON
+    readonly = QAEmbeddingIndex(db_path, readonly=True)
+    expected = readonly.search(query, top_k=10)
+    assert readonly.storage_version == STORAGE_JSON and expected[0][0] == "qa000"
+    readonly.close()
+
+    index = QAEmbeddingIndex(db_path, readonly=False)
+    try:
+        assert index.storage_version == STORAGE_JSON
+        index.upsert("bad", "壞資料", [1.0] * 64, {})
+        index._conn.execute("UPDATE qa_vectors SET embedding = 'not json' WHERE entity_id = 'bad'")
+        index._conn.commit()
+        assert index.search(query, top_k=10) == expected
+
+        progress = []
+        counts = index.migrate_to_blob_storage(batch_size=64, model="stub", progress=lambda done, total: progress.append((done, total)))
+        assert counts == {"rows": 200, "skipped": 1}
+        assert progress[-1] == (201, 201)
+        assert index.storage_version == STORAGE_BLOB
+        assert index._conn.execute("SELECT COUNT(*), MIN(typeof(embedding)), MIN(model) FROM qa_vectors").fetchone() == (200, "blob", "stub")
+        assert [(e, pytest.approx(s, abs=1e-6)) for e, s, _ in index.search(query, top_k=10)] == [(e, s) for e, s, _ in expected]
+        assert index.migrate_to_blob_storage() == {"rows": 0, "skipped": 0}
+    finally:
+        index.close()
+
+    size_before = (tmp_path / "qa_vectors.db").stat().st_size
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("VACUUM")
+    assert (tmp_path / "qa_vectors.db").stat().st_size * 2.5 < size_before
+
+
+def test_exported_vectors_open_memory_mapped(tmp_path):
+    np = pytest.importorskip("numpy")
+    rng = random.Random(5)
+    db_path = str(tmp_path / "qa_vectors.db")
+    vectors_path = str(tmp_path / "export" / "qa_vectors.npy")
+    builder = QAEmbeddingIndex(db_path, readonly=False)
+    for i in range(50):
+        builder.upsert(f"qa{i:02d}", "問答", [rng.gauss(0, 1) for _ in range(16)], {"n": i})
+    builder.upsert("short", "維度不符", [1.0, 0.0], {})
+    query = [rng.gauss(0, 1) for _ in range(16)]
+    expected = builder.search(query, top_k=5)
+    assert builder.export_vectors(vectors_path) == {"rows": 50, "dim": 16, "omitted": 1}
+    builder.close()
+
+    index = QAEmbeddingIndex(db_path, readonly=True, vectors_path=vectors_path)
+    try:
+        hits = index.search(query, top_k=5)
+        assert [(e, m) for e, _, m in hits] == [(e, m) for e, _, m in expected]
+        assert [s for _, s, _ in hits] == pytest.approx([s for _, s, _ in expected], abs=1e-6)
+        matrix = index._load_all().groups[16][1]
+        assert isinstance(matrix, np.memmap) and not matrix.flags.writeable
+    finally:
+        index.close()
+
+    # 匯出後資料庫有新增：筆數不符，改由資料庫載入
+    writer = QAEmbeddingIndex(db_path, readonly=False)
+    writer.upsert("qa_new", "新增", list(query), {"n": -1})
+    writer.close()
+    stale = QAEmbeddingIndex(db_path, readonly=True, vectors_path=vectors_path)
+    try:
+        assert stale.search(query, top_k=1)[0][0] == "qa_new"
+        assert not isinstance(stale._load_all().groups[16][1], np.memmap)
+    finally:
+        stale.close()
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_search_many_matches_single_searches(tmp_path, monkeypatch, use_numpy):
+    monkeypatch.setattr(qa_embedding_index, "NUMPY_AVAILABLE", use_numpy and qa_embedding_index.NUMPY_AVAILABLE)
+    # 每段只計算 2 個查詢，驗證分段結果
+    monkeypatch.setattr(qa_embedding_index, "SEARCH_MANY_BLOCK_SCORES", 2 * 64)
+    rng = random.Random(11)
+    index = QAEmbeddingIndex(str(tmp_path / "qa_vectors.db"), readonly=False)
+    try:
+        for i in range(60):
+            index.upsert(f"qa{i:02d}", "問答", [rng.gauss(0, 1) for _ in range(8)], {"n": i})
+        for i in range(4):
+            index.upsert(f"short{i}", "維度不符", [rng.gauss(0, 1) for _ in range(3)], {"n": -i})
+        queries = [[rng.gauss(0, 1) for _ in range(8)] for _ in range(7)]
+        queries += [[0.0] * 8, [], [1.0, 0.5, 0.0], [1.0] * 5]
+        assert index.search_many([], top_k=3) == []
+        assert index.search_many(queries, top_k=0) == [[] for _ in queries]
+        for top_k, min_score in ((1, 0.0), (5, 0.3), (100, -1.0)):
+            batch = index.search_many(queries, top_k=top_k, min_score=min_score)
+            assert len(batch) == len(queries)
+            for query, hits in zip(queries, batch):
+                expected = index.search(query, top_k=top_k, min_score=min_score)
+                assert [(e, m) for e, _, m in hits] == [(e, m) for e, _, m in expected]
+                assert [s for _, s, _ in hits] == pytest.approx([s for _, s, _ in expected], abs=1e-6)
+    finally:
+        index.close()
+
+
+def test_exported_vectors_stale_after_reembedding_existing_id(tmp_path):
+    np = pytest.importorskip("numpy")
+    rng = random.Random(9)
+    db_path = str(tmp_path / "qa_vectors.db")
+    vectors_path = str(tmp_path / "qa_vectors.npy")
+    builder = QAEmbeddingIndex(db_path, readonly=False)
+    for i in range(10):
+        builder.upsert(f"id{i}", "問答", [rng.gauss(0, 1) for _ in range(8)], {"n": i})
+    builder.export_vectors(vectors_path)
+    builder.close()
+
+    fresh = QAEmbeddingIndex(db_path, readonly=True, vectors_path=vectors_path)
+    assert isinstance(fresh._load_all().groups[8][1], np.memmap)
+    fresh.close()
+
+    # 另一個實例重新 embedding 既有 id：列數與最大 rowid 不變，寫入序號改變
+    query = [rng.gauss(0, 1) for _ in range(8)]
+    writer = QAEmbeddingIndex(db_path, readonly=False)
+    writer.upsert("id5", "問答", list(query), {"n": 5})
+    writer.close()
+    for readonly in (True, False):
+        index = QAEmbeddingIndex(db_path, readonly=readonly, vectors_path=vectors_path)
+        try:
+            hits = index.search(query, top_k=1)
+            assert hits[0][0] == "id5" and hits[0][1] == pytest.approx(1.0, abs=1e-5)
+            assert not isinstance(index._load_all().groups[8][1], np.memmap)
+        finally:
+            index.close()
+
+    # 重新匯出後恢復 mmap；直接以 SQL 更新同樣視為過期
+    exporter = QAEmbeddingIndex(db_path, readonly=True)
+    exporter.export_vectors(vectors_path)
+    exporter.close()
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE qa_vectors SET metadata = ? WHERE entity_id = 'id1'", (json.dumps({"n": -1}),))
+    conn.commit()
+    conn.close()
+    index = QAEmbeddingIndex(db_path, readonly=True, vectors_path=vectors_path)
+    try:
+        loaded = index._load_all()
+        assert loaded.metadata[loaded.ids.index("id1")] == {"n": -1}
+        assert not isinstance(loaded.groups[8][1], np.memmap)
+    finally:
+        index.close()
@@ -2,6 +2,12 @@
 VectorService IC QA guard 測試：
 當 query 不具備「IC 上下文 + 明確代碼」時，應避免 QA embedding 命中 IC error/field QA 造成誤匹配。
 
+更新時間：2026-10-18 20:20
+作者：AI Assistant
+修改摘要：驗證 search_batch 的 embedding 回傳筆數不符時記錄警告並改走逐筆 QA 檢索
+更新時間：2026-10-18 15:10
+作者：AI Assistant
+修改摘要：驗證 search_batch 只呼叫一次 embedding 與 search_many，結果（含 IC 守衛與 alias 正規化）與逐筆 search 相同
 更新時間：2026-04-23 16:45
 作者：AI Assistant
 修改摘要：擴充 IC code 裸碼規則支援 AA/AB/AC/AD 群組碼，並補測試覆蓋
@@ -129,3 +135,73 @@ async def test_ic_bare_code_supports_letter_group_code_AA(monkeypatch):
         assert r and r[0]["id"] == "doc_thisqa_ic_error_qa_AA"
         assert "欄位資料必填寫" in (r[0].get("content") or "")
 
+
+
+@pytest.mark.asyncio
+async def test_search_batch_embeds_once_and_matches_single_search(monkeypatch):
+    """
+    search_batch：一次 embedding + 一次 search_many，各查詢結果與逐筆 search 相同（IC 守衛、alias 正規化照常套用）。
+    """
+    svc = VectorService(graph_store=_FakeGraphStore())
+    embed_calls = []
+
+    class _CountingEmbedding(_FakeEmbedding):
+        async def embed(self, texts):
+            embed_calls.append(list(texts))
+            return await super().embed(texts)
+
+    hits_by_call = iter(
+        [
+            [("doc_thisqa_ic_error_qa_16", 0.74, {})],
+            [("doc_thisqa_ic_error_qa_16", 0.74, {})],
+            [("doc_thisqa_ic_error_qa_01", 0.80, {})],
+        ]
+    )
+    monkeypatch.setattr(svc, "_embedding", _CountingEmbedding())
+    monkeypatch.setattr(svc._qa_index, "search", lambda query_emb, top_k, min_score: next(hits_by_call))
+    queries = ["無法成功讀卡,出現多筆處方箋寫入作業-回傳簽章", "IC卡 [16] 代表什麼？", "IC錯誤01"]
+    expected = [await svc.search(q, top_k=3) for q in queries]
+
+    embed_calls.clear()
+    batch_calls = []
+
+    def _search_many(query_embs, top_k, min_score):
+        batch_calls.append(len(query_embs))
+        return [
+            [("doc_thisqa_ic_error_qa_16", 0.74, {})],
+            [("doc_thisqa_ic_error_qa_16", 0.74, {})],
+            [("doc_thisqa_ic_error_qa_01", 0.80, {})],
+        ]
+
+    monkeypatch.setattr(svc._qa_index, "search_many", _search_many)
+    results = await svc.search_batch(queries, top_k=3)
+    assert embed_calls == [["無法成功讀卡,出現多筆處方箋寫入作業-回傳簽章", "IC卡 [16] 代表什麼？", "IC卡 [01]"]]
+    assert batch_calls == [3]
+    assert results == expected
+    assert results[1][0]["id"] == "doc_thisqa_ic_error_qa_16"
+    assert all(r["id"] != "doc_thisqa_ic_error_qa_16" for r in results[0])
+
+
+@pytest.mark.asyncio
+async def test_search_batch_falls_back_per_query_on_embedding_count_mismatch(monkeypatch, caplog):
+    """
+    search_batch：批次 embedding 回傳的向量數與查詢數不符時記錄警告，各查詢改走逐筆 QA embedding 檢索（不靜默略過 QA）。
+    """
+    svc = VectorService(graph_store=_FakeGraphStore())
+
+    class _TruncatingEmbedding(_FakeEmbedding):
+        async def embed(self, texts):
+            embs = await super().embed(texts)
+            return embs[:1] if len(texts) > 1 else embs
+
+    monkeypatch.setattr(svc, "_embedding", _TruncatingEmbedding())
+    monkeypatch.setattr(svc._qa_index, "search", lambda query_emb, top_k, min_score: [("doc_thisqa_ic_error_qa_01", 0.80, {})])
+    monkeypatch.setattr(svc._qa_index, "search_many", lambda *args, **kwargs: pytest.fail("search_many should not be called"))
+    queries = ["IC錯誤01", "IC 01"]
+    expected = [await svc.search(q, top_k=3) for q in queries]
+
+    with caplog.at_level("WARNING"):
+        results = await svc.search_batch(queries, top_k=3)
+    assert results == expected
+    assert all(r and r[0]["id"] == "doc_thisqa_ic_error_qa_01" for r in results)
+    assert "fallback to per-query QA search" in caplog.text